@@ -5,6 +5,7 @@ This package contains database-related utilities and repository pattern implemen
 
 Modules:
 - supabase_client.py: Supabase client setup and connection management
+- postgres.py: Optional asyncpg pool backend for hot-path RPC functions
 - queries.py: Query history repository (CRUD operations)
 - ratings.py: Ratings repository (CRUD operations)
 - legal_acts.py: Legal acts repository (CRUD, search, relations)
@@ -15,12 +16,15 @@ from backend.db.supabase_client import (
     get_supabase,
     check_database_health
 )
+from backend.db.postgres import PostgresPool, execute_rpc
 from backend.db import queries, ratings, legal_acts
 
 __all__ = [
     "SupabaseClient",
     "get_supabase",
     "check_database_health",
+    "PostgresPool",
+    "execute_rpc",
     "queries",
     "ratings",
     "legal_acts"
@@ -2,22 +2,37 @@
 PrawnikGPT Backend - Legal Acts Repository
 
 Database operations for legal acts:
-- List legal acts with filters and pagination
-- Get legal act details by ID
+- List legal acts with filters and pagination (offset or keyset cursor)
+- Get legal act details by ID (with materialized statistics)
 - Get legal act relations (graph traversal)
-- Full-text search in act titles
+- Ranked title search (Polish full-text search, trigram fallback)
 
 All queries are optimized for performance with proper indexes.
 """
 
+import asyncio
 import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from backend.config import settings
 from backend.db.supabase_client import get_supabase
+from backend.db.postgres import execute_rpc
+from backend.db.pagination import (
+    decode_cursor,
+    encode_cursor,
+    postgrest_count,
+    postgrest_quote
+)
 
 logger = logging.getLogger(__name__)
 
+# Columns returned by list endpoints
+LEGAL_ACT_LIST_COLUMNS = (
+    "id, title, typ_aktu, publisher, year, position, "
+    "status, organ_wydajacy, published_date, effective_date, created_at"
+)
+
 
 # =========================================================================
 # List Legal Acts (with filters and pagination)
@@ -31,11 +46,15 @@ async def list_legal_acts(
     publisher: Optional[str] = None,
     year: Optional[int] = None,
     order_by: str = "published_date",
-    order: str = "desc"
-) -> tuple[List[Dict[str, Any]], int]:
+    order: str = "desc",
+    count: str = "exact"
+) -> tuple[List[Dict[str, Any]], Optional[int]]:
     """
     List legal acts with filters and pagination.
     
+    With search, results come from search_legal_acts_ranked() and are
+    ordered by relevance (order_by/order do not apply).
+    
     Args:
         page: Page number (1-indexed)
         per_page: Items per page (max 100)
@@ -45,28 +64,42 @@ async def list_legal_acts(
         year: Filter by publication year (optional)
         order_by: Sort field (published_date or title)
         order: Sort direction (desc or asc)
+        count: Total count mode (exact, estimated or none)
         
     Returns:
-        Tuple of (list of acts, total count)
+        Tuple of (list of acts, total count or None if count="none")
         
     Raises:
         Exception: If database query fails
     """
     try:
         supabase = get_supabase()
+        count_method = postgrest_count(count)
+        
+        if search:
+            # Ranked title search (FTS + trigram fallback), ordered by relevance
+            acts, total_count = await search_legal_acts_ranked(
+                search,
+                limit=per_page,
+                offset=(page - 1) * per_page,
+                status=status,
+                publisher=publisher,
+                year=year
+            )
+            logger.info(
+                f"Listed {len(acts)} legal acts (page {page}, total {total_count}) "
+                f"with filters: search={search}, status={status}, "
+                f"publisher={publisher}, year={year}"
+            )
+            return acts, (total_count if count_method else None)
         
         # Build query
         query = supabase.table("legal_acts").select(
-            "id, title, typ_aktu, publisher, year, position, "
-            "status, organ_wydajacy, published_date, effective_date, created_at",
-            count="exact"
+            LEGAL_ACT_LIST_COLUMNS,
+            count=count_method
         )
         
         # Apply filters
-        if search:
-            # Use RPC for efficient full-text search
-            query = query.rpc("search_legal_acts", {"p_search_query": search})
-        
         if status:
             query = query.eq("status", status)
         
@@ -85,10 +118,10 @@ async def list_legal_acts(
         query = query.range(offset, offset + per_page - 1)
         
         # Execute query
-        response = query.execute()
+        response = await query.execute()
         
         acts = response.data or []
-        total_count = response.count or 0
+        total_count = (response.count or 0) if count_method else None
         
         logger.info(
             f"Listed {len(acts)} legal acts (page {page}, total {total_count}) "
@@ -103,6 +136,126 @@ async def list_legal_acts(
         raise
 
 
+async def list_legal_acts_after(
+    cursor: Optional[str] = None,
+    per_page: int = 20,
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    publisher: Optional[str] = None,
+    year: Optional[int] = None,
+    order_by: str = "published_date",
+    order: str = "desc",
+    count: str = "none"
+) -> tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+    """
+    List legal acts with keyset (cursor) pagination.
+    
+    Rows are ordered by (order_by, id); each page starts strictly after
+    the cursor row, so deep pages cost the same as the first one.
+    With search, pages follow the relevance ranking of
+    search_legal_acts_ranked() (the cursor holds the match offset).
+    
+    Args:
+        cursor: next_cursor of the previous page (None = first page)
+        per_page: Items per page (max 100)
+        search: Search query for title (optional)
+        status: Filter by status (optional)
+        publisher: Filter by publisher (optional)
+        year: Filter by publication year (optional)
+        order_by: Sort field (published_date or title)
+        order: Sort direction (desc or asc)
+        count: Total count mode (exact, estimated or none)
+        
+    Returns:
+        Tuple of (list of acts, total count or None, next cursor or None)
+        
+    Raises:
+        ValueError: If cursor is invalid
+        Exception: If database query fails
+    """
+    count_method = postgrest_count(count)
+    
+    if search:
+        offset = decode_cursor(cursor, "relevance", order)[0] if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("Invalid cursor")
+        
+        acts, total_count = await search_legal_acts_ranked(
+            search,
+            limit=per_page,
+            offset=offset,
+            status=status,
+            publisher=publisher,
+            year=year
+        )
+        next_cursor = None
+        if acts and offset + len(acts) < total_count:
+            next_cursor = encode_cursor("relevance", order, offset + len(acts), acts[-1]["id"])
+        return acts, (total_count if count_method else None), next_cursor
+    
+    after = decode_cursor(cursor, order_by, order) if cursor else None
+    
+    try:
+        supabase = get_supabase()
+        
+        def filtered(query):
+            if status:
+                query = query.eq("status", status)
+            if publisher:
+                query = query.eq("publisher", publisher)
+            if year:
+                query = query.eq("year", year)
+            return query
+        
+        query = filtered(supabase.table("legal_acts").select(LEGAL_ACT_LIST_COLUMNS))
+        
+        if after is not None:
+            value, row_id = after
+            op = "lt" if order == "desc" else "gt"
+            query = query.or_(
+                f"{order_by}.{op}.{postgrest_quote(value)},"
+                f"and({order_by}.eq.{postgrest_quote(value)},id.{op}.{postgrest_quote(row_id)})"
+            )
+        
+        # Fetch one extra row to know whether a next page exists
+        descending = order == "desc"
+        query = query.order(order_by, desc=descending).order("id", desc=descending)
+        query = query.limit(per_page + 1)
+        
+        if count_method:
+            # Count over the filtered set without the cursor condition
+            count_query = filtered(
+                supabase.table("legal_acts").select("id", count=count_method, head=True)
+            )
+            response, count_response = await asyncio.gather(
+                query.execute(),
+                count_query.execute()
+            )
+            total_count = count_response.count or 0
+        else:
+            response = await query.execute()
+            total_count = None
+        
+        rows = response.data or []
+        acts = rows[:per_page]
+        next_cursor = None
+        if len(rows) > per_page:
+            last = acts[-1]
+            next_cursor = encode_cursor(order_by, order, last[order_by], last["id"])
+        
+        logger.info(
+            f"Listed {len(acts)} legal acts (cursor={'yes' if cursor else 'no'}, "
+            f"total {total_count}) with filters: search={search}, status={status}, "
+            f"publisher={publisher}, year={year}"
+        )
+        
+        return acts, total_count, next_cursor
+        
+    except Exception as e:
+        logger.error(f"Failed to list legal acts (cursor): {e}", exc_info=True)
+        raise
+
+
 # =========================================================================
 # Get Legal Act by ID
 # =========================================================================
@@ -123,11 +276,12 @@ async def get_legal_act_by_id(act_id: str) -> Optional[Dict[str, Any]]:
     try:
         supabase = get_supabase()
         
-        # Query act with related data
-        response = supabase.table("legal_acts").select(
+        # Query act with materialized statistics (legal_act_stats, trigger-maintained)
+        response = await supabase.table("legal_acts").select(
             "id, title, typ_aktu, publisher, year, position, "
             "status, organ_wydajacy, published_date, effective_date, "
-            "updated_at, created_at"
+            "updated_at, created_at, "
+            "legal_act_stats(total_chunks, related_acts_count)"
         ).eq("id", act_id).single().execute()
         
         act = response.data
@@ -136,26 +290,18 @@ async def get_legal_act_by_id(act_id: str) -> Optional[Dict[str, Any]]:
             logger.warning(f"Legal act not found: {act_id}")
             return None
         
-        # Get statistics (chunks count)
-        chunks_response = supabase.table("legal_act_chunks")\
-            .select("id", count="exact")\
-            .eq("legal_act_id", act_id)\
-            .execute()
-        
-        total_chunks = chunks_response.count or 0
-        
-        # Get related acts count
-        relations_response = supabase.table("legal_act_relations")\
-            .select("id", count="exact")\
-            .or_(f"source_act_id.eq.{act_id},target_act_id.eq.{act_id}")\
-            .execute()
+        stats = act.pop("legal_act_stats", None)
+        if isinstance(stats, list):
+            stats = stats[0] if stats else None
         
-        related_acts_count = relations_response.count or 0
+        if stats is None:
+            # Stats row missing (legal_act_stats migration not applied yet)
+            stats = await _count_legal_act_stats(supabase, act_id)
         
         # Add statistics to response
         act["stats"] = {
-            "total_chunks": total_chunks,
-            "related_acts_count": related_acts_count
+            "total_chunks": stats.get("total_chunks") or 0,
+            "related_acts_count": stats.get("related_acts_count") or 0
         }
         
         logger.info(f"Retrieved legal act {act_id}: {act.get('title', 'N/A')}")
@@ -167,6 +313,83 @@ async def get_legal_act_by_id(act_id: str) -> Optional[Dict[str, Any]]:
         raise
 
 
+async def _count_legal_act_stats(supabase, act_id: str) -> Dict[str, int]:
+    """
+    Count chunks and relations of an act (fallback when stats row is missing).
+    
+    Args:
+        supabase: Async Supabase client
+        act_id: Legal act ID (UUID)
+        
+    Returns:
+        Dict with 'total_chunks' and 'related_acts_count'
+    """
+    logger.warning(f"No legal_act_stats row for act {act_id}, counting directly")
+    
+    chunks_response, relations_response = await asyncio.gather(
+        supabase.table("legal_act_chunks")
+            .select("id", count="exact")
+            .eq("legal_act_id", act_id)
+            .execute(),
+        supabase.table("legal_act_relations")
+            .select("id", count="exact")
+            .or_(f"source_act_id.eq.{act_id},target_act_id.eq.{act_id}")
+            .execute()
+    )
+    
+    return {
+        "total_chunks": chunks_response.count or 0,
+        "related_acts_count": relations_response.count or 0
+    }
+
+
+# =========================================================================
+# Legal Act Statistics Refresh
+# =========================================================================
+
+async def refresh_legal_act_stats() -> int:
+    """
+    Recompute materialized per-act statistics (legal_act_stats).
+    
+    Counters are maintained by triggers; the refresh repairs drift
+    (e.g., rows loaded with triggers disabled).
+    
+    Returns:
+        int: Number of acts whose counters were created or corrected
+        
+    Raises:
+        Exception: If database call fails
+    """
+    supabase = get_supabase()
+    rows = await execute_rpc(supabase, "refresh_legal_act_stats", {}) or []
+    updated = rows[0]["updated_acts"] if rows else 0
+    
+    if updated:
+        logger.warning(f"Legal act stats refresh corrected {updated} acts")
+    else:
+        logger.info("Legal act stats refresh: counters up to date")
+    
+    return updated
+
+
+async def periodic_legal_act_stats_refresh(interval_seconds: int = 86400):
+    """
+    Refresh legal act statistics periodically.
+    
+    Args:
+        interval_seconds: Refresh interval in seconds (0 = disabled)
+    """
+    if interval_seconds <= 0:
+        return
+    
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await refresh_legal_act_stats()
+        except Exception as e:
+            logger.error(f"Legal act stats refresh failed: {e}")
+
+
 # =========================================================================
 # Get Legal Act Relations (Graph Traversal)
 # =========================================================================
@@ -179,6 +402,9 @@ async def get_legal_act_relations(
     """
     Get legal act relations using graph traversal.
     
+    Both directions and both levels are fetched in one round trip by the
+    get_act_relations() SQL function; each relation is tagged with its depth.
+    
     Args:
         act_id: Legal act ID (UUID)
         depth: Traversal depth (1 or 2)
@@ -186,6 +412,7 @@ async def get_legal_act_relations(
         
     Returns:
         Dict with 'outgoing' and 'incoming' relations
+        (outgoing rows embed 'target_act', incoming rows embed 'source_act')
         
     Raises:
         Exception: If database query fails
@@ -193,63 +420,42 @@ async def get_legal_act_relations(
     try:
         supabase = get_supabase()
         
-        # Outgoing relations (this act → others)
-        outgoing_query = supabase.table("legal_act_relations").select(
-            "id, target_act_id, relation_type, article_reference, created_at, "
-            "target_act:legal_acts!target_act_id(id, title, typ_aktu, status)"
-        ).eq("source_act_id", act_id)
-        
-        if relation_type:
-            outgoing_query = outgoing_query.eq("relation_type", relation_type)
-        
-        outgoing_response = outgoing_query.execute()
-        outgoing = outgoing_response.data or []
-        
-        # Incoming relations (others → this act)
-        incoming_query = supabase.table("legal_act_relations").select(
-            "id, source_act_id, relation_type, article_reference, created_at, "
-            "source_act:legal_acts!source_act_id(id, title, typ_aktu, status)"
-        ).eq("target_act_id", act_id)
-        
-        if relation_type:
-            incoming_query = incoming_query.eq("relation_type", relation_type)
-        
-        incoming_response = incoming_query.execute()
-        incoming = incoming_response.data or []
-        
-        # If depth=2, fetch second-level relations
-        if depth == 2:
-            # Get IDs of directly related acts
-            outgoing_ids = [r["target_act_id"] for r in outgoing]
-            incoming_ids = [r["source_act_id"] for r in incoming]
+        rows = await execute_rpc(
+            supabase,
+            "get_act_relations",
+            {
+                "p_act_id": act_id,
+                "p_depth": depth,
+                "p_relation_type": relation_type
+            }
+        ) or []
+        
+        outgoing: List[Dict[str, Any]] = []
+        incoming: List[Dict[str, Any]] = []
+        
+        for row in rows:
+            relation = {
+                "id": row["relation_id"],
+                "source_act_id": row["source_act_id"],
+                "target_act_id": row["target_act_id"],
+                "relation_type": row["relation_type"],
+                "description": row.get("description"),
+                "created_at": row.get("created_at"),
+                "depth": row.get("depth", 1)
+            }
+            related_act = {
+                "id": row["related_act_id"],
+                "title": row["related_act_title"],
+                "typ_aktu": row.get("related_act_typ_aktu"),
+                "status": row.get("related_act_status")
+            }
             
-            # Fetch second-level outgoing relations
-            if outgoing_ids:
-                second_outgoing_query = supabase.table("legal_act_relations").select(
-                    "id, source_act_id, target_act_id, relation_type, article_reference, created_at, "
-                    "target_act:legal_acts!target_act_id(id, title, typ_aktu, status)"
-                ).in_("source_act_id", outgoing_ids)
-                
-                if relation_type:
-                    second_outgoing_query = second_outgoing_query.eq("relation_type", relation_type)
-                
-                second_outgoing_response = second_outgoing_query.execute()
-                # Append to outgoing (mark as second-level in practice)
-                # For simplicity, we append to the same list
-                outgoing.extend(second_outgoing_response.data or [])
-            
-            # Fetch second-level incoming relations
-            if incoming_ids:
-                second_incoming_query = supabase.table("legal_act_relations").select(
-                    "id, source_act_id, target_act_id, relation_type, article_reference, created_at, "
-                    "source_act:legal_acts!source_act_id(id, title, typ_aktu, status)"
-                ).in_("target_act_id", incoming_ids)
-                
-                if relation_type:
-                    second_incoming_query = second_incoming_query.eq("relation_type", relation_type)
-                
-                second_incoming_response = second_incoming_query.execute()
-                incoming.extend(second_incoming_response.data or [])
+            if row["direction"] == "outgoing":
+                relation["target_act"] = related_act
+                outgoing.append(relation)
+            else:
+                relation["source_act"] = related_act
+                incoming.append(relation)
         
         logger.info(
             f"Retrieved relations for act {act_id}: "
@@ -270,19 +476,31 @@ async def get_legal_act_relations(
 # Search Legal Acts (Full-text)
 # =========================================================================
 
-async def search_legal_acts(
+async def search_legal_acts_ranked(
     query: str,
-    limit: int = 20
-) -> List[Dict[str, Any]]:
+    limit: int = 20,
+    offset: int = 0,
+    status: Optional[str] = None,
+    publisher: Optional[str] = None,
+    year: Optional[int] = None
+) -> tuple[List[Dict[str, Any]], int]:
     """
-    Full-text search in legal act titles.
+    Ranked search in legal act titles (search_legal_acts_ranked RPC).
+    
+    Polish full-text search (GIN index) ranked by ts_rank_cd; if it finds
+    nothing, trigram word similarity (typos, prefixes) is used instead.
+    Filters, ranking and pagination run in the database.
     
     Args:
         query: Search query
-        limit: Maximum results
+        limit: Maximum results (1-100)
+        offset: Number of matches to skip
+        status: Filter by status (optional)
+        publisher: Filter by publisher (optional)
+        year: Filter by publication year (optional)
         
     Returns:
-        List of matching acts
+        Tuple of (matching acts with 'rank' and 'match_type', total matches)
         
     Raises:
         Exception: If database query fails
@@ -290,19 +508,52 @@ async def search_legal_acts(
     try:
         supabase = get_supabase()
         
-        # Simple ILIKE search for MVP
-        # In production, use PostgreSQL tsvector/tsquery for better performance
-        response = supabase.table("legal_acts").select(
-            "id, title, typ_aktu, publisher, year, position, status"
-        ).ilike("title", f"%{query}%").limit(limit).execute()
-        
-        acts = response.data or []
+        rows = await execute_rpc(
+            supabase,
+            "search_legal_acts_ranked",
+            {
+                "p_query": query,
+                "p_status": status,
+                "p_publisher": publisher,
+                "p_year": year,
+                "p_limit": limit,
+                "p_offset": offset,
+                "p_similarity_threshold": settings.legal_act_search_similarity_threshold
+            }
+        ) or []
+        
+        total_count = rows[0].get("total_count", 0) if rows else 0
+        acts = [{k: v for k, v in row.items() if k != "total_count"} for row in rows]
         
-        logger.info(f"Search for '{query}' returned {len(acts)} results")
+        logger.info(
+            f"Search for '{query}' returned {len(acts)} results "
+            f"(total {total_count}, match={acts[0]['match_type'] if acts else 'none'})"
+        )
         
-        return acts
+        return acts, total_count
         
     except Exception as e:
         logger.error(f"Failed to search legal acts: {e}", exc_info=True)
         raise
 
+
+async def search_legal_acts(
+    query: str,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Full-text search in legal act titles (best matches first).
+    
+    Args:
+        query: Search query
+        limit: Maximum results
+        
+    Returns:
+        List of matching acts
+        
+    Raises:
+        Exception: If database query fails
+    """
+    acts, _ = await search_legal_acts_ranked(query, limit=limit)
+    return acts
+
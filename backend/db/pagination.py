@@ -0,0 +1,112 @@
+"""
+PrawnikGPT Backend - Keyset Pagination Helpers
+
+Opaque cursors for keyset (seek) pagination:
+- A cursor encodes the sort key of the last row of a page (sort value + id)
+  together with the sort field and direction it was issued for
+- The next page starts strictly after that row, so its cost does not depend
+  on how deep the client has paged (no OFFSET scan)
+
+Count modes for list endpoints:
+- exact: count(*) over the filtered set
+- estimated: PostgREST estimated count (planner statistics above db-max-rows)
+- none: no count (cheapest)
+"""
+
+import base64
+import json
+from typing import Any, Optional, Tuple
+
+# =========================================================================
+# CONSTANTS
+# =========================================================================
+
+PAGINATION_MODES = ("offset", "cursor")
+COUNT_MODES = ("exact", "estimated", "none")
+
+
+# =========================================================================
+# CURSOR ENCODING
+# =========================================================================
+
+def encode_cursor(sort: str, order: str, value: Any, row_id: str) -> str:
+    """
+    Encode keyset position as opaque URL-safe cursor.
+
+    Args:
+        sort: Sort field the page was ordered by (e.g., "published_date")
+        order: Sort direction ("desc" or "asc")
+        value: Sort field value of the last row on the page
+        row_id: ID of the last row (tie-breaker)
+
+    Returns:
+        str: Cursor string (base64url without padding)
+    """
+    payload = json.dumps(
+        {"s": sort, "o": order, "v": value, "id": row_id},
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, str]:
+    """
+    Decode cursor and check it was issued for the same ordering.
+
+    Args:
+        cursor: Cursor from a previous page (next_cursor)
+        sort: Requested sort field
+        order: Requested sort direction
+
+    Returns:
+        Tuple of (sort value, row ID) of the last row of the previous page
+
+    Raises:
+        ValueError: If cursor is malformed or was issued for different ordering
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, row_id = payload["v"], payload["id"]
+        cursor_sort, cursor_order = payload["s"], payload["o"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError(
+            f"Cursor was issued for order_by={cursor_sort}, order={cursor_order}"
+        )
+    if value is None or not isinstance(row_id, str):
+        raise ValueError("Invalid cursor")
+
+    return value, row_id
+
+
+def postgrest_count(count: str) -> Optional[str]:
+    """
+    Map count mode to PostgREST count method.
+
+    Args:
+        count: Count mode ("exact", "estimated" or "none")
+
+    Returns:
+        Optional[str]: PostgREST count method or None (no count)
+
+    Raises:
+        ValueError: If count mode is unknown
+    """
+    if count not in COUNT_MODES:
+        raise ValueError(f"count must be one of {COUNT_MODES}")
+    return None if count == "none" else count
+
+
+def postgrest_quote(value: Any) -> str:
+    """
+    Quote value for use inside a PostgREST logical filter (or=/and=).
+
+    Reserved characters (commas, dots, parentheses) are allowed inside
+    double quotes; backslashes and double quotes are escaped.
+    """
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
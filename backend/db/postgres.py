@@ -0,0 +1,284 @@
+"""
+PrawnikGPT Backend - Direct PostgreSQL Backend (asyncpg)
+
+Optional repository backend for hot-path RPC functions
+(semantic_search_chunks, fetch_related_acts, list_user_queries).
+
+Instead of going through PostgREST over HTTP, the same SQL functions are
+called over a pooled asyncpg connection. Query vectors are sent in the
+pgvector binary format (no JSON encoding of 1024 floats).
+
+Enabled with DATABASE_BACKEND=asyncpg and DATABASE_URL. If asyncpg is not
+installed, DATABASE_URL is missing or the database cannot be reached,
+calls fall back to the PostgREST client.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import struct
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from backend.config import settings
+
+try:
+    import asyncpg
+except ImportError:  # Optional dependency
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+# Function and parameter names are interpolated into SQL - allow identifiers only
+_IDENTIFIER_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+# Seconds to serve PostgREST after a failed pool creation before reconnecting
+POOL_RETRY_SECONDS = 30.0
+
+
+class PostgresUnavailableError(RuntimeError):
+    """Raised when the asyncpg pool cannot be created or a connection fails."""
+
+
+# =========================================================================
+# TYPE CODECS
+# =========================================================================
+
+def encode_vector(vector: List[float]) -> bytes:
+    """
+    Encode vector in pgvector binary format.
+    
+    Layout: uint16 dimensions, uint16 unused (0), float32[dimensions],
+    all big-endian.
+    """
+    return struct.pack(f">HH{len(vector)}f", len(vector), 0, *vector)
+
+
+def decode_vector(data: bytes) -> List[float]:
+    """Decode vector from pgvector binary format."""
+    dim, _ = struct.unpack_from(">HH", data)
+    return list(struct.unpack_from(f">{dim}f", data, 4))
+
+
+async def _init_connection(conn) -> None:
+    """Register codecs on each new pool connection."""
+    await conn.set_type_codec(
+        "vector",
+        schema="public",
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary"
+    )
+    await conn.set_type_codec(
+        "jsonb",
+        schema="pg_catalog",
+        encoder=json.dumps,
+        decoder=json.loads,
+        format="text"
+    )
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Convert asyncpg values to the JSON-compatible types PostgREST returns."""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return [_to_jsonable(v) for v in value]
+    return value
+
+
+# =========================================================================
+# CONNECTION POOL
+# =========================================================================
+
+class PostgresPool:
+    """
+    Lazily created asyncpg connection pool (singleton).
+    
+    Example Usage:
+        ```python
+        rows = await PostgresPool.call_function(
+            "semantic_search_chunks",
+            {"query_embedding": embedding, "match_count": 10, "similarity_threshold": 0.5}
+        )
+        ```
+    """
+    
+    _pool = None
+    _lock: Optional[asyncio.Lock] = None
+    _retry_at = 0.0
+    _warned_unavailable = False
+    
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """
+        Check whether the asyncpg backend should be used.
+        
+        Returns:
+            bool: True if DATABASE_BACKEND=asyncpg, asyncpg is installed
+                and DATABASE_URL is configured
+        """
+        if settings.database_backend != "asyncpg":
+            return False
+        
+        if asyncpg is None or not settings.database_url:
+            if not cls._warned_unavailable:
+                logger.warning(
+                    "DATABASE_BACKEND=asyncpg but asyncpg is not installed or "
+                    "DATABASE_URL is not set - using PostgREST"
+                )
+                cls._warned_unavailable = True
+            return False
+        
+        return True
+    
+    @classmethod
+    async def get_pool(cls):
+        """
+        Get or create asyncpg pool.
+        
+        Concurrent first calls share one creation attempt. After a failure,
+        calls raise immediately for POOL_RETRY_SECONDS instead of reconnecting
+        on every RPC (callers fall back to PostgREST meanwhile).
+        
+        Raises:
+            PostgresUnavailableError: If pool cannot be created
+        """
+        if cls._pool is not None:
+            return cls._pool
+        
+        if time.monotonic() < cls._retry_at:
+            raise PostgresUnavailableError("asyncpg pool unavailable, retrying later")
+        
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        
+        async with cls._lock:
+            if cls._pool is not None:
+                return cls._pool
+            if time.monotonic() < cls._retry_at:
+                raise PostgresUnavailableError("asyncpg pool unavailable, retrying later")
+            
+            try:
+                cls._pool = await asyncpg.create_pool(
+                    dsn=settings.database_url,
+                    min_size=settings.database_pool_min_size,
+                    max_size=settings.database_pool_max_size,
+                    command_timeout=settings.database_command_timeout,
+                    init=_init_connection
+                )
+                logger.info(
+                    f"asyncpg pool initialized "
+                    f"(size {settings.database_pool_min_size}-{settings.database_pool_max_size})"
+                )
+            except (OSError, asyncpg.PostgresError) as e:
+                cls._retry_at = time.monotonic() + POOL_RETRY_SECONDS
+                logger.error(f"Failed to create asyncpg pool (retrying in {POOL_RETRY_SECONDS:.0f}s): {e}")
+                raise PostgresUnavailableError(f"asyncpg pool unavailable: {e}") from e
+        
+        return cls._pool
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Close pool connections (call on application shutdown)."""
+        if cls._pool is not None:
+            await cls._pool.close()
+            logger.info("asyncpg pool closed")
+        cls._pool = None
+        cls._lock = None
+        cls._retry_at = 0.0
+    
+    @classmethod
+    async def call_function(
+        cls,
+        function_name: str,
+        params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Call set-returning SQL function with named arguments.
+        
+        Args:
+            function_name: SQL function name (e.g., "semantic_search_chunks")
+            params: Named arguments (same dict as for PostgREST rpc())
+        
+        Returns:
+            List[Dict]: Rows with JSON-compatible values
+        
+        Raises:
+            ValueError: If function or parameter name is not a plain identifier
+            PostgresUnavailableError: If the database cannot be reached
+            asyncpg.DataError: If an argument cannot be encoded
+            asyncpg.PostgresError: If the function raises an error
+        """
+        names = [function_name, *params.keys()]
+        if not all(_IDENTIFIER_RE.match(name) for name in names):
+            raise ValueError(f"Invalid SQL identifier in call to {function_name}")
+        
+        arguments = ", ".join(
+            f"{name} => ${i}" for i, name in enumerate(params.keys(), start=1)
+        )
+        sql = f"SELECT * FROM {function_name}({arguments})"
+        
+        pool = await cls.get_pool()
+        
+        try:
+            async with pool.acquire() as conn:
+                records = await conn.fetch(sql, *params.values())
+        except asyncpg.DataError:
+            # Invalid arguments (an InterfaceError subclass) - PostgREST would fail too
+            raise
+        except (
+            OSError,
+            asyncpg.InterfaceError,  # Incl. ConnectionDoesNotExistError
+            asyncpg.PostgresConnectionError,
+            asyncpg.CannotConnectNowError
+        ) as e:
+            logger.error(f"asyncpg connection error calling {function_name}: {e}")
+            raise PostgresUnavailableError(f"asyncpg call failed: {e}") from e
+        
+        return [
+            {key: _to_jsonable(value) for key, value in record.items()}
+            for record in records
+        ]
+
+
+# =========================================================================
+# CONVENIENCE FUNCTIONS
+# =========================================================================
+
+async def execute_rpc(
+    client,
+    function_name: str,
+    params: Dict[str, Any]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Execute set-returning RPC via asyncpg when enabled, PostgREST otherwise.
+    
+    Falls back to the PostgREST client if the asyncpg pool is unavailable.
+    
+    Args:
+        client: Async Supabase client (PostgREST path / fallback)
+        function_name: SQL function name
+        params: Named arguments
+    
+    Returns:
+        Optional[List[Dict]]: Result rows (response.data on PostgREST path)
+    """
+    if PostgresPool.is_enabled():
+        try:
+            return await PostgresPool.call_function(function_name, params)
+        except PostgresUnavailableError as e:
+            logger.warning(f"Falling back to PostgREST for {function_name}: {e}")
+    
+    response = await client.rpc(function_name, params).execute()
+    return response.data
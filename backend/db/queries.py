@@ -4,9 +4,9 @@ PrawnikGPT Backend - Query Repository
 Database operations for query_history table:
 - Create query
 - Get query by ID
-- List queries with pagination
+- List queries with pagination (offset or keyset cursor)
 - Delete query
-- Update query fields
+- Update query fields (responses, failed generation)
 
 All operations respect Row Level Security (RLS) policies.
 """
@@ -17,6 +17,8 @@ from datetime import datetime
 from uuid import UUID
 
 from backend.db.supabase_client import get_supabase
+from backend.db.postgres import execute_rpc
+from backend.db.pagination import decode_cursor, encode_cursor, postgrest_count
 from postgrest.exceptions import APIError
 
 logger = logging.getLogger(__name__)
@@ -167,8 +169,9 @@ async def list_queries(
     try:
         client = get_supabase()
         
-        # Call the RPC function
-        response = await client.rpc(
+        # Call the RPC function (asyncpg pool if DATABASE_BACKEND=asyncpg)
+        queries = await execute_rpc(
+            client,
             "list_user_queries",
             {
                 "p_user_id": user_id,
@@ -176,9 +179,7 @@ async def list_queries(
                 "p_per_page": per_page,
                 "p_order": order,
             },
-        ).execute()
-        
-        queries = response.data or []
+        ) or []
         
         # Get total count from the first record if it exists
         total_count = queries[0].get("total_count", 0) if queries else 0
@@ -198,6 +199,88 @@ async def list_queries(
         raise RuntimeError(f"Failed to list queries: {e}")
 
 
+async def list_queries_after(
+    user_id: str,
+    cursor: Optional[str] = None,
+    per_page: int = 20,
+    order: str = "desc",
+    count: str = "none"
+) -> tuple[List[Dict[str, Any]], Optional[int], Optional[str]]:
+    """
+    List queries for user with keyset (cursor) pagination.
+    
+    Pages are ordered by (created_at, id) and start strictly after the
+    cursor row, so deep pages cost the same as the first one.
+    
+    Args:
+        user_id: User ID
+        cursor: next_cursor of the previous page (None = first page)
+        per_page: Items per page (1-100)
+        order: Sort order ("desc" or "asc") by created_at
+        count: Total count mode ("exact", "estimated" or "none")
+        
+    Returns:
+        tuple: (list of queries, total count or None, next cursor or None)
+        
+    Raises:
+        ValueError: If pagination parameters or cursor invalid
+        RuntimeError: If database operation fails
+    """
+    # Validation
+    if not (1 <= per_page <= 100):
+        raise ValueError("per_page must be 1-100")
+    if order not in ("desc", "asc"):
+        raise ValueError("order must be 'desc' or 'asc'")
+    count_method = postgrest_count(count)
+    after_created_at, after_id = (
+        decode_cursor(cursor, "created_at", order) if cursor else (None, None)
+    )
+    
+    try:
+        client = get_supabase()
+        
+        # Fetch one extra row to know whether a next page exists
+        rows = await execute_rpc(
+            client,
+            "list_user_queries_keyset",
+            {
+                "p_user_id": user_id,
+                "p_per_page": per_page + 1,
+                "p_order": order,
+                "p_after_created_at": after_created_at,
+                "p_after_id": after_id,
+            },
+        ) or []
+        
+        queries = rows[:per_page]
+        next_cursor = None
+        if len(rows) > per_page:
+            last = queries[-1]
+            next_cursor = encode_cursor("created_at", order, last["created_at"], last["id"])
+        
+        total_count = None
+        if count_method:
+            count_response = await client.table("query_history") \
+                .select("id", count=count_method, head=True) \
+                .eq("user_id", user_id) \
+                .execute()
+            total_count = count_response.count or 0
+        
+        logger.info(
+            f"Listed queries for user {user_id} via keyset RPC: "
+            f"{len(queries)} items (total {total_count})"
+        )
+        
+        return queries, total_count, next_cursor
+        
+    except APIError as e:
+        logger.error(f"Database error listing queries via keyset RPC: {e}")
+        raise RuntimeError(f"Failed to list queries: {e}")
+    except Exception as e:
+        logger.error(f"Unexpected error listing queries via keyset RPC: {e}")
+        raise RuntimeError(f"Failed to list queries: {e}")
+
+
 # =========================================================================
 # UPDATE OPERATIONS
 # =========================================================================
@@ -233,7 +316,8 @@ async def update_query_fast_response(
                 "fast_response_content": content,
                 "sources": sources,
                 "fast_model_name": model_name,
-                "fast_generation_time_ms": generation_time_ms
+                "fast_generation_time_ms": generation_time_ms,
+                "fast_response_error": None
             }) \
             .eq("id", query_id) \
             .execute()
@@ -284,7 +368,8 @@ async def update_query_accurate_response(
             .update({
                 "accurate_response_content": content,
                 "accurate_model_name": model_name,
-                "accurate_generation_time_ms": generation_time_ms
+                "accurate_generation_time_ms": generation_time_ms,
+                "accurate_response_error": None
             }) \
             .eq("id", query_id) \
             .execute()
@@ -304,6 +389,55 @@ async def update_query_accurate_response(
         raise RuntimeError(f"Failed to update accurate response: {e}")
 
 
+async def set_query_response_error(
+    query_id: str,
+    response_type: str,
+    error: Optional[str]
+) -> bool:
+    """
+    Mark fast or accurate response of a query as failed (or clear the mark).
+    
+    Args:
+        query_id: Query ID
+        response_type: "fast" or "accurate"
+        error: Failure description (None clears a previous failure)
+        
+    Returns:
+        bool: True if updated successfully
+        
+    Raises:
+        ValueError: If response_type is invalid
+        RuntimeError: If database operation fails
+    """
+    if response_type not in ("fast", "accurate"):
+        raise ValueError("response_type must be 'fast' or 'accurate'")
+    
+    try:
+        client = get_supabase()
+        
+        response = await client.table("query_history") \
+            .update({f"{response_type}_response_error": error[:1000] if error else None}) \
+            .eq("id", query_id) \
+            .execute()
+        
+        if not response.data:
+            logger.debug(f"Query not found for {response_type} error update: {query_id}")
+            return False
+        
+        logger.info(
+            f"{'Marked' if error else 'Cleared'} failed {response_type} response "
+            f"for query: {query_id}"
+        )
+        return True
+        
+    except APIError as e:
+        logger.error(f"Database error updating {response_type} response error: {e}")
+        raise RuntimeError(f"Failed to update {response_type} response error: {e}")
+    except Exception as e:
+        logger.error(f"Unexpected error updating {response_type} response error: {e}")
+        raise RuntimeError(f"Failed to update {response_type} response error: {e}")
+
+
 # =========================================================================
 # DELETE OPERATIONS
 # =========================================================================
@@ -4,13 +4,20 @@ PrawnikGPT Backend - Supabase Client
 This module provides Supabase client initialization and connection management.
 It implements connection pooling and provides utilities for database operations.
 
+The client is fully asynchronous: PostgREST requests go through a shared
+httpx.AsyncClient with a bounded connection pool, so a slow database call
+never blocks the event loop. All repository calls must be awaited:
+
+    response = await get_supabase().table("query_history").select("*").execute()
+
 The client is configured via environment variables (see config.py).
 """
 
+import asyncio
 import logging
 import os
 from typing import Optional
-from supabase import create_client, Client, ClientOptions
+from supabase import AsyncClient, AsyncClientOptions
 from postgrest.exceptions import APIError
 import httpx
 
@@ -21,24 +28,25 @@ logger = logging.getLogger(__name__)
 
 class SupabaseClient:
     """
-    Supabase client wrapper with connection management.
+    Async Supabase client wrapper with connection management.
     
     Provides:
     - Lazy initialization
-    - Connection pooling
+    - Connection pooling (shared httpx.AsyncClient, configurable limits)
     - Error handling
     - Health check utilities
     """
     
-    _instance: Optional[Client] = None
+    _instance: Optional[AsyncClient] = None
+    _http_client: Optional[httpx.AsyncClient] = None
     
     @classmethod
-    def get_client(cls) -> Client:
+    def get_client(cls) -> AsyncClient:
         """
-        Get or create Supabase client instance (singleton pattern).
+        Get or create async Supabase client instance (singleton pattern).
         
         Returns:
-            Client: Initialized Supabase client
+            AsyncClient: Initialized async Supabase client
             
         Raises:
             RuntimeError: If client initialization fails
@@ -49,24 +57,45 @@ class SupabaseClient:
                 # disable SSL verification if SUPABASE_VERIFY_SSL is set to false
                 verify_ssl = os.getenv("SUPABASE_VERIFY_SSL", "true").lower() != "false"
                 
-                # Create HTTP client with SSL verification setting
-                httpx_client = httpx.Client(verify=verify_ssl, timeout=30.0)
+                # Pooled async HTTP client shared by all PostgREST requests
+                cls._http_client = httpx.AsyncClient(
+                    verify=verify_ssl,
+                    timeout=settings.supabase_timeout,
+                    limits=httpx.Limits(
+                        max_connections=settings.supabase_pool_max_connections,
+                        max_keepalive_connections=settings.supabase_pool_max_keepalive,
+                        keepalive_expiry=settings.supabase_pool_keepalive_expiry
+                    )
+                )
                 
-                # Create client options with httpx_client parameter
-                client_options = ClientOptions(httpx_client=httpx_client)
+                client_options = AsyncClientOptions(httpx_client=cls._http_client)
                 
-                cls._instance = create_client(
+                # Service key is sent as bearer token, so no session lookup is needed
+                cls._instance = AsyncClient(
                     supabase_url=settings.supabase_url,
                     supabase_key=settings.supabase_service_key,
                     options=client_options
                 )
-                logger.info(f"Supabase client initialized: {settings.supabase_url} (SSL verify: {verify_ssl})")
+                logger.info(
+                    f"Supabase async client initialized: {settings.supabase_url} "
+                    f"(SSL verify: {verify_ssl}, "
+                    f"pool: {settings.supabase_pool_max_connections} connections)"
+                )
             except Exception as e:
                 logger.error(f"Failed to initialize Supabase client: {e}")
                 raise RuntimeError(f"Supabase initialization failed: {e}") from e
         
         return cls._instance
     
+    @classmethod
+    async def close(cls) -> None:
+        """Close pooled HTTP connections (call on application shutdown)."""
+        if cls._http_client is not None:
+            await cls._http_client.aclose()
+            logger.info("Supabase HTTP connection pool closed")
+        cls._http_client = None
+        cls._instance = None
+    
     @classmethod
     async def health_check(cls, timeout_seconds: int = 2) -> bool:
         """
@@ -86,7 +115,10 @@ class SupabaseClient:
             
             # Try RPC health_check first (fastest method)
             try:
-                response = client.rpc('health_check').execute()
+                response = await asyncio.wait_for(
+                    client.rpc('health_check').execute(),
+                    timeout=timeout_seconds
+                )
                 
                 # RPC returns True if database is healthy
                 if response.data is True:
@@ -102,6 +134,9 @@ class SupabaseClient:
             # If we got here without exception, database is healthy
             return True
             
+        except asyncio.TimeoutError:
+            logger.warning(f"Database health check timed out after {timeout_seconds}s")
+            return False
         except APIError as e:
             logger.warning(f"Database health check failed (API error): {e}")
             return False
@@ -124,7 +159,7 @@ class SupabaseClient:
             
             # Try to perform a simple operation
             # This will fail if connection is not working
-            _ = client.table('query_history').select('id', count='exact').limit(0).execute()
+            _ = await client.table('query_history').select('id', count='exact').limit(0).execute()
             
             return True
             
@@ -137,17 +172,17 @@ class SupabaseClient:
 # CONVENIENCE FUNCTIONS
 # =========================================================================
 
-def get_supabase() -> Client:
+def get_supabase() -> AsyncClient:
     """
     Dependency injection helper for FastAPI endpoints.
     
     Usage in FastAPI:
         @app.get("/endpoint")
-        async def endpoint(db: Client = Depends(get_supabase)):
-            # Use db client
+        async def endpoint(db: AsyncClient = Depends(get_supabase)):
+            response = await db.table("legal_acts").select("id").execute()
     
     Returns:
-        Client: Supabase client instance
+        AsyncClient: Async Supabase client instance
     """
     return SupabaseClient.get_client()
 
@@ -18,8 +18,16 @@ from backend.middleware import (
     add_request_id_middleware,
     add_rate_limit_headers
 )
+from backend.db.supabase_client import SupabaseClient
+from backend.db.postgres import PostgresPool
+from backend.db.legal_acts import periodic_legal_act_stats_refresh
 from backend.services.ollama_service import get_ollama_service
 from backend.services.rag_pipeline import log_rag_pipeline_metrics, periodic_metrics_logging
+from backend.services.local_vector_index import periodic_local_index_refresh
+from backend.services.answer_cache import periodic_answer_cache_invalidation
+from backend.services.relation_graph import get_relation_graph_service
+from backend.services.redis_client import close_redis
+from backend.services.job_worker import JobWorkerPool
 
 # =========================================================================
 # LOGGING CONFIGURATION
@@ -35,6 +43,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# In-process job workers (in-memory queue or JOB_WORKER_EMBEDDED=true)
+_job_worker_pool: JobWorkerPool | None = None
+
 # =========================================================================
 # FASTAPI APPLICATION
 # =========================================================================
@@ -171,6 +182,41 @@ async def startup_event():
         import asyncio
         asyncio.create_task(periodic_metrics_logging(interval_seconds=300))
         logger.info("Periodic metrics logging started (every 5 minutes)")
+    
+    # Mirror chunk embeddings into local vector index (optional)
+    if settings.local_vector_index_enabled:
+        import asyncio
+        asyncio.create_task(
+            periodic_local_index_refresh(settings.local_vector_index_refresh_interval)
+        )
+        logger.info(f"Local vector index refresh started ({settings.local_vector_index_dir})")
+    
+    # Drop cached answers built on changed legal acts or deleted chunks
+    if settings.answer_cache_enabled:
+        import asyncio
+        asyncio.create_task(
+            periodic_answer_cache_invalidation(settings.answer_cache_invalidation_interval)
+        )
+    
+    # Load legal act relation graph in background (first related-acts lookup uses it)
+    if settings.relation_graph_enabled:
+        import asyncio
+        asyncio.create_task(get_relation_graph_service().get_graph())
+    
+    # Repair drift of trigger-maintained legal act statistics
+    if settings.legal_act_stats_refresh_interval > 0:
+        import asyncio
+        asyncio.create_task(
+            periodic_legal_act_stats_refresh(settings.legal_act_stats_refresh_interval)
+        )
+    
+    # Consume generation jobs in this process (in-memory queue has no external workers)
+    global _job_worker_pool
+    if settings.job_queue_backend == "memory" or settings.job_worker_embedded:
+        _job_worker_pool = JobWorkerPool()
+        await _job_worker_pool.start()
+    else:
+        logger.info("Generation jobs are consumed by external workers (python -m backend.worker)")
 
 
 @app.on_event("shutdown")
@@ -179,10 +225,20 @@ async def shutdown_event():
     Application shutdown handler.
     
     Performs cleanup tasks:
+    - Stop in-process job workers
     - Close database connections
     - Flush logs
     """
     logger.info("PrawnikGPT Backend shutting down...")
+    
+    # Let running generation jobs finish
+    if _job_worker_pool is not None:
+        await _job_worker_pool.stop(timeout=settings.job_shutdown_timeout)
+    
+    # Close pooled database and Redis connections
+    await SupabaseClient.close()
+    await PostgresPool.close()
+    await close_redis()
 
 
 # =========================================================================
@@ -29,11 +29,18 @@ RelationType = Literal["zmienia", "uchyla", "zastepuje", "powoluje_sie"]
 class PaginationMetadata(BaseModel):
     """
     Pagination metadata for list responses.
+    
+    Offset mode fills page/total_pages; cursor mode fills next_cursor
+    (page is None). Totals are None when count="none".
     """
-    page: int = Field(..., ge=1)
+    page: Optional[int] = Field(None, ge=1)
     per_page: int = Field(..., ge=1, le=100)
-    total_pages: int = Field(..., ge=0)
-    total_count: int = Field(..., ge=0)
+    total_pages: Optional[int] = Field(None, ge=0)
+    total_count: Optional[int] = Field(None, ge=0)
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Cursor of the next page (cursor mode, None on last page)"
+    )
 
 
 class LegalActStats(BaseModel):
@@ -174,7 +181,8 @@ class LegalActListItem(BaseModel):
                 "organ_wydajacy": "Sejm RP",
                 "published_date": "1964-04-23T00:00:00Z",
                 "effective_date": "1964-01-01T00:00:00Z",
-                "created_at": "2025-01-01T00:00:00Z"
+                "created_at": "2025-01-01T00:00:00Z",
+                "depth": 1
             }
         }
     }
@@ -281,6 +289,12 @@ class OutgoingRelation(BaseModel):
         ...,
         description="When relation was established"
     )
+    depth: int = Field(
+        1,
+        ge=1,
+        le=2,
+        description="Traversal level (1 = direct relation, 2 = relation of a related act)"
+    )
     
     model_config = {
         "json_schema_extra": {
@@ -296,7 +310,8 @@ class OutgoingRelation(BaseModel):
                 },
                 "relation_type": "zmienia",
                 "description": "Niniejsza ustawa zmienia ustawę o podatku dochodowym",
-                "created_at": "2025-01-01T00:00:00Z"
+                "created_at": "2025-01-01T00:00:00Z",
+                "depth": 1
             }
         }
     }
@@ -328,6 +343,12 @@ class IncomingRelation(BaseModel):
         ...,
         description="When relation was established"
     )
+    depth: int = Field(
+        1,
+        ge=1,
+        le=2,
+        description="Traversal level (1 = direct relation, 2 = relation of a related act)"
+    )
     
     model_config = {
         "json_schema_extra": {
@@ -343,7 +364,8 @@ class IncomingRelation(BaseModel):
                 },
                 "relation_type": "zmienia",
                 "description": "Niniejsza ustawa została zmieniona",
-                "created_at": "2020-05-01T00:00:00Z"
+                "created_at": "2020-05-01T00:00:00Z",
+                "depth": 1
             }
         }
     }
@@ -90,11 +90,14 @@ class RatingDetail(RatingSummary):
 class PaginationMetadata(BaseModel):
     """
     Pagination metadata for list responses.
+    
+    Offset mode fills page/total_pages; cursor mode fills next_cursor
+    (page is None). Totals are None when count="none".
     """
-    page: int = Field(
-        ...,
+    page: Optional[int] = Field(
+        None,
         ge=1,
-        description="Current page number (1-indexed)"
+        description="Current page number (1-indexed, offset mode)"
     )
     per_page: int = Field(
         ...,
@@ -102,15 +105,19 @@ class PaginationMetadata(BaseModel):
         le=100,
         description="Items per page"
     )
-    total_pages: int = Field(
-        ...,
+    total_pages: Optional[int] = Field(
+        None,
         ge=0,
         description="Total number of pages"
     )
-    total_count: int = Field(
-        ...,
+    total_count: Optional[int] = Field(
+        None,
         ge=0,
-        description="Total number of items"
+        description="Total number of items (estimated if count=estimated)"
+    )
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Cursor of the next page (cursor mode, None on last page)"
     )
 
 
@@ -130,6 +137,13 @@ class QuerySubmitRequest(BaseModel):
         max_length=1000,
         description="Legal question in natural language (Polish)"
     )
+    stream: bool = Field(
+        False,
+        description=(
+            "Create the query immediately and skip background generation; "
+            "the client then consumes GET /api/v1/queries/{query_id}/stream"
+        )
+    )
     
     @field_validator('query_text')
     @classmethod
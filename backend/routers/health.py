@@ -18,6 +18,7 @@ from fastapi.responses import JSONResponse
 from backend.models.health import HealthResponse, ServiceHealthStatus
 from backend.services.health_check import perform_health_check
 from backend.services.rag_pipeline import get_rag_pipeline_metrics
+from backend.services.job_queue import get_job_queue
 from backend.middleware.rate_limit import check_rate_limit_health
 from backend.config import settings
 
@@ -46,13 +47,6 @@ router = APIRouter(
 
 @router.get(
     "/health",
-    summary="System health check",
-    description="""
-    Check health status of all critical services.
-    
-    Optional query parameter:
-    - `metrics=true`: Include RAG pipeline metrics in response
-    """,
     response_model=HealthResponse,
     status_code=status.HTTP_200_OK,
     summary="System Health Check",
@@ -154,6 +148,9 @@ async def health_check():
     - Step-by-step durations
     - Success/failure rates
     - Cache hit rates
+    - Ollama concurrency limits per model (adaptive) and queue waits
+    - Cancelled generations (query deleted, client disconnected)
+    - Job queue depth (waiting/running jobs per type) and counters
     
     This endpoint does not require authentication.
     """,
@@ -169,12 +166,16 @@ async def health_metrics():
     - Individual step durations
     - Success/failure rates
     - Cache hit rate
+    - Ollama concurrency limits (ollama.concurrency_limits) and scheduler stats
+    - Cancelled generations per response type and reason
+    - Job queue depth and counters
     
     Returns:
         dict: Aggregated metrics dictionary
     """
     try:
         metrics = get_rag_pipeline_metrics()
+        metrics["job_queue"] = await get_job_queue().get_stats()
         return metrics
     except Exception as e:
         logger.error(f"Metrics endpoint failed: {e}", exc_info=True)
@@ -11,7 +11,7 @@ Used for browsing available legal acts and understanding act relationships.
 """
 
 import logging
-from typing import Optional
+from typing import Annotated, Optional
 from fastapi import APIRouter, HTTPException, status, Query
 
 from backend.models.legal_act import (
@@ -28,9 +28,12 @@ from backend.models.legal_act import (
 )
 from backend.db.legal_acts import (
     list_legal_acts as db_list_legal_acts,
+    list_legal_acts_after as db_list_legal_acts_after,
     get_legal_act_by_id,
     get_legal_act_relations as db_get_relations
 )
+from backend.db.pagination import PAGINATION_MODES, COUNT_MODES
+from backend.services.relation_graph import get_relation_graph_service
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +58,7 @@ router = APIRouter(
     Public endpoint (no authentication required).
     
     Filters:
-    - search: Full-text search in title (optional)
+    - search: Search in title (optional); results are ordered by relevance
     - status: Filter by status (obowiazujacy, uchylony, zastapiony)
     - publisher: Filter by publisher (e.g., 'Dz.U.')
     - year: Filter by publication year
@@ -67,10 +70,16 @@ router = APIRouter(
     Pagination:
     - Default: page=1, per_page=20
     - Max per_page: 100
+    - pagination=cursor: keyset pagination over (order_by, id); pass
+      pagination.next_cursor as cursor to get the next page (constant time
+      per page, page is ignored)
+    - count: exact (default), estimated (planner statistics for large sets)
+      or none
     
     Performance:
     - Results cached for better performance
-    - Full-text search uses PostgreSQL tsvector
+    - Search uses Polish full-text search (GIN index) with a trigram
+      fallback for typos and prefixes; ranking and pagination run in the database
     """,
     responses={
         200: {"description": "Legal acts retrieved successfully"},
@@ -85,7 +94,10 @@ async def list_legal_acts(
     publisher: Optional[str] = Query(None, description="Filter by publisher"),
     year: Optional[int] = Query(None, ge=1918, le=2100, description="Filter by year"),
     order_by: str = Query("published_date", description="Sort by field"),
-    order: str = Query("desc", description="Sort order")
+    order: str = Query("desc", description="Sort order"),
+    pagination: Annotated[str, Query(description="Pagination mode: offset or cursor")] = "offset",
+    cursor: Annotated[Optional[str], Query(description="next_cursor of previous page")] = None,
+    count: Annotated[str, Query(description="Total count: exact, estimated or none")] = "exact"
 ):
     """
     List legal acts with filters and pagination.
@@ -99,6 +111,9 @@ async def list_legal_acts(
         year: Year filter
         order_by: Sort field
         order: Sort direction
+        pagination: Pagination mode (offset or cursor)
+        cursor: Cursor from previous page (cursor mode)
+        count: Total count mode
         
     Returns:
         LegalActListResponse: Paginated list of legal acts
@@ -116,17 +131,49 @@ async def list_legal_acts(
                 detail="order must be 'desc' or 'asc'"
             )
         
+        if pagination not in PAGINATION_MODES:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="pagination must be 'offset' or 'cursor'"
+            )
+        if count not in COUNT_MODES:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="count must be 'exact', 'estimated' or 'none'"
+            )
+        
         # Fetch from database
-        acts_data, total_count = await db_list_legal_acts(
-            page=page,
-            per_page=per_page,
-            search=search,
-            status=status,
-            publisher=publisher,
-            year=year,
-            order_by=order_by,
-            order=order
-        )
+        next_cursor = None
+        if pagination == "cursor":
+            try:
+                acts_data, total_count, next_cursor = await db_list_legal_acts_after(
+                    cursor=cursor,
+                    per_page=per_page,
+                    search=search,
+                    status=status,
+                    publisher=publisher,
+                    year=year,
+                    order_by=order_by,
+                    order=order,
+                    count=count
+                )
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=str(e)
+                )
+        else:
+            acts_data, total_count = await db_list_legal_acts(
+                page=page,
+                per_page=per_page,
+                search=search,
+                status=status,
+                publisher=publisher,
+                year=year,
+                order_by=order_by,
+                order=order,
+                count=count
+            )
         
         # Transform to response format
         legal_acts = [
@@ -147,21 +194,24 @@ async def list_legal_acts(
         ]
         
         # Calculate pagination metadata
-        total_pages = (total_count + per_page - 1) // per_page
+        total_pages = (
+            (total_count + per_page - 1) // per_page if total_count is not None else None
+        )
         
         logger.info(
             f"Listed {len(legal_acts)} legal acts (page={page}/{total_pages}, "
-            f"total={total_count}) with filters: search={search}, status={status}, "
-            f"publisher={publisher}, year={year}"
+            f"total={total_count}, pagination={pagination}) with filters: "
+            f"search={search}, status={status}, publisher={publisher}, year={year}"
         )
         
         return LegalActListResponse(
             legal_acts=legal_acts,
             pagination=PaginationMetadata(
-                page=page,
+                page=page if pagination == "offset" else None,
                 per_page=per_page,
                 total_pages=total_pages,
-                total_count=total_count
+                total_count=total_count,
+                next_cursor=next_cursor
             )
         )
         
@@ -276,7 +326,7 @@ async def get_legal_act(act_id: str):
     - Incoming: Acts affecting this act (others → this)
     
     Query parameters:
-    - depth: Graph traversal depth (1 or 2)
+    - depth: Graph traversal depth (1 or 2); each relation is tagged with its level
     - relation_type: Filter by type (optional)
       - modifies: Act modifies another
       - repeals: Act repeals another
@@ -321,8 +371,12 @@ async def get_legal_act_relations(
                 detail="Invalid relation_type"
             )
         
-        # Fetch relations from database
-        relations_data = await db_get_relations(act_id, depth, relation_type)
+        # Fetch relations from in-memory graph (database if not loaded)
+        graph = await get_relation_graph_service().get_graph()
+        if graph is not None:
+            relations_data = graph.act_relations(act_id, depth, relation_type)
+        else:
+            relations_data = await db_get_relations(act_id, depth, relation_type)
         
         # Transform outgoing relations
         outgoing = [
@@ -335,8 +389,9 @@ async def get_legal_act_relations(
                     status=r["target_act"]["status"]
                 ),
                 relation_type=r["relation_type"],
-                description=r.get("article_reference") or "",
-                created_at=r["created_at"]
+                description=r.get("description") or "",
+                created_at=r["created_at"],
+                depth=r.get("depth", 1)
             )
             for r in relations_data["outgoing"]
         ]
@@ -352,8 +407,9 @@ async def get_legal_act_relations(
                     status=r["source_act"]["status"]
                 ),
                 relation_type=r["relation_type"],
-                description=r.get("article_reference") or "",
-                created_at=r["created_at"]
+                description=r.get("description") or "",
+                created_at=r["created_at"],
+                depth=r.get("depth", 1)
             )
             for r in relations_data["incoming"]
         ]
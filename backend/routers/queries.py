@@ -5,16 +5,22 @@ API endpoints for query management:
 - POST /api/v1/queries - Submit new query
 - GET /api/v1/queries - List queries (with pagination)
 - GET /api/v1/queries/{query_id} - Get query details
+- GET /api/v1/queries/{query_id}/stream - Stream response tokens (SSE)
 - POST /api/v1/queries/{query_id}/accurate-response - Request accurate response
 - DELETE /api/v1/queries/{query_id} - Delete query
 
 All endpoints require authentication (JWT token).
 """
 
+import asyncio
+import json
 import logging
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from fastapi.responses import Response
+import uuid
+from contextlib import aclosing
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response, StreamingResponse
 
 from backend.models.query import (
     QuerySubmitRequest,
@@ -29,20 +35,42 @@ from backend.models.query import (
     AccurateResponseDetail,
     RatingDetail,
     PaginationMetadata,
-    QueryProcessingStatus
+    QueryProcessingStatus,
+    ResponseType
 )
 from backend.models.error import ApiErrorCode, create_error_response
 from backend.middleware.auth import get_current_user
 from backend.middleware.rate_limit import check_rate_limit
 from backend.services.rag_pipeline import (
-    process_query_fast_background,
-    process_query_accurate_background
+    get_rag_metrics,
+    stream_query_fast,
+    stream_query_accurate
+)
+from backend.services.job_queue import enqueue_job
+from backend.services.cancellation import get_cancellation_registry
+from backend.services.generation_leases import (
+    JOB_LEASE_OWNER,
+    get_generation_leases,
+    job_lease_ttl,
+    stream_lease_ttl
+)
+from backend.services.exceptions import (
+    NoRelevantActsError,
+    OLLAMATimeoutError,
+    OLLAMAUnavailableError,
+    JobQueueFullError,
+    QueryCancelledError,
+    RAGPipelineError
 )
 from backend.db.queries import (
+    create_query,
     get_query_by_id,
     list_queries,
+    list_queries_after,
+    set_query_response_error,
     delete_query
 )
+from backend.db.pagination import PAGINATION_MODES, COUNT_MODES
 from backend.db.ratings import get_ratings_by_query
 
 logger = logging.getLogger(__name__)
@@ -59,6 +87,15 @@ router = APIRouter(
 # POST /api/v1/queries - Submit New Query
 # =========================================================================
 
+async def _discard_unqueued_query(query_id: str, user_id: str) -> None:
+    """Remove a query whose fast response job could not be queued (best effort)."""
+    await get_generation_leases().release(query_id, "fast", JOB_LEASE_OWNER)
+    try:
+        await delete_query(query_id, user_id)
+    except Exception as e:
+        logger.error(f"Failed to remove unqueued query {query_id}: {e}")
+
+
 @router.post(
     "",
     response_model=QuerySubmitResponse,
@@ -68,11 +105,17 @@ router = APIRouter(
     Submit a new legal question for processing.
     
     The query is processed asynchronously:
-    1. Query created immediately (returns 202 Accepted)
-    2. Fast response generated in background (<15s)
+    1. Query created immediately (returns 202 Accepted with query_id)
+    2. Fast response job queued and generated by a worker (<15s)
     3. Results stored in database
     4. Client can poll GET /api/v1/queries/{query_id} for results
     
+    With "stream": true no job is queued - the client opens
+    GET /api/v1/queries/{query_id}/stream to receive tokens as they are
+    generated. Streams of queued queries wait for the job instead.
+    
+    If the job cannot be queued (503) the query is not kept in history.
+    
     Rate limits:
     - 10 queries per minute (authenticated users)
     
@@ -86,12 +129,11 @@ router = APIRouter(
         400: {"description": "Invalid query text (10-1000 chars required)"},
         401: {"description": "Unauthorized (invalid/missing token)"},
         429: {"description": "Rate limit exceeded"},
-        503: {"description": "Service unavailable (OLLAMA or database down)"}
+        503: {"description": "Service unavailable (OLLAMA or database down, or job queue full)"}
     }
 )
 async def submit_query(
     request: QuerySubmitRequest,
-    background_tasks: BackgroundTasks,
     user_id: str = Depends(get_current_user)
 ):
     """
@@ -99,7 +141,6 @@ async def submit_query(
     
     Args:
         request: Query submission request (query_text)
-        background_tasks: FastAPI background tasks
         user_id: Authenticated user ID (from JWT)
         
     Returns:
@@ -111,27 +152,54 @@ async def submit_query(
             f"Query submitted by user {user_id}: {request.query_text[:50]}..."
         )
         
-        # Add background task for RAG pipeline
-        background_tasks.add_task(
-            process_query_fast_background,
-            user_id=user_id,
-            query_text=request.query_text
-        )
+        query_id = await create_query(user_id, request.query_text)
+        
+        # Streaming: generation runs in the SSE endpoint
+        if request.stream:
+            return QuerySubmitResponse(
+                query_id=query_id,
+                query_text=request.query_text,
+                status="pending",
+                created_at=datetime.now(timezone.utc),
+                fast_response={
+                    "status": "pending",
+                    "estimated_time_seconds": 15
+                }
+            )
+        
+        # Queue fast response job (consumed by job workers); streams opened
+        # for the query attach to the job instead of generating again
+        await get_generation_leases().acquire(query_id, "fast", JOB_LEASE_OWNER, job_lease_ttl())
+        try:
+            await enqueue_job("fast", {
+                "query_id": query_id,
+                "user_id": user_id,
+                "query_text": request.query_text
+            })
+        except Exception:
+            # Nothing would ever answer the query - do not leave it pending
+            await _discard_unqueued_query(query_id, user_id)
+            raise
         
         # Return immediate response (202 Accepted)
-        # Note: query_id will be generated by background task
-        # For now, return processing status
         return QuerySubmitResponse(
-            query_id="processing",  # Will be assigned in background
+            query_id=query_id,
             query_text=request.query_text,
             status="processing",
-            created_at=None,  # Will be set in background
+            created_at=datetime.now(timezone.utc),
             fast_response={
                 "status": "processing",
                 "estimated_time_seconds": 15
             }
         )
         
+    except JobQueueFullError as e:
+        logger.warning(f"Query rejected, {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many queries are being processed. Please try again shortly.",
+            headers={"Retry-After": "30"}
+        )
     except Exception as e:
         logger.error(f"Failed to submit query: {e}", exc_info=True)
         raise HTTPException(
@@ -157,6 +225,10 @@ async def submit_query(
     Pagination:
     - Default: page=1, per_page=20
     - Max per_page: 100
+    - pagination=cursor: keyset pagination over (created_at, id); pass
+      pagination.next_cursor as cursor to get the next page (page is ignored)
+    - count (cursor mode): exact, estimated or none (default: exact);
+      offset mode always returns the exact count
     
     Ordering:
     - desc: Newest first (default)
@@ -172,6 +244,9 @@ async def get_queries(
     page: int = 1,
     per_page: int = 20,
     order: str = "desc",
+    pagination: str = "offset",
+    cursor: Optional[str] = None,
+    count: str = "exact",
     user_id: str = Depends(get_current_user)
 ):
     """
@@ -181,6 +256,9 @@ async def get_queries(
         page: Page number (1-indexed)
         per_page: Items per page (1-100)
         order: Sort order ("desc" or "asc")
+        pagination: Pagination mode ("offset" or "cursor")
+        cursor: Cursor from previous page (cursor mode)
+        count: Total count mode ("exact", "estimated" or "none", cursor mode)
         user_id: Authenticated user ID
         
     Returns:
@@ -204,22 +282,52 @@ async def get_queries(
                 detail="Order must be 'desc' or 'asc'"
             )
         
+        if pagination not in PAGINATION_MODES:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Pagination must be 'offset' or 'cursor'"
+            )
+        if count not in COUNT_MODES:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Count must be 'exact', 'estimated' or 'none'"
+            )
+        
         # Fetch queries from database
-        queries, total_count = await list_queries(
-            user_id=user_id,
-            page=page,
-            per_page=per_page,
-            order=order
-        )
+        next_cursor = None
+        if pagination == "cursor":
+            try:
+                queries, total_count, next_cursor = await list_queries_after(
+                    user_id=user_id,
+                    cursor=cursor,
+                    per_page=per_page,
+                    order=order,
+                    count=count
+                )
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=str(e)
+                )
+        else:
+            queries, total_count = await list_queries(
+                user_id=user_id,
+                page=page,
+                per_page=per_page,
+                order=order
+            )
         
         # Calculate pagination metadata
-        total_pages = (total_count + per_page - 1) // per_page
+        total_pages = (
+            (total_count + per_page - 1) // per_page if total_count is not None else None
+        )
         
-        pagination = PaginationMetadata(
-            page=page,
+        pagination_metadata = PaginationMetadata(
+            page=page if pagination == "offset" else None,
             per_page=per_page,
             total_pages=total_pages,
-            total_count=total_count
+            total_count=total_count,
+            next_cursor=next_cursor
         )
         
         # Transform to QueryListItem format
@@ -259,7 +367,7 @@ async def get_queries(
         
         return QueryListResponse(
             queries=query_items,
-            pagination=pagination
+            pagination=pagination_metadata
         )
         
     except HTTPException:
@@ -334,8 +442,13 @@ async def get_query(
                 created_at=r["created_at"]
             )
         
-        # Determine fast response status from content
-        fast_status = "completed" if query.get("fast_response_content") else "pending"
+        # Determine fast response status from content (or recorded failure)
+        if query.get("fast_response_content"):
+            fast_status = "completed"
+        elif query.get("fast_response_error"):
+            fast_status = "failed"
+        else:
+            fast_status = "pending"
         
         # Parse sources from JSONB
         sources_data = query.get("sources")
@@ -360,8 +473,13 @@ async def get_query(
             rating=ratings_map.get("fast")
         )
         
-        # Determine accurate response status from content
-        accurate_status = "completed" if query.get("accurate_response_content") else None
+        # Determine accurate response status from content (or recorded failure)
+        if query.get("accurate_response_content"):
+            accurate_status = "completed"
+        elif query.get("accurate_response_error"):
+            accurate_status = "failed"
+        else:
+            accurate_status = None
         
         # Build accurate response detail (if exists)
         accurate_response = None
@@ -402,6 +520,253 @@ async def get_query(
         )
 
 
+# =========================================================================
+# GET /api/v1/queries/{query_id}/stream - Stream Response (SSE)
+# =========================================================================
+
+# Seconds between checks whether an in-flight generation (job or another
+# stream) of the requested response has finished
+ATTACH_POLL_SECONDS = 1.0
+
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format single Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _stream_error_payload(error: Exception) -> Dict[str, Any]:
+    """Map pipeline exception to error event payload."""
+    if isinstance(error, NoRelevantActsError):
+        code, message = ApiErrorCode.NOT_FOUND, str(error)
+    elif isinstance(error, QueryCancelledError):
+        code, message = ApiErrorCode.GONE, "Query was cancelled"
+    elif isinstance(error, OLLAMATimeoutError):
+        code, message = ApiErrorCode.GENERATION_TIMEOUT, "Response generation timed out"
+    elif isinstance(error, OLLAMAUnavailableError):
+        code, message = ApiErrorCode.LLM_SERVICE_UNAVAILABLE, "LLM service unavailable"
+    else:
+        code, message = ApiErrorCode.INTERNAL_SERVER_ERROR, "Response generation failed"
+    return create_error_response(code=code, message=message).model_dump(mode="json")
+
+
+async def _sse_events(
+    events: AsyncIterator[Dict[str, Any]],
+    query_id: str,
+    response_type: ResponseType = "fast"
+) -> AsyncIterator[str]:
+    """
+    Serialize pipeline events to SSE, turning failures into an error event.
+    
+    The pipeline is closed as soon as the stream ends for any reason, so a
+    client disconnect or a deleted query (the stream task is registered
+    with the cancellation registry) aborts the Ollama request instead of
+    generating for nobody.
+    """
+    registry = get_cancellation_registry()
+    
+    try:
+        with registry.scope(query_id):
+            async with aclosing(events):
+                async for event in events:
+                    if registry.is_cancelled(query_id):
+                        raise QueryCancelledError(f"Query {query_id} was cancelled")
+                    yield _format_sse(event["event"], event["data"])
+    except QueryCancelledError as e:
+        logger.info(f"Streaming stopped for query {query_id}: {e}")
+        get_rag_metrics().record_cancellation(response_type, registry.reason(query_id) or "cancelled")
+        yield _format_sse("error", _stream_error_payload(e))
+    except Exception as e:
+        logger.error(f"Streaming failed for query {query_id}: {e}")
+        yield _format_sse("error", _stream_error_payload(e))
+    except BaseException:
+        # Client disconnected (stream closed or cancelled mid-generation)
+        logger.info(f"Client disconnected from {response_type} stream of query {query_id}")
+        get_rag_metrics().record_cancellation(response_type, registry.reason(query_id) or "disconnected")
+        raise
+
+
+async def _replay_completed(content: str, data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Emit an already stored response as a single token followed by done."""
+    yield {"event": "token", "data": {"text": content}}
+    yield {"event": "done", "data": data}
+
+
+def _stored_response(
+    query_id: str,
+    query: Dict[str, Any],
+    response_type: ResponseType
+) -> Optional[AsyncIterator[Dict[str, Any]]]:
+    """Replay events of a stored response (None if not generated yet)."""
+    if response_type == "fast":
+        if not query.get("fast_response_content"):
+            return None
+        return _replay_completed(query["fast_response_content"], {
+            "query_id": query_id,
+            "content": query["fast_response_content"],
+            "sources": query.get("sources"),
+            "model_name": query.get("fast_model_name"),
+            "generation_time_ms": query.get("fast_generation_time_ms")
+        })
+    
+    if not query.get("accurate_response_content"):
+        return None
+    return _replay_completed(query["accurate_response_content"], {
+        "query_id": query_id,
+        "content": query["accurate_response_content"],
+        "model_name": query.get("accurate_model_name"),
+        "generation_time_ms": query.get("accurate_generation_time_ms")
+    })
+
+
+async def _mark_failed(query_id: str, response_type: ResponseType, error: Exception) -> None:
+    """Record a failed generation so the query is not reported as pending."""
+    try:
+        await set_query_response_error(query_id, response_type, f"{type(error).__name__}: {error}")
+    except Exception as e:
+        logger.error(f"Failed to mark {response_type} response of query {query_id} as failed: {e}")
+
+
+async def _generate_or_attach(
+    query_id: str,
+    query_text: str,
+    user_id: str,
+    response_type: ResponseType
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Generate a response in this stream, or wait for whoever generates it.
+    
+    Only the holder of the generation lease runs the pipeline. While a
+    queued job or another stream (e.g. before an EventSource reconnect)
+    holds it, the stream waits and replays the stored response, or reports
+    the failure of the generation it waited for.
+    """
+    leases = get_generation_leases()
+    owner = f"stream:{uuid.uuid4().hex}"
+    attached = False
+    
+    while not await leases.acquire(query_id, response_type, owner, stream_lease_ttl(response_type)):
+        if not attached:
+            logger.info(f"Stream of query {query_id} attached to in-flight {response_type} generation")
+            attached = True
+        while await leases.holder(query_id, response_type) is not None:
+            await asyncio.sleep(ATTACH_POLL_SECONDS)
+    
+    try:
+        # The previous lease holder may have stored the response meanwhile
+        query = await get_query_by_id(query_id, user_id)
+        if not query:
+            raise QueryCancelledError(f"Query {query_id} was deleted")
+        
+        stored = _stored_response(query_id, query, response_type)
+        if stored is not None:
+            async for event in stored:
+                yield event
+            return
+        
+        error = query.get(f"{response_type}_response_error")
+        if error and attached:
+            raise RAGPipelineError(f"Generation of {response_type} response failed ({error})")
+        if error:
+            # Opening a new stream retries a failed generation
+            await set_query_response_error(query_id, response_type, None)
+        
+        pipeline = stream_query_fast if response_type == "fast" else stream_query_accurate
+        try:
+            async with aclosing(pipeline(query_id, query_text, user_id)) as events:
+                async for event in events:
+                    yield event
+        except QueryCancelledError:
+            raise
+        except Exception as e:
+            await _mark_failed(query_id, response_type, e)
+            raise
+    finally:
+        await asyncio.shield(leases.release(query_id, response_type, owner))
+
+
+@router.get(
+    "/{query_id}/stream",
+    summary="Stream response tokens (SSE)",
+    description="""
+    Stream a fast or accurate response as Server-Sent Events.
+    
+    Events:
+    - token: {"text": "..."} - next generated fragment
+    - done: full response metadata (content, sources, model_name,
+      generation_time_ms) - sent once the response is persisted
+    - error: standard error response body
+    
+    If the requested response is already stored it is replayed as a single
+    token event followed by done. The full text is persisted at the end of
+    the stream, so GET /api/v1/queries/{query_id} returns it afterwards;
+    if generation fails the response is marked failed.
+    
+    A response is generated once: while a queued job or another stream
+    (e.g. before a reconnect) generates it, the stream waits and replays
+    the stored response when it is ready.
+    
+    Accurate responses require a completed fast response.
+    """,
+    responses={
+        200: {"description": "Event stream", "content": {"text/event-stream": {}}},
+        401: {"description": "Unauthorized"},
+        404: {"description": "Query not found"},
+        409: {"description": "Fast response must be completed first"}
+    }
+)
+async def stream_query_response(
+    query_id: str,
+    response_type: ResponseType = "fast",
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Stream response tokens for a query.
+    
+    Args:
+        query_id: Query ID (UUID)
+        response_type: "fast" or "accurate"
+        user_id: Authenticated user ID
+        
+    Returns:
+        StreamingResponse: text/event-stream
+    """
+    try:
+        query = await get_query_by_id(query_id, user_id)
+    except Exception as e:
+        logger.error(f"Failed to load query {query_id} for streaming: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve query"
+        )
+    
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Query not found"
+        )
+    
+    events = _stored_response(query_id, query, response_type)
+    
+    if events is None:
+        if response_type == "accurate" and not query.get("fast_response_content"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Fast response must be completed before requesting accurate response"
+            )
+        events = _generate_or_attach(query_id, query.get("query_text", ""), user_id, response_type)
+    
+    logger.info(f"Streaming {response_type} response for query {query_id} (user {user_id})")
+    
+    return StreamingResponse(
+        _sse_events(events, query_id, response_type),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+        }
+    )
+
+
 # =========================================================================
 # POST /api/v1/queries/{query_id}/accurate-response - Request Accurate
 # =========================================================================
@@ -422,9 +787,12 @@ async def get_query(
     
     The accurate response is generated asynchronously:
     1. Request accepted immediately (returns 202)
-    2. Response generated in background (<240s)
+    2. Accurate response job queued and generated by a worker (<240s)
     3. Client can poll GET /api/v1/queries/{query_id} for results
     
+    Requesting it again while it is being generated (or after it failed
+    and before a retry finishes) does not queue a second job.
+    
     Rate limits:
     - 10 requests per minute (authenticated users)
     """,
@@ -433,12 +801,12 @@ async def get_query(
         401: {"description": "Unauthorized"},
         404: {"description": "Query not found"},
         409: {"description": "Accurate response already exists"},
-        429: {"description": "Rate limit exceeded"}
+        429: {"description": "Rate limit exceeded"},
+        503: {"description": "Job queue full"}
     }
 )
 async def request_accurate_response(
     query_id: str,
-    background_tasks: BackgroundTasks,
     user_id: str = Depends(get_current_user)
 ):
     """
@@ -446,7 +814,6 @@ async def request_accurate_response(
     
     Args:
         query_id: Query ID (UUID)
-        background_tasks: FastAPI background tasks
         user_id: Authenticated user ID
         
     Returns:
@@ -476,18 +843,31 @@ async def request_accurate_response(
                 detail="Fast response must be completed before requesting accurate response"
             )
         
-        # Add background task for accurate response generation
+        # Queue accurate response job (consumed by job workers), unless a job
+        # or stream is already generating it
         query_text = query.get("query_text", "")
         
-        background_tasks.add_task(
-            process_query_accurate_background,
-            query_id=query_id,
-            query_text=query_text
-        )
-        
-        logger.info(
-            f"Accurate response requested for query {query_id} by user {user_id}"
-        )
+        leases = get_generation_leases()
+        if await leases.acquire(query_id, "accurate", JOB_LEASE_OWNER, job_lease_ttl()):
+            try:
+                if query.get("accurate_response_error"):
+                    await set_query_response_error(query_id, "accurate", None)
+                
+                await enqueue_job("accurate", {
+                    "query_id": query_id,
+                    "user_id": user_id,
+                    "query_text": query_text
+                })
+            except Exception:
+                # Not queued - let the next request try again
+                await leases.release(query_id, "accurate", JOB_LEASE_OWNER)
+                raise
+            
+            logger.info(
+                f"Accurate response requested for query {query_id} by user {user_id}"
+            )
+        else:
+            logger.info(f"Accurate response for query {query_id} is already being generated")
         
         # Return immediate response (202 Accepted)
         return AccurateResponseSubmitResponse(
@@ -500,6 +880,13 @@ async def request_accurate_response(
         
     except HTTPException:
         raise
+    except JobQueueFullError as e:
+        logger.warning(f"Accurate response rejected, {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many responses are being generated. Please try again shortly.",
+            headers={"Retry-After": "60"}
+        )
     except Exception as e:
         logger.error(f"Failed to request accurate response: {e}", exc_info=True)
         raise HTTPException(
@@ -522,6 +909,7 @@ async def request_accurate_response(
     This operation:
     - Deletes the query and all associated data
     - Cascades to ratings (if any)
+    - Cancels response generation still running or queued for the query
     - Cannot be undone
     - Requires query ownership (RLS enforced)
     
@@ -559,6 +947,9 @@ async def delete_query_endpoint(
         
         logger.info(f"Deleted query {query_id} for user {user_id}")
         
+        # Stop generating answers nobody will read (frees Ollama slots)
+        await get_cancellation_registry().cancel(query_id, reason="deleted")
+        
         # Return 204 No Content
         return Response(status_code=status.HTTP_204_NO_CONTENT)
         
@@ -0,0 +1,492 @@
+"""
+PrawnikGPT Backend - Semantic Answer Cache
+
+In-process cache of fast responses for near-duplicate questions.
+
+A prior answer is reused when both hold:
+- cosine similarity of the query embeddings >= answer_cache_similarity_threshold
+- Jaccard overlap of the retrieved chunk-ID sets >= answer_cache_min_chunk_overlap
+
+The lookup runs after retrieval, so a hit skips only LLM generation - the
+embedding and vector search still run and provide the chunk set that guards
+against reusing an answer grounded in different provisions.
+
+Invalidation:
+- Each entry stores a fingerprint of every chunk it was generated from. If a
+  chunk retrieved now has different content than when the answer was cached,
+  the entry is dropped (chunks edited or re-ingested).
+- invalidate_chunks() / invalidate_acts() drop entries built on given chunks
+  or legal acts; clear() drops all. AnswerCacheInvalidator calls them
+  periodically (see periodic_answer_cache_invalidation) for legal acts
+  updated since the last check and for chunks deleted from the database.
+- Entries expire after answer_cache_ttl and are evicted LRU beyond
+  answer_cache_size. Entries of another fast model never match.
+
+Requires numpy (optional dependency); without it the cache is disabled.
+The cache is per worker - near-duplicates are served from memory, with no
+Redis round trip on the hot path.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from backend.config import settings
+from backend.db.supabase_client import get_supabase
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+# Candidates (by embedding similarity) checked for chunk overlap per lookup
+MAX_CANDIDATES = 5
+
+# Changed legal acts fetched per invalidation check (the rest on the next check)
+ACT_CHANGES_LIMIT = 1000
+
+# Chunk IDs checked for existence per PostgREST request
+EXISTENCE_CHECK_BATCH = 200
+
+
+# =========================================================================
+# HELPERS
+# =========================================================================
+
+def chunk_fingerprint(chunk: Dict[str, Any]) -> str:
+    """Short hash of chunk content (detects edited chunks with the same ID)."""
+    content = chunk.get("content") or ""
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def chunk_overlap(first: set, second: set) -> float:
+    """Jaccard overlap of two chunk-ID sets (0-1)."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+# =========================================================================
+# SEMANTIC ANSWER CACHE
+# =========================================================================
+
+class SemanticAnswerCache:
+    """
+    Cache of fast responses keyed by query embedding and retrieved chunks.
+
+    Example Usage:
+        ```python
+        cache = get_answer_cache()
+
+        hit = cache.lookup(query_embedding, chunks, model_name)
+        if hit is None:
+            response_text, generation_time_ms = await generate_text_fast(...)
+            cache.store(query_id, query_embedding, chunks, response_text,
+                        model_name, generation_time_ms)
+        ```
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: int = 86400,
+        similarity_threshold: float = 0.95,
+        min_chunk_overlap: float = 0.8
+    ):
+        """
+        Initialize SemanticAnswerCache.
+
+        Args:
+            max_size: Max cached answers (LRU eviction)
+            ttl: Entry lifetime in seconds
+            similarity_threshold: Min cosine similarity of query embeddings
+            min_chunk_overlap: Min Jaccard overlap of retrieved chunk IDs
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.min_chunk_overlap = min_chunk_overlap
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        # Normalized embeddings of entries (rebuilt lazily after changes)
+        self._matrix = None
+        self._matrix_keys: List[str] = []
+
+        # Counters
+        self.hits: int = 0
+        self.misses: int = 0
+        self.stale: int = 0
+        self.invalidated: int = 0
+        self.generation_ms_saved: int = 0
+        self._hit_similarity_sum: float = 0.0
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    def _remove(self, key: str) -> None:
+        """Remove entry and mark the embedding matrix dirty."""
+        if self._entries.pop(key, None) is not None:
+            self._matrix = None
+
+    def _expire(self) -> None:
+        """Drop entries older than ttl."""
+        cutoff = time.time() - self.ttl
+        expired = [key for key, entry in self._entries.items() if entry["created_at"] < cutoff]
+        for key in expired:
+            self._remove(key)
+
+    def _candidates(self, query_embedding: List[float]) -> List[tuple]:
+        """Entries above the similarity threshold, most similar first."""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query /= norm
+
+        if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+            # Rebuild from entries of the query dimension
+            self._matrix_keys = [
+                key for key, entry in self._entries.items()
+                if entry["embedding"].shape[0] == query.shape[0]
+            ]
+            if not self._matrix_keys:
+                self._matrix = None
+                return []
+            self._matrix = np.stack([self._entries[key]["embedding"] for key in self._matrix_keys])
+
+        similarities = self._matrix @ query
+        top = np.argsort(-similarities)[:MAX_CANDIDATES]
+        return [
+            (self._matrix_keys[i], float(similarities[i]))
+            for i in top
+            if similarities[i] >= self.similarity_threshold
+        ]
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    def lookup(
+        self,
+        query_embedding: List[float],
+        chunks: List[Dict[str, Any]],
+        model_name: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find cached answer for a near-duplicate question.
+
+        Args:
+            query_embedding: Embedding of the new question
+            chunks: Chunks retrieved for the new question
+            model_name: Current fast model (answers of other models never match)
+
+        Returns:
+            Optional[Dict]: Hit with content, model_name, source_query_id,
+                similarity, chunk_overlap and generation_time_ms; None on miss
+        """
+        self._expire()
+
+        current = {chunk["id"]: chunk_fingerprint(chunk) for chunk in chunks}
+
+        for key, similarity in self._candidates(query_embedding):
+            entry = self._entries.get(key)
+            if entry is None or entry["model_name"] != model_name:
+                continue
+
+            overlap = chunk_overlap(set(current), set(entry["chunks"]))
+            if overlap < self.min_chunk_overlap:
+                continue
+
+            if any(
+                entry["chunks"][chunk_id] != fingerprint
+                for chunk_id, fingerprint in current.items()
+                if chunk_id in entry["chunks"]
+            ):
+                logger.info(f"Answer cache entry {key} is stale (chunk content changed)")
+                self._remove(key)
+                self.stale += 1
+                continue
+
+            self._entries.move_to_end(key)
+            entry["hits"] += 1
+            self.hits += 1
+            self.generation_ms_saved += entry["generation_time_ms"]
+            self._hit_similarity_sum += similarity
+
+            return {
+                "content": entry["content"],
+                "model_name": entry["model_name"],
+                "source_query_id": key,
+                "similarity": similarity,
+                "chunk_overlap": overlap,
+                "generation_time_ms": entry["generation_time_ms"]
+            }
+
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        query_id: str,
+        query_embedding: List[float],
+        chunks: List[Dict[str, Any]],
+        content: str,
+        model_name: str,
+        generation_time_ms: int
+    ) -> None:
+        """
+        Cache generated fast response.
+
+        Args:
+            query_id: Query the answer was generated for
+            query_embedding: Query embedding
+            chunks: Chunks the answer was generated from
+            content: Response text
+            model_name: Fast model that generated the response
+            generation_time_ms: Generation time (reported as saved on hits)
+        """
+        if self.max_size <= 0 or not content:
+            return
+
+        embedding = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return
+
+        self._remove(query_id)
+        self._entries[query_id] = {
+            "embedding": embedding / norm,
+            "chunks": {chunk["id"]: chunk_fingerprint(chunk) for chunk in chunks},
+            "act_ids": {chunk.get("legal_act_id") for chunk in chunks},
+            "content": content,
+            "model_name": model_name,
+            "generation_time_ms": generation_time_ms,
+            "created_at": time.time(),
+            "hits": 0
+        }
+        self._matrix = None
+
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_chunks(self, chunk_ids: List[str]) -> int:
+        """
+        Drop answers generated from any of the given chunks.
+
+        Returns:
+            int: Number of dropped entries
+        """
+        ids = set(chunk_ids)
+        keys = [key for key, entry in self._entries.items() if ids & entry["chunks"].keys()]
+        for key in keys:
+            self._remove(key)
+        self.invalidated += len(keys)
+        return len(keys)
+
+    def invalidate_acts(self, act_ids: List[str]) -> int:
+        """
+        Drop answers generated from chunks of any of the given legal acts.
+
+        Returns:
+            int: Number of dropped entries
+        """
+        ids = set(act_ids)
+        keys = [key for key, entry in self._entries.items() if ids & entry["act_ids"]]
+        for key in keys:
+            self._remove(key)
+        self.invalidated += len(keys)
+        return len(keys)
+
+    def chunk_ids(self) -> List[str]:
+        """IDs of all chunks cached answers were generated from."""
+        ids = set()
+        for entry in self._entries.values():
+            ids.update(entry["chunks"])
+        return sorted(ids)
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        self._entries.clear()
+        self._matrix = None
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidated = 0
+        self.generation_ms_saved = 0
+        self._hit_similarity_sum = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Hit/miss counters, hit rate, mean hit similarity,
+                generation time saved and size
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total > 0 else 0.0,
+            "avg_hit_similarity": self._hit_similarity_sum / self.hits if self.hits else 0.0,
+            "generation_ms_saved": self.generation_ms_saved,
+            "stale_evictions": self.stale,
+            "invalidated": self.invalidated,
+            "size": len(self._entries),
+            "max_size": self.max_size
+        }
+
+
+# =========================================================================
+# DATA CHANGE TRACKING
+# =========================================================================
+
+class AnswerCacheInvalidator:
+    """
+    Drops cached answers whose legal acts or chunks changed in the database.
+
+    - Legal acts with updated_at after the previous check (status, title,
+      re-ingestion): answers built on their chunks are dropped.
+    - Fewer chunks than at the previous check: cached chunk IDs that no
+      longer exist are looked up and answers built on them are dropped.
+
+    Edited chunk content is caught at lookup time by the chunk fingerprints.
+    """
+
+    def __init__(self, cache: SemanticAnswerCache):
+        """
+        Args:
+            cache: Cache to invalidate
+        """
+        self.cache = cache
+        self._acts_updated_at: Optional[str] = None
+        self._chunk_count: Optional[int] = None
+        self._started = False
+
+    async def _fetch_changed_acts(self, since: Optional[str]) -> List[Dict[str, Any]]:
+        """Legal acts (id, updated_at) updated after since, oldest first (latest one if since is None)."""
+        query = get_supabase().table("legal_acts").select("id, updated_at")
+        if since is None:
+            query = query.order("updated_at", desc=True).limit(1)
+        else:
+            query = query.gt("updated_at", since).order("updated_at").limit(ACT_CHANGES_LIMIT)
+        response = await query.execute()
+        return response.data or []
+
+    async def _fetch_chunk_count(self) -> Optional[int]:
+        """Number of chunks in the database."""
+        response = await get_supabase().table("legal_act_chunks").select("id", count="exact").limit(1).execute()
+        return response.count
+
+    async def _fetch_existing_chunks(self, chunk_ids: List[str]) -> set:
+        """Subset of chunk_ids that still exist."""
+        existing = set()
+        for start in range(0, len(chunk_ids), EXISTENCE_CHECK_BATCH):
+            response = await (
+                get_supabase().table("legal_act_chunks")
+                .select("id")
+                .in_("id", chunk_ids[start:start + EXISTENCE_CHECK_BATCH])
+                .execute()
+            )
+            existing.update(row["id"] for row in response.data or [])
+        return existing
+
+    async def check(self) -> int:
+        """
+        Compare the database with the previous check and invalidate changes.
+
+        The first check only records the current state.
+
+        Returns:
+            int: Number of dropped entries
+        """
+        invalidated = 0
+
+        acts = await self._fetch_changed_acts(self._acts_updated_at if self._started else None)
+        if acts:
+            if self._started:
+                invalidated += self.cache.invalidate_acts([act["id"] for act in acts])
+            self._acts_updated_at = acts[-1]["updated_at"]
+
+        chunk_count = await self._fetch_chunk_count()
+        if self._started and chunk_count is not None and self._chunk_count is not None \
+                and chunk_count < self._chunk_count:
+            chunk_ids = self.cache.chunk_ids()
+            existing = await self._fetch_existing_chunks(chunk_ids)
+            deleted = [chunk_id for chunk_id in chunk_ids if chunk_id not in existing]
+            if deleted:
+                invalidated += self.cache.invalidate_chunks(deleted)
+        self._chunk_count = chunk_count
+
+        self._started = True
+        return invalidated
+
+
+# =========================================================================
+# SINGLETON INSTANCE
+# =========================================================================
+
+_answer_cache: SemanticAnswerCache | None = None
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Get SemanticAnswerCache singleton (None if disabled or numpy is missing).
+
+    Returns:
+        Optional[SemanticAnswerCache]: Cache instance or None
+    """
+    global _answer_cache
+
+    if not settings.answer_cache_enabled:
+        return None
+
+    if np is None:
+        logger.warning("ANSWER_CACHE_ENABLED=true but numpy is not installed")
+        return None
+
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache(
+            max_size=settings.answer_cache_size,
+            ttl=settings.answer_cache_ttl,
+            similarity_threshold=settings.answer_cache_similarity_threshold,
+            min_chunk_overlap=settings.answer_cache_min_chunk_overlap
+        )
+
+    return _answer_cache
+
+
+async def periodic_answer_cache_invalidation(interval_seconds: int = 300):
+    """
+    Drop cached answers built on changed legal acts or deleted chunks.
+
+    Args:
+        interval_seconds: Check interval in seconds (0 = disabled)
+    """
+    cache = get_answer_cache()
+    if cache is None or interval_seconds <= 0:
+        return
+
+    invalidator = AnswerCacheInvalidator(cache)
+
+    while True:
+        try:
+            invalidated = await invalidator.check()
+            if invalidated:
+                logger.info(f"Answer cache: dropped {invalidated} answers built on changed data")
+        except Exception as e:
+            logger.error(f"Answer cache invalidation check failed: {e}")
+
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,162 @@
+"""
+PrawnikGPT Backend - Cache Payload Codec
+
+Compact binary encoding for JSON-like cache payloads stored in Redis:
+- orjson serialization (falls back to stdlib json with ensure_ascii=False,
+  so Polish characters are stored as UTF-8 instead of \\uXXXX escapes)
+- Optional zstd or lz4 compression for payloads above a size threshold
+
+Encoded layout: 1-byte format tag + body
+- 0x01: uncompressed JSON
+- 0x02: zstd-compressed JSON
+- 0x03: lz4-frame-compressed JSON
+
+Payloads written before the codec existed (plain JSON text) are still
+decoded. Compression libraries are optional - if the configured one is not
+installed, payloads are stored uncompressed.
+"""
+
+import json
+import logging
+from typing import Any, Optional
+
+from backend.config import settings
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # Optional dependency
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+TAG_JSON = b"\x01"
+TAG_ZSTD = b"\x02"
+TAG_LZ4 = b"\x03"
+
+ZSTD_LEVEL = 3
+
+_zstd_compressor = None
+_zstd_decompressor = None
+_warned_missing = False
+
+
+# =========================================================================
+# SERIALIZATION
+# =========================================================================
+
+def _dumps(value: Any) -> bytes:
+    """Serialize value to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    """Deserialize UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _compression() -> Optional[str]:
+    """Configured compression if its library is installed, else None."""
+    global _warned_missing
+    
+    method = settings.redis_cache_compression
+    if method == "zstd" and zstandard is not None:
+        return "zstd"
+    if method == "lz4" and lz4_frame is not None:
+        return "lz4"
+    
+    if method != "none" and not _warned_missing:
+        logger.warning(
+            f"REDIS_CACHE_COMPRESSION={method} but the library is not installed - "
+            f"cache payloads are stored uncompressed"
+        )
+        _warned_missing = True
+    return None
+
+
+def _zstd():
+    """Lazily created zstd (de)compressor pair."""
+    global _zstd_compressor, _zstd_decompressor
+    if _zstd_compressor is None:
+        _zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        _zstd_decompressor = zstandard.ZstdDecompressor()
+    return _zstd_compressor, _zstd_decompressor
+
+
+# =========================================================================
+# PUBLIC API
+# =========================================================================
+
+def encode_payload(value: Any) -> bytes:
+    """
+    Encode JSON-compatible value for storage in Redis.
+    
+    Args:
+        value: JSON-compatible value (dicts, lists, strings, numbers)
+    
+    Returns:
+        bytes: Format tag followed by (optionally compressed) JSON
+    """
+    body = _dumps(value)
+    
+    if len(body) >= settings.redis_cache_compression_min_bytes:
+        method = _compression()
+        if method == "zstd":
+            return TAG_ZSTD + _zstd()[0].compress(body)
+        if method == "lz4":
+            return TAG_LZ4 + lz4_frame.compress(body)
+    
+    return TAG_JSON + body
+
+
+def decode_payload(data: bytes) -> Any:
+    """
+    Decode payload produced by encode_payload() (or legacy plain JSON).
+    
+    Args:
+        data: Raw bytes from Redis
+    
+    Returns:
+        Any: Decoded value
+    
+    Raises:
+        ValueError: If payload format is unknown or its library is missing
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    
+    tag, body = data[:1], data[1:]
+    
+    if tag == TAG_JSON:
+        return _loads(body)
+    if tag == TAG_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd payload but zstandard is not installed")
+        return _loads(_zstd()[1].decompress(body))
+    if tag == TAG_LZ4:
+        if lz4_frame is None:
+            raise ValueError("lz4 payload but lz4 is not installed")
+        return _loads(lz4_frame.decompress(body))
+    if tag in (b"{", b"["):
+        # Legacy entry (plain json.dumps)
+        return _loads(data)
+    
+    raise ValueError(f"Unknown cache payload format: {tag!r}")
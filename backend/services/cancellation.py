@@ -0,0 +1,315 @@
+"""
+PrawnikGPT Backend - Query Cancellation Registry
+
+Stops generation work for queries nobody is waiting for any more (query
+deleted via DELETE /api/v1/queries/{query_id}, stream client gone), so
+abandoned answers do not hold an Ollama slot for up to 240s.
+
+- run(query_id, coro) executes pipeline work as a task registered under
+  the query ID; cancel(query_id) cancels it. Cancelling the task aborts the
+  in-flight httpx request to Ollama and releases the scheduler slot, and
+  run() raises QueryCancelledError.
+- cancel() leaves a tombstone (CANCEL_TOMBSTONE_SECONDS), so jobs of the
+  query that are still queued are skipped when they start.
+- With Redis configured the tombstone is shared: workers in other
+  processes (`python -m backend.worker`) poll it for the queries they are
+  running and cancel them as well.
+- Streams run their own task inside scope(query_id), so cancel() interrupts
+  them at once, also while they wait for Ollama or an in-flight job (see
+  routers/queries.py).
+
+Example Usage:
+    ```python
+    registry = get_cancellation_registry()
+
+    # Worker
+    await registry.run(query_id, process_query_accurate(query_id, query_text))
+
+    # DELETE endpoint
+    await registry.cancel(query_id, reason="deleted")
+    ```
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Iterator, Optional, Set, TypeVar
+
+import redis
+
+from backend.services.exceptions import QueryCancelledError
+from backend.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+CANCEL_KEY_PREFIX = "query_cancelled"
+
+# Seconds a cancelled query stays cancelled (longer than any queued job waits)
+CANCEL_TOMBSTONE_SECONDS = 600
+
+# Seconds between Redis checks for cancellations from other processes
+CANCEL_POLL_SECONDS = 1.0
+
+
+# =========================================================================
+# REGISTRY
+# =========================================================================
+
+class CancellationRegistry:
+    """
+    Running generation tasks per query ID, with cancellation tombstones.
+
+    The registry is per process; the Redis tombstones connect API and
+    worker processes.
+    """
+
+    def __init__(self, redis_client=None, poll_interval: float = CANCEL_POLL_SECONDS):
+        """
+        Initialize CancellationRegistry.
+
+        Args:
+            redis_client: Async Redis client for cross-process cancellation
+                (None = this process only)
+            poll_interval: Seconds between Redis checks
+        """
+        self._redis = redis_client
+        self.poll_interval = poll_interval
+
+        self._tasks: Dict[str, Set[asyncio.Task]] = defaultdict(set)
+        self._tombstones: Dict[str, tuple[float, str]] = {}  # query_id -> (expires_at, reason)
+        self._watcher: Optional[asyncio.Task] = None
+
+        # Counters
+        self.cancelled_tasks: int = 0
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    def _tombstone(self, query_id: str, reason: str) -> None:
+        """Remember query_id as cancelled (and forget expired tombstones)."""
+        now = time.time()
+        for expired in [key for key, (expires_at, _) in self._tombstones.items() if expires_at < now]:
+            del self._tombstones[expired]
+        self._tombstones[query_id] = (now + CANCEL_TOMBSTONE_SECONDS, reason)
+
+    def _cancel_local(self, query_id: str) -> int:
+        """Cancel tasks of query_id running in this process."""
+        tasks = [task for task in self._tasks.get(query_id, ()) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        self.cancelled_tasks += len(tasks)
+        return len(tasks)
+
+    def _ensure_watcher(self) -> None:
+        """Start the Redis poll task while tasks are registered."""
+        if self._redis is None or (self._watcher is not None and not self._watcher.done()):
+            return
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        """Pick up cancellations by other processes for running queries."""
+        while self._tasks:
+            await asyncio.sleep(self.poll_interval)
+
+            query_ids = [
+                query_id for query_id in list(self._tasks)
+                if not self.is_cancelled(query_id)
+            ]
+            if not query_ids:
+                continue
+
+            try:
+                reasons = await self._redis.mget(
+                    [f"{CANCEL_KEY_PREFIX}:{query_id}" for query_id in query_ids]
+                )
+            except redis.exceptions.RedisError as e:
+                logger.warning(f"Cancellation check failed: {e}")
+                continue
+
+            for query_id, reason in zip(query_ids, reasons):
+                if reason is not None:
+                    reason = reason.decode() if isinstance(reason, bytes) else str(reason)
+                    self._tombstone(query_id, reason)
+                    cancelled = self._cancel_local(query_id)
+                    logger.info(f"Cancelled {cancelled} tasks of query {query_id} ({reason})")
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    def is_cancelled(self, query_id: str) -> bool:
+        """Check if query_id was cancelled in this process (no Redis round trip)."""
+        tombstone = self._tombstones.get(query_id)
+        if tombstone is None:
+            return False
+        if tombstone[0] < time.time():
+            del self._tombstones[query_id]
+            return False
+        return True
+
+    def reason(self, query_id: str) -> Optional[str]:
+        """Cancellation reason of query_id (None if not cancelled)."""
+        return self._tombstones[query_id][1] if self.is_cancelled(query_id) else None
+
+    async def check(self, query_id: str) -> None:
+        """
+        Raise if query_id was cancelled here or (with Redis) in another process.
+
+        Raises:
+            QueryCancelledError: If the query was cancelled
+        """
+        if not self.is_cancelled(query_id) and self._redis is not None:
+            try:
+                reason = await self._redis.get(f"{CANCEL_KEY_PREFIX}:{query_id}")
+            except redis.exceptions.RedisError as e:
+                logger.warning(f"Cancellation check for query {query_id} failed: {e}")
+                reason = None
+            if reason is not None:
+                self._tombstone(query_id, reason.decode() if isinstance(reason, bytes) else str(reason))
+
+        if self.is_cancelled(query_id):
+            raise QueryCancelledError(f"Query {query_id} was cancelled ({self.reason(query_id)})")
+
+    async def run(self, query_id: str, coro: Awaitable[T]) -> T:
+        """
+        Run coro as a cancellable task of query_id.
+
+        Cancellation of the caller (e.g. worker shutdown) is propagated
+        unchanged; only cancellation through cancel() is reported as
+        QueryCancelledError.
+
+        Args:
+            query_id: Query the work belongs to
+            coro: Pipeline coroutine
+
+        Returns:
+            Result of coro
+
+        Raises:
+            QueryCancelledError: If the query is or gets cancelled
+        """
+        try:
+            await self.check(query_id)
+        except QueryCancelledError:
+            coro.close()
+            raise
+
+        task = asyncio.ensure_future(coro)
+        self._tasks[query_id].add(task)
+        self._ensure_watcher()
+
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task.cancelled() and self.is_cancelled(query_id) and not asyncio.current_task().cancelling():
+                raise QueryCancelledError(
+                    f"Query {query_id} was cancelled ({self.reason(query_id)})"
+                ) from None
+            raise
+        finally:
+            tasks = self._tasks.get(query_id)
+            if tasks is not None:
+                tasks.discard(task)
+                if not tasks:
+                    del self._tasks[query_id]
+
+    @contextmanager
+    def scope(self, query_id: str) -> Iterator[None]:
+        """
+        Make the current task cancellable through cancel(query_id) while open.
+
+        For work that runs in the caller's task instead of through run()
+        (SSE streams): cancel() interrupts the task at its current await
+        and the scope raises QueryCancelledError. Other cancellations of
+        the task (client disconnect, shutdown) propagate unchanged.
+
+        Raises:
+            QueryCancelledError: If the query gets cancelled inside the scope
+        """
+        task = asyncio.current_task()
+        self._tasks[query_id].add(task)
+        self._ensure_watcher()
+
+        try:
+            yield
+        except asyncio.CancelledError:
+            if self.is_cancelled(query_id) and task.cancelling() == 1:
+                task.uncancel()
+                raise QueryCancelledError(
+                    f"Query {query_id} was cancelled ({self.reason(query_id)})"
+                ) from None
+            raise
+        finally:
+            tasks = self._tasks.get(query_id)
+            if tasks is not None:
+                tasks.discard(task)
+                if not tasks:
+                    del self._tasks[query_id]
+
+    async def cancel(self, query_id: str, reason: str = "cancelled") -> int:
+        """
+        Cancel generation for query_id in this and (with Redis) other processes.
+
+        Args:
+            query_id: Query to cancel
+            reason: Reason recorded in metrics and logs (e.g. "deleted")
+
+        Returns:
+            int: Number of tasks cancelled in this process
+        """
+        self._tombstone(query_id, reason)
+        cancelled = self._cancel_local(query_id)
+
+        if self._redis is not None:
+            try:
+                await self._redis.set(f"{CANCEL_KEY_PREFIX}:{query_id}", reason, ex=CANCEL_TOMBSTONE_SECONDS)
+            except redis.exceptions.RedisError as e:
+                logger.warning(f"Failed to publish cancellation of query {query_id}: {e}")
+
+        if cancelled:
+            logger.info(f"Cancelled {cancelled} tasks of query {query_id} ({reason})")
+        return cancelled
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get registry statistics.
+
+        Returns:
+            dict: Running queries and cancelled task count
+        """
+        return {
+            "running_queries": len(self._tasks),
+            "cancelled_tasks": self.cancelled_tasks
+        }
+
+
+# =========================================================================
+# SINGLETON
+# =========================================================================
+
+_cancellation_registry: CancellationRegistry | None = None
+
+
+def get_cancellation_registry() -> CancellationRegistry:
+    """
+    Get or create the cancellation registry (Redis-backed if configured).
+
+    Returns:
+        CancellationRegistry: Registry instance
+    """
+    global _cancellation_registry
+
+    if _cancellation_registry is None:
+        _cancellation_registry = CancellationRegistry(get_redis())
+
+    return _cancellation_registry
@@ -0,0 +1,389 @@
+"""
+PrawnikGPT Backend - Context Packer
+
+Packs retrieved chunks into the token budget of the generation model:
+- Budget per model from num_ctx (ollama_fast_num_ctx / ollama_accurate_num_ctx)
+  minus the prompt scaffolding (system prompt, template, question) minus
+  context_response_reserve_tokens for the answer
+- Chunks ranked by relevance (RRF score for hybrid search, else distance)
+- Near-duplicate chunks dropped (word-shingle Jaccard similarity)
+- Whole chunks only, best first - no cut in the middle of an article
+- Adjacent chunk_index fragments of the same act merged under one header
+- Manifest of included chunk IDs (plus dropped duplicates / over-budget)
+
+Token counts use a per-model characters-per-token ratio calibrated from the
+model's own tokenizer: Ollama reports prompt_eval_count for every
+generation, and OllamaService feeds it back via TokenEstimator.observe().
+Until a model has been observed a conservative default ratio is used.
+
+Example Usage:
+    ```python
+    packed = pack_context(chunks, related_acts, model="mistral:7b", overhead_text=prompt_without_context)
+    prompt = build_prompt(question, packed["text"])
+    logger.info(packed["manifest"])
+    ```
+"""
+
+import logging
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+# Characters per token before a model has been observed (Polish legal text
+# with Llama/Mistral-style tokenizers is ~3-3.5; lower = more conservative)
+DEFAULT_CHARS_PER_TOKEN = 3.0
+
+# Plausible range of observed ratios (outliers, e.g. prompt cache hits that
+# under-report prompt_eval_count, are ignored)
+MIN_CHARS_PER_TOKEN = 1.5
+MAX_CHARS_PER_TOKEN = 6.0
+
+# Observations with fewer prompt tokens are too noisy to calibrate from
+MIN_OBSERVED_TOKENS = 64
+
+# Weight of a new observation in the moving average
+RATIO_ALPHA = 0.2
+
+# Words per shingle for near-duplicate detection
+SHINGLE_SIZE = 3
+
+# Related act titles listed after the fragments (if budget allows)
+MAX_RELATED_ACTS = 5
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# =========================================================================
+# TOKEN ESTIMATION
+# =========================================================================
+
+class TokenEstimator:
+    """
+    Token count estimates with a cached characters-per-token ratio per model.
+
+    Example Usage:
+        ```python
+        estimator = get_token_estimator()
+        estimator.observe("mistral:7b", chars=len(prompt), tokens=data["prompt_eval_count"])
+        tokens = estimator.estimate(context, "mistral:7b")
+        ```
+    """
+
+    def __init__(self, default_ratio: float = DEFAULT_CHARS_PER_TOKEN):
+        """
+        Initialize TokenEstimator.
+
+        Args:
+            default_ratio: Characters per token for models not observed yet
+        """
+        self.default_ratio = default_ratio
+        self._ratios: Dict[str, float] = {}
+        self._observations: Dict[str, int] = {}
+
+    def chars_per_token(self, model: Optional[str]) -> float:
+        """Current characters-per-token ratio of model."""
+        return self._ratios.get(model, self.default_ratio) if model else self.default_ratio
+
+    def estimate(self, text: str, model: Optional[str] = None) -> int:
+        """
+        Estimate the token count of text for model (rounded up).
+
+        Args:
+            text: Input text
+            model: Model whose tokenizer counts (None = default ratio)
+
+        Returns:
+            int: Estimated token count
+        """
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.chars_per_token(model))
+
+    def observe(self, model: str, chars: int, tokens: Optional[int]) -> None:
+        """
+        Calibrate model's ratio from a prompt and its real token count.
+
+        Args:
+            model: Model that evaluated the prompt
+            chars: Prompt characters (prompt + system prompt)
+            tokens: prompt_eval_count reported by Ollama
+        """
+        if not tokens or tokens < MIN_OBSERVED_TOKENS or chars <= 0:
+            return
+
+        ratio = chars / tokens
+        if not MIN_CHARS_PER_TOKEN <= ratio <= MAX_CHARS_PER_TOKEN:
+            return
+
+        previous = self._ratios.get(model)
+        self._ratios[model] = ratio if previous is None else (
+            RATIO_ALPHA * ratio + (1 - RATIO_ALPHA) * previous
+        )
+        self._observations[model] = self._observations.get(model, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get calibration state.
+
+        Returns:
+            dict: Ratio and observation count per model, default ratio
+        """
+        return {
+            "default_chars_per_token": self.default_ratio,
+            "models": {
+                model: {
+                    "chars_per_token": round(ratio, 3),
+                    "observations": self._observations.get(model, 0)
+                }
+                for model, ratio in self._ratios.items()
+            }
+        }
+
+
+# =========================================================================
+# SINGLETON
+# =========================================================================
+
+_token_estimator: TokenEstimator | None = None
+
+
+def get_token_estimator() -> TokenEstimator:
+    """Get global TokenEstimator instance."""
+    global _token_estimator
+
+    if _token_estimator is None:
+        _token_estimator = TokenEstimator()
+
+    return _token_estimator
+
+
+def get_num_ctx(model: str) -> int:
+    """Context window (num_ctx) configured for model (fast model's for others)."""
+    if model == settings.ollama_accurate_model:
+        return settings.ollama_accurate_num_ctx
+    return settings.ollama_fast_num_ctx
+
+
+# =========================================================================
+# HELPERS
+# =========================================================================
+
+def _rank_key(position: int, chunk: Dict[str, Any]) -> tuple:
+    """Sort key: RRF score (hybrid) descending, else distance ascending."""
+    rrf_score = chunk.get("rrf_score")
+    if rrf_score is not None:
+        return (0, -rrf_score, position)
+    distance = chunk.get("distance")
+    return (1, distance if distance is not None else math.inf, position)
+
+
+def _shingles(text: str) -> frozenset:
+    """Lowercased word n-grams of text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _act_key(chunk: Dict[str, Any]) -> str:
+    """Grouping key of the chunk's legal act."""
+    return str(chunk.get("legal_act_id") or chunk.get("id"))
+
+
+def _act_header(chunk: Dict[str, Any]) -> str:
+    """Header line of the chunk's legal act."""
+    title = (chunk.get("legal_act") or {}).get("title") or "Akt prawny"
+    return f"\n=== {title} ===\n"
+
+
+def _fragment(indexes: List[int], content: str) -> str:
+    """Fragment block for one chunk or a run of adjacent chunks."""
+    if len(indexes) == 1:
+        label = f"[Fragment {indexes[0] + 1}]"
+    else:
+        label = f"[Fragmenty {indexes[0] + 1}-{indexes[-1] + 1}]"
+    return f"{label}\n{content}\n"
+
+
+def _trim_to_tokens(content: str, tokens: int, estimator: TokenEstimator, model: str) -> str:
+    """Cut content to about tokens, at the last sentence or line boundary."""
+    max_chars = int(tokens * estimator.chars_per_token(model))
+    if max_chars <= 0:
+        return ""
+
+    cut = content[:max_chars]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary > max_chars // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " [...]"
+
+
+# =========================================================================
+# PACKING
+# =========================================================================
+
+def pack_context(
+    chunks: List[Dict[str, Any]],
+    related_acts: List[Dict[str, Any]],
+    model: str,
+    budget_tokens: Optional[int] = None,
+    overhead_text: str = "",
+    duplicate_threshold: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Pack chunks and related acts into a token budget.
+
+    Args:
+        chunks: Retrieved chunks (id, legal_act_id, chunk_index, content,
+            distance or rrf_score, legal_act)
+        related_acts: Related legal acts (title)
+        model: Generation model (budget and token ratio)
+        budget_tokens: Context budget (default: num_ctx of model minus
+            overhead_text minus context_response_reserve_tokens)
+        overhead_text: Rest of the prompt (system prompt, template, question)
+        duplicate_threshold: Shingle similarity of near-duplicates
+            (default: settings.context_duplicate_threshold)
+
+    Returns:
+        dict: Packed context:
+            - text: Legal context for the prompt (same layout as build_legal_context)
+            - chunks: Included chunks, best first
+            - manifest: [{chunk_id, legal_act_id, chunk_index, tokens, truncated}]
+            - tokens: Estimated tokens of text
+            - budget: Token budget
+            - dropped: {"duplicate": [chunk IDs], "over_budget": [chunk IDs]}
+    """
+    estimator = get_token_estimator()
+    if budget_tokens is None:
+        budget_tokens = (
+            get_num_ctx(model)
+            - estimator.estimate(overhead_text, model)
+            - settings.context_response_reserve_tokens
+        )
+    budget_tokens = max(0, budget_tokens)
+    if duplicate_threshold is None:
+        duplicate_threshold = settings.context_duplicate_threshold
+
+    ranked = [chunk for _, chunk in sorted(enumerate(chunks), key=lambda item: _rank_key(*item))]
+
+    # Drop near-duplicates (the better ranked copy is kept)
+    unique: List[Dict[str, Any]] = []
+    kept_shingles: List[frozenset] = []
+    seen_ids = set()
+    duplicates: List[Any] = []
+    for chunk in ranked:
+        shingles = _shingles(chunk.get("content", ""))
+        if chunk.get("id") in seen_ids or any(
+            _jaccard(shingles, other) >= duplicate_threshold for other in kept_shingles
+        ):
+            duplicates.append(chunk.get("id"))
+            continue
+        seen_ids.add(chunk.get("id"))
+        unique.append(chunk)
+        kept_shingles.append(shingles)
+
+    # Greedy selection of whole chunks, best first
+    used = 0
+    included: List[Dict[str, Any]] = []
+    contents: Dict[int, str] = {}
+    manifest: List[Dict[str, Any]] = []
+    over_budget: List[Any] = []
+    acts_included = set()
+    for chunk in unique:
+        content = chunk.get("content", "")
+        chunk_tokens = estimator.estimate(_fragment([chunk.get("chunk_index", 0)], content), model)
+        header_tokens = 0 if _act_key(chunk) in acts_included else estimator.estimate(_act_header(chunk), model)
+        truncated = False
+
+        if used + header_tokens + chunk_tokens > budget_tokens:
+            if included:
+                over_budget.append(chunk.get("id"))
+                continue
+            # Best chunk alone exceeds the budget - keep its beginning
+            content = _trim_to_tokens(content, budget_tokens - header_tokens - 8, estimator, model)
+            if not content:
+                over_budget.append(chunk.get("id"))
+                continue
+            chunk_tokens = estimator.estimate(_fragment([chunk.get("chunk_index", 0)], content), model)
+            truncated = True
+            logger.warning(
+                f"Top chunk {chunk.get('id')} exceeds context budget of {budget_tokens} tokens, truncated"
+            )
+
+        used += header_tokens + chunk_tokens
+        acts_included.add(_act_key(chunk))
+        included.append(chunk)
+        contents[id(chunk)] = content
+        manifest.append({
+            "chunk_id": chunk.get("id"),
+            "legal_act_id": chunk.get("legal_act_id"),
+            "chunk_index": chunk.get("chunk_index"),
+            "tokens": chunk_tokens,
+            "truncated": truncated
+        })
+
+    # Layout: acts in order of their best chunk, fragments in document order,
+    # adjacent fragments merged
+    by_act: Dict[str, List[Dict[str, Any]]] = {}
+    for chunk in included:
+        by_act.setdefault(_act_key(chunk), []).append(chunk)
+
+    context_parts = []
+    for act_chunks in by_act.values():
+        context_parts.append(_act_header(act_chunks[0]))
+        act_chunks = sorted(act_chunks, key=lambda chunk: chunk.get("chunk_index", 0))
+
+        run: List[Dict[str, Any]] = []
+        for chunk in act_chunks + [None]:
+            if run and (chunk is None or chunk.get("chunk_index", 0) != run[-1].get("chunk_index", 0) + 1):
+                context_parts.append(_fragment(
+                    [item.get("chunk_index", 0) for item in run],
+                    "\n".join(contents[id(item)] for item in run)
+                ))
+                run = []
+            if chunk is not None:
+                run.append(chunk)
+
+    # Related acts (titles only) with the remaining budget
+    if related_acts:
+        header = "\n=== Powiązane akty prawne ===\n"
+        titles = [f"- {act.get('title', '')}\n" for act in related_acts[:MAX_RELATED_ACTS]]
+        while titles and used + estimator.estimate(header + "".join(titles), model) > budget_tokens:
+            titles.pop()
+        if titles:
+            context_parts.append(header)
+            context_parts.extend(titles)
+
+    text = "\n".join(context_parts)
+    tokens = estimator.estimate(text, model)
+
+    logger.debug(
+        f"Packed context for {model}: {len(included)}/{len(chunks)} chunks, "
+        f"~{tokens}/{budget_tokens} tokens ({len(duplicates)} duplicates, "
+        f"{len(over_budget)} over budget)"
+    )
+
+    return {
+        "text": text,
+        "chunks": included,
+        "manifest": manifest,
+        "tokens": tokens,
+        "budget": budget_tokens,
+        "dropped": {"duplicate": duplicates, "over_budget": over_budget}
+    }
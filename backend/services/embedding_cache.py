@@ -0,0 +1,264 @@
+"""
+PrawnikGPT Backend - Embedding Cache
+
+Two-tier cache for query embeddings:
+- Tier 1: bounded in-process LRU (per worker, no I/O)
+- Tier 2: Redis (shared across workers, async pooled client), vectors stored
+  as packed float32 bytes
+
+Cache keys combine the embedding model name with a hash of the normalized
+query text (whitespace collapsed, case folded), so trivially re-worded
+variants of the same question share one entry.
+
+Hit/miss counters are exposed via get_stats() and reported by RAGMetrics.
+"""
+
+import hashlib
+import logging
+import re
+import struct
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from backend.config import settings
+from backend.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+REDIS_KEY_PREFIX = "emb:v1"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+# =========================================================================
+# KEY AND SERIALIZATION HELPERS
+# =========================================================================
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for cache key computation.
+
+    Collapses all whitespace runs to single spaces, strips the ends and
+    applies Unicode case folding.
+
+    Args:
+        text: Input text
+
+    Returns:
+        str: Normalized text
+    """
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+def make_cache_key(text: str, model: str) -> str:
+    """
+    Build cache key from model name and normalized text hash.
+
+    Args:
+        text: Input text (raw, will be normalized)
+        model: Embedding model name
+
+    Returns:
+        str: Cache key, e.g. "nomic-embed-text:3f2a..."
+    """
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+def pack_embedding(embedding: List[float]) -> bytes:
+    """Pack embedding as little-endian float32 bytes (4 bytes per dimension)."""
+    return struct.pack(f"<{len(embedding)}f", *embedding)
+
+
+def unpack_embedding(data: bytes) -> List[float]:
+    """Unpack little-endian float32 bytes into embedding vector."""
+    return list(struct.unpack(f"<{len(data) // 4}f", data))
+
+
+# =========================================================================
+# EMBEDDING CACHE
+# =========================================================================
+
+class EmbeddingCache:
+    """
+    Two-tier (LRU + Redis) cache for embedding vectors.
+
+    Redis is optional - without settings.redis_url only the in-process
+    tier is used. Redis errors are logged and treated as cache misses.
+
+    Example Usage:
+        ```python
+        cache = get_embedding_cache()
+
+        embedding = await cache.get(query_text, "nomic-embed-text")
+        if embedding is None:
+            embedding = await service.generate_embedding(query_text)
+            await cache.set(query_text, "nomic-embed-text", embedding)
+        ```
+    """
+
+    def __init__(
+        self,
+        max_size: int = 2048,
+        redis_ttl: int = 604800,
+        redis_url: Optional[str] = None
+    ):
+        """
+        Initialize EmbeddingCache.
+
+        Args:
+            max_size: Max entries in the in-process LRU (0 disables tier 1)
+            redis_ttl: TTL of Redis entries in seconds
+            redis_url: Redis URL (tier 2 disabled if None)
+        """
+        self.max_size = max_size
+        self.redis_ttl = redis_ttl
+        self.redis_url = redis_url
+
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._redis_client = None
+
+        # Counters
+        self.memory_hits: int = 0
+        self.redis_hits: int = 0
+        self.misses: int = 0
+
+    # =========================================================================
+    # PRIVATE METHODS - Redis
+    # =========================================================================
+
+    def _get_redis(self):
+        """Get shared async Redis client (lazy initialization)."""
+        if self._redis_client is None and self.redis_url:
+            self._redis_client = get_redis(self.redis_url)
+        return self._redis_client
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        """Insert entry into the LRU and evict the oldest if full."""
+        if self.max_size <= 0:
+            return
+        self._lru[key] = embedding
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    async def get(self, text: str, model: str) -> Optional[List[float]]:
+        """
+        Look up embedding for text (tier 1 first, then tier 2).
+
+        Redis hits are promoted into the in-process LRU.
+
+        Args:
+            text: Input text
+            model: Embedding model name
+
+        Returns:
+            Optional[List[float]]: Cached embedding or None on miss
+        """
+        key = make_cache_key(text, model)
+
+        embedding = self._lru.get(key)
+        if embedding is not None:
+            self._lru.move_to_end(key)
+            self.memory_hits += 1
+            return list(embedding)
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                data = await redis_client.get(f"{REDIS_KEY_PREFIX}:{key}")
+                if data:
+                    embedding = unpack_embedding(data)
+                    self._remember(key, embedding)
+                    self.redis_hits += 1
+                    return list(embedding)
+            except redis.exceptions.RedisError as e:
+                logger.warning(f"Embedding cache lookup failed (Redis): {e}")
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, model: str, embedding: List[float]) -> None:
+        """
+        Store embedding in both tiers.
+
+        Args:
+            text: Input text
+            model: Embedding model name
+            embedding: Embedding vector
+        """
+        key = make_cache_key(text, model)
+        self._remember(key, list(embedding))
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                await redis_client.set(
+                    f"{REDIS_KEY_PREFIX}:{key}",
+                    pack_embedding(embedding),
+                    ex=self.redis_ttl
+                )
+            except redis.exceptions.RedisError as e:
+                logger.warning(f"Embedding cache store failed (Redis): {e}")
+
+    def clear(self) -> None:
+        """Clear the in-process tier and reset counters (Redis is left intact)."""
+        self._lru.clear()
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Hit/miss counters, hit rate and LRU size
+        """
+        hits = self.memory_hits + self.redis_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total > 0 else 0.0,
+            "size": len(self._lru),
+            "max_size": self.max_size
+        }
+
+
+# =========================================================================
+# SINGLETON INSTANCE
+# =========================================================================
+
+_embedding_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Get or create EmbeddingCache singleton instance.
+
+    Returns:
+        EmbeddingCache: Singleton instance
+    """
+    global _embedding_cache
+
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            max_size=settings.embedding_cache_size,
+            redis_ttl=settings.redis_embedding_cache_ttl,
+            redis_url=settings.redis_url
+        )
+
+    return _embedding_cache
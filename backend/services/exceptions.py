@@ -9,11 +9,13 @@ Exception hierarchy:
   - ServiceUnavailableError
     - DatabaseUnavailableError
     - OLLAMAUnavailableError
+    - JobQueueFullError
   - RAGPipelineError
     - NoRelevantActsError
     - EmbeddingGenerationError
   - TimeoutError
     - OLLAMATimeoutError
+      - LLMRequestShedError
     - GenerationTimeoutError
 """
 
@@ -47,6 +49,11 @@ class OLLAMAUnavailableError(ServiceUnavailableError):
     pass
 
 
+class JobQueueFullError(ServiceUnavailableError):
+    """Raised when a generation job queue is at its max depth (backpressure)"""
+    pass
+
+
 # =========================================================================
 # RAG PIPELINE ERRORS
 # =========================================================================
@@ -73,6 +80,11 @@ class EmbeddingGenerationError(RAGPipelineError):
     pass
 
 
+class QueryCancelledError(RAGPipelineError):
+    """Raised when generation for a query is cancelled (query deleted, client gone)"""
+    pass
+
+
 # =========================================================================
 # TIMEOUT ERRORS
 # =========================================================================
@@ -87,6 +99,11 @@ class OLLAMATimeoutError(TimeoutError):
     pass
 
 
+class LLMRequestShedError(OLLAMATimeoutError):
+    """Raised when a queued LLM request is dropped because it can no longer meet its deadline"""
+    pass
+
+
 class GenerationTimeoutError(TimeoutError):
     """
     Raised when LLM generation exceeds timeout.
@@ -0,0 +1,211 @@
+"""
+PrawnikGPT Backend - Generation Leases
+
+At most one generator per query response: a fast or accurate response is
+produced either by a queued job or by one SSE stream, never by both, and a
+reconnecting EventSource client does not start a second generation.
+
+- The API takes the lease for JOB_LEASE_OWNER before enqueueing a job; the
+  worker releases it when the job is acked, cancelled or dead-lettered.
+- GET /api/v1/queries/{query_id}/stream takes the lease for its own owner
+  ID. If the lease is held, the stream attaches instead: it waits for the
+  stored response and replays it (see routers/queries.py).
+- Leases expire (job: all attempts of the job, stream: the model timeout
+  plus slack), so a crashed holder cannot block a query forever.
+
+With Redis configured leases are shared by all API and worker processes;
+without it they are per process (matching the in-memory job queue).
+
+Example Usage:
+    ```python
+    leases = get_generation_leases()
+    if await leases.acquire(query_id, "fast", owner, ttl=stream_lease_ttl("fast")):
+        try:
+            ...  # generate
+        finally:
+            await leases.release(query_id, "fast", owner)
+    ```
+"""
+
+import logging
+import time
+from typing import Dict, Optional
+
+import redis
+
+from backend.config import settings
+from backend.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+LEASE_KEY_PREFIX = "query_generation"
+
+# Owner of leases taken for queued jobs (released by the job worker)
+JOB_LEASE_OWNER = "job"
+
+# Seconds a stream lease outlives the model timeout (retrieval, persisting)
+STREAM_LEASE_SLACK_SECONDS = 60
+
+# Delete the lease only if it is still held by the caller.
+# KEYS: lease; ARGV: owner
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def job_lease_ttl() -> int:
+    """Seconds a job lease lasts (every attempt may run to the visibility timeout)."""
+    return settings.job_visibility_timeout * settings.job_max_attempts
+
+
+def stream_lease_ttl(response_type: str) -> int:
+    """Seconds a stream lease lasts for response_type."""
+    timeout = settings.ollama_accurate_timeout if response_type == "accurate" else settings.ollama_fast_timeout
+    return timeout + STREAM_LEASE_SLACK_SECONDS
+
+
+# =========================================================================
+# LEASES
+# =========================================================================
+
+class GenerationLeases:
+    """
+    Expiring per-response generation leases (Redis or in-process).
+
+    Redis errors fail open: acquire() grants the lease and holder() reports
+    none, so an outage may duplicate generation but never blocks it.
+    """
+
+    def __init__(self, redis_client=None):
+        """
+        Initialize GenerationLeases.
+
+        Args:
+            redis_client: Async Redis client for leases shared across
+                processes (None = this process only)
+        """
+        self._redis = redis_client
+        self._release_script = (
+            redis_client.register_script(RELEASE_LEASE_SCRIPT) if redis_client is not None else None
+        )
+        self._leases: Dict[str, tuple[str, float]] = {}  # key -> (owner, expires_at)
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    @staticmethod
+    def _key(query_id: str, response_type: str) -> str:
+        """Lease key of one query response."""
+        return f"{LEASE_KEY_PREFIX}:{response_type}:{query_id}"
+
+    def _local_holder(self, key: str) -> Optional[str]:
+        """Owner of an in-process lease (None if free or expired)."""
+        lease = self._leases.get(key)
+        if lease is None:
+            return None
+        if lease[1] < time.time():
+            del self._leases[key]
+            return None
+        return lease[0]
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    async def acquire(self, query_id: str, response_type: str, owner: str, ttl: int) -> bool:
+        """
+        Take the generation lease of a query response.
+
+        Args:
+            query_id: Query ID
+            response_type: "fast" or "accurate"
+            owner: Lease owner (JOB_LEASE_OWNER or a stream ID)
+            ttl: Seconds until the lease expires
+
+        Returns:
+            bool: True if the caller now holds the lease
+        """
+        key = self._key(query_id, response_type)
+
+        if self._redis is None:
+            if self._local_holder(key) is not None:
+                return False
+            self._leases[key] = (owner, time.time() + ttl)
+            return True
+
+        try:
+            return bool(await self._redis.set(key, owner, nx=True, ex=ttl))
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Generation lease for query {query_id} unavailable, generating anyway: {e}")
+            return True
+
+    async def release(self, query_id: str, response_type: str, owner: str) -> None:
+        """
+        Release the lease if it is still held by owner.
+
+        Args:
+            query_id: Query ID
+            response_type: "fast" or "accurate"
+            owner: Owner passed to acquire()
+        """
+        key = self._key(query_id, response_type)
+
+        if self._redis is None:
+            if self._local_holder(key) == owner:
+                del self._leases[key]
+            return
+
+        try:
+            await self._release_script(keys=[key], args=[owner])
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to release generation lease of query {query_id}: {e}")
+
+    async def holder(self, query_id: str, response_type: str) -> Optional[str]:
+        """
+        Current lease owner of a query response.
+
+        Returns:
+            Optional[str]: Owner, or None if nobody is generating
+        """
+        key = self._key(query_id, response_type)
+
+        if self._redis is None:
+            return self._local_holder(key)
+
+        try:
+            owner = await self._redis.get(key)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Generation lease check for query {query_id} failed: {e}")
+            return None
+        return owner.decode() if isinstance(owner, bytes) else owner
+
+
+# =========================================================================
+# SINGLETON
+# =========================================================================
+
+_generation_leases: GenerationLeases | None = None
+
+
+def get_generation_leases() -> GenerationLeases:
+    """
+    Get or create the generation leases (Redis-backed if configured).
+
+    Returns:
+        GenerationLeases: Leases instance
+    """
+    global _generation_leases
+
+    if _generation_leases is None:
+        _generation_leases = GenerationLeases(get_redis())
+
+    return _generation_leases
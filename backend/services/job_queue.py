@@ -0,0 +1,644 @@
+"""
+PrawnikGPT Backend - Generation Job Queue
+
+Queue for fast / accurate response generation jobs, decoupling API pods
+(enqueue) from GPU-bound workers (consume, see services/job_worker.py).
+
+Backends (settings.job_queue_backend):
+- memory: in-process asyncio queue, consumed inside the API process
+  (development, tests; jobs are lost on restart)
+- redis: Redis Streams with a consumer group per job type, consumed by
+  `python -m backend.worker` (durable, shared by all pods)
+
+Delivery is at-least-once:
+- A reserved job is invisible to other consumers until acked or failed.
+- A running job is kept reserved by worker heartbeats (extend()); a job not
+  acked or extended within job_visibility_timeout (worker crashed) is
+  reclaimed and retried.
+- Failed jobs are retried up to job_max_attempts, then moved to the
+  dead-letter stream/list and reported to the on_dead callback (the worker
+  marks the response failed and releases its generation lease).
+
+Backpressure: enqueue() raises JobQueueFullError once a job type has
+job_queue_max_depth waiting + running jobs.
+
+Example Usage:
+    ```python
+    job_id = await enqueue_job("fast", {"query_id": ..., "user_id": ..., "query_text": ...})
+    ```
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import redis
+
+from backend.config import settings
+from backend.services.exceptions import JobQueueFullError
+from backend.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+JOB_TYPES = ("fast", "accurate")
+
+JOB_STREAM_PREFIX = "jobs"
+JOB_DEAD_LETTER_KEY = "jobs:dead"
+JOB_CONSUMER_GROUP = "workers"
+
+# Dead-letter entries kept for inspection (oldest are trimmed)
+DEAD_LETTER_MAX_LEN = 1000
+
+# Messages reclaimed per stream per reclaim pass
+RECLAIM_BATCH_SIZE = 100
+
+# Atomically ack + delete a stream entry, then optionally add its retry (to the
+# same stream) or dead-letter entry. No-op if the entry was already acked
+# (e.g. reclaimed by another worker), so a job is never requeued twice.
+# KEYS: stream, target stream; ARGV: group, entry ID, job JSON ("" = none),
+# error ("" = retry), dead-letter max length
+FINISH_ENTRY_SCRIPT = """
+if redis.call('XACK', KEYS[1], ARGV[1], ARGV[2]) == 0 then
+    return 0
+end
+redis.call('XDEL', KEYS[1], ARGV[2])
+if ARGV[3] ~= '' then
+    if ARGV[4] == '' then
+        redis.call('XADD', KEYS[2], '*', 'job', ARGV[3])
+    else
+        redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[5], '*', 'job', ARGV[3], 'error', ARGV[4])
+    end
+end
+return 1
+"""
+
+
+# =========================================================================
+# JOB
+# =========================================================================
+
+class Job:
+    """
+    Queued generation job.
+
+    Attributes:
+        id: Job ID (stable across retries)
+        type: Job type ("fast" or "accurate")
+        payload: JSON-compatible job arguments
+        attempts: Number of failed attempts so far
+        enqueued_at: Unix timestamp of first enqueue
+        receipt: Backend-specific delivery handle (stream entry ID for Redis)
+        consumer: Consumer that reserved the job (not serialized)
+    """
+
+    def __init__(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        job_id: Optional[str] = None,
+        attempts: int = 0,
+        enqueued_at: Optional[float] = None,
+        receipt: Optional[str] = None
+    ):
+        self.id = job_id or str(uuid.uuid4())
+        self.type = job_type
+        self.payload = payload
+        self.attempts = attempts
+        self.enqueued_at = enqueued_at if enqueued_at is not None else time.time()
+        self.receipt = receipt
+        self.consumer: Optional[str] = None
+
+    def to_json(self) -> str:
+        """Serialize job (without receipt)."""
+        return json.dumps({
+            "id": self.id,
+            "type": self.type,
+            "payload": self.payload,
+            "attempts": self.attempts,
+            "enqueued_at": self.enqueued_at
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data: Any, receipt: Optional[str] = None) -> "Job":
+        """Deserialize job produced by to_json()."""
+        fields = json.loads(data)
+        return cls(
+            job_type=fields["type"],
+            payload=fields["payload"],
+            job_id=fields["id"],
+            attempts=fields.get("attempts", 0),
+            enqueued_at=fields.get("enqueued_at"),
+            receipt=receipt
+        )
+
+
+# =========================================================================
+# QUEUE INTERFACE
+# =========================================================================
+
+class JobQueue(ABC):
+    """
+    Base class for job queue backends.
+
+    Subclasses implement enqueue/reserve/extend/ack/fail/reclaim_expired/
+    depth/dead_letter_count.
+    Counters (enqueued, completed, retried, dead) are kept per process.
+
+    Every dead-lettered job - failed for the last time or reclaimed after its
+    last attempt - is passed to on_dead(job, error), if set.
+    """
+
+    backend: str = "base"
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        visibility_timeout: int = 600,
+        max_depth: int = 1000
+    ):
+        """
+        Initialize queue.
+
+        Args:
+            max_attempts: Total attempts before a job is dead-lettered
+            visibility_timeout: Seconds before an unacked job is reclaimed
+            max_depth: Max waiting + running jobs per type (backpressure)
+        """
+        self.max_attempts = max_attempts
+        self.visibility_timeout = visibility_timeout
+        self.max_depth = max_depth
+        self.on_dead: Optional[Callable[[Job, str], Awaitable[None]]] = None
+
+        # Counters (this process)
+        self.enqueued: int = 0
+        self.completed: int = 0
+        self.retried: int = 0
+        self.dead: int = 0
+        self.reclaimed: int = 0
+
+    @staticmethod
+    def _check_type(job_type: str) -> None:
+        """Raise ValueError for unknown job types."""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type} (expected one of {JOB_TYPES})")
+
+    def _should_retry(self, job: Job, retryable: bool) -> bool:
+        """Whether a failed job gets another attempt."""
+        return retryable and job.attempts + 1 < self.max_attempts
+
+    async def _notify_dead(self, job: Job, error: str) -> None:
+        """Pass a dead-lettered job to on_dead (errors are logged, not raised)."""
+        if self.on_dead is None:
+            return
+        try:
+            await self.on_dead(job, error)
+        except Exception as e:
+            logger.error(f"Dead-letter callback failed for job {job.id}: {e}")
+
+    @abstractmethod
+    async def enqueue(self, job_type: str, payload: Dict[str, Any]) -> str:
+        """
+        Add job to the queue.
+
+        Returns:
+            str: Job ID
+
+        Raises:
+            ValueError: If job type is unknown
+            JobQueueFullError: If the job type is at max depth
+        """
+
+    @abstractmethod
+    async def reserve(self, job_type: str, consumer: str, timeout: float = 5.0) -> Optional[Job]:
+        """
+        Take next job of a type (invisible to others until acked/failed).
+
+        Args:
+            job_type: Job type to consume
+            consumer: Consumer name (unique per worker slot)
+            timeout: Max seconds to wait for a job
+
+        Returns:
+            Optional[Job]: Reserved job or None if none arrived in time
+        """
+
+    @abstractmethod
+    async def extend(self, job: Job) -> bool:
+        """
+        Restart the visibility timeout of a reserved job (worker heartbeat).
+
+        Returns:
+            bool: False if the job is no longer reserved (reclaimed or finished)
+        """
+
+    @abstractmethod
+    async def ack(self, job: Job) -> None:
+        """Mark reserved job as completed."""
+
+    @abstractmethod
+    async def fail(self, job: Job, error: str, retryable: bool = True) -> bool:
+        """
+        Mark reserved job as failed.
+
+        Args:
+            job: Reserved job
+            error: Error description (kept with dead-lettered jobs)
+            retryable: False for permanent errors (dead-letter immediately)
+
+        Returns:
+            bool: True if the job was requeued for another attempt
+        """
+
+    @abstractmethod
+    async def reclaim_expired(self) -> int:
+        """
+        Retry (or dead-letter) jobs reserved longer than visibility_timeout.
+
+        Returns:
+            int: Number of reclaimed jobs
+        """
+
+    @abstractmethod
+    async def depth(self) -> Dict[str, Dict[str, int]]:
+        """
+        Queue depth per job type.
+
+        Returns:
+            dict: {job_type: {"waiting": n, "running": n}}
+        """
+
+    @abstractmethod
+    async def dead_letter_count(self) -> int:
+        """Number of jobs in the dead-letter stream/list."""
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics (depth per type and process counters).
+
+        Returns:
+            dict: backend, depth, dead_letter, enqueued, completed,
+                retried, reclaimed, dead
+        """
+        try:
+            depth = await self.depth()
+            dead_letter = await self.dead_letter_count()
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to read job queue depth: {e}")
+            depth, dead_letter = None, None
+
+        return {
+            "backend": self.backend,
+            "depth": depth,
+            "dead_letter": dead_letter,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "retried": self.retried,
+            "reclaimed": self.reclaimed,
+            "dead": self.dead
+        }
+
+
+# =========================================================================
+# IN-MEMORY BACKEND
+# =========================================================================
+
+class InMemoryJobQueue(JobQueue):
+    """
+    In-process job queue (one asyncio queue per job type).
+
+    Consumers must run in the same process and event loop.
+    """
+
+    backend = "memory"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._queues: Dict[str, asyncio.Queue] = {job_type: asyncio.Queue() for job_type in JOB_TYPES}
+        self._running: Dict[str, tuple] = {}  # receipt -> (job, deadline)
+        self._dead_letter: deque = deque(maxlen=DEAD_LETTER_MAX_LEN)
+        self._deliveries = itertools.count(1)
+
+    def _running_count(self, job_type: str) -> int:
+        return sum(1 for job, _ in self._running.values() if job.type == job_type)
+
+    async def _requeue_or_bury(self, job: Job, error: str, retryable: bool) -> bool:
+        attempt = Job(job.type, job.payload, job_id=job.id, attempts=job.attempts + 1,
+                      enqueued_at=job.enqueued_at)
+
+        if self._should_retry(job, retryable):
+            self._queues[job.type].put_nowait(attempt)
+            self.retried += 1
+            return True
+
+        self._dead_letter.append({"job": attempt, "error": error})
+        self.dead += 1
+        logger.error(f"Job {job.id} ({job.type}) dead-lettered after {attempt.attempts} attempts: {error}")
+        await self._notify_dead(job, error)
+        return False
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any]) -> str:
+        self._check_type(job_type)
+        if self._queues[job_type].qsize() + self._running_count(job_type) >= self.max_depth:
+            raise JobQueueFullError(f"Job queue '{job_type}' is full ({self.max_depth} jobs)")
+
+        job = Job(job_type, payload)
+        self._queues[job_type].put_nowait(job)
+        self.enqueued += 1
+        return job.id
+
+    async def reserve(self, job_type: str, consumer: str, timeout: float = 5.0) -> Optional[Job]:
+        self._check_type(job_type)
+        try:
+            job = await asyncio.wait_for(self._queues[job_type].get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        job.receipt = str(next(self._deliveries))
+        job.consumer = consumer
+        self._running[job.receipt] = (job, time.monotonic() + self.visibility_timeout)
+        return job
+
+    async def extend(self, job: Job) -> bool:
+        if job.receipt not in self._running:
+            return False
+        self._running[job.receipt] = (job, time.monotonic() + self.visibility_timeout)
+        return True
+
+    async def ack(self, job: Job) -> None:
+        if self._running.pop(job.receipt, None) is not None:
+            self.completed += 1
+
+    async def fail(self, job: Job, error: str, retryable: bool = True) -> bool:
+        if self._running.pop(job.receipt, None) is None:
+            return False  # Already reclaimed
+        return await self._requeue_or_bury(job, error, retryable)
+
+    async def reclaim_expired(self) -> int:
+        now = time.monotonic()
+        expired = [job for job, deadline in self._running.values() if deadline <= now]
+        for job in expired:
+            del self._running[job.receipt]
+            await self._requeue_or_bury(job, "visibility timeout expired", retryable=True)
+        self.reclaimed += len(expired)
+        return len(expired)
+
+    async def depth(self) -> Dict[str, Dict[str, int]]:
+        return {
+            job_type: {
+                "waiting": self._queues[job_type].qsize(),
+                "running": self._running_count(job_type)
+            }
+            for job_type in JOB_TYPES
+        }
+
+    async def dead_letter_count(self) -> int:
+        return len(self._dead_letter)
+
+
+# =========================================================================
+# REDIS STREAMS BACKEND
+# =========================================================================
+
+class RedisStreamJobQueue(JobQueue):
+    """
+    Durable job queue on Redis Streams.
+
+    One stream per job type (jobs:fast, jobs:accurate) with consumer group
+    "workers". Completed entries are acked and deleted, so stream length is
+    waiting + running jobs. Retries are re-added as new entries with
+    attempts + 1; reclaiming uses XAUTOCLAIM on entries idle longer than the
+    visibility timeout, and heartbeats reset an entry's idle time with XCLAIM.
+    Ack, retry and dead-lettering are one atomic script call
+    (FINISH_ENTRY_SCRIPT).
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, **kwargs):
+        """
+        Initialize queue.
+
+        Args:
+            client: Async Redis client (see services/redis_client.py)
+            **kwargs: JobQueue options
+        """
+        super().__init__(**kwargs)
+        self.client = client
+        self._groups_ready = False
+        self._finish_entry = client.register_script(FINISH_ENTRY_SCRIPT)
+
+    @staticmethod
+    def _stream(job_type: str) -> str:
+        return f"{JOB_STREAM_PREFIX}:{job_type}"
+
+    async def _ensure_groups(self) -> None:
+        """Create streams and consumer groups (idempotent)."""
+        if self._groups_ready:
+            return
+        for job_type in JOB_TYPES:
+            try:
+                await self.client.xgroup_create(
+                    self._stream(job_type), JOB_CONSUMER_GROUP, id="0", mkstream=True
+                )
+            except redis.exceptions.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+        self._groups_ready = True
+
+    async def _finish(self, job: Job, then: Optional[Job] = None, error: str = "") -> bool:
+        """
+        Ack + delete job entry, then requeue `then` (error="") or dead-letter it.
+
+        Returns:
+            bool: False if the entry was already acked by someone else
+        """
+        stream = self._stream(job.type)
+        target = JOB_DEAD_LETTER_KEY if error else stream
+        done = await self._finish_entry(
+            keys=[stream, target],
+            args=[JOB_CONSUMER_GROUP, job.receipt, then.to_json() if then else "", error, DEAD_LETTER_MAX_LEN]
+        )
+        return bool(done)
+
+    async def _requeue_or_bury(self, job: Job, error: str, retryable: bool) -> bool:
+        attempt = Job(job.type, job.payload, job_id=job.id, attempts=job.attempts + 1,
+                      enqueued_at=job.enqueued_at)
+
+        if self._should_retry(job, retryable):
+            if await self._finish(job, then=attempt):
+                self.retried += 1
+                return True
+            return False
+
+        if await self._finish(job, then=attempt, error=(error or "failed")[:1000]):
+            self.dead += 1
+            logger.error(f"Job {job.id} ({job.type}) dead-lettered after {attempt.attempts} attempts: {error}")
+            await self._notify_dead(job, error)
+        return False
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any]) -> str:
+        self._check_type(job_type)
+        await self._ensure_groups()
+
+        stream = self._stream(job_type)
+        if await self.client.xlen(stream) >= self.max_depth:
+            raise JobQueueFullError(f"Job queue '{job_type}' is full ({self.max_depth} jobs)")
+
+        job = Job(job_type, payload)
+        await self.client.xadd(stream, {"job": job.to_json()})
+        self.enqueued += 1
+        return job.id
+
+    async def reserve(self, job_type: str, consumer: str, timeout: float = 5.0) -> Optional[Job]:
+        self._check_type(job_type)
+        await self._ensure_groups()
+
+        response = await self.client.xreadgroup(
+            JOB_CONSUMER_GROUP,
+            consumer,
+            {self._stream(job_type): ">"},
+            count=1,
+            block=max(1, int(timeout * 1000))
+        )
+        if not response:
+            return None
+
+        _, messages = response[0]
+        if not messages:
+            return None
+
+        entry_id, fields = messages[0]
+        job = self._decode(entry_id, fields)
+        job.consumer = consumer
+        return job
+
+    @staticmethod
+    def _decode(entry_id: Any, fields: Dict[Any, Any]) -> Job:
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode()
+        data = fields.get(b"job", fields.get("job"))
+        return Job.from_json(data, receipt=entry_id)
+
+    async def extend(self, job: Job) -> bool:
+        claimed = await self.client.xclaim(
+            self._stream(job.type),
+            JOB_CONSUMER_GROUP,
+            job.consumer or "worker",
+            min_idle_time=0,
+            message_ids=[job.receipt],
+            justid=True
+        )
+        return bool(claimed)
+
+    async def ack(self, job: Job) -> None:
+        if await self._finish(job):
+            self.completed += 1
+
+    async def fail(self, job: Job, error: str, retryable: bool = True) -> bool:
+        return await self._requeue_or_bury(job, error, retryable)
+
+    async def reclaim_expired(self) -> int:
+        await self._ensure_groups()
+
+        reclaimed = 0
+        for job_type in JOB_TYPES:
+            response = await self.client.xautoclaim(
+                self._stream(job_type),
+                JOB_CONSUMER_GROUP,
+                "reclaimer",
+                min_idle_time=self.visibility_timeout * 1000,
+                start_id="0-0",
+                count=RECLAIM_BATCH_SIZE
+            )
+            for entry_id, fields in response[1]:
+                if not fields:
+                    continue  # Entry deleted meanwhile
+                job = self._decode(entry_id, fields)
+                await self._requeue_or_bury(job, "visibility timeout expired", retryable=True)
+                reclaimed += 1
+
+        self.reclaimed += reclaimed
+        return reclaimed
+
+    async def depth(self) -> Dict[str, Dict[str, int]]:
+        await self._ensure_groups()
+
+        result = {}
+        for job_type in JOB_TYPES:
+            stream = self._stream(job_type)
+            length = await self.client.xlen(stream)
+            pending = (await self.client.xpending(stream, JOB_CONSUMER_GROUP))["pending"]
+            result[job_type] = {"waiting": max(0, length - pending), "running": pending}
+        return result
+
+    async def dead_letter_count(self) -> int:
+        return await self.client.xlen(JOB_DEAD_LETTER_KEY)
+
+
+# =========================================================================
+# SINGLETON INSTANCE
+# =========================================================================
+
+_job_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+    """
+    Get or create job queue singleton for settings.job_queue_backend.
+
+    The Redis backend falls back to the in-memory queue (with a warning)
+    if REDIS_URL is not configured.
+
+    Returns:
+        JobQueue: Queue instance
+    """
+    global _job_queue
+
+    if _job_queue is None:
+        options = {
+            "max_attempts": settings.job_max_attempts,
+            "visibility_timeout": settings.job_visibility_timeout,
+            "max_depth": settings.job_queue_max_depth
+        }
+
+        client = get_redis() if settings.job_queue_backend == "redis" else None
+        if client is not None:
+            _job_queue = RedisStreamJobQueue(client, **options)
+        else:
+            if settings.job_queue_backend == "redis":
+                logger.warning("JOB_QUEUE_BACKEND=redis but REDIS_URL is not set - using in-memory queue")
+            _job_queue = InMemoryJobQueue(**options)
+
+        logger.info(f"Job queue initialized (backend={_job_queue.backend})")
+
+    return _job_queue
+
+
+async def enqueue_job(job_type: str, payload: Dict[str, Any]) -> str:
+    """
+    Enqueue generation job on the configured queue.
+
+    Args:
+        job_type: "fast" or "accurate"
+        payload: Job arguments (JSON-compatible)
+
+    Returns:
+        str: Job ID
+
+    Raises:
+        JobQueueFullError: If the queue is at max depth
+    """
+    job_id = await get_job_queue().enqueue(job_type, payload)
+    logger.info(f"Enqueued {job_type} job {job_id}")
+    return job_id
@@ -0,0 +1,315 @@
+"""
+PrawnikGPT Backend - Generation Job Worker Pool
+
+Consumes fast / accurate generation jobs from the job queue
+(services/job_queue.py) and runs the RAG pipeline for them.
+
+Concurrency is bounded per model tier: job_fast_concurrency consumer slots
+for fast jobs and job_accurate_concurrency slots for accurate jobs, so a
+burst of slow accurate jobs cannot starve fast responses. While a job runs
+its worker extends the job's visibility timeout (heartbeat), so long queue
+waits and retries inside the job do not get it reclaimed; a reclaimer task
+retries jobs whose worker crashed.
+
+Jobs run through the cancellation registry (services/cancellation.py): a
+job whose query is deleted is aborted (freeing its Ollama slot) or, if
+still queued, skipped; cancelled jobs are acked, not retried.
+
+A finished job releases the generation lease taken when it was queued
+(services/generation_leases.py), so streams waiting for it replay the
+result; a dead-lettered job (failed or reclaimed after its last attempt)
+marks the response failed.
+
+Runs in the standalone worker process (`python -m backend.worker`) and,
+for the in-memory queue, inside the API process.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from backend.config import settings
+from backend.db.queries import set_query_response_error
+from backend.services.cancellation import get_cancellation_registry
+from backend.services.exceptions import NoRelevantActsError, QueryCancelledError
+from backend.services.generation_leases import JOB_LEASE_OWNER, get_generation_leases
+from backend.services.job_queue import Job, JobQueue, get_job_queue
+from backend.services.llm_scheduler import llm_request_context
+from backend.services.rag_pipeline import (
+    get_rag_metrics,
+    process_query_fast,
+    process_query_accurate
+)
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# JOB HANDLERS
+# =========================================================================
+
+async def _run_fast_job(payload: Dict[str, Any]) -> None:
+    """Generate fast response for an already created query."""
+    with llm_request_context(priority="interactive", user_id=payload["user_id"]):
+        await get_cancellation_registry().run(payload["query_id"], process_query_fast(
+            user_id=payload["user_id"],
+            query_text=payload["query_text"],
+            query_id=payload["query_id"]
+        ))
+
+
+async def _run_accurate_job(payload: Dict[str, Any]) -> None:
+    """Generate accurate response for a query with a fast response."""
+    with llm_request_context(priority="accurate", user_id=payload.get("user_id")):
+        await get_cancellation_registry().run(payload["query_id"], process_query_accurate(
+            query_id=payload["query_id"],
+            query_text=payload["query_text"]
+        ))
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[None]]] = {
+    "fast": _run_fast_job,
+    "accurate": _run_accurate_job
+}
+
+# Errors that will not go away on retry (job is dead-lettered at once)
+NON_RETRYABLE_ERRORS = (NoRelevantActsError, KeyError, ValueError)
+
+# Seconds a consumer waits for a job before checking for shutdown
+RESERVE_TIMEOUT = 5.0
+
+# Heartbeats per visibility timeout while a job runs (at most one per second)
+HEARTBEATS_PER_VISIBILITY_TIMEOUT = 3
+HEARTBEAT_MIN_INTERVAL = 1.0
+
+
+# =========================================================================
+# WORKER POOL
+# =========================================================================
+
+class JobWorkerPool:
+    """
+    Pool of consumer tasks with fixed concurrency per job type.
+
+    Example Usage:
+        ```python
+        pool = JobWorkerPool()
+        await pool.start()
+        ...
+        await pool.stop(timeout=30)
+        ```
+    """
+
+    def __init__(
+        self,
+        queue: Optional[JobQueue] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        name: Optional[str] = None
+    ):
+        """
+        Initialize JobWorkerPool.
+
+        Args:
+            queue: Job queue (default: configured singleton)
+            concurrency: Consumer slots per job type
+                (default: job_fast_concurrency / job_accurate_concurrency)
+            name: Consumer name prefix (default: hostname-pid)
+        """
+        self.queue = queue or get_job_queue()
+        self.queue.on_dead = self._on_dead
+        self.concurrency = concurrency or {
+            "fast": settings.job_fast_concurrency,
+            "accurate": settings.job_accurate_concurrency
+        }
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+
+        self._tasks: List[asyncio.Task] = []
+        self._busy: Set[asyncio.Task] = set()  # Consumer tasks running a job
+        self._stopping = asyncio.Event()
+
+        # Counters
+        self.running: Dict[str, int] = {job_type: 0 for job_type in self.concurrency}
+        self.processed: int = 0
+        self.failed: int = 0
+        self.cancelled: int = 0
+
+    # =========================================================================
+    # PRIVATE METHODS
+    # =========================================================================
+
+    async def _release_lease(self, job: Job) -> None:
+        """Release the generation lease of a finished job."""
+        try:
+            await get_generation_leases().release(job.payload["query_id"], job.type, JOB_LEASE_OWNER)
+        except Exception as e:
+            logger.warning(f"Failed to release generation lease of job {job.id}: {e}")
+
+    async def _mark_failed(self, job: Job, error: str) -> None:
+        """Mark the response of a dead-lettered job as failed."""
+        try:
+            await set_query_response_error(job.payload["query_id"], job.type, error)
+        except Exception as e:
+            logger.error(f"Failed to mark {job.type} response of job {job.id} as failed: {e}")
+
+    async def _on_dead(self, job: Job, error: str) -> None:
+        """Mark the response of a dead-lettered job failed and free its lease."""
+        await self._mark_failed(job, error)
+        await self._release_lease(job)
+
+    async def _heartbeat(self, job: Job) -> None:
+        """Keep a running job reserved until cancelled."""
+        interval = max(
+            HEARTBEAT_MIN_INTERVAL, self.queue.visibility_timeout / HEARTBEATS_PER_VISIBILITY_TIMEOUT
+        )
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self.queue.extend(job):
+                    logger.warning(f"Job {job.id} ({job.type}) was reclaimed while running")
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat of job {job.id} failed: {e}")
+
+    async def _handle(self, job: Job) -> None:
+        """Run job handler and ack or fail the job."""
+        handler = JOB_HANDLERS[job.type]
+        start = time.time()
+        self.running[job.type] += 1
+        self._busy.add(asyncio.current_task())
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+
+        try:
+            await handler(job.payload)
+        except asyncio.CancelledError:
+            # Shutdown timeout - leave job reserved, it is reclaimed later
+            raise
+        except QueryCancelledError as e:
+            # Query deleted - nothing to retry
+            await self.queue.ack(job)
+            await self._release_lease(job)
+            self.cancelled += 1
+            reason = get_cancellation_registry().reason(job.payload.get("query_id", "")) or "cancelled"
+            get_rag_metrics().record_cancellation(job.type, reason)
+            logger.info(f"Job {job.id} ({job.type}) cancelled after {time.time() - start:.2f}s: {e}")
+        except Exception as e:
+            self.failed += 1
+            retryable = not isinstance(e, NON_RETRYABLE_ERRORS)
+            error = f"{type(e).__name__}: {e}"
+            # A dead-lettered job is finished by _on_dead()
+            requeued = await self.queue.fail(job, error, retryable=retryable)
+            logger.warning(
+                f"Job {job.id} ({job.type}) failed on attempt {job.attempts + 1}"
+                f"{', requeued' if requeued else ''}: {e}"
+            )
+        else:
+            await self.queue.ack(job)
+            await self._release_lease(job)
+            self.processed += 1
+            logger.info(
+                f"Job {job.id} ({job.type}) completed in {time.time() - start:.2f}s "
+                f"(queued {start - job.enqueued_at:.2f}s)"
+            )
+        finally:
+            heartbeat.cancel()
+            self.running[job.type] -= 1
+            self._busy.discard(asyncio.current_task())
+
+    async def _consume(self, job_type: str, slot: int) -> None:
+        """Consumer loop of one slot."""
+        consumer = f"{self.name}-{job_type}-{slot}"
+
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.reserve(job_type, consumer, timeout=RESERVE_TIMEOUT)
+                if job is not None:
+                    await self._handle(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Queue unavailable (e.g. Redis down) - back off and retry
+                logger.error(f"Job consumer {consumer} error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _reclaim(self) -> None:
+        """Periodically retry jobs whose visibility timeout expired."""
+        interval = max(1.0, min(60.0, self.queue.visibility_timeout / 4))
+
+        while not self._stopping.is_set():
+            try:
+                reclaimed = await self.queue.reclaim_expired()
+                if reclaimed:
+                    logger.warning(f"Reclaimed {reclaimed} expired jobs")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job reclaim failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    # =========================================================================
+    # PUBLIC METHODS
+    # =========================================================================
+
+    async def start(self) -> None:
+        """Start consumer and reclaimer tasks."""
+        self._stopping.clear()
+
+        for job_type, slots in self.concurrency.items():
+            for slot in range(slots):
+                self._tasks.append(asyncio.create_task(self._consume(job_type, slot)))
+        self._tasks.append(asyncio.create_task(self._reclaim()))
+
+        logger.info(
+            f"Job worker pool started ({self.name}, backend={self.queue.backend}, "
+            f"concurrency={self.concurrency})"
+        )
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """
+        Stop taking jobs and wait for running ones.
+
+        Jobs still running after timeout are cancelled; they stay reserved
+        and are retried after the visibility timeout.
+
+        Args:
+            timeout: Seconds to wait for running jobs
+        """
+        self._stopping.set()
+        if not self._tasks:
+            return
+
+        # Idle consumers are only waiting for the next job
+        for task in self._tasks:
+            if task not in self._busy:
+                task.cancel()
+
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        self._tasks = []
+        logger.info(f"Job worker pool stopped ({len(pending)} jobs cancelled)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get worker pool statistics.
+
+        Returns:
+            dict: Concurrency, running jobs per type, processed/failed/cancelled counters
+        """
+        return {
+            "name": self.name,
+            "concurrency": dict(self.concurrency),
+            "running": dict(self.running),
+            "processed": self.processed,
+            "failed": self.failed,
+            "cancelled": self.cancelled
+        }
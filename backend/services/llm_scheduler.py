@@ -0,0 +1,622 @@
+"""
+PrawnikGPT Backend - LLM Request Scheduler
+
+Admission control for Ollama requests (replaces plain per-model semaphores):
+- Priority classes: interactive (fast answers, query embeddings) is admitted
+  before accurate, accurate before batch (model warmups, bulk embeddings)
+- Per-user fair queuing: within a priority class, waiting users are served
+  round-robin, so a single user cannot take every slot
+- Deadline-aware shedding: a queued request whose remaining time is shorter
+  than the typical service time of its model is rejected with
+  LLMRequestShedError instead of taking a slot only to time out
+- Queue-wait metrics per priority class
+- Adaptive concurrency (AIMD): each model's slot limit grows by one while
+  requests queue and latency stays near its baseline, and shrinks
+  multiplicatively on timeouts, backend errors or latency blow-ups, within
+  a configurable floor and ceiling
+
+Each model has its own slot pool (ollama_*_model_concurrency is the initial
+limit when adaptive concurrency is enabled). An optional
+global pool (ollama_global_concurrency) bounds requests across all models
+on the same Ollama host, which lets interactive requests overtake queued
+accurate ones even though they use different models.
+
+Priority and user come from explicit arguments or from llm_request_context(),
+which the RAG pipeline sets once per query so that every Ollama call made
+for it (embedding, generation) is scheduled alike.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Iterator
+
+from backend.config import settings
+from backend.services.exceptions import (
+    LLMRequestShedError,
+    ModelNotFoundError,
+    OLLAMATimeoutError,
+    OLLAMAUnavailableError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+# Priority classes, highest first
+PRIORITIES = ("interactive", "accurate", "batch")
+
+# Queue-wait samples kept per priority class (for percentiles)
+WAIT_SAMPLES = 1000
+
+# Smoothing factor of the per-model service time estimate (EWMA)
+SERVICE_TIME_ALPHA = 0.2
+
+# Slots for models without a configured limit
+DEFAULT_MODEL_CONCURRENCY = 3
+
+# Adaptive concurrency (AIMD) tuning
+ADAPTIVE_WINDOW_REQUESTS = 20  # Re-evaluate the limit after this many completed requests
+ADAPTIVE_WINDOW_SECONDS = 30.0  # ...or after this long with at least ADAPTIVE_MIN_SAMPLES
+ADAPTIVE_MIN_SAMPLES = 3
+ADAPTIVE_DECREASE_FACTOR = 0.75  # Multiplicative decrease on overload
+ADAPTIVE_LATENCY_TOLERANCE = 2.0  # Window latency above tolerance x baseline = overload
+ADAPTIVE_MAX_ERROR_RATE = 0.1  # Backend error share above this = overload
+ADAPTIVE_BASELINE_DRIFT = 0.05  # Max baseline latency rise per window (re-baselining)
+
+
+# =========================================================================
+# REQUEST CONTEXT
+# =========================================================================
+
+_request_context: ContextVar[dict[str, str | None] | None] = ContextVar(
+    "llm_request_context", default=None
+)
+
+
+@contextmanager
+def llm_request_context(
+    priority: str | None = None,
+    user_id: str | None = None
+) -> Iterator[None]:
+    """
+    Set priority class and user for Ollama calls made inside the block.
+
+    Args:
+        priority: One of PRIORITIES (None = derived from model)
+        user_id: User the requests are made for (fair queuing key)
+
+    Example:
+        ```python
+        with llm_request_context(priority="interactive", user_id=user_id):
+            embedding = await generate_embedding(query_text)
+        ```
+    """
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITIES}")
+
+    token = _request_context.set({"priority": priority, "user_id": user_id})
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def current_request_context() -> dict[str, str | None]:
+    """Get priority/user set by the innermost llm_request_context()."""
+    return _request_context.get() or {"priority": None, "user_id": None}
+
+
+# =========================================================================
+# PRIORITY LIMITER
+# =========================================================================
+
+class _Waiter:
+    """Queued acquire() call."""
+
+    __slots__ = ("future", "priority", "user_key", "enqueued_at")
+
+    def __init__(self, priority: str, user_key: str):
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.priority = priority
+        self.user_key = user_key
+        self.enqueued_at = time.time()
+
+
+class PriorityLimiter:
+    """
+    Counting semaphore with priority classes and per-user round-robin.
+
+    Free slots are handed to the oldest waiter of the next user (round-robin)
+    in the highest non-empty priority class. New requests never overtake
+    queued ones.
+    """
+
+    def __init__(self, name: str, capacity: int):
+        """
+        Initialize PriorityLimiter.
+
+        Args:
+            name: Pool name (model name or "global"), used in logs and errors
+            capacity: Max concurrently held slots
+        """
+        self.name = name
+        self.capacity = capacity
+        self.running = 0
+        self.queued = 0  # Requests that found no free slot (cumulative)
+
+        # priority -> user -> FIFO of waiters (user order = round-robin order)
+        self._queues: dict[str, OrderedDict[str, deque[_Waiter]]] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self._waiting: dict[str, int] = {priority: 0 for priority in PRIORITIES}
+
+        # Metrics
+        self.admitted: dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        self.shed: dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        self._waits: dict[str, deque[float]] = {
+            priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES
+        }
+
+    @property
+    def waiting(self) -> int:
+        """Number of queued requests."""
+        return sum(self._waiting.values())
+
+    async def acquire(
+        self,
+        priority: str,
+        user_id: str | None = None,
+        deadline: float | None = None,
+        service_time: float = 0.0
+    ) -> None:
+        """
+        Wait for a slot.
+
+        Args:
+            priority: Priority class (one of PRIORITIES)
+            user_id: Fair queuing key (requests without user share one queue)
+            deadline: Unix time the request must be finished by (None = no limit)
+            service_time: Expected time the slot will be held in seconds
+
+        Raises:
+            LLMRequestShedError: If the deadline can no longer be met while queued
+        """
+        if self.running < self.capacity and not self.waiting:
+            self.running += 1
+            self._record_admission(priority, 0.0)
+            return
+
+        waiter = _Waiter(priority, user_id or "")
+        self._queues[priority].setdefault(waiter.user_key, deque()).append(waiter)
+        self._waiting[priority] += 1
+        self.queued += 1
+
+        # Latest moment the slot can be taken and the request still finish in time
+        timeout = None if deadline is None else deadline - service_time - time.time()
+
+        try:
+            if timeout is None or timeout > 0:
+                await asyncio.wait({waiter.future}, timeout=timeout)
+        except asyncio.CancelledError:
+            if waiter.future.done():
+                self.release()  # Slot was handed over just before cancellation
+            else:
+                self._remove(waiter)
+            raise
+
+        waited = time.time() - waiter.enqueued_at
+
+        if not waiter.future.done():
+            self._remove(waiter)
+            self.shed[priority] += 1
+            logger.warning(
+                f"Shed {priority} request for {self.name} after {waited:.2f}s in queue "
+                f"(deadline in {deadline - time.time():.2f}s, "
+                f"expected service time {service_time:.2f}s)"
+            )
+            raise LLMRequestShedError(
+                f"Request for {self.name} cannot finish before its deadline "
+                f"(queued {waited:.1f}s, {self.waiting} requests waiting)"
+            )
+
+        self._record_admission(priority, waited)
+
+    def release(self) -> None:
+        """Free a slot and hand it to the next waiter."""
+        self.running -= 1
+        self._dispatch()
+
+    def set_capacity(self, capacity: int) -> None:
+        """
+        Change the slot limit.
+
+        Raising it admits waiters at once; lowering it takes effect as
+        running requests finish.
+        """
+        self.capacity = capacity
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters."""
+        while self.running < self.capacity:
+            waiter = self._next_waiter()
+            if waiter is None:
+                break
+            self.running += 1
+            waiter.future.set_result(None)
+
+    def _next_waiter(self) -> _Waiter | None:
+        """Pop next waiter: highest priority class, next user round-robin."""
+        for priority in PRIORITIES:
+            users = self._queues[priority]
+            if not users:
+                continue
+
+            user_key, waiters = next(iter(users.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                users.move_to_end(user_key)  # User goes to the back of the round
+            else:
+                del users[user_key]
+
+            self._waiting[priority] -= 1
+            return waiter
+
+        return None
+
+    def _remove(self, waiter: _Waiter) -> None:
+        """Drop a waiter that gave up (cancelled or shed)."""
+        users = self._queues[waiter.priority]
+        waiters = users.get(waiter.user_key)
+        if waiters is None or waiter not in waiters:
+            return
+
+        waiters.remove(waiter)
+        if not waiters:
+            del users[waiter.user_key]
+        self._waiting[waiter.priority] -= 1
+
+    def _record_admission(self, priority: str, waited: float) -> None:
+        """Record queue wait of an admitted request."""
+        self.admitted[priority] += 1
+        self._waits[priority].append(waited)
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get slot usage and queue-wait statistics.
+
+        Returns:
+            dict: capacity, running and per-priority waiting/admitted/shed
+                counts with average and p95 queue wait (ms)
+        """
+        priorities = {}
+        for priority in PRIORITIES:
+            waits = sorted(self._waits[priority])
+            priorities[priority] = {
+                "waiting": self._waiting[priority],
+                "admitted": self.admitted[priority],
+                "shed": self.shed[priority],
+                "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0
+            }
+
+        return {
+            "capacity": self.capacity,
+            "running": self.running,
+            "priorities": priorities
+        }
+
+
+# =========================================================================
+# ADAPTIVE CONCURRENCY
+# =========================================================================
+
+class AdaptiveConcurrency:
+    """
+    AIMD controller for the slot limit of one PriorityLimiter.
+
+    Completed requests are collected in windows (ADAPTIVE_WINDOW_REQUESTS
+    or ADAPTIVE_WINDOW_SECONDS). At the end of a window the limit is
+    multiplied by ADAPTIVE_DECREASE_FACTOR if the error rate or the average
+    latency (relative to the lowest recently seen window average) shows
+    overload, and raised by one if requests had to queue. A timeout lowers
+    the limit at once (at most once per ADAPTIVE_WINDOW_SECONDS).
+    """
+
+    def __init__(self, limiter: PriorityLimiter, floor: int, ceiling: int):
+        """
+        Initialize AdaptiveConcurrency.
+
+        Args:
+            limiter: Limiter whose capacity is controlled (its current
+                capacity is the initial limit)
+            floor: Lowest allowed limit
+            ceiling: Highest allowed limit
+        """
+        self.limiter = limiter
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        limiter.set_capacity(min(self.ceiling, max(self.floor, limiter.capacity)))
+
+        self.baseline_latency: float | None = None
+        self.window_latency: float | None = None
+        self.increases = 0
+        self.decreases = 0
+
+        self._last_decrease = 0.0
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        """Start a new measurement window."""
+        self._window_start = time.time()
+        self._window_queued = self.limiter.queued
+        self._latencies: list[float] = []
+        self._errors = 0
+
+    def record_success(self, latency: float) -> None:
+        """Record a completed request and its slot hold time (seconds)."""
+        self._latencies.append(latency)
+        self._maybe_evaluate()
+
+    def record_error(self) -> None:
+        """Record a request failed by the backend (unavailable, out of memory)."""
+        self._errors += 1
+        self._maybe_evaluate()
+
+    def record_timeout(self) -> None:
+        """Record a timed out request (backs off immediately)."""
+        if time.time() - self._last_decrease >= ADAPTIVE_WINDOW_SECONDS:
+            self._decrease("timeout")
+            self._reset_window()
+        else:
+            self.record_error()
+
+    def _maybe_evaluate(self) -> None:
+        """Evaluate the window once it is complete."""
+        samples = len(self._latencies) + self._errors
+        elapsed = time.time() - self._window_start
+
+        if samples >= ADAPTIVE_WINDOW_REQUESTS or (
+            samples >= ADAPTIVE_MIN_SAMPLES and elapsed >= ADAPTIVE_WINDOW_SECONDS
+        ):
+            self._evaluate(samples)
+            self._reset_window()
+
+    def _evaluate(self, samples: int) -> None:
+        """Apply additive increase / multiplicative decrease for the window."""
+        error_rate = self._errors / samples
+        if error_rate > ADAPTIVE_MAX_ERROR_RATE:
+            self._decrease(f"error rate {error_rate:.0%}")
+            return
+
+        if not self._latencies:
+            return
+
+        self.window_latency = sum(self._latencies) / len(self._latencies)
+        baseline = self.baseline_latency
+        self.baseline_latency = (
+            self.window_latency if baseline is None
+            else min(self.window_latency, baseline * (1 + ADAPTIVE_BASELINE_DRIFT))
+        )
+
+        if baseline is not None and self.window_latency > ADAPTIVE_LATENCY_TOLERANCE * baseline:
+            self._decrease(
+                f"latency {self.window_latency:.2f}s vs baseline {baseline:.2f}s"
+            )
+        elif self.limiter.queued > self._window_queued and self.limiter.capacity < self.ceiling:
+            # Requests had to wait and latency is healthy - probe for more throughput
+            self.limiter.set_capacity(self.limiter.capacity + 1)
+            self.increases += 1
+            logger.info(
+                f"Concurrency limit for {self.limiter.name} raised to {self.limiter.capacity}"
+            )
+
+    def _decrease(self, reason: str) -> None:
+        """Lower the limit multiplicatively (not below floor)."""
+        self._last_decrease = time.time()
+        limit = max(self.floor, int(self.limiter.capacity * ADAPTIVE_DECREASE_FACTOR))
+        if limit == self.limiter.capacity:
+            return
+
+        self.limiter.set_capacity(limit)
+        self.decreases += 1
+        logger.warning(f"Concurrency limit for {self.limiter.name} lowered to {limit} ({reason})")
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get controller statistics.
+
+        Returns:
+            dict: limit, floor, ceiling, latencies (ms) and change counters
+        """
+        return {
+            "limit": self.limiter.capacity,
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "baseline_latency_ms": round(self.baseline_latency * 1000, 1) if self.baseline_latency is not None else None,
+            "window_latency_ms": round(self.window_latency * 1000, 1) if self.window_latency is not None else None,
+            "increases": self.increases,
+            "decreases": self.decreases
+        }
+
+
+# =========================================================================
+# SCHEDULER
+# =========================================================================
+
+class LLMScheduler:
+    """
+    Per-model (and optional global) priority limiters for Ollama requests.
+
+    Example Usage:
+        ```python
+        scheduler = LLMScheduler({"mistral:7b": 5}, global_limit=6)
+
+        async with scheduler.slot("mistral:7b", deadline=time.time() + 15):
+            response = await client.post("/api/generate", json=payload)
+        ```
+    """
+
+    def __init__(
+        self,
+        model_limits: dict[str, int],
+        default_limit: int = DEFAULT_MODEL_CONCURRENCY,
+        global_limit: int = 0,
+        deadline_shedding: bool = True,
+        adaptive: bool = False,
+        adaptive_floor: int = 1,
+        adaptive_ceiling_factor: float = 2.0
+    ):
+        """
+        Initialize LLMScheduler.
+
+        Args:
+            model_limits: Max concurrent requests per model (initial limits
+                if adaptive)
+            default_limit: Slots shared by models without a limit
+            global_limit: Max concurrent requests across models (0 = unlimited)
+            deadline_shedding: Reject queued requests that would miss their deadline
+            adaptive: Adjust per-model limits from latency and errors (AIMD)
+            adaptive_floor: Lowest adaptive limit
+            adaptive_ceiling_factor: Highest adaptive limit as a multiple of
+                the model's configured limit
+        """
+        self._limiters = {
+            model: PriorityLimiter(model, limit) for model, limit in model_limits.items()
+        }
+        self._default_limiter = PriorityLimiter("default", default_limit)
+        self._global_limiter = PriorityLimiter("global", global_limit) if global_limit > 0 else None
+        self.deadline_shedding = deadline_shedding
+
+        # AIMD controllers for models with a configured limit
+        self._adaptive: dict[str, AdaptiveConcurrency] = {}
+        if adaptive:
+            for model, limiter in self._limiters.items():
+                self._adaptive[model] = AdaptiveConcurrency(
+                    limiter,
+                    floor=adaptive_floor,
+                    ceiling=math.ceil(limiter.capacity * adaptive_ceiling_factor)
+                )
+
+        # Per-model service time estimate (EWMA of slot hold time, seconds)
+        self._service_time: dict[str, float] = {}
+
+    def resolve_priority(self, model: str, priority: str | None = None) -> str:
+        """
+        Priority class of a request.
+
+        Explicit priority wins, then llm_request_context(); otherwise
+        requests for the accurate model are "accurate" and all other
+        requests "interactive".
+        """
+        priority = priority or current_request_context()["priority"]
+        if priority is None:
+            priority = "accurate" if model == settings.ollama_accurate_model else "interactive"
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITIES}")
+        return priority
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model: str,
+        priority: str | None = None,
+        user_id: str | None = None,
+        deadline: float | None = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold a request slot for model.
+
+        Args:
+            model: Model name
+            priority: Priority class (default: see resolve_priority())
+            user_id: Fair queuing key (default: from llm_request_context())
+            deadline: Unix time the request must be finished by
+
+        Raises:
+            LLMRequestShedError: If the deadline can no longer be met while queued
+        """
+        controller = self._adaptive.get(model)
+        priority = self.resolve_priority(model, priority)
+        if user_id is None:
+            user_id = current_request_context()["user_id"]
+        if not self.deadline_shedding:
+            deadline = None
+
+        service_time = self._service_time.get(model, 0.0)
+        limiter = self._limiters.get(model, self._default_limiter)
+
+        await limiter.acquire(priority, user_id, deadline, service_time)
+        try:
+            if self._global_limiter is not None:
+                await self._global_limiter.acquire(priority, user_id, deadline, service_time)
+            try:
+                start = time.time()
+                yield
+            except ModelNotFoundError:
+                raise  # Configuration problem, says nothing about load
+            except OLLAMATimeoutError:
+                if controller is not None:
+                    controller.record_timeout()
+                raise
+            except OLLAMAUnavailableError:
+                if controller is not None:
+                    controller.record_error()
+                raise
+            else:
+                elapsed = time.time() - start
+                self._record_service_time(model, elapsed)
+                if controller is not None:
+                    controller.record_success(elapsed)
+            finally:
+                if self._global_limiter is not None:
+                    self._global_limiter.release()
+        finally:
+            limiter.release()
+
+    def _record_service_time(self, model: str, seconds: float) -> None:
+        """Update service time estimate of model (successful requests only)."""
+        previous = self._service_time.get(model)
+        if previous is None:
+            self._service_time[model] = seconds
+        else:
+            self._service_time[model] = previous + SERVICE_TIME_ALPHA * (seconds - previous)
+
+    def get_limits(self) -> dict[str, int]:
+        """Current concurrency limit per model pool."""
+        limits = {model: limiter.capacity for model, limiter in self._limiters.items()}
+        if self._global_limiter is not None:
+            limits["global"] = self._global_limiter.capacity
+        return limits
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            dict: Per-pool slot usage and queue waits (see
+                PriorityLimiter.get_stats()), adaptive limits per model (see
+                AdaptiveConcurrency.get_stats()) and service time estimates (ms)
+        """
+        pools = {model: limiter.get_stats() for model, limiter in self._limiters.items()}
+        for model, controller in self._adaptive.items():
+            pools[model]["adaptive"] = controller.get_stats()
+        pools["default"] = self._default_limiter.get_stats()
+        if self._global_limiter is not None:
+            pools["global"] = self._global_limiter.get_stats()
+
+        return {
+            "deadline_shedding": self.deadline_shedding,
+            "pools": pools,
+            "service_time_ms": {
+                model: round(seconds * 1000, 1) for model, seconds in self._service_time.items()
+            }
+        }
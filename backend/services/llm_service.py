@@ -10,17 +10,18 @@ Models:
 
 Features:
 - Prompt templating
-- Token management
-- Streaming support (optional)
+- Token management (context packed into num_ctx, see context_packer)
+- Streaming support (generate_text_stream)
 - Timeout handling
 - Error recovery
 """
 
 import logging
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 
 from backend.config import settings
+from backend.services.context_packer import get_token_estimator, pack_context
 from backend.services.ollama_service import get_ollama_service
 from backend.services.exceptions import (
     OLLAMAUnavailableError,
@@ -43,6 +44,10 @@ ACCURATE_MODEL = settings.ollama_accurate_model  # gpt-oss:120b
 FAST_TIMEOUT = settings.ollama_fast_timeout  # 15s
 ACCURATE_TIMEOUT = settings.ollama_accurate_timeout  # 240s
 
+# Context windows (tokens)
+FAST_NUM_CTX = settings.ollama_fast_num_ctx
+ACCURATE_NUM_CTX = settings.ollama_accurate_num_ctx
+
 # Generation parameters
 DEFAULT_TEMPERATURE = 0.3  # Lower for more factual responses
 DEFAULT_TOP_P = 0.9
@@ -143,6 +148,38 @@ def build_prompt(question: str, legal_context: str) -> str:
     )
 
 
+def pack_legal_context(
+    question: str,
+    chunks: List[Dict[str, Any]],
+    related_acts: List[Dict[str, Any]],
+    model: str,
+    system_prompt: Optional[str] = SYSTEM_PROMPT
+) -> Dict[str, Any]:
+    """
+    Build legal context that fits the context window of model.
+    
+    Budget = num_ctx of model - system prompt - prompt template with the
+    question - context_response_reserve_tokens. Chunks are ranked, deduplicated,
+    selected whole and adjacent fragments merged (see context_packer).
+    
+    Args:
+        question: User's legal question
+        chunks: Retrieved chunks
+        related_acts: Related legal acts
+        model: Generation model
+        system_prompt: System prompt sent with the question
+        
+    Returns:
+        dict: Packed context (text, chunks, manifest, tokens, budget, dropped)
+    """
+    return pack_context(
+        chunks,
+        related_acts,
+        model=model,
+        overhead_text=(system_prompt or "") + build_prompt(question, "")
+    )
+
+
 # =========================================================================
 # TEXT GENERATION
 # =========================================================================
@@ -153,7 +190,8 @@ async def generate_text(
     timeout: int,
     temperature: float = DEFAULT_TEMPERATURE,
     system_prompt: Optional[str] = None,
-    stream: bool = False
+    stream: bool = False,
+    num_ctx: Optional[int] = None
 ) -> str:
     """
     Generate text using OLLAMA model.
@@ -167,7 +205,8 @@ async def generate_text(
         timeout: Timeout in seconds
         temperature: Sampling temperature (0-1)
         system_prompt: Optional system prompt
-        stream: Whether to stream response (not implemented yet)
+        stream: Passed through to Ollama (use generate_text_stream() for tokens)
+        num_ctx: Context window size in tokens (None = model default)
         
     Returns:
         str: Generated text
@@ -197,10 +236,65 @@ async def generate_text(
         top_p=DEFAULT_TOP_P,
         top_k=DEFAULT_TOP_K,
         timeout=timeout,
-        stream=stream
+        stream=stream,
+        num_ctx=num_ctx
     )
 
 
+async def generate_text_stream(
+    prompt: str,
+    model: str,
+    timeout: int,
+    temperature: float = DEFAULT_TEMPERATURE,
+    system_prompt: Optional[str] = None,
+    user_id: Optional[str] = None,
+    num_ctx: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Stream generated text fragments from OLLAMA model.
+    
+    Args:
+        prompt: Input prompt
+        model: Model name (fast or accurate)
+        timeout: Total generation time limit in seconds
+        temperature: Sampling temperature (0-1)
+        system_prompt: Optional system prompt
+        user_id: User the response is generated for (fair scheduling)
+        num_ctx: Context window size in tokens (None = model default)
+        
+    Yields:
+        str: Generated text fragments (in order)
+        
+    Raises:
+        OLLAMAUnavailableError: If OLLAMA service unavailable
+        OLLAMATimeoutError: If generation times out
+        
+    Example:
+        ```python
+        async for token in generate_text_stream(
+            prompt="Explain contract law",
+            model="mistral:7b",
+            timeout=15
+        ):
+            print(token, end="")
+        ```
+    """
+    service = get_ollama_service()
+    
+    async for token in service.generate_text_stream(
+        prompt=prompt,
+        model=model,
+        system_prompt=system_prompt,
+        temperature=temperature,
+        top_p=DEFAULT_TOP_P,
+        top_k=DEFAULT_TOP_K,
+        timeout=timeout,
+        user_id=user_id,
+        num_ctx=num_ctx
+    ):
+        yield token
+
+
 async def generate_text_fast(
     prompt: str,
     system_prompt: Optional[str] = SYSTEM_PROMPT
@@ -226,7 +320,8 @@ async def generate_text_fast(
         model=FAST_MODEL,
         timeout=FAST_TIMEOUT,
         temperature=DEFAULT_TEMPERATURE,
-        system_prompt=system_prompt
+        system_prompt=system_prompt,
+        num_ctx=FAST_NUM_CTX
     )
     
     generation_time_ms = int((time.time() - start_time) * 1000)
@@ -259,7 +354,8 @@ async def generate_text_accurate(
         model=ACCURATE_MODEL,
         timeout=ACCURATE_TIMEOUT,
         temperature=DEFAULT_TEMPERATURE,
-        system_prompt=system_prompt
+        system_prompt=system_prompt,
+        num_ctx=ACCURATE_NUM_CTX
     )
     
     generation_time_ms = int((time.time() - start_time) * 1000)
@@ -324,47 +420,18 @@ def extract_sources_from_response(
 # HELPER FUNCTIONS
 # =========================================================================
 
-def estimate_token_count(text: str) -> int:
+def estimate_token_count(text: str, model: Optional[str] = None) -> int:
     """
     Estimate token count for text.
     
-    Rough approximation: 1 token ≈ 4 characters for Polish text.
+    Uses the characters-per-token ratio calibrated from the model's
+    prompt_eval_count (default ratio until the model has been used).
     
     Args:
         text: Input text
+        model: Model whose tokenizer counts (None = default ratio)
         
     Returns:
         int: Estimated token count
     """
-    return len(text) // 4
-
-
-def truncate_context_if_needed(
-    context: str,
-    max_tokens: int = 4000
-) -> str:
-    """
-    Truncate context if too long.
-    
-    Args:
-        context: Legal context string
-        max_tokens: Maximum tokens allowed
-        
-    Returns:
-        str: Truncated context (if needed)
-    """
-    estimated_tokens = estimate_token_count(context)
-    
-    if estimated_tokens <= max_tokens:
-        return context
-    
-    # Truncate to fit (rough)
-    max_chars = max_tokens * 4
-    truncated = context[:max_chars]
-    
-    logger.warning(
-        f"Context truncated: {estimated_tokens} → {max_tokens} tokens"
-    )
-    
-    return truncated + "\n\n[... treść skrócona ...]"
-
+    return get_token_estimator().estimate(text, model)
@@ -0,0 +1,623 @@
+"""
+PrawnikGPT Backend - Local Vector Index
+
+Optional in-process retrieval engine for read-heavy deployments.
+
+Chunk embeddings are mirrored from legal_act_chunks into memory-mapped
+files in LOCAL_VECTOR_INDEX_DIR and semantic_search() is answered with a
+vectorized exact top-k (cosine) without a database round trip. Chunk text
+and act metadata are hydrated from a local JSONL file (only the top-k rows
+are decoded).
+
+Storage layout (one generation of files is active at a time):
+- manifest.json: dimension, row count, refresh watermark, active generation
+- embeddings.{gen}.f32: float32[count, dim], L2-normalized rows
+- offsets.{gen}.i64: int64[count], byte offset of each row in chunks file
+- chunks.{gen}.jsonl: one JSON object per row (chunk + act metadata)
+
+Files are append-only and the manifest is replaced atomically, so every
+uvicorn worker can map them read-only (shared OS page cache) while one
+worker refreshes. Refresh is incremental by (created_at, id); deleted
+chunks and changed act metadata are picked up by refresh(full=True).
+sync() (run periodically) does both: after the incremental refresh it
+compares the embedded chunk count and latest legal_acts.updated_at with
+the manifest and rebuilds if they differ.
+
+Requires numpy (optional dependency). Enabled with
+LOCAL_VECTOR_INDEX_ENABLED=true.
+
+Manual rebuild (e.g. after deleting chunks; running workers pick up the
+new generation on their next search):
+    python -m backend.services.local_vector_index --full
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import mmap
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.db.supabase_client import SupabaseClient, get_supabase
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows (single worker there)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "refresh.lock"
+FORMAT_VERSION = 1
+
+# Rows fetched per PostgREST request during refresh
+REFRESH_BATCH_SIZE = 500
+
+# Embedding column per dimension (see 20251203120000_add_native_768_embeddings)
+EMBEDDING_COLUMNS = {768: "embedding_768", 1024: "embedding"}
+
+# Fields stored per chunk (same names as semantic_search_chunks RPC rows)
+_CHUNK_FIELDS = ("id", "legal_act_id", "chunk_index", "content", "metadata")
+_ACT_FIELDS = ("title", "publisher", "year", "position", "status")
+
+
+# =========================================================================
+# HELPERS
+# =========================================================================
+
+def _normalize_rows(vectors):
+    """L2-normalize rows (zero rows stay zero) so dot product = cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _row_to_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert legal_act_chunks row (with embedded legal_acts) to stored record."""
+    record = {field: row.get(field) for field in _CHUNK_FIELDS}
+    act = row.get("legal_acts") or {}
+    for field in _ACT_FIELDS:
+        record[f"act_{field}"] = act.get(field)
+    return record
+
+
+def _parse_vector(value: Any) -> List[float]:
+    """Parse pgvector value (PostgREST returns text like "[0.1,0.2]")."""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+# =========================================================================
+# LOCAL VECTOR INDEX
+# =========================================================================
+
+class LocalVectorIndex:
+    """
+    Memory-mapped embeddings index with exact top-k cosine search.
+    
+    Example Usage:
+        ```python
+        index = LocalVectorIndex("/var/lib/prawnikgpt/index", dim=768)
+        await index.refresh()
+        rows = index.search(query_embedding, top_k=10, distance_threshold=0.5)
+        ```
+    """
+    
+    def __init__(self, directory: str, dim: int):
+        """
+        Initialize index (files are loaded lazily).
+        
+        Args:
+            directory: Directory for index files (created if missing)
+            dim: Embedding dimension (768 or 1024)
+        
+        Raises:
+            ValueError: If dimension is not supported
+        """
+        if dim not in EMBEDDING_COLUMNS:
+            raise ValueError(f"Unsupported embedding dimension: {dim}")
+        
+        self.directory = Path(directory)
+        self.dim = dim
+        self.column = EMBEDDING_COLUMNS[dim]
+        
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._manifest_version: Optional[Tuple[int, int]] = None
+        self._vectors = None
+        self._offsets = None
+        self._chunks = None
+        
+        self._refresh_lock = asyncio.Lock()
+        self._searches = 0
+        self._last_refresh: Optional[float] = None
+    
+    # ---------------------------------------------------------------------
+    # Paths and manifest
+    # ---------------------------------------------------------------------
+    
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+    
+    def _data_paths(self, generation: int) -> Tuple[Path, Path, Path]:
+        """Embeddings, offsets and chunks file paths for a generation."""
+        return (
+            self._path(f"embeddings.{generation}.f32"),
+            self._path(f"offsets.{generation}.i64"),
+            self._path(f"chunks.{generation}.jsonl")
+        )
+    
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        """Read manifest from disk (None if missing or for another dimension)."""
+        try:
+            manifest = json.loads(self._path(MANIFEST_FILE).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        
+        if manifest.get("version") != FORMAT_VERSION or manifest.get("dim") != self.dim:
+            logger.warning(
+                "Local vector index manifest does not match (version/dim), ignoring"
+            )
+            return None
+        return manifest
+    
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Replace manifest atomically (readers see old or new, never partial)."""
+        tmp_path = self._path(f"{MANIFEST_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(MANIFEST_FILE))
+    
+    @staticmethod
+    def _empty_manifest(dim: int, generation: int) -> Dict[str, Any]:
+        return {
+            "version": FORMAT_VERSION,
+            "dim": dim,
+            "generation": generation,
+            "count": 0,
+            "chunks_bytes": 0,
+            "last_created_at": None,
+            "last_id": None,
+            "acts_updated_at": None,
+            "updated_at": None
+        }
+    
+    # ---------------------------------------------------------------------
+    # Reader side (memory maps)
+    # ---------------------------------------------------------------------
+    
+    def _maybe_reload(self) -> None:
+        """Re-map files if the manifest changed (refresh by this or another worker)."""
+        try:
+            stat = self._path(MANIFEST_FILE).stat()
+        except FileNotFoundError:
+            return
+        
+        # Manifest is replaced (new inode) on every publish
+        version = (stat.st_ino, stat.st_mtime_ns)
+        if version == self._manifest_version:
+            return
+        
+        manifest = self._read_manifest()
+        self._manifest_version = version
+        if manifest is None:
+            return
+        
+        count = manifest["count"]
+        if count == 0:
+            self._vectors = self._offsets = self._chunks = None
+            self._manifest = manifest
+            return
+        
+        embeddings_path, offsets_path, chunks_path = self._data_paths(manifest["generation"])
+        # Only the first `count` rows are mapped - rows appended by a running
+        # refresh become visible with the next manifest
+        self._vectors = np.memmap(embeddings_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+        self._offsets = np.memmap(offsets_path, dtype=np.int64, mode="r", shape=(count,))
+        with open(chunks_path, "rb") as f:
+            self._chunks = mmap.mmap(f.fileno(), length=manifest["chunks_bytes"], access=mmap.ACCESS_READ)
+        self._manifest = manifest
+        
+        logger.info(
+            f"Local vector index loaded: {count} chunks, dim={self.dim}, "
+            f"generation={manifest['generation']}"
+        )
+    
+    def is_ready(self, dim: int) -> bool:
+        """
+        Check whether the index can answer searches for this dimension.
+        
+        Args:
+            dim: Query embedding dimension
+        
+        Returns:
+            bool: True if index is loaded, non-empty and dimension matches
+        """
+        if dim != self.dim:
+            return False
+        self._maybe_reload()
+        return self._manifest is not None and self._manifest["count"] > 0
+    
+    def _read_record(self, row: int) -> Dict[str, Any]:
+        """Decode one chunk record from the chunks file."""
+        start = int(self._offsets[row])
+        end = int(self._offsets[row + 1]) if row + 1 < len(self._offsets) else self._manifest["chunks_bytes"]
+        return json.loads(self._chunks[start:end])
+    
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        distance_threshold: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Exact top-k cosine search over memory-mapped embeddings.
+        
+        Args:
+            query_embedding: Query vector (index dimension)
+            top_k: Maximum number of results
+            distance_threshold: Maximum cosine distance (0-2)
+        
+        Returns:
+            List[Dict]: Rows in semantic_search_chunks RPC format
+                (id, legal_act_id, ..., distance, act_title, ...), closest first
+        
+        Raises:
+            ValueError: If index is not ready for query dimension
+        """
+        if not self.is_ready(len(query_embedding)):
+            raise ValueError(f"Local vector index not ready for dim={len(query_embedding)}")
+        
+        self._searches += 1
+        
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        
+        distances = 1.0 - self._vectors @ query
+        
+        k = min(top_k, len(distances))
+        candidates = np.argpartition(distances, k - 1)[:k]
+        candidates = candidates[np.argsort(distances[candidates])]
+        
+        results = []
+        for row in candidates:
+            distance = float(distances[row])
+            if distance >= distance_threshold:
+                break
+            record = self._read_record(int(row))
+            record["distance"] = distance
+            results.append(record)
+        
+        return results
+    
+    # ---------------------------------------------------------------------
+    # Writer side (refresh)
+    # ---------------------------------------------------------------------
+    
+    async def _fetch_version(self) -> Tuple[Optional[int], Optional[str]]:
+        """Embedded chunk count and latest legal_acts.updated_at in the database."""
+        client = get_supabase()
+        
+        chunks_response, acts_response = await asyncio.gather(
+            client.table("legal_act_chunks")
+                .select("id", count="exact")
+                .not_.is_(self.column, "null")
+                .limit(1)
+                .execute(),
+            client.table("legal_acts")
+                .select("updated_at")
+                .order("updated_at", desc=True)
+                .limit(1)
+                .execute()
+        )
+        
+        return (
+            chunks_response.count,
+            acts_response.data[0]["updated_at"] if acts_response.data else None
+        )
+    
+    async def _fetch_batch(
+        self,
+        after: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Fetch next chunks ordered by (created_at, id) after the watermark."""
+        client = get_supabase()
+        
+        query = (
+            client.table("legal_act_chunks")
+            .select(
+                f"id, legal_act_id, chunk_index, content, metadata, created_at, {self.column}, "
+                f"legal_acts(title, publisher, year, position, status)"
+            )
+            .not_.is_(self.column, "null")
+            .order("created_at")
+            .order("id")
+            .limit(limit)
+        )
+        
+        if after is not None:
+            created_at, chunk_id = after
+            query = query.or_(
+                f'created_at.gt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.gt.{chunk_id})'
+            )
+        
+        response = await query.execute()
+        return response.data or []
+    
+    def _append(self, manifest: Dict[str, Any], rows: List[Dict[str, Any]]) -> None:
+        """
+        Append rows to the generation files and advance manifest (in memory).
+        
+        Files are first truncated to the manifest sizes, dropping leftovers
+        of an interrupted refresh.
+        """
+        embeddings_path, offsets_path, chunks_path = self._data_paths(manifest["generation"])
+        count = manifest["count"]
+        
+        vectors = _normalize_rows(
+            np.asarray([_parse_vector(row[self.column]) for row in rows], dtype=np.float32)
+        )
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim embeddings, got {vectors.shape[1]}")
+        
+        offsets = []
+        lines = []
+        position = manifest["chunks_bytes"]
+        for row in rows:
+            line = json.dumps(_row_to_record(row), ensure_ascii=False).encode("utf-8") + b"\n"
+            offsets.append(position)
+            lines.append(line)
+            position += len(line)
+        
+        for path, size, data in (
+            (embeddings_path, count * self.dim * 4, vectors.tobytes()),
+            (offsets_path, count * 8, np.asarray(offsets, dtype=np.int64).tobytes()),
+            (chunks_path, manifest["chunks_bytes"], b"".join(lines))
+        ):
+            with open(path, "ab") as f:
+                f.truncate(size)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        
+        manifest["count"] = count + len(rows)
+        manifest["chunks_bytes"] = position
+        manifest["last_created_at"] = rows[-1]["created_at"]
+        manifest["last_id"] = rows[-1]["id"]
+    
+    def _try_lock_file(self):
+        """Take the cross-worker refresh lock (None if held by another worker)."""
+        handle = open(self._path(LOCK_FILE), "a")
+        if fcntl is None:
+            return handle
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            return None
+        return handle
+    
+    async def refresh(self, full: bool = False) -> int:
+        """
+        Mirror new chunks from the database into the index.
+        
+        Incremental refresh appends chunks created after the stored
+        watermark. Full refresh builds a new generation from scratch and
+        switches to it at the end (searches keep using the old one meanwhile).
+        Only one worker refreshes at a time; others return immediately.
+        
+        Args:
+            full: Rebuild all rows (picks up deletions and metadata changes)
+        
+        Returns:
+            int: Number of rows added (0 if another worker is refreshing)
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        async with self._refresh_lock:
+            lock_handle = self._try_lock_file()
+            if lock_handle is None:
+                logger.debug("Local vector index refresh already running in another worker")
+                return 0
+            
+            try:
+                current = self._read_manifest()
+                
+                if full or current is None:
+                    generation = (current["generation"] + 1) if current else 0
+                    manifest = self._empty_manifest(self.dim, generation)
+                    # Taken before the rows, so act changes during the build trigger another one
+                    _, manifest["acts_updated_at"] = await self._fetch_version()
+                    for path in self._data_paths(generation):
+                        path.unlink(missing_ok=True)
+                    publish_each_batch = current is None
+                else:
+                    manifest = dict(current)
+                    publish_each_batch = True
+                
+                added = 0
+                start = time.time()
+                
+                while True:
+                    after = None
+                    if manifest["last_created_at"] is not None:
+                        after = (manifest["last_created_at"], manifest["last_id"])
+                    
+                    rows = await self._fetch_batch(after, REFRESH_BATCH_SIZE)
+                    if not rows:
+                        break
+                    
+                    await asyncio.to_thread(self._append, manifest, rows)
+                    added += len(rows)
+                    
+                    if publish_each_batch:
+                        manifest["updated_at"] = time.time()
+                        self._write_manifest(manifest)
+                    
+                    if len(rows) < REFRESH_BATCH_SIZE:
+                        break
+                
+                if not publish_each_batch or (added == 0 and current is None):
+                    manifest["updated_at"] = time.time()
+                    self._write_manifest(manifest)
+                
+                if current is not None and manifest["generation"] != current["generation"]:
+                    # Readers that still map old files keep them until unmapped
+                    for path in self._data_paths(current["generation"]):
+                        path.unlink(missing_ok=True)
+                
+                self._last_refresh = time.time()
+                logger.info(
+                    f"Local vector index refreshed ({'full' if full else 'incremental'}): "
+                    f"+{added} chunks, total {manifest['count']} "
+                    f"in {(time.time() - start) * 1000:.0f}ms"
+                )
+                return added
+            finally:
+                lock_handle.close()
+    
+    async def sync(self) -> int:
+        """
+        Incremental refresh, then a full rebuild if the index is out of date.
+        
+        The index is rebuilt when its row count differs from the embedded
+        chunks in the database (chunks deleted, or embeddings backfilled on
+        rows older than the watermark) or when legal act metadata changed.
+        
+        Returns:
+            int: Number of rows added by the refresh (rows in the new
+                generation after a rebuild)
+        """
+        added = await self.refresh()
+        
+        count, acts_updated_at = await self._fetch_version()
+        manifest = self._read_manifest()
+        if manifest is None:
+            return added
+        
+        if count != manifest["count"] or acts_updated_at != manifest.get("acts_updated_at"):
+            logger.info(
+                f"Local vector index out of date ({manifest['count']} rows, database {count}; "
+                f"acts updated {acts_updated_at}), rebuilding"
+            )
+            return await self.refresh(full=True)
+        return added
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+        
+        Returns:
+            Dict: count, dim, generation, searches, last refresh timestamp
+        """
+        manifest = self._manifest or {}
+        return {
+            "dim": self.dim,
+            "count": manifest.get("count", 0),
+            "generation": manifest.get("generation"),
+            "searches": self._searches,
+            "last_refresh": self._last_refresh
+        }
+
+
+# =========================================================================
+# SINGLETON AND BACKGROUND REFRESH
+# =========================================================================
+
+_local_vector_index: LocalVectorIndex | None = None
+
+
+def get_local_vector_index() -> Optional[LocalVectorIndex]:
+    """
+    Get LocalVectorIndex singleton (None if disabled or numpy is missing).
+    
+    Returns:
+        Optional[LocalVectorIndex]: Index instance or None
+    """
+    global _local_vector_index
+    
+    if not settings.local_vector_index_enabled:
+        return None
+    
+    if np is None:
+        logger.warning("LOCAL_VECTOR_INDEX_ENABLED=true but numpy is not installed")
+        return None
+    
+    if _local_vector_index is None:
+        _local_vector_index = LocalVectorIndex(
+            directory=settings.local_vector_index_dir,
+            dim=settings.local_vector_index_dim
+        )
+    
+    return _local_vector_index
+
+
+async def periodic_local_index_refresh(interval_seconds: int = 300):
+    """
+    Sync local vector index at startup and then periodically (see sync()).
+    
+    Args:
+        interval_seconds: Refresh interval in seconds (0 = only at startup)
+    """
+    index = get_local_vector_index()
+    if index is None:
+        return
+    
+    while True:
+        try:
+            await index.sync()
+        except Exception as e:
+            logger.error(f"Local vector index refresh failed: {e}")
+        
+        if interval_seconds <= 0:
+            return
+        await asyncio.sleep(interval_seconds)
+
+
+# =========================================================================
+# COMMAND LINE
+# =========================================================================
+
+async def _main(full: bool) -> int:
+    """Refresh (or rebuild) the configured local vector index once."""
+    index = get_local_vector_index()
+    if index is None:
+        logger.error("Local vector index is disabled (LOCAL_VECTOR_INDEX_ENABLED) or numpy is missing")
+        return 1
+    
+    try:
+        added = await index.refresh(full=True) if full else await index.sync()
+    finally:
+        await SupabaseClient.close()
+    logger.info(f"Local vector index {'rebuilt' if full else 'synced'}: {added} rows written")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the local vector index")
+    parser.add_argument("--full", action="store_true", help="Rebuild all rows (new generation)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=settings.log_level, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    raise SystemExit(asyncio.run(_main(args.full)))
@@ -0,0 +1,518 @@
+"""
+PrawnikGPT Backend - Ollama Host Pool
+
+Routes Ollama requests across several inference hosts (OLLAMA_HOST plus
+OLLAMA_EXTRA_HOSTS):
+- Model affinity: models pinned to hosts (OLLAMA_MODEL_HOSTS, e.g. the
+  120B accurate model on the big GPU box) are only sent there; otherwise
+  hosts that have the model installed are used, preferring hosts where it
+  is already loaded (/api/ps) to avoid cold model loads
+- Least-loaded routing by requests in flight per host
+- Health tracking: a host that cannot be reached is skipped for
+  HOST_DOWN_SECONDS and requests fail over to the next best host
+  (see OllamaService._retry_request)
+- Installed/loaded models are refreshed in the background from /api/tags
+  and /api/ps
+- Circuit breaker per host and model (closed/open/half-open): after
+  repeated failures requests fail fast instead of piling retries onto a
+  dead backend
+
+With a single host the pool always returns that host, so OllamaService
+behaves exactly as before.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Iterable
+
+import httpx
+
+from backend.services.exceptions import OLLAMAUnavailableError
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+# Seconds an unreachable host is skipped
+HOST_DOWN_SECONDS = 30.0
+
+# Routing cost of a cold model load, in requests in flight
+NOT_RESIDENT_PENALTY = 4
+
+# Seconds between background refreshes of installed/loaded models
+MODELS_REFRESH_SECONDS = 15.0
+
+# Circuit breaker defaults (see settings.ollama_circuit_*)
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+
+
+def _model_names(data: dict) -> set[str]:
+    """Model names from an /api/tags or /api/ps response."""
+    return {model["name"] for model in data.get("models", []) if model.get("name")}
+
+
+def _matches(model: str, names: set[str]) -> bool:
+    """Check model against Ollama names (untagged names mean ':latest')."""
+    return model in names or (":" not in model and f"{model}:latest" in names)
+
+
+# =========================================================================
+# CIRCUIT BREAKER
+# =========================================================================
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one host/model pair.
+
+    - closed: requests pass; failure_threshold consecutive failures open it
+    - open: requests are rejected until reset_seconds have passed
+    - half-open: a single probe request passes; success closes the
+      circuit, failure opens it again
+
+    Example Usage:
+        ```python
+        breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10)
+        if not breaker.allow():
+            raise OLLAMAUnavailableError("circuit open")
+        try:
+            result = await call()
+            breaker.record_success()
+        except OLLAMATimeoutError:
+            breaker.record_failure()
+            raise
+        ```
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS,
+        enabled: bool = True
+    ):
+        """
+        Initialize CircuitBreaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: Time the circuit stays open before a probe
+            enabled: False = always closed (failures are only counted)
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.enabled = enabled
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def is_available(self) -> bool:
+        """Check (without side effects) if allow() would let a request pass."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.time() - self.opened_at >= self.reset_seconds
+        return not self._probe_in_flight
+
+    def allow(self) -> bool:
+        """
+        Admit a request (claims the probe when the circuit is half-open).
+
+        Returns:
+            bool: False if the request must fail fast
+        """
+        if not self.is_available():
+            self.rejected += 1
+            return False
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """Record a request the backend answered (closes the circuit)."""
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a backend failure (connection error, timeout, 5xx)."""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+
+        if not self.enabled:
+            return
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.time()
+
+    def release(self) -> None:
+        """Finish a request without a verdict (cancelled, shed before sending)."""
+        if self._probe_in_flight:
+            self._probe_in_flight = False
+            self.state = self.OPEN  # Next request probes again right away
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get breaker statistics.
+
+        Returns:
+            dict: state, consecutive failures, times opened, rejected requests
+        """
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+# =========================================================================
+# HOST
+# =========================================================================
+
+class OllamaHost:
+    """State of one Ollama server."""
+
+    def __init__(
+        self,
+        base_url: str,
+        client_factory: Callable[[str], httpx.AsyncClient],
+        breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker
+    ):
+        """
+        Initialize OllamaHost.
+
+        Args:
+            base_url: Ollama base URL
+            client_factory: Creates the HTTP client for base_url
+            breaker_factory: Creates the circuit breaker of a model
+        """
+        self.base_url = base_url.rstrip("/")
+        self._client_factory = client_factory
+        self._client: httpx.AsyncClient | None = None
+        self._breaker_factory = breaker_factory
+        self._breakers: dict[str | None, CircuitBreaker] = {}
+
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.down_until = 0.0
+        self.last_error: str | None = None
+
+        self.models: set[str] | None = None  # Installed models (None = not fetched yet)
+        self.resident: set[str] = set()  # Models loaded in memory
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client for this host (created lazily)."""
+        if self._client is None:
+            self._client = self._client_factory(self.base_url)
+        return self._client
+
+    @property
+    def healthy(self) -> bool:
+        """False while the host is skipped after a connection failure."""
+        return time.time() >= self.down_until
+
+    def breaker(self, model: str | None) -> CircuitBreaker:
+        """Circuit breaker of model on this host (None = model-less calls)."""
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = self._breaker_factory()
+        return breaker
+
+    def has_model(self, model: str) -> bool:
+        """Check if model is installed (unknown model lists count as yes)."""
+        return self.models is None or _matches(model, self.models)
+
+    def is_resident(self, model: str) -> bool:
+        """Check if model is loaded in memory."""
+        return _matches(model, self.resident)
+
+    def mark_success(self, model: str | None = None) -> None:
+        """Record a successful request (Ollama keeps the model loaded)."""
+        self.requests += 1
+        self.down_until = 0.0
+        if model:
+            self.resident.add(model)
+
+    def mark_failure(self, error: Exception, down: bool = False) -> None:
+        """
+        Record a failed request.
+
+        Args:
+            error: Failure cause
+            down: Host unreachable - skip it for HOST_DOWN_SECONDS
+        """
+        self.requests += 1
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        if down:
+            self.down_until = time.time() + HOST_DOWN_SECONDS
+            logger.warning(
+                f"Ollama host {self.base_url} marked down for {HOST_DOWN_SECONDS:.0f}s: {error}"
+            )
+
+    async def refresh(self) -> bool:
+        """
+        Fetch installed (/api/tags) and loaded (/api/ps) models.
+
+        Returns:
+            bool: True if the host responded
+        """
+        try:
+            tags, ps = await asyncio.gather(
+                self.client.get("/api/tags", timeout=5.0),
+                self.client.get("/api/ps", timeout=5.0)
+            )
+            if tags.status_code != 200:
+                raise OLLAMAUnavailableError(f"HTTP {tags.status_code} from /api/tags")
+
+            self.models = _model_names(tags.json())
+            if ps.status_code == 200:
+                self.resident = _model_names(ps.json())
+            self.down_until = 0.0
+            return True
+        except Exception as e:
+            self.mark_failure(e, down=True)
+            return False
+
+    async def close(self) -> None:
+        """Close the HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get host statistics.
+
+        Returns:
+            dict: health, in-flight/total/failed requests, loaded models,
+                circuit breakers per model
+        """
+        return {
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "resident_models": sorted(self.resident),
+            "last_error": self.last_error,
+            "circuits": {
+                model or "*": breaker.get_stats() for model, breaker in self._breakers.items()
+            }
+        }
+
+
+# =========================================================================
+# POOL
+# =========================================================================
+
+class OllamaPool:
+    """
+    Set of Ollama hosts with model-aware least-loaded selection.
+
+    Example Usage:
+        ```python
+        pool = OllamaPool(
+            ["http://gpu-small:11434", "http://gpu-big:11434"],
+            model_hosts={"gpt-oss:120b": ["http://gpu-big:11434"]},
+            client_factory=lambda url: httpx.AsyncClient(base_url=url)
+        )
+        host = pool.select("gpt-oss:120b")  # Always gpu-big
+        ```
+    """
+
+    def __init__(
+        self,
+        hosts: list[str],
+        model_hosts: dict[str, list[str]] | None = None,
+        client_factory: Callable[[str], httpx.AsyncClient] | None = None,
+        circuit_breaker: bool = True,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS
+    ):
+        """
+        Initialize OllamaPool.
+
+        Args:
+            hosts: Ollama base URLs (first = primary)
+            model_hosts: Models pinned to hosts (hosts not in hosts are added)
+            client_factory: Creates the HTTP client for a base URL
+            circuit_breaker: Fail fast on hosts with repeated failures
+            failure_threshold: Consecutive failures that open a circuit
+            reset_seconds: Time a circuit stays open before a probe
+        """
+        client_factory = client_factory or (lambda url: httpx.AsyncClient(base_url=url))
+
+        def breaker_factory() -> CircuitBreaker:
+            return CircuitBreaker(failure_threshold, reset_seconds, enabled=circuit_breaker)
+
+        self._model_hosts = {
+            model: {url.rstrip("/") for url in urls}
+            for model, urls in (model_hosts or {}).items()
+        }
+
+        urls: list[str] = []
+        for url in [*hosts, *(url for urls in self._model_hosts.values() for url in urls)]:
+            url = url.rstrip("/")
+            if url not in urls:
+                urls.append(url)
+        if not urls:
+            raise ValueError("OllamaPool requires at least one host")
+
+        self.hosts = [OllamaHost(url, client_factory, breaker_factory) for url in urls]
+        self.failovers = 0
+
+        self._last_refresh = 0.0
+        self._refresh_task: asyncio.Task | None = None
+
+    @property
+    def primary(self) -> OllamaHost:
+        """First configured host."""
+        return self.hosts[0]
+
+    @property
+    def is_multi_host(self) -> bool:
+        """True if requests can be routed to more than one host."""
+        return len(self.hosts) > 1
+
+    def select(
+        self,
+        model: str | None = None,
+        exclude: Iterable[OllamaHost] = ()
+    ) -> OllamaHost:
+        """
+        Choose a host for a request.
+
+        Candidates are the model's pinned hosts (if any), narrowed to hosts
+        with the model installed. Among healthy candidates whose circuit
+        admits requests, the one with the fewest requests in flight wins,
+        with a penalty for hosts that would have to load the model first.
+        If every circuit is open, a host is still returned - the caller
+        fails fast on its breaker.
+
+        Args:
+            model: Model of the request (None = any host, e.g. health check)
+            exclude: Hosts already tried for this request (ignored if no
+                other candidate is left)
+
+        Returns:
+            OllamaHost: Selected host
+
+        Raises:
+            OLLAMAUnavailableError: If no host is configured for a pinned model
+        """
+        if not self.is_multi_host:
+            return self.primary
+
+        self._refresh_if_stale()
+
+        candidates = self.hosts
+        if model is not None:
+            pinned = self._model_hosts.get(model)
+            if pinned:
+                candidates = [host for host in candidates if host.base_url in pinned]
+            installed = [host for host in candidates if host.has_model(model)]
+            candidates = installed or candidates
+
+        if not candidates:
+            raise OLLAMAUnavailableError(f"No Ollama host configured for model {model}")
+
+        excluded = set(exclude)
+        untried = [host for host in candidates if host not in excluded]
+        candidates = untried or candidates
+
+        closed = [host for host in candidates if host.breaker(model).is_available()]
+        candidates = closed or candidates
+
+        healthy = [host for host in candidates if host.healthy]
+        if not healthy:
+            # Everything is down - try the host that failed longest ago
+            return min(candidates, key=lambda host: host.down_until)
+
+        def cost(host: OllamaHost) -> int:
+            cold = model is not None and not host.is_resident(model)
+            return host.in_flight + (NOT_RESIDENT_PENALTY if cold else 0)
+
+        return min(healthy, key=cost)
+
+    def host_count(self, model: str) -> int:
+        """Number of configured hosts that may serve model (its pinned hosts, else all)."""
+        pinned = self._model_hosts.get(model)
+        if pinned:
+            return sum(1 for host in self.hosts if host.base_url in pinned)
+        return len(self.hosts)
+
+    def can_fail_over(self, model: str | None, tried: Iterable[OllamaHost]) -> bool:
+        """Check if an untried healthy host with a closed circuit could serve model."""
+        if not self.is_multi_host:
+            return False
+        tried = list(tried)
+        host = self.select(model, exclude=tried)
+        return host not in tried and host.healthy and host.breaker(model).is_available()
+
+    async def refresh(self) -> int:
+        """
+        Refresh installed/loaded models of all hosts.
+
+        Returns:
+            int: Number of hosts that responded
+        """
+        self._last_refresh = time.time()
+        results = await asyncio.gather(*(host.refresh() for host in self.hosts))
+        return sum(results)
+
+    def _refresh_if_stale(self) -> None:
+        """Start a background refresh if model lists are outdated."""
+        if time.time() - self._last_refresh < MODELS_REFRESH_SECONDS:
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+
+        self._last_refresh = time.time()
+        try:
+            self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+        except RuntimeError:
+            pass  # No event loop (sync caller) - refresh on next async selection
+
+    def all_models(self) -> list[str]:
+        """Installed models across hosts (sorted, de-duplicated)."""
+        names: set[str] = set()
+        for host in self.hosts:
+            names |= host.models or set()
+        return sorted(names)
+
+    async def close(self) -> None:
+        """Close HTTP clients of all hosts."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+        await asyncio.gather(*(host.close() for host in self.hosts))
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get pool statistics.
+
+        Returns:
+            dict: Per-host statistics, pinned models and failover count
+        """
+        return {
+            "hosts": {host.base_url: host.get_stats() for host in self.hosts},
+            "model_hosts": {model: sorted(urls) for model, urls in self._model_hosts.items()},
+            "failovers": self.failovers
+        }
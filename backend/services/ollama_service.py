@@ -7,25 +7,39 @@ Comprehensive service for Ollama API integration with:
 - Structured outputs (JSON)
 - Error recovery
 - Resource management
+- Batched embeddings (/api/embed) with micro-batching of single calls
+- Single-flight coalescing of identical in-flight requests
+- Token streaming (NDJSON from /api/generate)
+- Priority / fair / deadline-aware admission (services/llm_scheduler.py)
+- Multi-host routing with model affinity and failover (services/ollama_pool.py)
+- Circuit breaker per host and model, hedged requests for short calls
 
 Based on implementation plan from .ai/ollama-service-implementation-plan.md
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import os
 import re
 import time
-from typing import Any, Callable
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable
 
 import httpx
 
 from backend.config import settings
+from backend.services.context_packer import get_num_ctx, get_token_estimator
+from backend.services.embedding_cache import get_embedding_cache
+from backend.services.llm_scheduler import LLMScheduler
+from backend.services.ollama_pool import CircuitBreaker, OllamaHost, OllamaPool
 from backend.services.exceptions import (
     OLLAMAUnavailableError,
     OLLAMATimeoutError,
     EmbeddingGenerationError,
+    LLMRequestShedError,
     ModelNotFoundError,
     OutOfMemoryError,
 )
@@ -40,6 +54,177 @@ MODELS_CACHE_TTL = 300  # 5 minutes
 MEMORY_WARNING_THRESHOLD = 0.80  # 80% of available memory
 MEMORY_CRITICAL_THRESHOLD = 0.90  # 90% of available memory
 
+# Hedged requests: latency samples kept per model, samples needed before
+# hedging, and the lowest hedge delay (seconds)
+HEDGE_LATENCY_SAMPLES = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.05
+
+# Host serving the request currently executed by _retry_request()
+_current_host: ContextVar[OllamaHost | None] = ContextVar("ollama_current_host", default=None)
+
+
+class _EmbeddingBatcher:
+    """
+    Micro-batching collector for single embedding requests.
+    
+    Concurrent generate_embedding() calls for the same model (and timeout)
+    that arrive within the batching window are merged into one /api/embed
+    request. A batch is flushed when the window elapses or when it reaches
+    max_batch inputs, whichever comes first.
+    """
+    
+    def __init__(self, service: "OllamaService", window_ms: int, max_batch: int):
+        self._service = service
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: dict[tuple[str, int, str], list[tuple[str, asyncio.Future]]] = {}
+        self._flush_timers: dict[tuple[str, int, str], asyncio.Task] = {}
+        self._running: set[asyncio.Task] = set()  # Strong refs to in-flight batches
+    
+    async def submit(self, text: str, model: str, timeout: int, priority: str) -> list[float]:
+        """
+        Queue text for the next batch and wait for its embedding.
+        
+        Args:
+            text: Input text (already validated)
+            model: Embedding model
+            timeout: Request timeout in seconds
+            priority: Scheduler priority class (only same-priority calls are merged)
+            
+        Returns:
+            list[float]: Embedding vector for text
+        """
+        key = (model, timeout, priority)
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((text, future))
+        
+        if len(pending) >= self.max_batch:
+            self._flush(key)
+        elif key not in self._flush_timers:
+            self._flush_timers[key] = asyncio.create_task(self._flush_after_window(key))
+        
+        return await future
+    
+    async def _flush_after_window(self, key: tuple[str, int, str]) -> None:
+        """Flush pending batch once the batching window elapses."""
+        await asyncio.sleep(self.window)
+        self._flush_timers.pop(key, None)
+        self._flush(key)
+    
+    def _flush(self, key: tuple[str, int, str]) -> None:
+        """Detach pending batch for key and send it in a background task."""
+        timer = self._flush_timers.pop(key, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        
+        batch = self._pending.pop(key, [])
+        if not batch:
+            return
+        
+        task = asyncio.create_task(self._run_batch(key, batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+    
+    async def _run_batch(
+        self,
+        key: tuple[str, int, str],
+        batch: list[tuple[str, asyncio.Future]]
+    ) -> None:
+        """Send one batch and resolve waiting futures in input order."""
+        # Skip callers that gave up while waiting for the window
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+        
+        model, timeout, priority = key
+        texts = [text for text, _ in batch]
+        
+        try:
+            if len(texts) == 1:
+                # Nothing to merge - use the plain single-input endpoint
+                embeddings = [await self._service._embed_single(texts[0], model, timeout, priority)]
+            else:
+                embeddings = await self._service.generate_embeddings_batch(
+                    texts, model=model, timeout=timeout, priority=priority
+                )
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+
+class _SingleFlight:
+    """
+    Coalesces identical in-flight calls into one shared execution.
+    
+    The first caller for a key starts the call as a task; concurrent callers
+    with the same key await that same task instead of issuing their own
+    request (and taking another scheduler slot). The shared task is cancelled
+    only when every waiter has been cancelled.
+    """
+    
+    def __init__(self):
+        self._calls: dict[Hashable, list] = {}  # key -> [task, waiter_count]
+        self.coalesced: int = 0
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently in flight."""
+        return len(self._calls)
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func() once per key among concurrent callers.
+        
+        Args:
+            key: Call identity (hashable)
+            func: Coroutine factory executed by the first caller
+            
+        Returns:
+            Any: Result of the shared call
+        """
+        entry = self._calls.get(key)
+        if entry is None:
+            task = asyncio.create_task(func())
+            entry = [task, 0]
+            self._calls[key] = entry
+            task.add_done_callback(lambda _, key=key, entry=entry: self._forget(key, entry))
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced identical in-flight request: {str(key)[:80]}")
+        
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                # Last waiter gone - nobody needs the result anymore
+                task.cancel()
+    
+    def _forget(self, key: Hashable, entry: list) -> None:
+        """Remove finished call so later callers start a fresh one."""
+        if self._calls.get(key) is entry:
+            del self._calls[key]
+
+
+def _options_hash(options: dict) -> str:
+    """Stable short hash of generation options (for single-flight keys)."""
+    encoded = json.dumps(options, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
 
 class OllamaService:
     """
@@ -88,6 +273,9 @@ class OllamaService:
         
         # Generate embedding
         embedding = await service.generate_embedding("Legal text")
+        
+        # Generate many embeddings in as few requests as possible
+        embeddings = await service.generate_embeddings_batch(["Text 1", "Text 2"])
         ```
     """
     
@@ -97,7 +285,9 @@ class OllamaService:
         timeout_connect: int = 5,
         timeout_read: int = 300,
         max_retries: int = 3,
-        retry_delay: float = 1.0
+        retry_delay: float = 1.0,
+        extra_hosts: list[str] | None = None,
+        model_hosts: dict[str, list[str]] | None = None
     ):
         """
         Initialize OllamaService.
@@ -108,6 +298,8 @@ class OllamaService:
             timeout_read: Read timeout in seconds (for long generations)
             max_retries: Maximum retry attempts for failed requests
             retry_delay: Delay between retries in seconds
+            extra_hosts: Additional Ollama base URLs to balance requests across
+            model_hosts: Models pinned to hosts (e.g. accurate model on the big host)
         """
         self.base_url = base_url or settings.ollama_host
         self.timeout_connect = timeout_connect
@@ -120,60 +312,85 @@ class OllamaService:
         self.available_models: list[str] = []
         
         # Private state
-        self._client: httpx.AsyncClient | None = None
+        self._pool = OllamaPool(
+            [self.base_url, *(extra_hosts or [])],
+            model_hosts=model_hosts,
+            client_factory=self._create_client,
+            circuit_breaker=settings.ollama_circuit_breaker_enabled,
+            failure_threshold=settings.ollama_circuit_failure_threshold,
+            reset_seconds=settings.ollama_circuit_reset_seconds
+        )
         self._model_cache: dict[str, bool] = {}
         self._last_health_check: float = 0.0
         self._last_models_fetch: float = 0.0
         self._connection_lock = asyncio.Lock()
         
-        # Rate limiting per model - separate semaphores for different models
-        self._model_semaphores: dict[str, asyncio.Semaphore] = {}
-        self._init_model_semaphores()
+        # Admission control per model (priority classes, fair queuing, deadlines)
+        self._scheduler = self._init_scheduler()
+        
+        # Hedged requests (latency samples per model for the p95 hedge delay)
+        self._hedging = settings.ollama_hedging_enabled
+        self._latencies: dict[str | None, deque[float]] = {}
+        self._hedges = 0
+        self._hedge_wins = 0
+        
+        # Single-flight coalescing of identical in-flight requests
+        self._single_flight: _SingleFlight | None = (
+            _SingleFlight() if settings.ollama_single_flight_enabled else None
+        )
+        
+        # Micro-batching of concurrent single embedding calls (disabled if window is 0)
+        self._embedding_batcher: _EmbeddingBatcher | None = None
+        if settings.ollama_embedding_batch_window_ms > 0:
+            self._embedding_batcher = _EmbeddingBatcher(
+                self,
+                window_ms=settings.ollama_embedding_batch_window_ms,
+                max_batch=settings.ollama_embedding_batch_size
+            )
         
-        logger.info(f"OllamaService initialized: {self.base_url}")
+        logger.info(
+            f"OllamaService initialized: {', '.join(host.base_url for host in self._pool.hosts)}"
+        )
     
     # =========================================================================
     # PRIVATE METHODS - Rate Limiting Setup
     # =========================================================================
     
-    def _init_model_semaphores(self):
+    def _init_scheduler(self) -> LLMScheduler:
         """
-        Initialize semaphores for rate limiting per model.
+        Create the request scheduler with per-model concurrency limits.
         
-        Creates separate semaphores for different model types with
-        configurable concurrency limits from settings.
-        """
-        # Default semaphore for unknown models
-        default_limit = 3
+        Configured limits are per host: each model's limit is scaled by the
+        number of hosts that may serve it (its pinned hosts, else all hosts),
+        so adding hosts adds throughput. Models without a configured limit
+        share a default pool of 3 slots. Limits are initial values when
+        adaptive concurrency is enabled.
         
-        # Model-specific limits from settings
-        model_limits = {
+        Returns:
+            LLMScheduler: Scheduler for this service
+        """
+        # Model-specific limits from settings (per host)
+        per_host_limits = {
             settings.ollama_fast_model: settings.ollama_fast_model_concurrency,
             settings.ollama_accurate_model: settings.ollama_accurate_model_concurrency,
             settings.ollama_embedding_model: settings.ollama_embedding_model_concurrency,
         }
+        model_limits = {
+            model: limit * self._pool.host_count(model)
+            for model, limit in per_host_limits.items()
+        }
         
-        # Create semaphores for known models
         for model, limit in model_limits.items():
-            self._model_semaphores[model] = asyncio.Semaphore(limit)
             logger.debug(f"Rate limit for {model}: {limit} concurrent requests")
         
-        # Store default limit for unknown models
-        self._default_semaphore = asyncio.Semaphore(default_limit)
-    
-    def _get_model_semaphore(self, model: str) -> asyncio.Semaphore:
-        """
-        Get semaphore for a specific model.
-        
-        Returns model-specific semaphore if configured, otherwise default.
-        
-        Args:
-            model: Model name
-            
-        Returns:
-            asyncio.Semaphore: Semaphore for rate limiting
-        """
-        return self._model_semaphores.get(model, self._default_semaphore)
+        return LLMScheduler(
+            model_limits,
+            global_limit=settings.ollama_global_concurrency,
+            deadline_shedding=settings.ollama_deadline_shedding_enabled,
+            adaptive=settings.ollama_adaptive_concurrency_enabled,
+            adaptive_floor=settings.ollama_adaptive_concurrency_floor,
+            adaptive_ceiling_factor=settings.ollama_adaptive_concurrency_ceiling_factor
+        )
     
     # =========================================================================
     # PRIVATE METHODS - Memory Monitoring
@@ -291,60 +508,102 @@ class OllamaService:
     # PRIVATE METHODS - HTTP Client Management
     # =========================================================================
     
-    async def _get_client(self) -> httpx.AsyncClient:
+    def _create_client(self, base_url: str) -> httpx.AsyncClient:
         """
-        Get or create HTTP client (lazy initialization).
+        Create HTTP client for one Ollama host.
         
+        Args:
+            base_url: Ollama base URL
+            
         Returns:
             httpx.AsyncClient: Configured async HTTP client
         """
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=httpx.Timeout(
-                    connect=self.timeout_connect,
-                    read=self.timeout_read
-                ),
-                limits=httpx.Limits(
-                    max_keepalive_connections=5,
-                    max_connections=10
-                )
+        return httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(
+                self.timeout_read,
+                connect=self.timeout_connect
+            ),
+            limits=httpx.Limits(
+                max_keepalive_connections=5,
+                max_connections=10
             )
+        )
+    
+    async def _get_client(self, host: OllamaHost | None = None) -> httpx.AsyncClient:
+        """
+        Get HTTP client of a host (lazy initialization).
         
-        return self._client
+        Args:
+            host: Target host (default: host selected by _retry_request()
+                for the current request, else the primary host)
+            
+        Returns:
+            httpx.AsyncClient: Configured async HTTP client
+        """
+        host = host or _current_host.get() or self._pool.primary
+        return host.client
     
     async def _retry_request(
         self,
         func: Callable,
         max_retries: int | None = None,
-        retry_delay: float | None = None
+        retry_delay: float | None = None,
+        model: str | None = None,
+        hedge: bool = False
     ) -> Any:
         """
-        Execute request with retry logic and exponential backoff.
+        Execute request with retry logic, host failover and exponential backoff.
+        
+        Each attempt runs on a host chosen by the host pool (model affinity,
+        least loaded). If the host fails and another healthy host can serve
+        the model, the next attempt fails over to it at once; otherwise the
+        same host is retried after a backoff delay (network errors only).
+        Requests to a host/model whose circuit is open fail fast.
         
         Args:
             func: Async function to execute
             max_retries: Max retry attempts (defaults to self.max_retries)
             retry_delay: Base delay between retries (defaults to self.retry_delay)
+            model: Model of the request (host selection)
+            hedge: Duplicate slow attempts to another host (short calls only)
             
         Returns:
             Any: Function result
             
         Raises:
-            OLLAMAUnavailableError: If all retries fail
+            OLLAMAUnavailableError: If all retries fail or the circuit is open
         """
         max_retries = max_retries or self.max_retries
         retry_delay = retry_delay or self.retry_delay
         
         last_error = None
+        tried: list[OllamaHost] = []
         
         for attempt in range(max_retries + 1):
+            host = self._pool.select(model, exclude=tried)
+            if not host.breaker(model).allow():
+                raise OLLAMAUnavailableError(
+                    f"Circuit open for {model or 'Ollama'} on {host.base_url}, failing fast"
+                    + (f" (last error: {last_error})" if last_error else "")
+                )
+            tried.append(host)
+            
             try:
-                return await func()
+                if hedge:
+                    return await self._hedged_call(func, host, model, tried)
+                return await self._call_host(func, host, model)
             except (httpx.ConnectError, httpx.TimeoutException) as e:
                 last_error = e
                 
                 if attempt < max_retries:
+                    if self._pool.can_fail_over(model, tried):
+                        self._pool.failovers += 1
+                        logger.warning(f"Request to {host.base_url} failed, failing over: {e}")
+                        continue
+                    if not host.breaker(model).is_available():
+                        raise OLLAMAUnavailableError(f"Request failed, circuit open: {e}") from e
+                    
                     wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
                     logger.warning(
                         f"Request failed (attempt {attempt + 1}/{max_retries + 1}), "
@@ -354,12 +613,227 @@ class OllamaService:
                 else:
                     logger.error(f"Request failed after {max_retries + 1} attempts")
                     raise OLLAMAUnavailableError(f"Request failed: {e}") from e
+            except OLLAMAUnavailableError as e:
+                # Host-side failure (connection refused, HTTP 5xx, out of memory,
+                # model missing) - another host may still serve the request
+                last_error = e
+                if attempt < max_retries and self._pool.can_fail_over(model, tried):
+                    self._pool.failovers += 1
+                    logger.warning(f"Request to {host.base_url} failed, failing over: {e}")
+                    continue
+                raise
             except Exception as e:
                 # Don't retry on non-network errors
                 raise
         
         raise OLLAMAUnavailableError(f"Request failed: {last_error}")
     
+    async def _scheduled_request(
+        self,
+        func: Callable,
+        model: str,
+        priority: str | None,
+        user_id: str | None,
+        deadline: float,
+        **retry_kwargs: Any
+    ) -> Any:
+        """
+        Execute request through _retry_request() while holding a model slot.
+        
+        The slot (priority, fair queuing, deadline shedding) is taken before a
+        host is selected and held across retries, failover and hedging, so
+        time spent queued never counts as host latency or host load, and a
+        hedge does not queue behind its own request.
+        
+        Args:
+            func: Async function to execute (uses _get_client())
+            model: Model of the request
+            priority: Scheduler priority class
+            user_id: User for fair queuing
+            deadline: Unix time the request must be finished by
+            **retry_kwargs: Passed to _retry_request()
+            
+        Returns:
+            Any: Function result
+        """
+        async with self._scheduler.slot(model, priority, user_id, deadline):
+            return await self._retry_request(func, model=model, **retry_kwargs)
+    
+    def _record_host_error(
+        self,
+        host: OllamaHost,
+        breaker: CircuitBreaker,
+        error: BaseException
+    ) -> None:
+        """
+        Record a failed request on its host and host/model circuit breaker.
+        
+        Connection errors, timeouts and 5xx / stream errors count against the
+        host; a missing model or out-of-memory answer proves the host is up.
+        Requests that ended without a verdict (shed in our queue, cancelled)
+        only give up a half-open probe.
+        
+        Args:
+            host: Host the request went to
+            breaker: Circuit breaker of the request's model on host
+            error: Exception the request ended with
+        """
+        if isinstance(error, (httpx.ConnectError, httpx.TimeoutException)):
+            host.mark_failure(error, down=isinstance(error, httpx.ConnectError))
+            breaker.record_failure()
+        elif isinstance(error, LLMRequestShedError):
+            breaker.release()  # Shed in our queue - nothing was sent
+        elif isinstance(error, OLLAMATimeoutError):
+            host.mark_failure(error)
+            breaker.record_failure()
+        elif isinstance(error, (ModelNotFoundError, OutOfMemoryError)):
+            host.mark_failure(error)
+            breaker.record_success()  # Host answered
+        elif isinstance(error, OLLAMAUnavailableError):
+            host.mark_failure(error, down=isinstance(error.__context__, httpx.ConnectError))
+            breaker.record_failure()
+        else:
+            breaker.release()
+    
+    async def _call_host(self, func: Callable, host: OllamaHost, model: str | None) -> Any:
+        """
+        Execute func against host, recording the outcome.
+        
+        Updates the host's in-flight count and health, the host/model circuit
+        breaker and (on success) the latency samples used for hedging. The
+        caller already holds the scheduler slot (see _scheduled_request()),
+        so only the exchange with the host is timed and counted.
+        
+        Args:
+            func: Async function to execute (uses _get_client())
+            host: Target host
+            model: Model of the request
+            
+        Returns:
+            Any: Function result
+        """
+        token = _current_host.set(host)
+        breaker = host.breaker(model)
+        host.in_flight += 1
+        start_time = time.time()
+        
+        try:
+            result = await func()
+        except BaseException as e:
+            self._record_host_error(host, breaker, e)
+            raise
+        finally:
+            host.in_flight -= 1
+            _current_host.reset(token)
+        
+        host.mark_success(model)
+        breaker.record_success()
+        self._latencies.setdefault(
+            model, deque(maxlen=HEDGE_LATENCY_SAMPLES)
+        ).append(time.time() - start_time)
+        return result
+    
+    def _hedge_delay(self, model: str | None) -> float | None:
+        """
+        Delay after which a request is hedged (p95 latency of model).
+        
+        Returns:
+            float | None: Seconds, or None if hedging is off, there is no
+                other host, or too few latency samples exist
+        """
+        if not self._hedging or not self._pool.is_multi_host:
+            return None
+        
+        samples = self._latencies.get(model)
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(HEDGE_MIN_DELAY, p95)
+    
+    async def _hedged_call(
+        self,
+        func: Callable,
+        host: OllamaHost,
+        model: str | None,
+        tried: list[OllamaHost]
+    ) -> Any:
+        """
+        Execute func on host, duplicating it to another host when slow.
+        
+        If the request is still running after the model's p95 latency, the
+        same request is sent to the best other host. The first successful
+        response wins and the other request is cancelled. Without another
+        healthy host (or enough latency samples) this is a plain call.
+        
+        Args:
+            func: Async function to execute (uses _get_client())
+            host: Primary host
+            model: Model of the request
+            tried: Hosts used by this request (the hedge host is appended)
+            
+        Returns:
+            Any: Result of the first successful request
+        """
+        delay = self._hedge_delay(model)
+        if delay is None:
+            return await self._call_host(func, host, model)
+        
+        primary = asyncio.ensure_future(self._call_host(func, host, model))
+        pending = {primary}
+        
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            
+            backup_host = self._pool.select(model, exclude=tried)
+            if (
+                backup_host in tried
+                or not backup_host.healthy
+                or not backup_host.breaker(model).allow()
+            ):
+                return await primary
+            
+            tried.append(backup_host)
+            self._hedges += 1
+            logger.debug(
+                f"Hedging {model} request to {backup_host.base_url} "
+                f"after {delay * 1000:.0f}ms on {host.base_url}"
+            )
+            backup = asyncio.ensure_future(self._call_host(func, backup_host, model))
+            pending.add(backup)
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._hedge_wins += 1
+                        return task.result()
+            
+            # Both requests failed - report the primary's error
+            raise primary.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _coalesce(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Execute func() through the single-flight layer (if enabled).
+        
+        Args:
+            key: Request identity, e.g. (kind, model, prompt, ...)
+            func: Coroutine factory performing the actual request
+            
+        Returns:
+            Any: Request result (shared between identical concurrent calls)
+        """
+        if self._single_flight is None:
+            return await func()
+        return await self._single_flight.do(key, func)
+    
     # =========================================================================
     # PUBLIC METHODS - Health Check and Availability
     # =========================================================================
@@ -397,6 +871,15 @@ class OllamaService:
                 return self.is_available
         
         async def _check():
+            if self._pool.is_multi_host:
+                # Refresh every host; available if any host responds
+                responding = await self._pool.refresh()
+                self.is_available = responding > 0
+                self._last_health_check = time.time()
+                if not self.is_available and force:
+                    raise OLLAMAUnavailableError("No Ollama host is reachable")
+                return self.is_available
+            
             try:
                 client = await self._get_client()
                 response = await client.get("/api/version", timeout=2.0)
@@ -479,6 +962,16 @@ class OllamaService:
                 return self.available_models
         
         async def _fetch_models():
+            if self._pool.is_multi_host:
+                # Union of models installed on any host
+                if not await self._pool.refresh():
+                    raise OLLAMAUnavailableError("No Ollama host is reachable")
+                models = self._pool.all_models()
+                self.available_models = models
+                self._last_models_fetch = time.time()
+                logger.info(f"Available Ollama models (all hosts): {models}")
+                return models
+            
             client = await self._get_client()
             response = await client.get("/api/tags", timeout=5.0)
             
@@ -532,6 +1025,55 @@ class OllamaService:
         if num_ctx is not None and num_ctx < 0:
             raise ValueError(f"num_ctx must be non-negative, got {num_ctx}")
     
+    def _default_timeout(self, model: str) -> int:
+        """
+        Get model-specific generation timeout.
+        
+        - Fast model (mistral:7b): 15s
+        - Accurate model (gpt-oss:120b): 240s
+        - Other models: 60s default
+        """
+        if model == settings.ollama_fast_model:
+            return settings.ollama_fast_timeout
+        if model == settings.ollama_accurate_model:
+            return settings.ollama_accurate_timeout
+        return 60
+    
+    def _raise_for_generate_status(self, status_code: int, body: str, model: str) -> None:
+        """
+        Map non-200 /api/generate responses to service exceptions.
+        
+        Raises:
+            ModelNotFoundError: If model is not installed (404)
+            OutOfMemoryError: If model requires more memory (500)
+            OLLAMAUnavailableError: For any other non-200 status
+        """
+        if status_code == 200:
+            return
+        
+        error_text = body.lower()
+        
+        if status_code == 404 and "model" in error_text and "not found" in error_text:
+            raise ModelNotFoundError(
+                f"Model '{model}' not found. "
+                f"Run: ollama pull {model}"
+            )
+        
+        if status_code == 500 and ("memory" in error_text or "oom" in error_text):
+            logger.error(
+                f"Out of memory error with model {model}. "
+                f"Consider: 1) Using smaller model, 2) Reducing num_ctx, "
+                f"3) Closing other applications, 4) Using GPU with more VRAM"
+            )
+            raise OutOfMemoryError(
+                f"Model {model} requires more memory. "
+                f"Try using a smaller model or reducing context size."
+            )
+        
+        raise OLLAMAUnavailableError(
+            f"OLLAMA generation failed: HTTP {status_code}"
+        )
+    
     def _build_structured_system_prompt(
         self,
         base_system_prompt: str,
@@ -629,7 +1171,9 @@ Pamiętaj:
         num_ctx: int | None = None,
         seed: int | None = None,
         timeout: int | None = None,
-        stream: bool = False
+        stream: bool = False,
+        priority: str | None = None,
+        user_id: str | None = None
     ) -> str:
         """
         Generate text using Ollama model.
@@ -649,7 +1193,11 @@ Pamiętaj:
             num_ctx: Context window size (tokens)
             seed: Random seed for reproducibility
             timeout: Request timeout in seconds (overrides default)
-            stream: Enable streaming (not implemented yet)
+            stream: Passed through to Ollama; use generate_text_stream()
+                to consume tokens incrementally
+            priority: Scheduler priority class ("interactive", "accurate",
+                "batch"; default: from llm_request_context() or model)
+            user_id: User for fair queuing (default: from llm_request_context())
             
         Returns:
             str: Generated text
@@ -657,6 +1205,7 @@ Pamiętaj:
         Raises:
             OLLAMAUnavailableError: If service unavailable
             OLLAMATimeoutError: If request times out
+            LLMRequestShedError: If the request cannot be started in time
             ValueError: If prompt is empty or model invalid
             ModelNotFoundError: If model not found
             OutOfMemoryError: If model requires more memory
@@ -687,12 +1236,8 @@ Pamiętaj:
         
         # Use model-specific timeout if not provided
         if timeout is None:
-            if model == settings.ollama_fast_model:
-                timeout = settings.ollama_fast_timeout  # 15s
-            elif model == settings.ollama_accurate_model:
-                timeout = settings.ollama_accurate_timeout  # 240s
-            else:
-                timeout = 60  # Default
+            timeout = self._default_timeout(model)
+        deadline = time.time() + timeout  # Time spent queued counts against timeout
         
         # Validate model exists
         if not await self.validate_model(model):
@@ -704,114 +1249,318 @@ Pamiętaj:
             )
         
         async def _generate():
-            # Use model-specific semaphore for rate limiting
-            semaphore = self._get_model_semaphore(model)
-            async with semaphore:  # Limit concurrent requests per model
-                # Check memory before generation
-                self._check_memory_usage(context=f"before generation with {model}")
+            # Check memory before generation
+            self._check_memory_usage(context=f"before generation with {model}")
+            
+            client = await self._get_client()
+            
+            # Build request payload
+            payload = {
+                "model": model,
+                "prompt": prompt.strip(),
+                "stream": stream,
+                "options": {
+                    "temperature": temperature,
+                    "top_p": top_p,
+                    "top_k": top_k
+                }
+            }
+            
+            # Add optional parameters
+            if system_prompt:
+                payload["system"] = system_prompt
+            if num_ctx is not None:
+                payload["options"]["num_ctx"] = num_ctx
+            if seed is not None:
+                payload["options"]["seed"] = seed
+            
+            logger.info(
+                f"Starting generation with {model} "
+                f"(timeout={timeout}s, temp={temperature})"
+            )
+            
+            start_time = time.time()
+            
+            try:
+                # Use custom timeout for this request
+                response = await client.post(
+                    "/api/generate",
+                    json=payload,
+                    timeout=timeout
+                )
                 
-                client = await self._get_client()
+                if response.status_code != 200:
+                    self._raise_for_generate_status(
+                        response.status_code, response.text, model
+                    )
                 
-                # Build request payload
-                payload = {
-                    "model": model,
-                    "prompt": prompt.strip(),
-                    "stream": stream,
-                    "options": {
-                        "temperature": temperature,
-                        "top_p": top_p,
-                        "top_k": top_k
-                    }
-                }
+                # Parse response
+                data = response.json()
+                generated_text = data.get("response", "")
+                
+                if not generated_text:
+                    raise OLLAMAUnavailableError("OLLAMA returned empty response")
+                
+                # Calibrate context packing with the model's real token count
+                get_token_estimator().observe(
+                    model, len(prompt) + len(system_prompt or ""), data.get("prompt_eval_count")
+                )
+                
+                generation_time = time.time() - start_time
                 
-                # Add optional parameters
-                if system_prompt:
-                    payload["system"] = system_prompt
-                if num_ctx is not None:
-                    payload["options"]["num_ctx"] = num_ctx
-                if seed is not None:
-                    payload["options"]["seed"] = seed
+                # Check memory after generation
+                self._check_memory_usage(context=f"after generation with {model}")
                 
                 logger.info(
-                    f"Starting generation with {model} "
-                    f"(timeout={timeout}s, temp={temperature})"
+                    f"Generation completed: {len(generated_text)} chars "
+                    f"in {generation_time:.2f}s with {model}"
                 )
                 
-                start_time = time.time()
+                return generated_text.strip()
                 
-                try:
-                    # Use custom timeout for this request
-                    response = await client.post(
-                        "/api/generate",
-                        json=payload,
-                        timeout=timeout
-                    )
-                    
-                    if response.status_code == 404:
-                        error_text = response.text.lower()
-                        if "model" in error_text and "not found" in error_text:
-                            raise ModelNotFoundError(
-                                f"Model '{model}' not found. "
-                                f"Run: ollama pull {model}"
-                            )
+            except httpx.TimeoutException:
+                generation_time = time.time() - start_time
+                logger.error(
+                    f"Generation timeout after {generation_time:.2f}s with model {model}. "
+                    f"Consider: 1) Using faster model, 2) Reducing context size, "
+                    f"3) Increasing timeout"
+                )
+                raise OLLAMATimeoutError(
+                    f"Generation timed out after {timeout}s. "
+                    f"Model: {model}"
+                )
+            except (ModelNotFoundError, OutOfMemoryError, OLLAMATimeoutError):
+                raise  # Re-raise our custom errors
+            except httpx.ConnectError:
+                raise OLLAMAUnavailableError("Cannot connect to Ollama service")
+            except Exception as e:
+                logger.error(f"Unexpected error during generation: {e}")
+                raise OLLAMAUnavailableError(f"Generation failed: {e}")
+        
+        # Identical concurrent generations share one backend call (the timeout is
+        # part of the key: joiners wait under the first caller's deadline)
+        key = (
+            "generate",
+            model,
+            prompt.strip(),
+            system_prompt,
+            _options_hash({
+                "temperature": temperature,
+                "top_p": top_p,
+                "top_k": top_k,
+                "num_ctx": num_ctx,
+                "seed": seed,
+                "stream": stream,
+                "timeout": timeout
+            })
+        )
+        return await self._coalesce(
+            key,
+            lambda: self._scheduled_request(
+                _generate,
+                model,
+                priority,
+                user_id,
+                deadline,
+                max_retries=1,  # Only retry once for generation
+                hedge=model == settings.ollama_fast_model
+            )
+        )
+    
+    async def generate_text_stream(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: str | None = None,
+        temperature: float = 0.3,
+        top_p: float = 0.9,
+        top_k: int = 40,
+        num_ctx: int | None = None,
+        seed: int | None = None,
+        timeout: int | None = None,
+        priority: str | None = None,
+        user_id: str | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text from Ollama token by token.
+        
+        Reads the NDJSON body of /api/generate with "stream": true and yields
+        each non-empty "response" fragment as soon as it arrives. The model
+        slot is held until the stream is exhausted or closed.
+        
+        Streams are neither retried nor coalesced: once tokens have been
+        delivered to the caller a transparent retry is no longer possible.
+        
+        Args:
+            prompt: User prompt/question
+            model: Model name (e.g., 'mistral:7b')
+            system_prompt: System prompt (role definition)
+            temperature: Sampling temperature (0.0-1.0)
+            top_p: Nucleus sampling parameter
+            top_k: Top-k sampling parameter
+            num_ctx: Context window size (tokens)
+            seed: Random seed for reproducibility
+            timeout: Total generation time limit in seconds (overrides default)
+            priority: Scheduler priority class (see generate_text())
+            user_id: User for fair queuing (see generate_text())
+            
+        Yields:
+            str: Generated text fragments
+            
+        Raises:
+            OLLAMAUnavailableError: If service unavailable or stream reports an error
+            OLLAMATimeoutError: If generation exceeds timeout
+            LLMRequestShedError: If the request cannot be started in time
+            ValueError: If prompt is empty or model invalid
+            ModelNotFoundError: If model not found
+            OutOfMemoryError: If model requires more memory
+        
+        Example:
+            ```python
+            service = get_ollama_service()
+            
+            async for token in service.generate_text_stream(
+                prompt="Explain Article 29 of Labor Code",
+                model="mistral:7b"
+            ):
+                print(token, end="", flush=True)
+            ```
+        """
+        # Validate parameters
+        self._validate_generation_params(prompt, model, temperature, num_ctx)
+        
+        # Use model-specific timeout if not provided
+        if timeout is None:
+            timeout = self._default_timeout(model)
+        queue_deadline = time.time() + timeout
+        
+        # Validate model exists
+        if not await self.validate_model(model):
+            available = await self.list_models()
+            raise ModelNotFoundError(
+                f"Model '{model}' not found. "
+                f"Available models: {available}. "
+                f"To install: ollama pull {model}"
+            )
+        
+        payload = {
+            "model": model,
+            "prompt": prompt.strip(),
+            "stream": True,
+            "options": {
+                "temperature": temperature,
+                "top_p": top_p,
+                "top_k": top_k
+            }
+        }
+        if system_prompt:
+            payload["system"] = system_prompt
+        if num_ctx is not None:
+            payload["options"]["num_ctx"] = num_ctx
+        if seed is not None:
+            payload["options"]["seed"] = seed
+        
+        async with self._scheduler.slot(model, priority, user_id, queue_deadline):
+            self._check_memory_usage(context=f"before streaming generation with {model}")
+            
+            # Streams are not retried, so the host is chosen once
+            host = self._pool.select(model)
+            breaker = host.breaker(model)
+            if not breaker.allow():
+                raise OLLAMAUnavailableError(
+                    f"Circuit open for {model} on {host.base_url}, failing fast"
+                )
+            client = await self._get_client(host)
+            host.in_flight += 1
+            
+            logger.info(
+                f"Starting streaming generation with {model} "
+                f"(timeout={timeout}s, temp={temperature})"
+            )
+            
+            start_time = time.time()
+            deadline = start_time + timeout
+            first_token_time = None
+            generated_chars = 0
+            
+            try:
+                async with client.stream(
+                    "POST",
+                    "/api/generate",
+                    json=payload,
+                    timeout=timeout
+                ) as response:
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        self._raise_for_generate_status(response.status_code, body, model)
                     
-                    if response.status_code == 500:
-                        error_text = response.text.lower()
-                        if "memory" in error_text or "oom" in error_text:
-                            logger.error(
-                                f"Out of memory error with model {model}. "
-                                f"Consider: 1) Using smaller model, 2) Reducing num_ctx, "
-                                f"3) Closing other applications, 4) Using GPU with more VRAM"
+                    async for line in response.aiter_lines():
+                        if time.time() > deadline:
+                            raise httpx.ReadTimeout("Streaming generation deadline exceeded")
+                        
+                        if not line.strip():
+                            continue
+                        
+                        data = json.loads(line)
+                        
+                        if data.get("error"):
+                            raise OLLAMAUnavailableError(
+                                f"Streaming generation failed: {data['error']}"
                             )
-                            raise OutOfMemoryError(
-                                f"Model {model} requires more memory. "
-                                f"Try using a smaller model or reducing context size."
+                        
+                        token = data.get("response", "")
+                        if token:
+                            if first_token_time is None:
+                                first_token_time = time.time()
+                            generated_chars += len(token)
+                            yield token
+                        
+                        if data.get("done"):
+                            get_token_estimator().observe(
+                                model, len(prompt) + len(system_prompt or ""), data.get("prompt_eval_count")
                             )
-                    
-                    if response.status_code != 200:
-                        raise OLLAMAUnavailableError(
-                            f"OLLAMA generation failed: HTTP {response.status_code}"
-                        )
-                    
-                    # Parse response
-                    data = response.json()
-                    generated_text = data.get("response", "")
-                    
-                    if not generated_text:
-                        raise OLLAMAUnavailableError("OLLAMA returned empty response")
-                    
-                    generation_time = time.time() - start_time
-                    
-                    # Check memory after generation
-                    self._check_memory_usage(context=f"after generation with {model}")
-                    
-                    logger.info(
-                        f"Generation completed: {len(generated_text)} chars "
-                        f"in {generation_time:.2f}s with {model}"
-                    )
-                    
-                    return generated_text.strip()
-                    
-                except httpx.TimeoutException:
-                    generation_time = time.time() - start_time
-                    logger.error(
-                        f"Generation timeout after {generation_time:.2f}s with model {model}. "
-                        f"Consider: 1) Using faster model, 2) Reducing context size, "
-                        f"3) Increasing timeout"
-                    )
-                    raise OLLAMATimeoutError(
-                        f"Generation timed out after {timeout}s. "
-                        f"Model: {model}"
-                    )
-                except (ModelNotFoundError, OutOfMemoryError, OLLAMATimeoutError):
-                    raise  # Re-raise our custom errors
-                except httpx.ConnectError:
-                    raise OLLAMAUnavailableError("Cannot connect to Ollama service")
-                except Exception as e:
-                    logger.error(f"Unexpected error during generation: {e}")
-                    raise OLLAMAUnavailableError(f"Generation failed: {e}")
-        
-        return await self._retry_request(_generate, max_retries=1)  # Only retry once for generation
+                            break
+                
+                if first_token_time is None:
+                    raise OLLAMAUnavailableError("OLLAMA returned empty response")
+                
+                logger.info(
+                    f"Streaming generation completed: {generated_chars} chars "
+                    f"in {time.time() - start_time:.2f}s with {model} "
+                    f"(first token after {first_token_time - start_time:.2f}s)"
+                )
+                host.mark_success(model)
+                breaker.record_success()
+                
+            except httpx.TimeoutException as e:
+                self._record_host_error(host, breaker, e)
+                logger.error(
+                    f"Streaming generation timeout after {time.time() - start_time:.2f}s "
+                    f"with model {model}"
+                )
+                raise OLLAMATimeoutError(
+                    f"Generation timed out after {timeout}s. "
+                    f"Model: {model}"
+                )
+            except (ModelNotFoundError, OutOfMemoryError, OLLAMAUnavailableError) as e:
+                # HTTP error status or "error" line in the stream
+                self._record_host_error(host, breaker, e)
+                raise
+            except httpx.ConnectError as e:
+                self._record_host_error(host, breaker, e)
+                raise OLLAMAUnavailableError("Cannot connect to Ollama service")
+            except json.JSONDecodeError as e:
+                error = OLLAMAUnavailableError(f"Malformed streaming response: {e}")
+                self._record_host_error(host, breaker, error)
+                raise error
+            except httpx.HTTPError as e:
+                logger.error(f"Unexpected error during streaming generation: {e}")
+                error = OLLAMAUnavailableError(f"Generation failed: {e}")
+                self._record_host_error(host, breaker, error)
+                raise error
+            finally:
+                host.in_flight -= 1
+                breaker.release()  # Probe ended without a verdict (cancelled, model errors)
     
     async def generate_text_structured(
         self,
@@ -820,7 +1569,10 @@ Pamiętaj:
         json_schema: dict,
         system_prompt: str | None = None,
         temperature: float = 0.3,
-        timeout: int | None = None
+        timeout: int | None = None,
+        num_ctx: int | None = None,
+        priority: str | None = None,
+        user_id: str | None = None
     ) -> dict:
         """
         Generate structured JSON response using Ollama.
@@ -836,12 +1588,17 @@ Pamiętaj:
             system_prompt: Base system prompt (will be extended with schema)
             temperature: Sampling temperature
             timeout: Request timeout
+            num_ctx: Context window (default: the model's configured num_ctx,
+                so Ollama does not reload the model with another context size)
+            priority: Scheduler priority class (see generate_text())
+            user_id: User for fair queuing (see generate_text())
             
         Returns:
             dict: Parsed JSON response
             
         Raises:
             OLLAMAUnavailableError: If service unavailable
+            LLMRequestShedError: If the request cannot be started in time
             ValueError: If response is not valid JSON
         
         Example:
@@ -881,6 +1638,13 @@ Pamiętaj:
             # }
             ```
         """
+        # Use model-specific timeout if not provided
+        if timeout is None:
+            timeout = self._default_timeout(model)
+        if num_ctx is None:
+            num_ctx = get_num_ctx(model)
+        deadline = time.time() + timeout
+        
         # Build enhanced system prompt with schema
         enhanced_system_prompt = self._build_structured_system_prompt(
             base_system_prompt=system_prompt or "",
@@ -888,93 +1652,94 @@ Pamiętaj:
         )
         
         async def _generate_structured():
-            # Use model-specific semaphore for rate limiting
-            semaphore = self._get_model_semaphore(model)
-            async with semaphore:  # Limit concurrent requests per model
-                client = await self._get_client()
-                
-                # Build request payload with format: json
-                payload = {
-                    "model": model,
-                    "prompt": prompt.strip(),
-                    "format": "json",  # Ollama parameter for JSON output
-                    "system": enhanced_system_prompt,
-                    "options": {
-                        "temperature": temperature
-                    }
+            client = await self._get_client()
+            
+            # Build request payload with format: json
+            payload = {
+                "model": model,
+                "prompt": prompt.strip(),
+                "format": "json",  # Ollama parameter for JSON output
+                "system": enhanced_system_prompt,
+                "options": {
+                    "temperature": temperature,
+                    "num_ctx": num_ctx
                 }
+            }
+            
+            logger.info(
+                f"Starting structured generation with {model} "
+                f"(timeout={timeout}s, format=json)"
+            )
+            
+            try:
+                response = await client.post(
+                    "/api/generate",
+                    json=payload,
+                    timeout=timeout
+                )
                 
-                # Use model-specific timeout if not provided
-                if timeout is None:
-                    if model == settings.ollama_fast_model:
-                        timeout = settings.ollama_fast_timeout
-                    elif model == settings.ollama_accurate_model:
-                        timeout = settings.ollama_accurate_timeout
-                    else:
-                        timeout = 60
+                if response.status_code != 200:
+                    raise OLLAMAUnavailableError(
+                        f"Structured generation failed: HTTP {response.status_code}"
+                    )
                 
-                logger.info(
-                    f"Starting structured generation with {model} "
-                    f"(timeout={timeout}s, format=json)"
-                )
+                # Parse response
+                data = response.json()
+                response_text = data.get("response", "")
+                
+                if not response_text:
+                    raise ValueError("Ollama returned empty response")
                 
+                # Try to parse JSON
                 try:
-                    response = await client.post(
-                        "/api/generate",
-                        json=payload,
-                        timeout=timeout
+                    parsed = self._parse_json_response(response_text, json_schema)
+                    logger.info(f"Structured generation completed successfully")
+                    return parsed
+                except ValueError as e:
+                    logger.error(
+                        f"Failed to parse JSON response from model {model}. "
+                        f"Response: {response_text[:200]}"
                     )
+                    # Fallback: Try to extract JSON from text
+                    try:
+                        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+                        if json_match:
+                            parsed = json.loads(json_match.group(0))
+                            logger.warning("Extracted JSON from text (model added extra text)")
+                            return parsed
+                    except Exception:
+                        pass
                     
-                    if response.status_code != 200:
-                        raise OLLAMAUnavailableError(
-                            f"Structured generation failed: HTTP {response.status_code}"
-                        )
-                    
-                    # Parse response
-                    data = response.json()
-                    response_text = data.get("response", "")
-                    
-                    if not response_text:
-                        raise ValueError("Ollama returned empty response")
+                    raise ValueError(
+                        f"Model did not return valid JSON. "
+                        f"Response: {response_text[:200]}"
+                    ) from e
                     
-                    # Try to parse JSON
-                    try:
-                        parsed = self._parse_json_response(response_text, json_schema)
-                        logger.info(f"Structured generation completed successfully")
-                        return parsed
-                    except ValueError as e:
-                        logger.error(
-                            f"Failed to parse JSON response from model {model}. "
-                            f"Response: {response_text[:200]}"
-                        )
-                        # Fallback: Try to extract JSON from text
-                        try:
-                            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                            if json_match:
-                                parsed = json.loads(json_match.group(0))
-                                logger.warning("Extracted JSON from text (model added extra text)")
-                                return parsed
-                        except Exception:
-                            pass
-                        
-                        raise ValueError(
-                            f"Model did not return valid JSON. "
-                            f"Response: {response_text[:200]}"
-                        ) from e
-                        
-                except httpx.TimeoutException:
-                    raise OLLAMATimeoutError(
-                        f"Structured generation timed out after {timeout}s"
-                    )
-                except httpx.ConnectError:
-                    raise OLLAMAUnavailableError("Cannot connect to Ollama service")
-                except (ValueError, OLLAMATimeoutError, OLLAMAUnavailableError):
-                    raise  # Re-raise our custom errors
-                except Exception as e:
-                    logger.error(f"Unexpected error during structured generation: {e}")
-                    raise OLLAMAUnavailableError(f"Structured generation failed: {e}")
-        
-        return await self._retry_request(_generate_structured, max_retries=1)
+            except httpx.TimeoutException:
+                raise OLLAMATimeoutError(
+                    f"Structured generation timed out after {timeout}s"
+                )
+            except httpx.ConnectError:
+                raise OLLAMAUnavailableError("Cannot connect to Ollama service")
+            except (ValueError, OLLAMATimeoutError, OLLAMAUnavailableError):
+                raise  # Re-raise our custom errors
+            except Exception as e:
+                logger.error(f"Unexpected error during structured generation: {e}")
+                raise OLLAMAUnavailableError(f"Structured generation failed: {e}")
+        
+        key = (
+            "structured",
+            model,
+            prompt.strip(),
+            enhanced_system_prompt,
+            _options_hash({"temperature": temperature, "num_ctx": num_ctx, "timeout": timeout})
+        )
+        return await self._coalesce(
+            key,
+            lambda: self._scheduled_request(
+                _generate_structured, model, priority, user_id, deadline, max_retries=1
+            )
+        )
     
     # =========================================================================
     # PUBLIC METHODS - Embedding Generation
@@ -984,17 +1749,24 @@ Pamiętaj:
         self,
         text: str,
         model: str | None = None,
-        timeout: int | None = None
+        timeout: int | None = None,
+        priority: str | None = None,
+        user_id: str | None = None
     ) -> list[float]:
         """
         Generate embedding vector for text.
         
         Defaults to nomic-embed-text model (768 dimensions) if model not specified.
         
+        Concurrent calls arriving within settings.ollama_embedding_batch_window_ms
+        are merged into a single /api/embed request (see generate_embeddings_batch).
+        
         Args:
             text: Input text
             model: Embedding model (defaults to settings.ollama_embedding_model)
             timeout: Request timeout
+            priority: Scheduler priority class (see generate_text())
+            user_id: User for fair queuing (only used for unbatched requests)
             
         Returns:
             list[float]: Embedding vector (768-dim for nomic-embed-text)
@@ -1026,53 +1798,268 @@ Pamiętaj:
         # Use defaults from settings if not provided
         model = model or settings.ollama_embedding_model
         timeout = timeout or settings.ollama_embedding_timeout
+        priority = self._scheduler.resolve_priority(model, priority)
+        
+        async def _embed():
+            # Merge with concurrent calls into one /api/embed request if enabled
+            if self._embedding_batcher is not None:
+                return await self._embedding_batcher.submit(text, model, timeout, priority)
+            return await self._embed_single(text, model, timeout, priority, user_id)
+        
+        # Identical concurrent texts share one embedding
+        return await self._coalesce(("embed", model, text.strip(), timeout), _embed)
+    
+    async def generate_embeddings_batch(
+        self,
+        texts: list[str],
+        model: str | None = None,
+        max_batch: int | None = None,
+        timeout: int | None = None,
+        priority: str | None = None
+    ) -> list[list[float]]:
+        """
+        Generate embedding vectors for many texts using /api/embed.
+        
+        Packs up to max_batch inputs into a single request. Larger inputs are
+        split into several requests (sent concurrently, bounded by the model
+        slots). Output order always matches input order. Bulk callers (e.g.
+        ingestion) should pass priority="batch".
+        
+        Note: /api/embed returns L2-normalized vectors. Cosine distance (used
+        by pgvector search) is unaffected by normalization.
+        
+        Args:
+            texts: Input texts
+            model: Embedding model (defaults to settings.ollama_embedding_model)
+            max_batch: Max inputs per request (defaults to settings.ollama_embedding_batch_size)
+            timeout: Request timeout per batch request
+            priority: Scheduler priority class (see generate_text())
+            
+        Returns:
+            list[list[float]]: Embedding vectors, one per input text
+            
+        Raises:
+            EmbeddingGenerationError: If any text is empty or generation fails
+            OLLAMATimeoutError: If request times out
+            ValueError: If max_batch is invalid
+        
+        Example:
+            ```python
+            service = get_ollama_service()
+            
+            embeddings = await service.generate_embeddings_batch(
+                ["Kodeks cywilny", "Kodeks pracy"],
+                max_batch=32
+            )
+            # Returns: [[0.123, ...], [0.456, ...]]
+            ```
+        """
+        if not texts:
+            return []
+        
+        for index, text in enumerate(texts):
+            if not text or len(text.strip()) == 0:
+                raise EmbeddingGenerationError(f"Text at index {index} cannot be empty")
+        
+        model = model or settings.ollama_embedding_model
+        timeout = timeout or settings.ollama_embedding_timeout
+        max_batch = max_batch or settings.ollama_embedding_batch_size
+        
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be >= 1, got {max_batch}")
+        
+        # Split oversized input into consecutive slices (keeps order)
+        slices = [texts[i:i + max_batch] for i in range(0, len(texts), max_batch)]
+        
+        results = await asyncio.gather(*(
+            self._embed_batch_request(batch, model, timeout, priority) for batch in slices
+        ))
+        
+        return [embedding for batch_result in results for embedding in batch_result]
+    
+    # =========================================================================
+    # PRIVATE METHODS - Embedding Requests
+    # =========================================================================
+    
+    async def _embed_single(
+        self,
+        text: str,
+        model: str,
+        timeout: int,
+        priority: str | None = None,
+        user_id: str | None = None
+    ) -> list[float]:
+        """
+        Generate one embedding via /api/embeddings (single input).
+        
+        Args:
+            text: Input text (already validated)
+            model: Embedding model
+            timeout: Request timeout
+            priority: Scheduler priority class
+            user_id: User for fair queuing
+            
+        Returns:
+            list[float]: Embedding vector
+        """
+        deadline = time.time() + timeout
         
         async def _generate_embedding():
-            # Use model-specific semaphore for rate limiting
-            semaphore = self._get_model_semaphore(model or settings.ollama_embedding_model)
-            async with semaphore:  # Limit concurrent requests per model
-                client = await self._get_client()
+            client = await self._get_client()
+            
+            logger.debug(f"Generating embedding with {model}: {text[:50]}...")
+            
+            try:
+                response = await client.post(
+                    "/api/embeddings",
+                    json={
+                        "model": model,
+                        "prompt": text.strip()
+                    },
+                    timeout=timeout
+                )
                 
-                logger.debug(f"Generating embedding with {model}: {text[:50]}...")
+                if response.status_code != 200:
+                    raise EmbeddingGenerationError(
+                        f"Embedding generation failed: HTTP {response.status_code}"
+                    )
                 
-                try:
-                    response = await client.post(
-                        "/api/embeddings",
-                        json={
-                            "model": model,
-                            "prompt": text.strip()
-                        },
-                        timeout=timeout
+                data = response.json()
+                embedding = data.get("embedding")
+                
+                if not embedding:
+                    raise EmbeddingGenerationError("No embedding in response")
+                
+                logger.debug(f"Generated embedding: {len(embedding)} dimensions")
+                return embedding
+                
+            except httpx.TimeoutException:
+                logger.error(f"Embedding generation timeout ({timeout}s): {text[:50]}...")
+                raise OLLAMATimeoutError(
+                    f"Embedding generation timed out after {timeout}s"
+                )
+            except httpx.ConnectError:
+                raise OLLAMAUnavailableError("Cannot connect to Ollama service")
+            except (EmbeddingGenerationError, OLLAMATimeoutError, OLLAMAUnavailableError):
+                raise  # Re-raise our custom errors
+            except Exception as e:
+                logger.error(f"Embedding generation error: {e}")
+                raise EmbeddingGenerationError(f"Unexpected error: {e}")
+        
+        return await self._scheduled_request(
+            _generate_embedding, model, priority, user_id, deadline, hedge=True
+        )
+    
+    async def _embed_batch_request(
+        self,
+        texts: list[str],
+        model: str,
+        timeout: int,
+        priority: str | None = None
+    ) -> list[list[float]]:
+        """
+        Generate embeddings for one batch via /api/embed (multi-input).
+        
+        Args:
+            texts: Input texts (already validated, len <= max_batch)
+            model: Embedding model
+            timeout: Request timeout
+            priority: Scheduler priority class
+            
+        Returns:
+            list[list[float]]: Embedding vectors in input order
+        """
+        deadline = time.time() + timeout
+        
+        async def _generate_batch():
+            client = await self._get_client()
+            
+            logger.debug(f"Generating {len(texts)} embeddings with {model} (batched)")
+            
+            try:
+                response = await client.post(
+                    "/api/embed",
+                    json={
+                        "model": model,
+                        "input": [text.strip() for text in texts]
+                    },
+                    timeout=timeout
+                )
+                
+                if response.status_code != 200:
+                    raise EmbeddingGenerationError(
+                        f"Batch embedding generation failed: HTTP {response.status_code}"
                     )
-                    
-                    if response.status_code != 200:
-                        raise EmbeddingGenerationError(
-                            f"Embedding generation failed: HTTP {response.status_code}"
-                        )
-                    
-                    data = response.json()
-                    embedding = data.get("embedding")
-                    
-                    if not embedding:
-                        raise EmbeddingGenerationError("No embedding in response")
-                    
-                    logger.debug(f"Generated embedding: {len(embedding)} dimensions")
-                    return embedding
-                    
-                except httpx.TimeoutException:
-                    logger.error(f"Embedding generation timeout ({timeout}s): {text[:50]}...")
-                    raise OLLAMATimeoutError(
-                        f"Embedding generation timed out after {timeout}s"
+                
+                data = response.json()
+                embeddings = data.get("embeddings")
+                
+                if not embeddings or len(embeddings) != len(texts):
+                    raise EmbeddingGenerationError(
+                        f"Expected {len(texts)} embeddings in response, "
+                        f"got {len(embeddings or [])}"
                     )
-                except httpx.ConnectError:
-                    raise OLLAMAUnavailableError("Cannot connect to Ollama service")
-                except (EmbeddingGenerationError, OLLAMATimeoutError, OLLAMAUnavailableError):
-                    raise  # Re-raise our custom errors
-                except Exception as e:
-                    logger.error(f"Embedding generation error: {e}")
-                    raise EmbeddingGenerationError(f"Unexpected error: {e}")
-        
-        return await self._retry_request(_generate_embedding)
+                
+                logger.debug(
+                    f"Generated {len(embeddings)} embeddings: "
+                    f"{len(embeddings[0])} dimensions"
+                )
+                return embeddings
+                
+            except httpx.TimeoutException:
+                logger.error(
+                    f"Batch embedding timeout ({timeout}s) for {len(texts)} inputs"
+                )
+                raise OLLAMATimeoutError(
+                    f"Batch embedding generation timed out after {timeout}s"
+                )
+            except httpx.ConnectError:
+                raise OLLAMAUnavailableError("Cannot connect to Ollama service")
+            except (EmbeddingGenerationError, OLLAMATimeoutError, OLLAMAUnavailableError):
+                raise  # Re-raise our custom errors
+            except Exception as e:
+                logger.error(f"Batch embedding generation error: {e}")
+                raise EmbeddingGenerationError(f"Unexpected error: {e}")
+        
+        # One batch request holds a single model slot
+        return await self._scheduled_request(
+            _generate_batch, model, priority, None, deadline, hedge=True
+        )
+    
+    # =========================================================================
+    # PUBLIC METHODS - Statistics
+    # =========================================================================
+    
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get request scheduling, routing and coalescing statistics.
+        
+        Returns:
+            dict: Statistics with keys:
+                - concurrency_limits: current (adaptive) slot limit per model
+                - scheduler: slot usage, queue waits and shed requests per
+                  model pool and priority class
+                - hosts: per-host health, load, loaded models and circuit
+                  breakers, failovers
+                - hedging: hedged requests, hedges that answered first
+                - single_flight: coalesced call count and calls in flight
+        """
+        stats: dict[str, Any] = {
+            "concurrency_limits": self._scheduler.get_limits(),
+            "scheduler": self._scheduler.get_stats(),
+            "hosts": self._pool.get_stats(),
+            "hedging": {
+                "enabled": self._hedging,
+                "hedged": self._hedges,
+                "won": self._hedge_wins
+            }
+        }
+        if self._single_flight is not None:
+            stats["single_flight"] = {
+                "coalesced": self._single_flight.coalesced,
+                "in_flight": self._single_flight.in_flight
+            }
+        return stats
     
     # =========================================================================
     # MODEL WARMUP
@@ -1098,11 +2085,17 @@ Pamiętaj:
             # Use a minimal prompt to trigger model loading
             test_prompt = "Test"
             
+            # Load with the context window real requests use - Ollama reloads
+            # the model whenever num_ctx changes
+            num_ctx = None if model == settings.ollama_embedding_model else get_num_ctx(model)
+            
             await self.generate_text(
                 prompt=test_prompt,
                 model=model,
                 timeout=timeout,
-                temperature=0.1  # Low temperature for faster generation
+                temperature=0.1,  # Low temperature for faster generation
+                num_ctx=num_ctx,
+                priority="batch"  # Never delay user requests
             )
             
             logger.info(f"Model {model} warmed up successfully")
@@ -1172,6 +2165,10 @@ async def generate_embedding(
     This function maintains backward compatibility with existing code
     that imports generate_embedding directly.
     
+    Results are served from the two-tier embedding cache (in-process LRU +
+    Redis) keyed by model and normalized text, so repeated questions are
+    embedded only once.
+    
     Args:
         text: Input text
         model: Embedding model (optional)
@@ -1183,8 +2180,19 @@ async def generate_embedding(
     Raises:
         EmbeddingGenerationError: If generation fails
     """
+    cache = get_embedding_cache()
+    model_name = model or settings.ollama_embedding_model
+    
+    if text and text.strip():
+        cached = await cache.get(text, model_name)
+        if cached is not None:
+            return cached
+    
     service = get_ollama_service()
-    return await service.generate_embedding(text, model, timeout)
+    embedding = await service.generate_embedding(text, model, timeout)
+    
+    await cache.set(text, model_name, embedding)
+    return embedding
 
 
 # =========================================================================
@@ -1209,7 +2217,9 @@ def get_ollama_service() -> OllamaService:
             timeout_connect=5,
             timeout_read=300,  # 5 minutes for accurate model
             max_retries=3,
-            retry_delay=1.0
+            retry_delay=1.0,
+            extra_hosts=settings.ollama_extra_hosts_list,
+            model_hosts=settings.ollama_model_hosts_map
         )
     
     return _ollama_service
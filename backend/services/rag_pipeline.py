@@ -7,7 +7,7 @@ Pipeline Steps (Fast Response):
 1. Generate query embedding
 2. Semantic search (similarity search in pgvector)
 3. Fetch related acts (graph traversal)
-4. Build legal context
+4. Pack legal context into the model's token budget (context_packer)
 5. Construct prompt
 6. Generate LLM response (fast model)
 7. Extract sources
@@ -15,43 +15,68 @@ Pipeline Steps (Fast Response):
 9. Cache context for accurate response
 
 Pipeline Steps (Accurate Response):
-1. Retrieve cached context
+1. Retrieve cached context (repack legal context for the accurate model)
 2. Enhanced prompt construction
 3. Generate LLM response (accurate model)
 4. Update database
 
+Streaming variants (stream_query_fast / stream_query_accurate) run the same
+steps but yield tokens as they are generated and persist the full text at
+the end.
+
 Features:
 - Full error handling at each step
 - Performance monitoring
-- Context caching (Redis, 5min TTL)
+- Context caching (async Redis, chunk references + shared content cache)
+- Semantic answer cache (fast responses reused for near-duplicate questions)
 - Background task support
+- Cancellation of abandoned generations (services/cancellation.py)
 """
 
 import logging
 import time
 import json
-from typing import Dict, Any, List, Optional, Tuple
+from contextlib import aclosing
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 from collections import defaultdict
 import redis
 
 from backend.services.ollama_service import generate_embedding, get_ollama_service
+from backend.services.embedding_cache import get_embedding_cache
+from backend.services.answer_cache import get_answer_cache
+from backend.services.llm_scheduler import llm_request_context
+from backend.services.cancellation import get_cancellation_registry
+from backend.services.context_packer import get_num_ctx
+from backend.services.redis_client import get_redis
+from backend.services.cache_codec import encode_payload, decode_payload
 from backend.services.vector_search import (
     semantic_search,
+    hybrid_search,
+    get_search_tier,
     fetch_related_acts,
     extract_act_ids_from_chunks
 )
 from backend.services.llm_service import (
     generate_text_fast,
     generate_text_accurate,
-    build_legal_context,
+    generate_text_stream,
+    pack_legal_context,
     build_prompt,
     extract_sources_from_response,
-    SYSTEM_PROMPT
+    SYSTEM_PROMPT,
+    FAST_MODEL,
+    ACCURATE_MODEL,
+    FAST_TIMEOUT,
+    ACCURATE_TIMEOUT,
+    DEFAULT_TEMPERATURE
 )
 from backend.services.exceptions import (
     NoRelevantActsError,
     RAGPipelineError,
-    GenerationTimeoutError
+    GenerationTimeoutError,
+    OLLAMATimeoutError,
+    OLLAMAUnavailableError,
+    QueryCancelledError
 )
 from backend.db.queries import (
     create_query,
@@ -75,7 +100,9 @@ class RAGMetrics:
     - Generation times (fast/accurate)
     - Success/failure rates
     - Pipeline step durations
-    - Cache hit rates
+    - Cache hit rates (RAG context and query embeddings)
+    - Time to first token (streaming responses)
+    - Cancelled generations (query deleted, client disconnected)
     - Memory usage (if available)
     """
     
@@ -83,8 +110,11 @@ class RAGMetrics:
         self.generation_times: Dict[str, List[float]] = defaultdict(list)
         self.pipeline_times: Dict[str, List[float]] = defaultdict(list)
         self.step_times: Dict[str, List[float]] = defaultdict(list)
+        self.first_token_times: Dict[str, List[float]] = defaultdict(list)
         self.success_count: Dict[str, int] = defaultdict(int)
         self.failure_count: Dict[str, int] = defaultdict(int)
+        self.cancel_count: Dict[str, int] = defaultdict(int)
+        self.cancel_reasons: Dict[str, int] = defaultdict(int)
         self.cache_hits: int = 0
         self.cache_misses: int = 0
         self.memory_samples: List[float] = []  # Memory usage percentages
@@ -108,6 +138,12 @@ class RAGMetrics:
         if len(self.step_times[step_name]) > self.max_samples:
             self.step_times[step_name].pop(0)
     
+    def record_time_to_first_token(self, response_type: str, time_ms: float):
+        """Record time from stream start to first generated token."""
+        self.first_token_times[response_type].append(time_ms)
+        if len(self.first_token_times[response_type]) > self.max_samples:
+            self.first_token_times[response_type].pop(0)
+    
     def record_success(self, response_type: str):
         """Record successful pipeline execution."""
         self.success_count[response_type] += 1
@@ -116,6 +152,11 @@ class RAGMetrics:
         """Record failed pipeline execution."""
         self.failure_count[response_type] += 1
     
+    def record_cancellation(self, response_type: str, reason: str):
+        """Record generation cancelled before completion."""
+        self.cancel_count[response_type] += 1
+        self.cancel_reasons[reason] += 1
+    
     def record_cache_hit(self):
         """Record cache hit."""
         self.cache_hits += 1
@@ -137,6 +178,7 @@ class RAGMetrics:
             "generation_times": {},
             "pipeline_times": {},
             "step_times": {},
+            "time_to_first_token": {},
             "success_rates": {},
             "cache_hit_rate": 0.0
         }
@@ -171,6 +213,16 @@ class RAGMetrics:
                     "count": len(times)
                 }
         
+        # Time to first token (streaming)
+        for response_type, times in self.first_token_times.items():
+            if times:
+                stats["time_to_first_token"][response_type] = {
+                    "avg_ms": sum(times) / len(times),
+                    "min_ms": min(times),
+                    "max_ms": max(times),
+                    "count": len(times)
+                }
+        
         # Success rates
         for response_type in set(list(self.success_count.keys()) + list(self.failure_count.keys())):
             total = self.success_count[response_type] + self.failure_count[response_type]
@@ -181,11 +233,28 @@ class RAGMetrics:
                     "rate": self.success_count[response_type] / total
                 }
         
+        # Cancelled generations (not counted as failures)
+        stats["cancellations"] = {
+            "by_type": dict(self.cancel_count),
+            "by_reason": dict(self.cancel_reasons),
+            **get_cancellation_registry().get_stats()
+        }
+        
         # Cache hit rate
         total_cache_requests = self.cache_hits + self.cache_misses
         if total_cache_requests > 0:
             stats["cache_hit_rate"] = self.cache_hits / total_cache_requests
         
+        # Query embedding cache counters (LRU + Redis tiers)
+        stats["embedding_cache"] = get_embedding_cache().get_stats()
+        
+        # Semantic answer cache (fast responses reused for near-duplicate questions)
+        answer_cache = get_answer_cache()
+        stats["answer_cache"] = answer_cache.get_stats() if answer_cache is not None else None
+        
+        # Ollama scheduling (adaptive slot limits, queue waits) and request coalescing
+        stats["ollama"] = get_ollama_service().get_stats()
+        
         # Memory usage stats
         if self.memory_samples:
             stats["memory_usage"] = {
@@ -217,6 +286,7 @@ def get_rag_metrics() -> RAGMetrics:
 # =========================================================================
 
 # Similarity search parameters
+# (per-tier top_k / index parameters: VECTOR_SEARCH_FAST_* / VECTOR_SEARCH_ACCURATE_*)
 TOP_K_CHUNKS = 10
 DISTANCE_THRESHOLD = 0.5
 
@@ -226,97 +296,292 @@ RELATED_ACTS_DEPTH = 2
 # Cache TTL (seconds)
 CACHE_TTL = settings.redis_rag_context_ttl
 
+# System prompt for accurate (detailed) responses
+ACCURATE_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+
+Dla tej odpowiedzi:
+- Dokonaj głębszej analizy przepisów
+- Rozważ różne interpretacje i konteksty
+- Wskaż potencjalne wyjątki lub szczególne przypadki
+- Podaj przykłady zastosowania (jeśli relewanatne)
+"""
+
+
+# =========================================================================
+# RETRIEVAL
+# =========================================================================
+
+async def retrieve_chunks(
+    query_text: str,
+    query_embedding: List[float],
+    quality: str = "fast"
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve relevant chunks using configured retrieval mode.
+    
+    RAG_RETRIEVAL_MODE=semantic: vector similarity only, with index
+    parameters of the quality tier ("fast" = cheaper, "accurate" = higher recall).
+    RAG_RETRIEVAL_MODE=hybrid: vector + keyword search fused with RRF
+    (weights from HYBRID_* settings, tier top_k).
+    
+    Raises:
+        NoRelevantActsError: If too few chunks found
+    """
+    tier = get_search_tier(quality)
+    
+    if settings.rag_retrieval_mode == "hybrid":
+        return await hybrid_search(
+            query_embedding=query_embedding,
+            query_text=query_text,
+            top_k=tier["top_k"],
+            semantic_weight=settings.hybrid_semantic_weight,
+            keyword_weight=settings.hybrid_keyword_weight,
+            rrf_k=settings.hybrid_rrf_k,
+            distance_threshold=DISTANCE_THRESHOLD
+        )
+    
+    return await semantic_search(
+        query_embedding=query_embedding,
+        top_k=tier["top_k"],
+        distance_threshold=DISTANCE_THRESHOLD,
+        quality=quality
+    )
+
 
 # =========================================================================
 # REDIS CACHE MANAGEMENT
 # =========================================================================
+#
+# Normalized layout (per-query entries hold references only):
+#   rag_context:v2:{query_id} -> ordered chunk refs (id + retrieval scores:
+#                                distance, hybrid rrf_score and ranks) and
+#                                related act refs (id + relation fields)
+#   rag_chunk:v2:{chunk_id}   -> chunk body (content, chunk_index, legal_act)
+#   rag_act:{act_id}          -> related act metadata (title, publisher, ...)
+# Chunk and act entries are shared by all queries that retrieved them and
+# live for redis_rag_content_ttl (refreshed on every write). legal_context
+# is not stored - it is rebuilt from the chunks on read.
 
-_redis_client = None
+RAG_CONTEXT_KEY_PREFIX = "rag_context:v2"
+RAG_CHUNK_KEY_PREFIX = "rag_chunk:v2"  # v1 bodies could hold hybrid scores
+RAG_ACT_KEY_PREFIX = "rag_act"
 
-def get_redis_client():
-    """Get or create Redis client instance."""
-    global _redis_client
-    if _redis_client is None and settings.redis_url:
-        try:
-            _redis_client = redis.from_url(settings.redis_url)
-            logger.info("Redis client initialized.")
-        except redis.exceptions.ConnectionError as e:
-            logger.error(f"Failed to connect to Redis: {e}")
-            _redis_client = None
-    return _redis_client
-
-def cache_rag_context(
+CONTENT_CACHE_TTL = settings.redis_rag_content_ttl
+
+# Per-query fields of a chunk / related act (kept in the query entry)
+CHUNK_REF_FIELDS = ("distance", "rrf_score", "semantic_rank", "keyword_rank")
+RELATED_ACT_REF_FIELDS = (
+    "relation_type", "relation_description", "source_act_id", "depth"
+)
+
+
+def _split_refs(
+    items: List[Dict[str, Any]],
+    ref_fields: Tuple[str, ...]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Split items into per-query refs and shared bodies keyed by ID."""
+    refs = []
+    bodies = {}
+    for item in items:
+        refs.append({"id": item["id"], **{f: item.get(f) for f in ref_fields if f in item}})
+        bodies[item["id"]] = {k: v for k, v in item.items() if k not in ref_fields}
+    return refs, bodies
+
+
+async def cache_rag_context(
     query_id: str,
     chunks: List[Dict[str, Any]],
-    related_acts: List[Dict[str, Any]],
-    legal_context: str
+    related_acts: List[Dict[str, Any]]
 ) -> None:
     """
     Cache RAG context for accurate response generation in Redis.
+    
+    Stores chunk and act bodies in the shared content cache and a small
+    per-query entry with ordered references, in one pipelined round trip.
+    Payloads are encoded with cache_codec (orjson + optional compression).
     """
-    redis_client = get_redis_client()
+    redis_client = get_redis()
     if not redis_client:
         logger.warning("Redis not configured. Skipping cache.")
         return
 
     try:
-        context_data = {
-            "chunks": chunks,
-            "related_acts": related_acts,
-            "legal_context": legal_context,
-        }
-        redis_client.set(
-            f"rag_context:{query_id}",
-            json.dumps(context_data),
-            ex=CACHE_TTL
+        chunk_refs, chunk_bodies = _split_refs(chunks, CHUNK_REF_FIELDS)
+        act_refs, act_bodies = _split_refs(related_acts, RELATED_ACT_REF_FIELDS)
+        
+        pipe = redis_client.pipeline(transaction=False)
+        for chunk_id, body in chunk_bodies.items():
+            pipe.set(f"{RAG_CHUNK_KEY_PREFIX}:{chunk_id}", encode_payload(body), ex=CONTENT_CACHE_TTL)
+        for act_id, body in act_bodies.items():
+            pipe.set(f"{RAG_ACT_KEY_PREFIX}:{act_id}", encode_payload(body), ex=CONTENT_CACHE_TTL)
+        
+        payload = encode_payload({"chunks": chunk_refs, "related_acts": act_refs})
+        pipe.set(f"{RAG_CONTEXT_KEY_PREFIX}:{query_id}", payload, ex=CACHE_TTL)
+        await pipe.execute()
+        
+        logger.info(
+            f"Cached context for query {query_id} in Redis "
+            f"({len(payload)} bytes, {len(chunk_refs)} chunks, {len(act_refs)} related acts)."
         )
-        logger.info(f"Cached context for query {query_id} in Redis.")
     except redis.exceptions.RedisError as e:
         logger.error(f"Failed to cache context for query {query_id}: {e}")
 
-def get_cached_context(query_id: str) -> Optional[Dict[str, Any]]:
+async def get_cached_context(query_id: str) -> Optional[Dict[str, Any]]:
     """
     Retrieve cached RAG context from Redis.
+    
+    Resolves the per-query references against the content cache with one
+    MGET. If any referenced chunk or act has been evicted the entry is
+    treated as a miss.
+    
+    Only retrieval results are cached, not the packed legal_context: callers
+    re-pack them with _pack_context for the model they generate with.
+    
+    Returns:
+        Optional[Dict]: {"chunks": [...], "related_acts": [...]} in the
+            original order (pass to _pack_context), or None on miss
     """
-    redis_client = get_redis_client()
+    redis_client = get_redis()
     if not redis_client:
         return None
 
     try:
-        cached_data = redis_client.get(f"rag_context:{query_id}")
-        if cached_data:
-            logger.info(f"Cache hit for query {query_id} in Redis.")
-            return json.loads(cached_data)
-        else:
+        cached_data = await redis_client.get(f"{RAG_CONTEXT_KEY_PREFIX}:{query_id}")
+        if not cached_data:
             logger.info(f"Cache miss for query {query_id} in Redis.")
             return None
-    except redis.exceptions.RedisError as e:
+        
+        entry = decode_payload(cached_data)
+        chunk_refs = entry.get("chunks", [])
+        act_refs = entry.get("related_acts", [])
+        
+        keys = [f"{RAG_CHUNK_KEY_PREFIX}:{ref['id']}" for ref in chunk_refs]
+        keys += [f"{RAG_ACT_KEY_PREFIX}:{ref['id']}" for ref in act_refs]
+        bodies = await redis_client.mget(keys) if keys else []
+        
+        if any(body is None for body in bodies):
+            logger.info(f"Cache miss for query {query_id} in Redis (content evicted).")
+            return None
+        
+        resolved = [{**decode_payload(body), **ref} for body, ref in zip(bodies, chunk_refs + act_refs)]
+        logger.info(f"Cache hit for query {query_id} in Redis.")
+        return {
+            "chunks": resolved[:len(chunk_refs)],
+            "related_acts": resolved[len(chunk_refs):]
+        }
+    except (redis.exceptions.RedisError, ValueError, KeyError, TypeError) as e:
         logger.error(f"Failed to retrieve cached context for query {query_id}: {e}")
         return None
 
 
+# =========================================================================
+# SEMANTIC ANSWER CACHE
+# =========================================================================
+
+def lookup_cached_answer(
+    query_id: str,
+    query_embedding: List[float],
+    chunks: List[Dict[str, Any]]
+) -> Optional[str]:
+    """
+    Look up fast response of a near-duplicate question (see answer_cache).
+    
+    Returns:
+        Optional[str]: Cached response text or None (miss or cache disabled)
+    """
+    answer_cache = get_answer_cache()
+    if answer_cache is None:
+        return None
+    
+    hit = answer_cache.lookup(query_embedding, chunks, settings.ollama_fast_model)
+    if hit is None:
+        return None
+    
+    logger.info(
+        f"Answer cache hit for query {query_id}: reusing response of query "
+        f"{hit['source_query_id']} (similarity={hit['similarity']:.3f}, "
+        f"chunk_overlap={hit['chunk_overlap']:.2f}, saved ~{hit['generation_time_ms']}ms)"
+    )
+    return hit["content"]
+
+
+def store_cached_answer(
+    query_id: str,
+    query_embedding: List[float],
+    chunks: List[Dict[str, Any]],
+    response_text: str,
+    generation_time_ms: int
+) -> None:
+    """Store generated fast response in the semantic answer cache (if enabled)."""
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        answer_cache.store(
+            query_id, query_embedding, chunks, response_text,
+            settings.ollama_fast_model, generation_time_ms
+        )
+
+
+# =========================================================================
+# CONTEXT PACKING
+# =========================================================================
+
+def _pack_context(
+    query_text: str,
+    chunks: List[Dict[str, Any]],
+    related_acts: List[Dict[str, Any]],
+    model: str,
+    system_prompt: str
+) -> Dict[str, Any]:
+    """
+    Pack chunks into the token budget of model and log the manifest.
+    
+    Returns:
+        dict: Packed context (see llm_service.pack_legal_context); sources
+            are extracted from packed["chunks"], the chunks the model saw
+    """
+    packed = pack_legal_context(query_text, chunks, related_acts, model, system_prompt)
+    
+    logger.info(
+        f"Packed {len(packed['chunks'])}/{len(chunks)} chunks for {model} "
+        f"(~{packed['tokens']}/{packed['budget']} tokens, "
+        f"{len(packed['dropped']['duplicate'])} duplicates, "
+        f"{len(packed['dropped']['over_budget'])} over budget)"
+    )
+    logger.debug(f"Context manifest: {packed['manifest']}")
+    
+    return packed
+
+
 # =========================================================================
 # FAST RESPONSE PIPELINE
 # =========================================================================
 
 async def process_query_fast(
     user_id: str,
-    query_text: str
+    query_text: str,
+    query_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Full RAG pipeline for fast response generation.
     
     Includes metrics collection for monitoring performance.
+    
+    Args:
+        user_id: User ID
+        query_text: Query text
+        query_id: Existing query ID (created at submission, e.g. for queued
+            jobs); a new query is created if None
     """
     pipeline_start = time.time()
     metrics = get_rag_metrics()
     
     try:
-        # STEP 1: Create query in database
-        step_start = time.time()
-        logger.info(f"[STEP 1/9] Creating query for user {user_id}")
-        query_id = await create_query(user_id, query_text)
-        metrics.record_step_time("create_query", time.time() - step_start)
+        # STEP 1: Create query in database (unless created at submission)
+        if query_id is None:
+            step_start = time.time()
+            logger.info(f"[STEP 1/9] Creating query for user {user_id}")
+            query_id = await create_query(user_id, query_text)
+            metrics.record_step_time("create_query", time.time() - step_start)
         
         # STEP 2: Generate query embedding
         step_start = time.time()
@@ -326,12 +591,10 @@ async def process_query_fast(
         
         # STEP 3: Semantic search
         step_start = time.time()
-        logger.info(f"[STEP 3/9] Performing semantic search (top_k={TOP_K_CHUNKS})")
-        chunks = await semantic_search(
-            query_embedding=query_embedding,
-            top_k=TOP_K_CHUNKS,
-            distance_threshold=DISTANCE_THRESHOLD
+        logger.info(
+            f"[STEP 3/9] Performing {settings.rag_retrieval_mode} search (quality=fast)"
         )
+        chunks = await retrieve_chunks(query_text, query_embedding)
         metrics.record_step_time("semantic_search", time.time() - step_start)
         
         # STEP 4: Fetch related acts
@@ -344,38 +607,49 @@ async def process_query_fast(
         )
         metrics.record_step_time("fetch_related_acts", time.time() - step_start)
         
-        # STEP 5: Build legal context
+        # STEP 5: Pack legal context into the fast model's context window
         step_start = time.time()
-        logger.info("[STEP 5/9] Building legal context")
-        legal_context = build_legal_context(chunks, related_acts)
-        metrics.record_step_time("build_legal_context", time.time() - step_start)
+        logger.info("[STEP 5/9] Packing legal context")
+        packed = _pack_context(query_text, chunks, related_acts, FAST_MODEL, SYSTEM_PROMPT)
+        legal_context = packed["text"]
+        metrics.record_step_time("pack_context", time.time() - step_start)
         
-        # STEP 6: Generate LLM response (fast model)
+        # STEP 6: Generate LLM response (fast model), unless a near-duplicate
+        # question was already answered from the same chunks
         step_start = time.time()
-        logger.info("[STEP 6/9] Generating fast response")
+        cached_answer = lookup_cached_answer(query_id, query_embedding, chunks)
         
-        # Record memory before generation
-        try:
-            from backend.services.ollama_service import get_ollama_service
-            ollama_service = get_ollama_service()
-            mem_info = ollama_service._get_memory_usage()
-            if mem_info.get("percent") is not None:
-                metrics.record_memory_usage(mem_info["percent"])
-        except Exception:
-            pass  # Non-critical, continue without memory info
-        
-        prompt = build_prompt(query_text, legal_context)
-        response_text, generation_time_ms = await generate_text_fast(
-            prompt=prompt,
-            system_prompt=SYSTEM_PROMPT
-        )
-        metrics.record_generation_time("fast", generation_time_ms)
-        metrics.record_step_time("generate_text_fast", time.time() - step_start)
+        if cached_answer is not None:
+            logger.info("[STEP 6/9] Reusing cached fast response")
+            response_text = cached_answer
+            generation_time_ms = max(1, int((time.time() - step_start) * 1000))
+            metrics.record_step_time("answer_cache_hit", time.time() - step_start)
+        else:
+            logger.info("[STEP 6/9] Generating fast response")
+        
+            # Record memory before generation
+            try:
+                from backend.services.ollama_service import get_ollama_service
+                ollama_service = get_ollama_service()
+                mem_info = ollama_service._get_memory_usage()
+                if mem_info.get("percent") is not None:
+                    metrics.record_memory_usage(mem_info["percent"])
+            except Exception:
+                pass  # Non-critical, continue without memory info
+        
+            prompt = build_prompt(query_text, legal_context)
+            response_text, generation_time_ms = await generate_text_fast(
+                prompt=prompt,
+                system_prompt=SYSTEM_PROMPT
+            )
+            metrics.record_generation_time("fast", generation_time_ms)
+            metrics.record_step_time("generate_text_fast", time.time() - step_start)
+            store_cached_answer(query_id, query_embedding, chunks, response_text, generation_time_ms)
         
         # STEP 7: Extract sources
         step_start = time.time()
         logger.info("[STEP 7/9] Extracting sources")
-        sources = extract_sources_from_response(response_text, chunks)
+        sources = extract_sources_from_response(response_text, packed["chunks"])
         metrics.record_step_time("extract_sources", time.time() - step_start)
         
         # STEP 8: Update database
@@ -393,11 +667,10 @@ async def process_query_fast(
         # STEP 9: Cache context for accurate response
         step_start = time.time()
         logger.info("[STEP 9/9] Caching context")
-        cache_rag_context(
+        await cache_rag_context(
             query_id=query_id,
             chunks=chunks,
-            related_acts=related_acts,
-            legal_context=legal_context
+            related_acts=related_acts
         )
         metrics.record_step_time("cache_context", time.time() - step_start)
         
@@ -456,34 +729,27 @@ async def process_query_accurate(
         # STEP 1: Retrieve cached context
         step_start = time.time()
         logger.info(f"[STEP 1/4] Retrieving cached context for {query_id}")
-        cached = get_cached_context(query_id)
+        cached = await get_cached_context(query_id)
         
         if cached:
-            legal_context = cached["legal_context"]
+            chunks, related_acts = cached["chunks"], cached["related_acts"]
             metrics.record_cache_hit()
         else:
             logger.warning(f"[STEP 1/4] Cache miss for {query_id}, regenerating context")
             metrics.record_cache_miss()
             query_embedding = await generate_embedding(query_text)
-            chunks = await semantic_search(query_embedding, TOP_K_CHUNKS, DISTANCE_THRESHOLD)
+            chunks = await retrieve_chunks(query_text, query_embedding, quality="accurate")
             act_ids = extract_act_ids_from_chunks(chunks)
             related_acts = await fetch_related_acts(act_ids, RELATED_ACTS_DEPTH)
-            legal_context = build_legal_context(chunks, related_acts)
         
         metrics.record_step_time("retrieve_context", time.time() - step_start)
         
         # STEP 2: Enhanced prompt construction
         step_start = time.time()
         logger.info("[STEP 2/4] Building enhanced prompt")
-        enhanced_system_prompt = SYSTEM_PROMPT + """
-
-Dla tej odpowiedzi:
-- Dokonaj głębszej analizy przepisów
-- Rozważ różne interpretacje i konteksty
-- Wskaż potencjalne wyjątki lub szczególne przypadki
-- Podaj przykłady zastosowania (jeśli relewanatne)
-"""
-        prompt = build_prompt(query_text, legal_context)
+        enhanced_system_prompt = ACCURATE_SYSTEM_PROMPT
+        packed = _pack_context(query_text, chunks, related_acts, ACCURATE_MODEL, enhanced_system_prompt)
+        prompt = build_prompt(query_text, packed["text"])
         metrics.record_step_time("build_prompt", time.time() - step_start)
         
         # STEP 3: Generate response (accurate model)
@@ -531,16 +797,286 @@ Dla tej odpowiedzi:
         raise RAGPipelineError(f"Accurate response pipeline failed: {e}")
 
 
+# =========================================================================
+# STREAMING PIPELINES
+# =========================================================================
+
+async def _stream_generation(
+    prompt: str,
+    system_prompt: str,
+    model: str,
+    timeout: int,
+    response_type: str,
+    parts: List[str],
+    user_id: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream LLM tokens as "token" events, collecting them into parts.
+    
+    Records time to first token in RAG metrics.
+    """
+    metrics = get_rag_metrics()
+    start_time = time.time()
+    
+    # aclosing: abandoning this stream closes the Ollama request right away
+    async with aclosing(generate_text_stream(
+        prompt=prompt,
+        model=model,
+        timeout=timeout,
+        temperature=DEFAULT_TEMPERATURE,
+        system_prompt=system_prompt,
+        user_id=user_id,
+        num_ctx=get_num_ctx(model)
+    )) as tokens:
+        async for token in tokens:
+            if not parts:
+                metrics.record_time_to_first_token(
+                    response_type, (time.time() - start_time) * 1000
+                )
+            parts.append(token)
+            yield {"event": "token", "data": {"text": token}}
+
+
+async def stream_query_fast(
+    query_id: str,
+    query_text: str,
+    user_id: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming RAG pipeline for fast response generation.
+    
+    Runs retrieval for an already created query, yields generated tokens
+    as they arrive and persists the full response once generation ends.
+    
+    Args:
+        query_id: Existing query ID (created via create_query)
+        query_text: Query text
+        user_id: Owner of the query (fair scheduling of generation)
+        
+    Yields:
+        dict: Events with "event" and "data" keys:
+            - {"event": "token", "data": {"text": "..."}}
+            - {"event": "done", "data": {query_id, content, sources, model_name,
+              generation_time_ms, pipeline_time_ms}}
+            
+    Raises:
+        NoRelevantActsError: If no relevant chunks found
+        OLLAMATimeoutError: If generation times out
+        RAGPipelineError: If any other pipeline step fails
+    """
+    pipeline_start = time.time()
+    metrics = get_rag_metrics()
+    
+    try:
+        # Retrieval (same steps as process_query_fast)
+        step_start = time.time()
+        query_embedding = await generate_embedding(query_text)
+        metrics.record_step_time("generate_embedding", time.time() - step_start)
+        
+        step_start = time.time()
+        chunks = await retrieve_chunks(query_text, query_embedding)
+        metrics.record_step_time("semantic_search", time.time() - step_start)
+        
+        step_start = time.time()
+        act_ids = extract_act_ids_from_chunks(chunks)
+        related_acts = await fetch_related_acts(
+            act_ids=act_ids,
+            depth=RELATED_ACTS_DEPTH
+        )
+        metrics.record_step_time("fetch_related_acts", time.time() - step_start)
+        
+        step_start = time.time()
+        packed = _pack_context(query_text, chunks, related_acts, FAST_MODEL, SYSTEM_PROMPT)
+        metrics.record_step_time("pack_context", time.time() - step_start)
+        
+        # Generation (streamed), or cached answer of a near-duplicate question
+        generation_start = time.time()
+        cached_answer = lookup_cached_answer(query_id, query_embedding, chunks)
+        
+        if cached_answer is not None:
+            yield {"event": "token", "data": {"text": cached_answer}}
+            response_text = cached_answer
+            generation_time_ms = max(1, int((time.time() - generation_start) * 1000))
+            metrics.record_step_time("answer_cache_hit", time.time() - generation_start)
+        else:
+            prompt = build_prompt(query_text, packed["text"])
+        
+            parts: List[str] = []
+            async with aclosing(_stream_generation(
+                prompt, SYSTEM_PROMPT, FAST_MODEL, FAST_TIMEOUT, "fast", parts, user_id
+            )) as events:
+                async for event in events:
+                    yield event
+            generation_time_ms = int((time.time() - generation_start) * 1000)
+            metrics.record_generation_time("fast", generation_time_ms)
+        
+            response_text = "".join(parts).strip()
+            store_cached_answer(query_id, query_embedding, chunks, response_text, generation_time_ms)
+        sources = extract_sources_from_response(response_text, packed["chunks"])
+        
+        # Persist full response and cache context for accurate response
+        await update_query_fast_response(
+            query_id=query_id,
+            content=response_text,
+            sources=sources,
+            model_name=settings.ollama_fast_model,
+            generation_time_ms=generation_time_ms
+        )
+        await cache_rag_context(
+            query_id=query_id,
+            chunks=chunks,
+            related_acts=related_acts
+        )
+        
+        total_time_ms = int((time.time() - pipeline_start) * 1000)
+        metrics.record_pipeline_time("fast", total_time_ms)
+        metrics.record_success("fast")
+        
+        logger.info(
+            f"Fast streaming pipeline completed in {total_time_ms}ms "
+            f"(query_id: {query_id}, generation: {generation_time_ms}ms)"
+        )
+        
+        yield {
+            "event": "done",
+            "data": {
+                "query_id": query_id,
+                "content": response_text,
+                "sources": sources,
+                "model_name": settings.ollama_fast_model,
+                "generation_time_ms": generation_time_ms,
+                "pipeline_time_ms": total_time_ms
+            }
+        }
+        
+    except (NoRelevantActsError, OLLAMATimeoutError, OLLAMAUnavailableError):
+        metrics.record_failure("fast")
+        raise
+    except Exception as e:
+        logger.error(f"Fast streaming pipeline failed: {e}", exc_info=True)
+        metrics.record_failure("fast")
+        raise RAGPipelineError(f"Fast response pipeline failed: {e}")
+
+
+async def stream_query_accurate(
+    query_id: str,
+    query_text: str,
+    user_id: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming RAG pipeline for accurate response generation.
+    
+    Reuses cached context when available, yields generated tokens and
+    persists the full response once generation ends.
+    
+    Args:
+        query_id: Existing query ID (fast response already completed)
+        query_text: Query text
+        user_id: Owner of the query (fair scheduling of generation)
+        
+    Yields:
+        dict: "token" events followed by a single "done" event
+            (see stream_query_fast)
+            
+    Raises:
+        OLLAMATimeoutError: If generation times out
+        RAGPipelineError: If any other pipeline step fails
+    """
+    pipeline_start = time.time()
+    metrics = get_rag_metrics()
+    
+    try:
+        cached = await get_cached_context(query_id)
+        
+        if cached:
+            chunks, related_acts = cached["chunks"], cached["related_acts"]
+            metrics.record_cache_hit()
+        else:
+            logger.warning(f"Cache miss for {query_id}, regenerating context")
+            metrics.record_cache_miss()
+            query_embedding = await generate_embedding(query_text)
+            chunks = await retrieve_chunks(query_text, query_embedding, quality="accurate")
+            act_ids = extract_act_ids_from_chunks(chunks)
+            related_acts = await fetch_related_acts(act_ids, RELATED_ACTS_DEPTH)
+        
+        packed = _pack_context(query_text, chunks, related_acts, ACCURATE_MODEL, ACCURATE_SYSTEM_PROMPT)
+        prompt = build_prompt(query_text, packed["text"])
+        
+        generation_start = time.time()
+        parts: List[str] = []
+        async with aclosing(_stream_generation(
+            prompt, ACCURATE_SYSTEM_PROMPT, ACCURATE_MODEL, ACCURATE_TIMEOUT, "accurate", parts, user_id
+        )) as events:
+            async for event in events:
+                yield event
+        generation_time_ms = int((time.time() - generation_start) * 1000)
+        metrics.record_generation_time("accurate", generation_time_ms)
+        
+        response_text = "".join(parts).strip()
+        
+        await update_query_accurate_response(
+            query_id=query_id,
+            content=response_text,
+            model_name=settings.ollama_accurate_model,
+            generation_time_ms=generation_time_ms
+        )
+        
+        total_time_ms = int((time.time() - pipeline_start) * 1000)
+        metrics.record_pipeline_time("accurate", total_time_ms)
+        metrics.record_success("accurate")
+        
+        logger.info(
+            f"Accurate streaming pipeline completed in {total_time_ms}ms "
+            f"(query_id: {query_id}, generation: {generation_time_ms}ms)"
+        )
+        
+        yield {
+            "event": "done",
+            "data": {
+                "query_id": query_id,
+                "content": response_text,
+                "model_name": settings.ollama_accurate_model,
+                "generation_time_ms": generation_time_ms,
+                "pipeline_time_ms": total_time_ms
+            }
+        }
+        
+    except (OLLAMATimeoutError, OLLAMAUnavailableError):
+        metrics.record_failure("accurate")
+        raise
+    except Exception as e:
+        logger.error(f"Accurate streaming pipeline failed: {e}", exc_info=True)
+        metrics.record_failure("accurate")
+        raise RAGPipelineError(f"Accurate response pipeline failed: {e}")
+
+
 # =========================================================================
 # BACKGROUND TASK HELPERS
 # =========================================================================
 
-async def process_query_fast_background(user_id: str, query_text: str) -> None:
+async def process_query_fast_background(
+    user_id: str,
+    query_text: str,
+    query_id: Optional[str] = None
+) -> None:
     """
     Background task wrapper for fast response generation.
+    
+    With an existing query_id the generation is cancellable through the
+    cancellation registry (e.g. when the query is deleted).
     """
     try:
-        await process_query_fast(user_id, query_text)
+        with llm_request_context(priority="interactive", user_id=user_id):
+            if query_id is None:
+                await process_query_fast(user_id, query_text)
+            else:
+                await get_cancellation_registry().run(
+                    query_id, process_query_fast(user_id, query_text, query_id)
+                )
+    except QueryCancelledError as e:
+        logger.info(f"Background fast response cancelled: {e}")
+        reason = get_cancellation_registry().reason(query_id) or "cancelled"
+        get_rag_metrics().record_cancellation("fast", reason)
     except Exception as e:
         logger.error(f"Background fast response failed: {e}", exc_info=True)
 
@@ -548,9 +1084,19 @@ async def process_query_fast_background(user_id: str, query_text: str) -> None:
 async def process_query_accurate_background(query_id: str, query_text: str) -> None:
     """
     Background task wrapper for accurate response generation.
+    
+    Cancellable through the cancellation registry (e.g. when the query is
+    deleted), which frees the accurate model slot at once.
     """
     try:
-        await process_query_accurate(query_id, query_text)
+        with llm_request_context(priority="accurate"):
+            await get_cancellation_registry().run(
+                query_id, process_query_accurate(query_id, query_text)
+            )
+    except QueryCancelledError as e:
+        logger.info(f"Background accurate response cancelled: {e}")
+        reason = get_cancellation_registry().reason(query_id) or "cancelled"
+        get_rag_metrics().record_cancellation("accurate", reason)
     except Exception as e:
         logger.error(f"Background accurate response failed: {e}", exc_info=True)
 
@@ -570,6 +1116,10 @@ def get_rag_pipeline_metrics() -> Dict[str, Any]:
             - step_times: Average/min/max for each pipeline step
             - success_rates: Success/failure counts and rates
             - cache_hit_rate: Cache hit ratio
+            - embedding_cache: Query embedding cache hits (per tier) and misses
+            - answer_cache: Semantic answer cache hits, misses and generation time saved
+            - cancellations: Cancelled generations per response type and reason
+            - ollama: Ollama request coalescing counters
     """
     metrics = get_rag_metrics()
     return metrics.get_stats()
@@ -0,0 +1,70 @@
+"""
+PrawnikGPT Backend - Shared Async Redis Client
+
+One redis.asyncio client (with its connection pool) per Redis URL, shared
+by all caches in the worker. Cache operations are awaited on the event loop
+instead of blocking it, and connections are reused across requests.
+
+Redis is optional - without settings.redis_url get_redis() returns None
+and callers skip the cache.
+"""
+
+import logging
+from typing import Dict, Optional
+
+import redis.asyncio as aioredis
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CLIENT REGISTRY
+# =========================================================================
+
+_clients: Dict[str, aioredis.Redis] = {}
+
+
+def get_redis(url: Optional[str] = None) -> Optional[aioredis.Redis]:
+    """
+    Get shared async Redis client for URL (lazily created, pooled).
+    
+    Creating the client does not connect - connections are opened by the
+    pool on first use, so errors surface as RedisError on the operation.
+    
+    Args:
+        url: Redis URL (defaults to settings.redis_url)
+    
+    Returns:
+        Optional[aioredis.Redis]: Client or None if Redis is not configured
+    """
+    url = url or settings.redis_url
+    if not url:
+        return None
+    
+    client = _clients.get(url)
+    if client is None:
+        pool = aioredis.ConnectionPool.from_url(
+            url,
+            max_connections=settings.redis_max_connections,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout
+        )
+        client = aioredis.Redis(connection_pool=pool)
+        _clients[url] = client
+        logger.info(
+            f"Async Redis client initialized (max_connections={settings.redis_max_connections})"
+        )
+    
+    return client
+
+
+async def close_redis() -> None:
+    """Close all shared Redis clients and their pools (call on shutdown)."""
+    for client in list(_clients.values()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close Redis client: {e}")
+    _clients.clear()
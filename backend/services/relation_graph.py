@@ -0,0 +1,478 @@
+"""
+PrawnikGPT Backend - Legal Act Relation Graph
+
+In-memory snapshot of legal_act_relations for related-acts lookups
+without database traffic.
+
+The graph is stored in CSR (compressed sparse row) form: acts are
+integer-indexed and outgoing/incoming adjacency lists are flat typed
+arrays (offsets, neighbor index, edge index). 1- and 2-hop
+neighborhoods are memoized per (act, relation type filter).
+
+The snapshot is immutable. RelationGraphService reloads it when the
+version (row counts and latest timestamps of legal_acts and
+legal_act_relations) changes, checked at most every
+RELATION_GRAPH_REFRESH_INTERVAL seconds. Requests keep using the old
+snapshot while a new one is loaded.
+
+Serves:
+- vector_search.fetch_related_acts() (RAG context expansion)
+- GET /api/v1/legal-acts/{act_id}/relations
+"""
+
+import asyncio
+import logging
+import time
+from array import array
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.db.supabase_client import get_supabase
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# CONFIGURATION
+# =========================================================================
+
+# Edge type codes (index in this tuple), same values as relation_type_enum
+RELATION_TYPES = ("modifies", "repeals", "implements", "based_on", "amends")
+_TYPE_CODES = {name: code for code, name in enumerate(RELATION_TYPES)}
+
+# PostgREST page size used while loading (default max-rows is 1000)
+LOAD_PAGE_SIZE = 1000
+
+# Max memoized neighborhoods per snapshot (cleared when exceeded)
+MAX_CACHED_NEIGHBORHOODS = 50_000
+
+_ACT_COLUMNS = "id, title, typ_aktu, publisher, year, position, status, published_date, updated_at"
+_RELATION_COLUMNS = "id, source_act_id, target_act_id, relation_type, description, created_at"
+
+
+def _type_mask(relation_types: Optional[List[str]]) -> int:
+    """Bitmask of allowed edge type codes (0 = all types)."""
+    if not relation_types:
+        return 0
+    mask = 0
+    for name in relation_types:
+        mask |= 1 << _TYPE_CODES[name]
+    return mask
+
+
+# =========================================================================
+# CSR GRAPH SNAPSHOT
+# =========================================================================
+
+class _Adjacency:
+    """CSR adjacency list: neighbors of node i are slots offsets[i]..offsets[i+1]."""
+    
+    __slots__ = ("offsets", "nodes", "edges")
+    
+    def __init__(self, node_count: int, heads: array, tails: array):
+        counts = [0] * (node_count + 1)
+        for head in heads:
+            counts[head + 1] += 1
+        
+        self.offsets = array("I", accumulate(counts))
+        self.nodes = array("I", bytes(4 * len(heads)))
+        self.edges = array("I", bytes(4 * len(heads)))
+        
+        # Counting sort of edges by head node (keeps load order within a node)
+        cursor = list(self.offsets[:-1])
+        for edge, (head, tail) in enumerate(zip(heads, tails)):
+            slot = cursor[head]
+            self.nodes[slot] = tail
+            self.edges[slot] = edge
+            cursor[head] = slot + 1
+    
+    def neighbors(self, node: int):
+        """Iterate (neighbor node, edge index) pairs."""
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return zip(self.nodes[start:end], self.edges[start:end])
+
+
+class RelationGraph:
+    """
+    Immutable CSR snapshot of the legal act relation graph.
+    
+    Example Usage:
+        ```python
+        graph = RelationGraph(acts, relations, version)
+        related = graph.related_acts(["act-uuid"], depth=2)
+        relations = graph.act_relations("act-uuid", depth=1)
+        ```
+    """
+    
+    def __init__(
+        self,
+        acts: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+        version: Tuple = ()
+    ):
+        """
+        Build graph from legal_acts and legal_act_relations rows.
+        
+        Args:
+            acts: legal_acts rows (id, title, typ_aktu, publisher, year, ...)
+            relations: legal_act_relations rows (id, source_act_id, target_act_id, ...)
+            version: Data version the snapshot was built from
+        """
+        self.version = version
+        self.acts = acts
+        self._index = {act["id"]: i for i, act in enumerate(acts)}
+        
+        # Edge attributes (indexed by edge number)
+        self._relations = []
+        sources = array("I")
+        targets = array("I")
+        self._edge_types = array("B")
+        
+        for relation in relations:
+            source = self._index.get(relation["source_act_id"])
+            target = self._index.get(relation["target_act_id"])
+            if source is None or target is None:
+                continue
+            sources.append(source)
+            targets.append(target)
+            self._edge_types.append(_TYPE_CODES[relation["relation_type"]])
+            self._relations.append(relation)
+        
+        self._outgoing = _Adjacency(len(acts), sources, targets)
+        self._incoming = _Adjacency(len(acts), targets, sources)
+        
+        self._neighborhoods: Dict[Tuple[int, int], List[Tuple[int, int, int, int]]] = {}
+    
+    @property
+    def act_count(self) -> int:
+        return len(self.acts)
+    
+    @property
+    def relation_count(self) -> int:
+        return len(self._relations)
+    
+    def has_act(self, act_id: str) -> bool:
+        return act_id in self._index
+    
+    def _allowed(self, edge: int, mask: int) -> bool:
+        return mask == 0 or bool(mask & (1 << self._edge_types[edge]))
+    
+    def _neighborhood(self, node: int, mask: int) -> List[Tuple[int, int, int, int]]:
+        """
+        2-hop neighborhood of node (memoized).
+        
+        Same traversal as fetch_related_acts RPC: depth 1 follows outgoing
+        and incoming edges, depth 2 follows outgoing edges of depth-1 acts
+        (without returning to the path's acts).
+        
+        Returns:
+            List of (depth, act node, edge, from node)
+        """
+        key = (node, mask)
+        cached = self._neighborhoods.get(key)
+        if cached is not None:
+            return cached
+        
+        first_hop = []
+        for adjacency in (self._outgoing, self._incoming):
+            for neighbor, edge in adjacency.neighbors(node):
+                if self._allowed(edge, mask):
+                    first_hop.append((1, neighbor, edge, node))
+        
+        second_hop = []
+        for _, hop_node, _, _ in first_hop:
+            for neighbor, edge in self._outgoing.neighbors(hop_node):
+                if neighbor != node and neighbor != hop_node and self._allowed(edge, mask):
+                    second_hop.append((2, neighbor, edge, hop_node))
+        
+        result = first_hop + second_hop
+        
+        if len(self._neighborhoods) >= MAX_CACHED_NEIGHBORHOODS:
+            self._neighborhoods.clear()
+        self._neighborhoods[key] = result
+        return result
+    
+    def related_acts(
+        self,
+        act_ids: List[str],
+        depth: int = 1,
+        relation_types: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Acts related to seed acts (same result format as fetch_related_acts).
+        
+        Each act is reported once at its shortest depth; seed acts are
+        excluded. Ordered by depth, then title.
+        
+        Args:
+            act_ids: Seed legal act IDs
+            depth: Traversal depth (1-2)
+            relation_types: Optional filter by relation types
+        
+        Returns:
+            List[Dict]: Related acts with relation metadata and depth
+        """
+        mask = _type_mask(relation_types)
+        seeds = {self._index[act_id] for act_id in act_ids if act_id in self._index}
+        
+        best: Dict[int, Tuple[int, int, int]] = {}
+        for seed in seeds:
+            for level, node, edge, from_node in self._neighborhood(seed, mask):
+                if level > depth or node in seeds:
+                    continue
+                current = best.get(node)
+                if current is None or level < current[0]:
+                    best[node] = (level, edge, from_node)
+        
+        results = []
+        for node, (level, edge, from_node) in best.items():
+            act = self.acts[node]
+            relation = self._relations[edge]
+            results.append({
+                "id": act["id"],
+                "title": act["title"],
+                "publisher": act.get("publisher"),
+                "year": act.get("year"),
+                "position": act.get("position"),
+                "status": act.get("status"),
+                "published_date": act.get("published_date"),
+                "relation_type": relation["relation_type"],
+                "relation_description": relation.get("description"),
+                "source_act_id": self.acts[from_node]["id"],
+                "depth": level
+            })
+        
+        results.sort(key=lambda r: (r["depth"], r["title"]))
+        return results
+    
+    def _relation_record(
+        self,
+        edge: int,
+        other_key: str,
+        other_node: int,
+        depth: int
+    ) -> Dict[str, Any]:
+        """Relation row with embedded act reference (as in legal_acts repository)."""
+        act = self.acts[other_node]
+        record = dict(self._relations[edge])
+        record["depth"] = depth
+        record[other_key] = {
+            "id": act["id"],
+            "title": act["title"],
+            "typ_aktu": act.get("typ_aktu"),
+            "status": act.get("status")
+        }
+        return record
+    
+    def act_relations(
+        self,
+        act_id: str,
+        depth: int = 1,
+        relation_type: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Outgoing and incoming relations of an act (same format as
+        db.legal_acts.get_legal_act_relations).
+        
+        With depth=2, outgoing relations of outgoing neighbors and incoming
+        relations of incoming neighbors are appended (tagged depth=2).
+        
+        Args:
+            act_id: Legal act ID
+            depth: Traversal depth (1 or 2)
+            relation_type: Optional relation type filter
+        
+        Returns:
+            Dict with 'outgoing' and 'incoming' relation lists
+        """
+        node = self._index.get(act_id)
+        if node is None:
+            return {"outgoing": [], "incoming": []}
+        
+        mask = _type_mask([relation_type] if relation_type else None)
+        result = {}
+        
+        for key, adjacency, other_key in (
+            ("outgoing", self._outgoing, "target_act"),
+            ("incoming", self._incoming, "source_act")
+        ):
+            level_nodes = [node]
+            records = []
+            for level in range(1, depth + 1):
+                next_nodes = {}  # Ordered set
+                for current in level_nodes:
+                    for neighbor, edge in adjacency.neighbors(current):
+                        if self._allowed(edge, mask):
+                            records.append(self._relation_record(edge, other_key, neighbor, level))
+                            next_nodes[neighbor] = None
+                level_nodes = list(next_nodes)
+            result[key] = records
+        
+        return result
+
+
+# =========================================================================
+# SERVICE (LOADING AND REFRESH)
+# =========================================================================
+
+class RelationGraphService:
+    """
+    Loads and refreshes the RelationGraph snapshot.
+    
+    Example Usage:
+        ```python
+        graph = await get_relation_graph_service().get_graph()
+        if graph is not None:
+            related = graph.related_acts(act_ids, depth=2)
+        ```
+    """
+    
+    def __init__(self, refresh_interval: float = 300.0):
+        """
+        Args:
+            refresh_interval: Min seconds between version checks / load retries
+        """
+        self.refresh_interval = refresh_interval
+        self._graph: Optional[RelationGraph] = None
+        self._lock = asyncio.Lock()
+        self._checked_at = 0.0
+        self._retry_at = 0.0
+        self._loads = 0
+    
+    async def _fetch_version(self) -> Tuple:
+        """Row counts and latest timestamps of legal_acts and legal_act_relations."""
+        supabase = get_supabase()
+        
+        relations_response, acts_response = await asyncio.gather(
+            supabase.table("legal_act_relations")
+                .select("created_at", count="exact")
+                .order("created_at", desc=True)
+                .limit(1)
+                .execute(),
+            supabase.table("legal_acts")
+                .select("updated_at", count="exact")
+                .order("updated_at", desc=True)
+                .limit(1)
+                .execute()
+        )
+        
+        return (
+            relations_response.count,
+            relations_response.data[0]["created_at"] if relations_response.data else None,
+            acts_response.count,
+            acts_response.data[0]["updated_at"] if acts_response.data else None
+        )
+    
+    async def _fetch_all(self, table: str, columns: str) -> List[Dict[str, Any]]:
+        """Fetch all rows of a table in pages."""
+        supabase = get_supabase()
+        rows = []
+        
+        while True:
+            response = await (
+                supabase.table(table)
+                .select(columns)
+                .order("id")
+                .range(len(rows), len(rows) + LOAD_PAGE_SIZE - 1)
+                .execute()
+            )
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < LOAD_PAGE_SIZE:
+                return rows
+    
+    async def _load(self, version: Tuple) -> RelationGraph:
+        start = time.time()
+        
+        acts, relations = await asyncio.gather(
+            self._fetch_all("legal_acts", _ACT_COLUMNS),
+            self._fetch_all("legal_act_relations", _RELATION_COLUMNS)
+        )
+        graph = RelationGraph(acts, relations, version)
+        
+        self._loads += 1
+        logger.info(
+            f"Relation graph loaded: {graph.act_count} acts, {graph.relation_count} relations "
+            f"in {(time.time() - start) * 1000:.0f}ms"
+        )
+        return graph
+    
+    async def get_graph(self) -> Optional[RelationGraph]:
+        """
+        Get current graph snapshot, reloading it if the data version changed.
+        
+        Returns:
+            Optional[RelationGraph]: Snapshot, or None if disabled or not loadable
+                (callers fall back to database queries)
+        """
+        if not settings.relation_graph_enabled:
+            return None
+        
+        now = time.monotonic()
+        
+        if self._graph is not None:
+            # Fresh enough, or another request is already refreshing: serve current snapshot
+            if now - self._checked_at < self.refresh_interval or self._lock.locked():
+                return self._graph
+        elif now < self._retry_at:
+            return None
+        
+        async with self._lock:
+            if self._graph is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+                return self._graph
+            
+            try:
+                version = await self._fetch_version()
+                if self._graph is None or version != self._graph.version:
+                    self._graph = await self._load(version)
+            except Exception as e:
+                logger.error(f"Failed to load relation graph: {e}")
+                self._retry_at = time.monotonic() + self.refresh_interval
+            
+            self._checked_at = time.monotonic()
+            return self._graph
+    
+    def invalidate(self) -> None:
+        """Force version check on next get_graph() call."""
+        self._checked_at = 0.0
+        self._retry_at = 0.0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get graph statistics.
+        
+        Returns:
+            Dict: loaded flag, act/relation counts, number of loads
+        """
+        graph = self._graph
+        return {
+            "loaded": graph is not None,
+            "acts": graph.act_count if graph else 0,
+            "relations": graph.relation_count if graph else 0,
+            "loads": self._loads
+        }
+
+
+# =========================================================================
+# SINGLETON
+# =========================================================================
+
+_relation_graph_service: RelationGraphService | None = None
+
+
+def get_relation_graph_service() -> RelationGraphService:
+    """
+    Get or create RelationGraphService singleton instance.
+    
+    Returns:
+        RelationGraphService: Singleton instance
+    """
+    global _relation_graph_service
+    
+    if _relation_graph_service is None:
+        _relation_graph_service = RelationGraphService(
+            refresh_interval=settings.relation_graph_refresh_interval
+        )
+    
+    return _relation_graph_service
@@ -6,9 +6,12 @@ Provides similarity search in legal act chunks using embeddings.
 
 Key Features:
 - Cosine similarity search
+- Hybrid semantic + keyword search (reciprocal rank fusion in SQL)
 - Distance threshold filtering
 - Top-K results
-- Related acts graph traversal
+- Quality tiers (per-request HNSW ef_search / IVFFlat probes)
+- Optional in-process search over a memory-mapped local index
+- Related acts graph traversal (in-memory graph, RPC fallback)
 - Metadata filtering (optional)
 
 Integration with:
@@ -19,8 +22,12 @@ Integration with:
 import logging
 from typing import List, Dict, Any, Optional
 
+from backend.config import settings
 from backend.db.supabase_client import get_supabase
+from backend.db.postgres import execute_rpc
 from backend.services.ollama_service import generate_embedding
+from backend.services.local_vector_index import get_local_vector_index
+from backend.services.relation_graph import get_relation_graph_service
 from backend.services.exceptions import NoRelevantActsError
 from postgrest.exceptions import APIError
 
@@ -39,6 +46,100 @@ MIN_RESULTS_REQUIRED = 3  # Minimum chunks to consider query answerable
 # Default top-K for similarity search
 DEFAULT_TOP_K = 10
 
+# Hybrid search defaults (reciprocal rank fusion)
+DEFAULT_SEMANTIC_WEIGHT = 1.0
+DEFAULT_KEYWORD_WEIGHT = 1.0
+DEFAULT_RRF_K = 60  # Fusion damping constant
+DEFAULT_CANDIDATE_COUNT = 50  # Candidates taken from each ranking before fusion
+
+# Quality tiers: cheaper index search for fast responses, higher recall for accurate
+SEARCH_QUALITY_TIERS = ("fast", "accurate")
+
+# Search RPC functions per embedding dimension
+# 768-dim (nomic-embed-text) is stored natively in embedding_768 (no zero padding)
+SUPPORTED_EMBEDDING_DIMS = (768, 1024)
+SEMANTIC_SEARCH_FUNCTIONS = {768: "semantic_search_chunks_768", 1024: "semantic_search_chunks"}
+SEMANTIC_SEARCH_TUNED_FUNCTIONS = {768: "semantic_search_chunks_768", 1024: "semantic_search_chunks_tuned"}
+HYBRID_SEARCH_FUNCTIONS = {768: "hybrid_search_chunks_768", 1024: "hybrid_search_chunks"}
+
+
+# =========================================================================
+# PRIVATE HELPERS
+# =========================================================================
+
+def _embedding_dimension(query_embedding: List[float]) -> int:
+    """
+    Validate query embedding and return its dimension (selects search RPC).
+    
+    Raises:
+        ValueError: If embedding is missing or has unsupported dimension
+    """
+    if not query_embedding:
+        raise ValueError("query_embedding is required")
+    
+    # Support both 768-dim and 1024-dim embeddings (stored in separate columns)
+    embedding_dim = len(query_embedding)
+    if embedding_dim not in SUPPORTED_EMBEDDING_DIMS:
+        raise ValueError(f"Expected 768 or 1024-dim embedding, got {embedding_dim}")
+    
+    return embedding_dim
+
+
+def get_search_tier(quality: str) -> Dict[str, int]:
+    """
+    Get search parameters for a quality tier (from settings).
+    
+    Args:
+        quality: "fast" or "accurate"
+    
+    Returns:
+        Dict[str, int]: top_k, ef_search (HNSW) and probes (IVFFlat)
+    
+    Raises:
+        ValueError: If quality tier is unknown
+    """
+    if quality not in SEARCH_QUALITY_TIERS:
+        raise ValueError(f"quality must be one of {SEARCH_QUALITY_TIERS}, got {quality!r}")
+    
+    return {
+        "top_k": getattr(settings, f"vector_search_{quality}_top_k"),
+        "ef_search": getattr(settings, f"vector_search_{quality}_ef_search"),
+        "probes": getattr(settings, f"vector_search_{quality}_probes")
+    }
+
+
+def _chunk_from_row(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform search RPC row to chunk result format (nested legal_act)."""
+    return {
+        "id": chunk["id"],
+        "legal_act_id": chunk["legal_act_id"],
+        "chunk_index": chunk["chunk_index"],
+        "content": chunk["content"],
+        "metadata": chunk.get("metadata"),
+        "distance": chunk["distance"],
+        # Nested legal_act structure for compatibility
+        "legal_act": {
+            "id": chunk["legal_act_id"],
+            "title": chunk["act_title"],
+            "publisher": chunk["act_publisher"],
+            "year": chunk["act_year"],
+            "position": chunk["act_position"],
+            "status": chunk["act_status"]
+        }
+    }
+
+
+def _require_min_results(results: List[Dict[str, Any]]) -> None:
+    """Raise NoRelevantActsError if too few chunks were found."""
+    if len(results) < MIN_RESULTS_REQUIRED:
+        logger.warning(
+            f"Insufficient relevant chunks found: {len(results)} < {MIN_RESULTS_REQUIRED}"
+        )
+        raise NoRelevantActsError(
+            f"Only {len(results)} relevant chunks found. "
+            f"Query may be outside scope of available legal acts."
+        )
+
 
 # =========================================================================
 # SEMANTIC SEARCH
@@ -48,16 +149,33 @@ async def semantic_search(
     query_embedding: List[float],
     top_k: int = DEFAULT_TOP_K,
     distance_threshold: float = DEFAULT_DISTANCE_THRESHOLD,
-    legal_act_ids: Optional[List[str]] = None
+    legal_act_ids: Optional[List[str]] = None,
+    quality: Optional[str] = None,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Perform semantic search in legal act chunks using pgvector RPC.
     
+    Without index parameters calls semantic_search_chunks (database defaults).
+    With quality tier or explicit ef_search/probes calls
+    semantic_search_chunks_tuned, which sets hnsw.ef_search and
+    ivfflat.probes for the transaction.
+    
+    768-dim embeddings are searched natively in embedding_768
+    (semantic_search_chunks_768), without padding to 1024.
+    
+    If the local vector index is enabled and loaded for the query dimension,
+    the search runs in-process (exact top-k, index parameters ignored).
+    
     Args:
         query_embedding: Query embedding vector (768 or 1024-dim)
         top_k: Maximum number of results to return
         distance_threshold: Maximum cosine distance (0-2, lower is better)
         legal_act_ids: Optional filter by legal act IDs (not used in RPC version)
+        quality: Optional quality tier ("fast" or "accurate") for index parameters
+        ef_search: HNSW candidate list size (overrides tier value)
+        probes: IVFFlat lists to scan (overrides tier value)
         
     Returns:
         List[Dict]: List of matching chunks with metadata:
@@ -77,80 +195,70 @@ async def semantic_search(
         embedding = await generate_embedding("Kodeks cywilny umowa sprzedaży")
         chunks = await semantic_search(embedding, top_k=10)
         # Returns top 10 most similar chunks
+        
+        # Cheaper index search for fast responses
+        chunks = await semantic_search(embedding, top_k=10, quality="fast")
         ```
     """
     # Validation
-    if not query_embedding:
-        raise ValueError("query_embedding is required")
-    
-    # Support both 768-dim and 1024-dim embeddings
-    embedding_dim = len(query_embedding)
-    if embedding_dim not in (768, 1024):
-        raise ValueError(f"Expected 768 or 1024-dim embedding, got {embedding_dim}")
-    
-    # Pad to 1024 if needed (database uses 1024-dim vectors)
-    if embedding_dim == 768:
-        query_embedding = query_embedding + [0.0] * (1024 - 768)
+    embedding_dim = _embedding_dimension(query_embedding)
     
     if top_k < 1:
         raise ValueError("top_k must be >= 1")
     if not (0 <= distance_threshold <= 2):
         raise ValueError("distance_threshold must be 0-2")
     
+    if quality is not None:
+        tier = get_search_tier(quality)
+        ef_search = ef_search if ef_search is not None else tier["ef_search"]
+        probes = probes if probes is not None else tier["probes"]
+    
+    if ef_search is not None and ef_search < 1:
+        raise ValueError("ef_search must be >= 1")
+    if probes is not None and probes < 1:
+        raise ValueError("probes must be >= 1")
+    
+    params = {
+        "query_embedding": query_embedding,
+        "match_count": top_k,
+        "similarity_threshold": distance_threshold
+    }
+    function_name = SEMANTIC_SEARCH_FUNCTIONS[embedding_dim]
+    
+    if ef_search is not None or probes is not None:
+        function_name = SEMANTIC_SEARCH_TUNED_FUNCTIONS[embedding_dim]
+        if ef_search is not None:
+            params["ef_search"] = ef_search
+        if probes is not None:
+            params["probes"] = probes
+    
     try:
-        client = get_supabase()
+        local_index = get_local_vector_index()
         
-        # Use RPC function for pgvector similarity search
-        # This is much faster than client-side filtering
-        response = client.rpc(
-            "semantic_search_chunks",
-            {
-                "query_embedding": query_embedding,
-                "match_count": top_k,
-                "similarity_threshold": distance_threshold
-            }
-        ).execute()
+        if local_index is not None and local_index.is_ready(embedding_dim):
+            # In-process exact search over memory-mapped embeddings (no DB round trip)
+            chunks = local_index.search(query_embedding, top_k, distance_threshold)
+        else:
+            client = get_supabase()
+            
+            # Use RPC function for pgvector similarity search
+            # This is much faster than client-side filtering
+            # (direct asyncpg pool with binary vector if DATABASE_BACKEND=asyncpg)
+            chunks = await execute_rpc(client, function_name, params)
         
-        if not response.data:
+        if not chunks:
             logger.warning("No chunks found by semantic search")
             raise NoRelevantActsError("No relevant legal act chunks found")
         
-        chunks = response.data
-        
         # Transform RPC response to expected format
-        results = []
-        for chunk in chunks:
-            result = {
-                "id": chunk["id"],
-                "legal_act_id": chunk["legal_act_id"],
-                "chunk_index": chunk["chunk_index"],
-                "content": chunk["content"],
-                "metadata": chunk.get("metadata"),
-                "distance": chunk["distance"],
-                # Nested legal_act structure for compatibility
-                "legal_act": {
-                    "id": chunk["legal_act_id"],
-                    "title": chunk["act_title"],
-                    "publisher": chunk["act_publisher"],
-                    "year": chunk["act_year"],
-                    "position": chunk["act_position"],
-                    "status": chunk["act_status"]
-                }
-            }
-            results.append(result)
+        results = [_chunk_from_row(chunk) for chunk in chunks]
         
-        if len(results) < MIN_RESULTS_REQUIRED:
-            logger.warning(
-                f"Insufficient relevant chunks found: {len(results)} < {MIN_RESULTS_REQUIRED}"
-            )
-            raise NoRelevantActsError(
-                f"Only {len(results)} relevant chunks found. "
-                f"Query may be outside scope of available legal acts."
-            )
+        _require_min_results(results)
         
         logger.info(
             f"Semantic search found {len(results)} chunks "
-            f"(top_k={top_k}, threshold={distance_threshold})"
+            f"(top_k={top_k}, threshold={distance_threshold}, "
+            f"ef_search={ef_search}, probes={probes})"
         )
         
         return results
@@ -204,6 +312,124 @@ async def semantic_search_with_query(
     )
 
 
+# =========================================================================
+# HYBRID SEARCH (SEMANTIC + KEYWORD)
+# =========================================================================
+
+async def hybrid_search(
+    query_embedding: List[float],
+    query_text: str,
+    top_k: int = DEFAULT_TOP_K,
+    semantic_weight: float = DEFAULT_SEMANTIC_WEIGHT,
+    keyword_weight: float = DEFAULT_KEYWORD_WEIGHT,
+    rrf_k: int = DEFAULT_RRF_K,
+    candidate_count: int = DEFAULT_CANDIDATE_COUNT,
+    distance_threshold: float = 2.0
+) -> List[Dict[str, Any]]:
+    """
+    Hybrid retrieval: vector top-k and full-text top-k fused server-side.
+    
+    Calls hybrid_search_chunks RPC (hybrid_search_chunks_768 for 768-dim
+    embeddings), which ranks chunks by cosine distance
+    and by keyword match (content_tsvector) in one round trip and combines
+    both rankings with weighted reciprocal rank fusion:
+    
+        rrf_score = semantic_weight / (rrf_k + semantic_rank)
+                  + keyword_weight / (rrf_k + keyword_rank)
+    
+    Catches questions citing article numbers or exact statute names that
+    pure vector search misses.
+    
+    Args:
+        query_embedding: Query embedding vector (768 or 1024-dim)
+        query_text: Raw question text (used for keyword matching)
+        top_k: Number of fused results to return
+        semantic_weight: Weight of the vector ranking (>= 0)
+        keyword_weight: Weight of the keyword ranking (>= 0)
+        rrf_k: Fusion damping constant (higher = flatter rank contribution)
+        candidate_count: Candidates taken from each ranking before fusion
+        distance_threshold: Max cosine distance for vector candidates (0-2)
+    
+    Returns:
+        List[Dict]: Chunks in semantic_search() format, ordered by fused score,
+            with additional keys: rrf_score, semantic_rank, keyword_rank
+    
+    Raises:
+        NoRelevantActsError: If too few chunks found
+        ValueError: If parameters invalid
+        RuntimeError: If search operation fails
+    
+    Example:
+        ```python
+        embedding = await generate_embedding(question)
+        chunks = await hybrid_search(embedding, question, top_k=8, keyword_weight=1.5)
+        ```
+    """
+    # Validation
+    embedding_dim = _embedding_dimension(query_embedding)
+    
+    if top_k < 1:
+        raise ValueError("top_k must be >= 1")
+    if semantic_weight < 0 or keyword_weight < 0:
+        raise ValueError("weights must be >= 0")
+    if rrf_k < 1:
+        raise ValueError("rrf_k must be >= 1")
+    if candidate_count < top_k:
+        raise ValueError("candidate_count must be >= top_k")
+    if not (0 <= distance_threshold <= 2):
+        raise ValueError("distance_threshold must be 0-2")
+    
+    try:
+        client = get_supabase()
+        
+        rows = await execute_rpc(
+            client,
+            HYBRID_SEARCH_FUNCTIONS[embedding_dim],
+            {
+                "query_embedding": query_embedding,
+                "query_text": query_text,
+                "match_count": top_k,
+                "semantic_weight": semantic_weight,
+                "keyword_weight": keyword_weight,
+                "rrf_k": rrf_k,
+                "candidate_count": candidate_count,
+                "similarity_threshold": distance_threshold
+            }
+        )
+        
+        if not rows:
+            logger.warning("No chunks found by hybrid search")
+            raise NoRelevantActsError("No relevant legal act chunks found")
+        
+        results = []
+        for row in rows:
+            result = _chunk_from_row(row)
+            result["rrf_score"] = row.get("rrf_score")
+            result["semantic_rank"] = row.get("semantic_rank")
+            result["keyword_rank"] = row.get("keyword_rank")
+            results.append(result)
+        
+        _require_min_results(results)
+        
+        keyword_hits = sum(1 for r in results if r["keyword_rank"] is not None)
+        logger.info(
+            f"Hybrid search found {len(results)} chunks "
+            f"({keyword_hits} with keyword match, top_k={top_k}, "
+            f"weights={semantic_weight}/{keyword_weight})"
+        )
+        
+        return results
+    
+    except NoRelevantActsError:
+        raise  # Re-raise domain errors
+    except APIError as e:
+        logger.error(f"Database error in hybrid search: {e}")
+        raise RuntimeError(f"Hybrid search failed: {e}")
+    except Exception as e:
+        logger.error(f"Unexpected error in hybrid search: {e}")
+        raise RuntimeError(f"Hybrid search failed: {e}")
+
+
 # =========================================================================
 # RELATED ACTS GRAPH TRAVERSAL
 # =========================================================================
@@ -214,9 +440,10 @@ async def fetch_related_acts(
     relation_types: Optional[List[str]] = None
 ) -> List[Dict[str, Any]]:
     """
-    Fetch related legal acts using graph traversal RPC.
+    Fetch related legal acts using graph traversal.
     
-    Uses recursive CTE in database to find acts related to seed acts
+    Served from the in-memory relation graph if loaded; otherwise uses
+    recursive CTE RPC in database to find acts related to seed acts
     up to specified depth with cycle detection.
     
     Args:
@@ -261,6 +488,15 @@ async def fetch_related_acts(
         if not all(rt in valid_types for rt in relation_types):
             raise ValueError(f"Invalid relation_types. Must be in {valid_types}")
     
+    graph = await get_relation_graph_service().get_graph()
+    if graph is not None:
+        results = graph.related_acts(act_ids, depth, relation_types)
+        logger.info(
+            f"Found {len(results)} related acts for {len(act_ids)} seed acts "
+            f"(depth={depth}, in-memory graph)"
+        )
+        return results
+    
     try:
         client = get_supabase()
         
@@ -274,9 +510,7 @@ async def fetch_related_acts(
         if relation_types:
             rpc_params["relation_types"] = relation_types
         
-        response = client.rpc("fetch_related_acts", rpc_params).execute()
-        
-        related_acts = response.data or []
+        related_acts = await execute_rpc(client, "fetch_related_acts", rpc_params) or []
         
         # Transform RPC response to expected format
         results = []
@@ -142,13 +142,13 @@ def mock_supabase_client():
     mock_table.single.return_value = mock_table
     mock_table.limit.return_value = mock_table
     mock_table.order.return_value = mock_table
-    mock_table.execute.return_value = MagicMock(data=[], count=0)
+    mock_table.execute = AsyncMock(return_value=MagicMock(data=[], count=0))
     
     mock_client.table.return_value = mock_table
     
     # Mock RPC
     mock_rpc = MagicMock()
-    mock_rpc.execute.return_value = MagicMock(data=True)
+    mock_rpc.execute = AsyncMock(return_value=MagicMock(data=True))
     mock_client.rpc.return_value = mock_rpc
     
     with patch('backend.db.supabase_client.SupabaseClient.get_client', return_value=mock_client):
@@ -357,6 +357,48 @@ def reset_rate_limiter():
     in_memory_limiter.requests.clear()
 
 
+@pytest.fixture(autouse=True)
+def reset_embedding_cache():
+    """
+    Reset in-process embedding cache between tests.
+    
+    Autouse: applies to all tests automatically.
+    """
+    from backend.services.embedding_cache import get_embedding_cache
+    
+    get_embedding_cache().clear()
+    
+    yield
+    
+    get_embedding_cache().clear()
+
+
+@pytest.fixture(autouse=True)
+def disable_relation_graph():
+    """
+    Serve related acts from (mocked) database queries, not the in-memory graph.
+    
+    Autouse: applies to all tests automatically. Graph tests enable it explicitly.
+    """
+    from backend.config import settings
+    
+    with patch.object(settings, 'relation_graph_enabled', False):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def reset_generation_leases():
+    """
+    Give each test fresh in-process generation leases.
+
+    Autouse: applies to all tests automatically.
+    """
+    from backend.services.generation_leases import GenerationLeases
+
+    with patch('backend.services.generation_leases._generation_leases', GenerationLeases()):
+        yield
+
+
 # =========================================================================
 # PYTEST CONFIGURATION
 # =========================================================================
@@ -26,6 +26,9 @@ backend_dir = Path(__file__).parent.parent.parent
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
+import httpx
+from supabase import create_client, ClientOptions
+
 from backend.db.supabase_client import SupabaseClient
 from backend.db.queries import (
     create_query,
@@ -70,10 +73,18 @@ def real_supabase_client():
         )
     
     # Reset SupabaseClient instance to force re-initialization with new config
+    # (repository functions use the pooled async client)
     SupabaseClient._instance = None
+    SupabaseClient._http_client = None
     
     try:
-        client = SupabaseClient.get_client()
+        # Synchronous client for direct test setup/verification queries
+        verify_ssl = os.getenv("SUPABASE_VERIFY_SSL", "true").lower() != "false"
+        client = create_client(
+            supabase_url,
+            supabase_key,
+            options=ClientOptions(httpx_client=httpx.Client(verify=verify_ssl, timeout=30.0))
+        )
         # Test connection by trying a simple query
         # Note: For self-signed certificates, we may need to disable SSL verification
         # This is acceptable for local/development environments
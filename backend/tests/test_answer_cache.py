@@ -0,0 +1,196 @@
+"""
+PrawnikGPT Backend - Semantic Answer Cache Tests
+
+Unit tests for the semantic answer cache:
+- Similarity and chunk-overlap matching
+- Invalidation (changed chunk content, explicit, TTL, model change,
+  changed legal acts and deleted chunks in the database)
+- Integration with process_query_fast() (generation skipped on hit)
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+pytest.importorskip("numpy")
+
+from backend.services.answer_cache import AnswerCacheInvalidator, SemanticAnswerCache, chunk_overlap
+from backend.services.rag_pipeline import process_query_fast
+
+
+# =========================================================================
+# FIXTURES
+# =========================================================================
+
+MODEL = "mistral:7b"
+
+
+def make_chunks(ids, content="Art. 27. Konsument ma prawo odstąpić od umowy"):
+    """Build retrieved chunks with given IDs."""
+    return [
+        {"id": chunk_id, "legal_act_id": "act-1", "chunk_index": i, "content": content}
+        for i, chunk_id in enumerate(ids)
+    ]
+
+
+@pytest.fixture
+def cache():
+    """Answer cache with strict thresholds."""
+    return SemanticAnswerCache(max_size=10, ttl=3600, similarity_threshold=0.95, min_chunk_overlap=0.8)
+
+
+@pytest.fixture
+def stored(cache):
+    """Cache with one answer for embedding [1, 0, 0, 0] and chunks c1-c5."""
+    cache.store("q1", [1.0, 0.0, 0.0, 0.0], make_chunks(["c1", "c2", "c3", "c4", "c5"]),
+                "Tak, w ciągu 14 dni.", MODEL, 9000)
+    return cache
+
+
+# =========================================================================
+# MATCHING TESTS
+# =========================================================================
+
+class TestAnswerCacheMatching:
+    """Tests for lookup() matching rules."""
+
+    def test_near_duplicate_hit(self, stored):
+        """Test that a near-identical question with the same chunks hits."""
+        hit = stored.lookup([0.99, 0.05, 0.0, 0.0], make_chunks(["c1", "c2", "c3", "c4", "c5"]), MODEL)
+
+        assert hit["content"] == "Tak, w ciągu 14 dni."
+        assert hit["source_query_id"] == "q1"
+        assert hit["similarity"] > 0.95
+        assert stored.get_stats()["hits"] == 1
+        assert stored.get_stats()["generation_ms_saved"] == 9000
+
+    def test_dissimilar_question_misses(self, stored):
+        """Test that embeddings below the threshold miss."""
+        assert stored.lookup([0.0, 1.0, 0.0, 0.0], make_chunks(["c1", "c2", "c3", "c4", "c5"]), MODEL) is None
+        assert stored.get_stats()["misses"] == 1
+
+    def test_low_chunk_overlap_misses(self, stored):
+        """Test that similar questions grounded in other chunks miss."""
+        assert stored.lookup([1.0, 0.0, 0.0, 0.0], make_chunks(["c1", "c2", "x3", "x4", "x5"]), MODEL) is None
+
+    def test_other_model_misses(self, stored):
+        """Test that answers of another fast model are not reused."""
+        assert stored.lookup([1.0, 0.0, 0.0, 0.0], make_chunks(["c1", "c2", "c3", "c4", "c5"]), "llama3:8b") is None
+
+    def test_chunk_overlap(self):
+        """Test Jaccard overlap of chunk-ID sets."""
+        assert chunk_overlap({"a", "b"}, {"a", "b"}) == 1.0
+        assert chunk_overlap({"a", "b"}, {"b", "c"}) == pytest.approx(1 / 3)
+        assert chunk_overlap(set(), {"a"}) == 0.0
+
+
+# =========================================================================
+# INVALIDATION TESTS
+# =========================================================================
+
+class TestAnswerCacheInvalidation:
+    """Tests for stale entry detection and explicit invalidation."""
+
+    def test_changed_chunk_content_is_stale(self, stored):
+        """Test that an edited chunk drops the entry."""
+        chunks = make_chunks(["c1", "c2", "c3", "c4", "c5"])
+        chunks[2]["content"] = "Art. 27. (uchylony)"
+
+        assert stored.lookup([1.0, 0.0, 0.0, 0.0], chunks, MODEL) is None
+        assert stored.get_stats()["stale_evictions"] == 1
+        assert stored.get_stats()["size"] == 0
+
+    def test_invalidate_chunks(self, stored):
+        """Test dropping entries built on given chunks."""
+        assert stored.invalidate_chunks(["other"]) == 0
+        assert stored.invalidate_chunks(["c3"]) == 1
+        assert stored.lookup([1.0, 0.0, 0.0, 0.0], make_chunks(["c1", "c2", "c3", "c4", "c5"]), MODEL) is None
+
+    def test_invalidate_acts(self, stored):
+        """Test dropping entries built on chunks of given acts."""
+        assert stored.invalidate_acts(["act-1"]) == 1
+        assert stored.get_stats()["invalidated"] == 1
+
+    def test_expired_entry_misses(self, stored):
+        """Test that entries older than ttl are dropped."""
+        stored.ttl = 0
+        assert stored.lookup([1.0, 0.0, 0.0, 0.0], make_chunks(["c1", "c2", "c3", "c4", "c5"]), MODEL) is None
+        assert stored.get_stats()["size"] == 0
+
+    def test_lru_eviction(self, cache):
+        """Test that the oldest entry is evicted beyond max_size."""
+        cache.max_size = 2
+        for i in range(3):
+            embedding = [0.0] * 4
+            embedding[i] = 1.0
+            cache.store(f"q{i}", embedding, make_chunks([f"c{i}"]), "odpowiedź", MODEL, 1000)
+
+        assert cache.get_stats()["size"] == 2
+        assert cache.lookup([1.0, 0.0, 0.0, 0.0], make_chunks(["c0"]), MODEL) is None
+        assert cache.lookup([0.0, 0.0, 1.0, 0.0], make_chunks(["c2"]), MODEL) is not None
+
+    @pytest.mark.asyncio
+    async def test_updated_act_invalidates(self, stored):
+        """Test that answers built on a legal act updated since the last check are dropped."""
+        invalidator = AnswerCacheInvalidator(stored)
+        invalidator._fetch_chunk_count = AsyncMock(return_value=5)
+        invalidator._fetch_changed_acts = AsyncMock(side_effect=[
+            [{"id": "act-9", "updated_at": "2025-12-01T10:00:00+00:00"}],
+            [],
+            [{"id": "act-1", "updated_at": "2025-12-02T10:00:00+00:00"}]
+        ])
+
+        assert await invalidator.check() == 0  # First check records state only
+        assert await invalidator.check() == 0
+        assert await invalidator.check() == 1
+
+        invalidator._fetch_changed_acts.assert_awaited_with("2025-12-01T10:00:00+00:00")
+        assert stored.get_stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_deleted_chunks_invalidate(self, stored):
+        """Test that answers built on chunks deleted from the database are dropped."""
+        invalidator = AnswerCacheInvalidator(stored)
+        invalidator._fetch_changed_acts = AsyncMock(return_value=[])
+        invalidator._fetch_chunk_count = AsyncMock(side_effect=[100, 100, 99])
+        invalidator._fetch_existing_chunks = AsyncMock(return_value={"c1", "c2", "c4", "c5"})
+
+        assert await invalidator.check() == 0
+        assert await invalidator.check() == 0
+        invalidator._fetch_existing_chunks.assert_not_awaited()
+
+        assert await invalidator.check() == 1
+        invalidator._fetch_existing_chunks.assert_awaited_once_with(["c1", "c2", "c3", "c4", "c5"])
+
+
+# =========================================================================
+# PIPELINE INTEGRATION TESTS
+# =========================================================================
+
+class TestProcessQueryFastAnswerCache:
+    """Tests for the answer cache in process_query_fast()."""
+
+    @pytest.mark.asyncio
+    async def test_second_near_duplicate_skips_generation(self, cache):
+        """Test that the fast response is generated once and copied to the second query."""
+        chunks = make_chunks(["c1", "c2", "c3"])
+        embeddings = iter([[1.0, 0.0, 0.0, 0.0], [0.99, 0.05, 0.0, 0.0]])
+        generate = AsyncMock(return_value=("Tak, w ciągu 14 dni.", 9000))
+        update = AsyncMock()
+
+        with patch('backend.services.rag_pipeline.get_answer_cache', return_value=cache), \
+             patch('backend.services.rag_pipeline.create_query', AsyncMock(side_effect=["q1", "q2"])), \
+             patch('backend.services.rag_pipeline.generate_embedding', AsyncMock(side_effect=lambda text: next(embeddings))), \
+             patch('backend.services.rag_pipeline.retrieve_chunks', AsyncMock(return_value=chunks)), \
+             patch('backend.services.rag_pipeline.fetch_related_acts', AsyncMock(return_value=[])), \
+             patch('backend.services.rag_pipeline.generate_text_fast', generate), \
+             patch('backend.services.rag_pipeline.update_query_fast_response', update), \
+             patch('backend.services.rag_pipeline.cache_rag_context', AsyncMock()):
+            first = await process_query_fast("user-1", "Czy mogę odstąpić od umowy?")
+            second = await process_query_fast("user-2", "Czy mogę odstąpić od umowy zawartej online?")
+
+        assert generate.await_count == 1
+        assert second["content"] == first["content"]
+        assert second["query_id"] == "q2"
+        assert second["generation_time_ms"] < 9000
+        assert update.await_args_list[1].kwargs["query_id"] == "q2"
+        assert update.await_args_list[1].kwargs["content"] == "Tak, w ciągu 14 dni."
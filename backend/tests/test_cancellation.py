@@ -0,0 +1,325 @@
+"""
+PrawnikGPT Backend - Query Cancellation Tests
+
+Unit tests for cancelling abandoned generations:
+- Cancellation registry (run/cancel, tombstones, caller cancellation)
+- Cross-process cancellation through Redis
+- Scheduler slot release on cancel
+- Worker pool (cancelled jobs are acked, not retried)
+- SSE streams (deleted query, also before the first token; closing the pipeline)
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from backend.services.cancellation import CANCEL_KEY_PREFIX, CancellationRegistry
+from backend.services.exceptions import QueryCancelledError
+from backend.services.job_queue import InMemoryJobQueue
+from backend.services.job_worker import JobWorkerPool
+from backend.services.llm_scheduler import LLMScheduler
+from backend.services.rag_pipeline import RAGMetrics
+
+
+# =========================================================================
+# HELPERS
+# =========================================================================
+
+async def wait_until(condition, attempts=100):
+    """Poll condition every 10ms."""
+    for _ in range(attempts):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+
+
+# =========================================================================
+# REGISTRY TESTS
+# =========================================================================
+
+class TestCancellationRegistry:
+    """Tests for CancellationRegistry."""
+
+    @pytest.mark.asyncio
+    async def test_run_returns_result(self):
+        """Test that uncancelled work completes normally and is unregistered."""
+        registry = CancellationRegistry()
+
+        async def work():
+            return "answer"
+
+        assert await registry.run("query-1", work()) == "answer"
+        assert registry.get_stats()["running_queries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancel_aborts_running_work(self):
+        """Test that cancel() interrupts the task and run() raises QueryCancelledError."""
+        registry = CancellationRegistry()
+        started = asyncio.Event()
+        aborted = asyncio.Event()
+
+        async def generation():
+            started.set()
+            try:
+                await asyncio.sleep(240)
+            finally:
+                aborted.set()  # e.g. httpx request closed
+
+        task = asyncio.create_task(registry.run("query-1", generation()))
+        await started.wait()
+
+        assert await registry.cancel("query-1", reason="deleted") == 1
+        with pytest.raises(QueryCancelledError):
+            await task
+
+        assert aborted.is_set()
+        assert registry.reason("query-1") == "deleted"
+        assert registry.get_stats() == {"running_queries": 0, "cancelled_tasks": 1}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_query_is_skipped(self):
+        """Test that work started after cancel() never runs (queued jobs)."""
+        registry = CancellationRegistry()
+        ran = False
+
+        async def generation():
+            nonlocal ran
+            ran = True
+
+        await registry.cancel("query-1", reason="deleted")
+        with pytest.raises(QueryCancelledError):
+            await registry.run("query-1", generation())
+
+        assert not ran
+        assert await registry.run("query-2", generation()) is None
+
+    @pytest.mark.asyncio
+    async def test_caller_cancellation_propagates(self):
+        """Test that cancelling the caller (shutdown) is not reported as query cancellation."""
+        registry = CancellationRegistry()
+        started = asyncio.Event()
+
+        async def generation():
+            started.set()
+            await asyncio.sleep(240)
+
+        task = asyncio.create_task(registry.run("query-1", generation()))
+        await started.wait()
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not registry.is_cancelled("query-1")
+
+    @pytest.mark.asyncio
+    async def test_cancel_releases_scheduler_slot(self):
+        """Test that a cancelled generation frees its model slot for queued requests."""
+        registry = CancellationRegistry()
+        scheduler = LLMScheduler({"gpt-oss:120b": 1}, adaptive=False)
+        holding = asyncio.Event()
+
+        async def generation():
+            async with scheduler.slot("gpt-oss:120b", "accurate"):
+                holding.set()
+                await asyncio.sleep(240)
+
+        task = asyncio.create_task(registry.run("query-1", generation()))
+        await holding.wait()
+        await registry.cancel("query-1")
+        with pytest.raises(QueryCancelledError):
+            await task
+
+        async with asyncio.timeout(1):
+            async with scheduler.slot("gpt-oss:120b", "accurate"):
+                pass
+
+
+# =========================================================================
+# CROSS-PROCESS TESTS
+# =========================================================================
+
+class TestRedisCancellation:
+    """Tests for cancellation through Redis tombstones."""
+
+    @pytest.mark.asyncio
+    async def test_cancel_publishes_tombstone(self):
+        """Test that cancel() stores the reason in Redis with a TTL."""
+        client = AsyncMock()
+        registry = CancellationRegistry(client)
+
+        await registry.cancel("query-1", reason="deleted")
+
+        client.set.assert_awaited_once()
+        args, kwargs = client.set.call_args
+        assert args == (f"{CANCEL_KEY_PREFIX}:query-1", "deleted")
+        assert kwargs["ex"] > 0
+
+    @pytest.mark.asyncio
+    async def test_remote_cancel_stops_local_work(self):
+        """Test that a tombstone set by another process cancels running work."""
+        client = AsyncMock()
+        client.get.return_value = None
+        client.mget.return_value = [b"deleted"]
+        registry = CancellationRegistry(client, poll_interval=0.01)
+
+        async def generation():
+            await asyncio.sleep(240)
+
+        with pytest.raises(QueryCancelledError):
+            await asyncio.wait_for(registry.run("query-1", generation()), timeout=1)
+
+        assert registry.reason("query-1") == "deleted"
+
+    @pytest.mark.asyncio
+    async def test_remote_tombstone_skips_queued_work(self):
+        """Test that run() checks Redis before starting."""
+        client = AsyncMock()
+        client.get.return_value = b"deleted"
+        registry = CancellationRegistry(client)
+
+        async def generation():
+            raise AssertionError("must not run")
+
+        with pytest.raises(QueryCancelledError):
+            await registry.run("query-1", generation())
+
+
+# =========================================================================
+# WORKER TESTS
+# =========================================================================
+
+class TestCancelledJobs:
+    """Tests for cancelled generation jobs."""
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_is_acked(self):
+        """Test that a job of a deleted query is aborted, acked and counted."""
+        queue = InMemoryJobQueue(max_attempts=2)
+        registry = CancellationRegistry()
+        metrics = RAGMetrics()
+        started = asyncio.Event()
+
+        async def slow_accurate(**kwargs):
+            started.set()
+            await asyncio.sleep(240)
+
+        with patch('backend.services.job_worker.process_query_accurate', side_effect=slow_accurate), \
+             patch('backend.services.job_worker.get_cancellation_registry', return_value=registry), \
+             patch('backend.services.job_worker.get_rag_metrics', return_value=metrics), \
+             patch('backend.services.job_worker.RESERVE_TIMEOUT', 0.01):
+            pool = JobWorkerPool(queue, concurrency={"fast": 0, "accurate": 1}, name="test")
+            await pool.start()
+            await queue.enqueue("accurate", {"query_id": "query-1", "query_text": "Pytanie"})
+            await started.wait()
+
+            await registry.cancel("query-1", reason="deleted")
+            await wait_until(lambda: pool.cancelled)
+            await pool.stop(timeout=1)
+
+        assert pool.get_stats()["cancelled"] == 1
+        assert pool.failed == 0
+        assert queue.completed == 1
+        assert (await queue.depth())["accurate"] == {"waiting": 0, "running": 0}
+        assert metrics.cancel_count["accurate"] == 1
+        assert metrics.cancel_reasons["deleted"] == 1
+
+
+# =========================================================================
+# STREAM TESTS
+# =========================================================================
+
+class TestStreamCancellation:
+    """Tests for cancellation of SSE streams."""
+
+    @pytest.mark.asyncio
+    async def test_deleted_query_ends_stream(self):
+        """Test that deleting the query stops the stream and closes the pipeline."""
+        from backend.routers.queries import _sse_events
+
+        registry = CancellationRegistry()
+        metrics = RAGMetrics()
+        closed = asyncio.Event()
+
+        async def pipeline():
+            try:
+                for i in range(100):
+                    yield {"event": "token", "data": {"text": f"t{i}"}}
+                    await asyncio.sleep(0)
+            finally:
+                closed.set()
+
+        with patch('backend.routers.queries.get_cancellation_registry', return_value=registry), \
+             patch('backend.routers.queries.get_rag_metrics', return_value=metrics):
+            messages = []
+            async for message in _sse_events(pipeline(), "query-1", "accurate"):
+                messages.append(message)
+                if len(messages) == 2:
+                    await registry.cancel("query-1", reason="deleted")
+
+        assert len(messages) == 3
+        assert messages[-1].startswith("event: error")
+        assert "GONE" in messages[-1]
+        assert closed.is_set()
+        assert metrics.cancel_count["accurate"] == 1
+        assert registry.get_stats()["running_queries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_delete_interrupts_stream_before_first_token(self):
+        """Test that deleting the query stops a stream still waiting for Ollama."""
+        from backend.routers.queries import _sse_events
+
+        registry = CancellationRegistry()
+        metrics = RAGMetrics()
+        started = asyncio.Event()
+        closed = asyncio.Event()
+
+        async def pipeline():
+            started.set()
+            try:
+                await asyncio.sleep(240)  # waiting for the first token
+                yield {"event": "token", "data": {"text": "t"}}
+            finally:
+                closed.set()
+
+        async def consume():
+            return [message async for message in _sse_events(pipeline(), "query-1", "fast")]
+
+        with patch('backend.routers.queries.get_cancellation_registry', return_value=registry), \
+             patch('backend.routers.queries.get_rag_metrics', return_value=metrics):
+            stream = asyncio.create_task(consume())
+            await started.wait()
+
+            assert await registry.cancel("query-1", reason="deleted") == 1
+            messages = await asyncio.wait_for(stream, timeout=1)
+
+        assert len(messages) == 1
+        assert "GONE" in messages[0]
+        assert closed.is_set()
+        assert not stream.cancelled()
+        assert metrics.cancel_reasons["deleted"] == 1
+        assert registry.get_stats()["running_queries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_disconnect_closes_pipeline(self):
+        """Test that closing the SSE stream (client gone) closes the pipeline."""
+        from backend.routers.queries import _sse_events
+
+        registry = CancellationRegistry()
+        metrics = RAGMetrics()
+        closed = asyncio.Event()
+
+        async def pipeline():
+            try:
+                while True:
+                    yield {"event": "token", "data": {"text": "t"}}
+            finally:
+                closed.set()
+
+        with patch('backend.routers.queries.get_cancellation_registry', return_value=registry), \
+             patch('backend.routers.queries.get_rag_metrics', return_value=metrics):
+            stream = _sse_events(pipeline(), "query-1", "fast")
+            await stream.__anext__()
+            await stream.aclose()
+
+        assert closed.is_set()
+        assert metrics.cancel_reasons["disconnected"] == 1
@@ -0,0 +1,226 @@
+"""
+PrawnikGPT Backend - Context Packer Tests
+
+Unit tests for packing RAG context into the model's token budget:
+- Token estimation (calibration from prompt_eval_count)
+- Ranking (distance, RRF score)
+- Near-duplicate removal
+- Budget (whole chunks, oversized top chunk, related acts)
+- Merging adjacent fragments of the same act
+- Manifest
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.services.context_packer import (
+    DEFAULT_CHARS_PER_TOKEN,
+    TokenEstimator,
+    pack_context,
+)
+from backend.services.llm_service import build_legal_context
+
+
+MODEL = "mistral:7b"
+
+
+# =========================================================================
+# HELPERS
+# =========================================================================
+
+def chunk(chunk_id, act_id, index, content, distance=0.1, **extra):
+    """Chunk as returned by retrieve_chunks()."""
+    return {
+        "id": chunk_id,
+        "legal_act_id": act_id,
+        "chunk_index": index,
+        "content": content,
+        "distance": distance,
+        "legal_act": {"id": act_id, "title": f"Ustawa {act_id}"},
+        **extra
+    }
+
+
+def words(prefix, count=40):
+    """Distinct text of count words."""
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+@pytest.fixture(autouse=True)
+def estimator():
+    """Fresh token estimator with the default ratio."""
+    instance = TokenEstimator()
+    with patch('backend.services.context_packer._token_estimator', instance):
+        yield instance
+
+
+# =========================================================================
+# TOKEN ESTIMATION TESTS
+# =========================================================================
+
+class TestTokenEstimator:
+    """Tests for TokenEstimator."""
+
+    def test_default_ratio(self, estimator):
+        """Test that unobserved models use the default ratio (rounded up)."""
+        assert estimator.estimate("", MODEL) == 0
+        assert estimator.estimate("a" * 30, MODEL) == 30 / DEFAULT_CHARS_PER_TOKEN
+        assert estimator.estimate("a" * 31, MODEL) == 11
+
+    def test_observe_calibrates_model(self, estimator):
+        """Test that prompt_eval_count calibrates only the observed model."""
+        estimator.observe(MODEL, chars=4000, tokens=1000)
+
+        assert estimator.chars_per_token(MODEL) == 4.0
+        assert estimator.chars_per_token("gpt-oss:120b") == DEFAULT_CHARS_PER_TOKEN
+        assert estimator.estimate("a" * 400, MODEL) == 100
+
+        estimator.observe(MODEL, chars=2000, tokens=1000)
+        assert 3.0 < estimator.chars_per_token(MODEL) < 4.0
+        assert estimator.get_stats()["models"][MODEL]["observations"] == 2
+
+    def test_implausible_observations_ignored(self, estimator):
+        """Test that short prompts, missing counts and outliers (prompt cache) are ignored."""
+        estimator.observe(MODEL, chars=100, tokens=20)
+        estimator.observe(MODEL, chars=4000, tokens=None)
+        estimator.observe(MODEL, chars=40000, tokens=100)
+
+        assert estimator.chars_per_token(MODEL) == DEFAULT_CHARS_PER_TOKEN
+
+    @pytest.mark.asyncio
+    async def test_ollama_generation_feeds_estimator(self, estimator):
+        """Test that OllamaService reports prompt_eval_count of each generation."""
+        from backend.services.ollama_service import OllamaService
+
+        service = OllamaService(base_url="http://localhost:11434", max_retries=0)
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"response": "Odpowiedź", "prompt_eval_count": 1000}
+        client = AsyncMock()
+        client.post = AsyncMock(return_value=response)
+
+        with patch.object(service, 'validate_model', return_value=True), \
+             patch.object(service, '_get_client', return_value=client):
+            await service.generate_text(prompt="p" * 3500, model=MODEL, system_prompt="s" * 500, timeout=15)
+
+        assert estimator.chars_per_token(MODEL) == 4.0
+
+
+# =========================================================================
+# PACKING TESTS
+# =========================================================================
+
+class TestPackContext:
+    """Tests for pack_context()."""
+
+    def test_same_layout_as_build_legal_context(self):
+        """Test that a context within budget matches the legacy layout."""
+        chunks = [
+            chunk("c1", "act-1", 0, "Art. 1. Treść."),
+            chunk("c2", "act-2", 4, "Art. 5. Inna treść.", distance=0.2),
+        ]
+        related = [{"title": "Kodeks cywilny"}]
+
+        packed = pack_context(chunks, related, MODEL, budget_tokens=1000)
+
+        assert packed["text"] == build_legal_context(chunks, related)
+
+    def test_ranked_by_distance_and_rrf(self):
+        """Test that the best chunks are kept when the budget is tight."""
+        chunks = [
+            chunk("far", "act-1", 0, words("a"), distance=0.5),
+            chunk("near", "act-2", 0, words("b"), distance=0.1),
+        ]
+        packed = pack_context(chunks, [], MODEL, budget_tokens=80)
+        assert [c["id"] for c in packed["chunks"]] == ["near"]
+        assert packed["dropped"]["over_budget"] == ["far"]
+
+        chunks[0]["rrf_score"], chunks[1]["rrf_score"] = 0.03, 0.01
+        packed = pack_context(chunks, [], MODEL, budget_tokens=80)
+        assert [c["id"] for c in packed["chunks"]] == ["far"]
+
+    def test_near_duplicates_dropped(self):
+        """Test that near-identical chunks (e.g. amended copies) are packed once."""
+        text = words("w", 60)
+        chunks = [
+            chunk("c1", "act-1", 0, text),
+            chunk("c2", "act-2", 0, text + " zmiana", distance=0.2),
+            chunk("c3", "act-3", 0, words("x"), distance=0.3),
+        ]
+
+        packed = pack_context(chunks, [], MODEL, budget_tokens=10000)
+
+        assert [c["id"] for c in packed["chunks"]] == ["c1", "c3"]
+        assert packed["dropped"]["duplicate"] == ["c2"]
+
+    def test_whole_chunks_within_budget(self):
+        """Test that chunks are never cut while a smaller chunk still fits."""
+        chunks = [
+            chunk("c1", "act-1", 0, words("a", 100)),
+            chunk("c2", "act-1", 5, words("b", 400), distance=0.2),
+            chunk("c3", "act-1", 9, words("c", 20), distance=0.3),
+        ]
+
+        packed = pack_context(chunks, [], MODEL, budget_tokens=400)
+
+        assert [c["id"] for c in packed["chunks"]] == ["c1", "c3"]
+        assert packed["dropped"]["over_budget"] == ["c2"]
+        assert words("b", 400) not in packed["text"]
+        assert packed["tokens"] <= packed["budget"]
+
+    def test_oversized_top_chunk_truncated(self):
+        """Test that the best chunk is trimmed at a sentence if nothing else fits."""
+        content = ". ".join(words(f"s{i}_", 10) for i in range(50))
+        packed = pack_context([chunk("c1", "act-1", 0, content)], [], MODEL, budget_tokens=200)
+
+        assert packed["manifest"][0]["truncated"] is True
+        assert packed["tokens"] <= 200
+        assert packed["text"].rstrip().endswith(". [...]")
+
+    def test_adjacent_fragments_merged(self):
+        """Test that consecutive chunk_index fragments of an act share one header."""
+        chunks = [
+            chunk("c2", "act-1", 2, "Art. 3."),
+            chunk("c1", "act-1", 1, "Art. 2.", distance=0.2),
+            chunk("c9", "act-1", 7, "Art. 8.", distance=0.3),
+            chunk("x1", "act-2", 0, "Art. 1.", distance=0.15),
+        ]
+
+        packed = pack_context(chunks, [], MODEL, budget_tokens=1000)
+
+        text = packed["text"]
+        assert text.count("=== Ustawa act-1 ===") == 1
+        assert "[Fragmenty 2-3]\nArt. 2.\nArt. 3.\n" in text
+        assert "[Fragment 8]\nArt. 8.\n" in text
+        assert text.index("Ustawa act-1") < text.index("Ustawa act-2")
+
+    def test_related_acts_only_if_budget_allows(self):
+        """Test that related act titles are added with the remaining budget."""
+        chunks = [chunk("c1", "act-1", 0, words("a", 60))]
+        related = [{"title": words("t", 20)} for _ in range(5)]
+
+        full = pack_context(chunks, related, MODEL, budget_tokens=10000)
+        tight = pack_context(chunks, related, MODEL, budget_tokens=full["tokens"] - 60)
+
+        assert full["text"].count("\n- ") == 5
+        assert 0 < tight["text"].count("\n- ") < 5
+        assert tight["tokens"] <= tight["budget"]
+
+    def test_manifest_and_default_budget(self):
+        """Test the manifest and the budget derived from num_ctx and the prompt."""
+        chunks = [chunk("c1", "act-1", 3, "Art. 4. Treść.")]
+
+        with patch('backend.services.context_packer.settings') as mock_settings:
+            mock_settings.ollama_accurate_model = "gpt-oss:120b"
+            mock_settings.ollama_fast_num_ctx = 4096
+            mock_settings.context_response_reserve_tokens = 1024
+            mock_settings.context_duplicate_threshold = 0.9
+            packed = pack_context(chunks, [], MODEL, overhead_text="x" * 300)
+
+        assert packed["budget"] == 4096 - 100 - 1024
+        assert packed["manifest"] == [{
+            "chunk_id": "c1",
+            "legal_act_id": "act-1",
+            "chunk_index": 3,
+            "tokens": packed["manifest"][0]["tokens"],
+            "truncated": False
+        }]
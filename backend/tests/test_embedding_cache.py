@@ -0,0 +1,157 @@
+"""
+PrawnikGPT Backend - Embedding Cache Tests
+
+Unit tests for the two-tier embedding cache:
+- Key normalization
+- Float32 packing
+- LRU tier (hits, eviction)
+- Redis tier (promotion, error handling)
+- Integration with generate_embedding() compatibility function
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import redis
+
+from backend.services.embedding_cache import (
+    EmbeddingCache,
+    normalize_text,
+    make_cache_key,
+    pack_embedding,
+    unpack_embedding,
+    REDIS_KEY_PREFIX
+)
+from backend.services.ollama_service import generate_embedding
+
+
+# =========================================================================
+# FIXTURES
+# =========================================================================
+
+@pytest.fixture
+def sample_embedding():
+    """Sample embedding exactly representable in float32."""
+    return [0.5, -0.25, 1.0, 0.125]
+
+
+@pytest.fixture
+def mock_redis():
+    """Mock async Redis client with in-memory storage."""
+    storage = {}
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=lambda key: storage.get(key))
+    client.set = AsyncMock(side_effect=lambda key, value, ex=None: storage.__setitem__(key, value))
+    client.storage = storage
+    return client
+
+
+# =========================================================================
+# KEY AND SERIALIZATION TESTS
+# =========================================================================
+
+class TestKeys:
+    """Tests for normalization and key helpers."""
+
+    def test_normalize_whitespace_and_case(self):
+        """Test that whitespace and case variants normalize equally."""
+        assert normalize_text("  Jakie   mam\tPRAWA?\n") == "jakie mam prawa?"
+
+    def test_key_includes_model(self):
+        """Test that the same text under different models gets different keys."""
+        key_a = make_cache_key("Pytanie", "nomic-embed-text")
+        key_b = make_cache_key("Pytanie", "mxbai-embed-large")
+
+        assert key_a != key_b
+        assert key_a.startswith("nomic-embed-text:")
+        assert make_cache_key("  pytanie ", "nomic-embed-text") == key_a
+
+    def test_pack_roundtrip(self, sample_embedding):
+        """Test float32 packing roundtrip and size."""
+        data = pack_embedding(sample_embedding)
+
+        assert len(data) == 4 * len(sample_embedding)
+        assert unpack_embedding(data) == sample_embedding
+
+
+# =========================================================================
+# CACHE TIER TESTS
+# =========================================================================
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache tiers and counters."""
+
+    @pytest.mark.asyncio
+    async def test_memory_hit(self, sample_embedding):
+        """Test LRU hit after set."""
+        cache = EmbeddingCache(max_size=10)
+
+        assert await cache.get("Pytanie", "m") is None
+        await cache.set("Pytanie", "m", sample_embedding)
+
+        assert await cache.get("PYTANIE  ", "m") == sample_embedding
+        assert cache.get_stats()["memory_hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, sample_embedding):
+        """Test that least recently used entries are evicted."""
+        cache = EmbeddingCache(max_size=2)
+
+        await cache.set("a", "m", sample_embedding)
+        await cache.set("b", "m", sample_embedding)
+        await cache.get("a", "m")  # "a" is now most recent
+        await cache.set("c", "m", sample_embedding)
+
+        assert await cache.get("b", "m") is None
+        assert await cache.get("a", "m") is not None
+        assert cache.get_stats()["size"] == 2
+
+    @pytest.mark.asyncio
+    async def test_redis_hit_promoted_to_memory(self, sample_embedding, mock_redis):
+        """Test that Redis hits are stored as float32 bytes and promoted."""
+        writer = EmbeddingCache(max_size=10, redis_url="redis://test")
+        reader = EmbeddingCache(max_size=10, redis_url="redis://test")
+        writer._redis_client = mock_redis
+        reader._redis_client = mock_redis
+
+        await writer.set("Pytanie", "m", sample_embedding)
+        stored_key = f"{REDIS_KEY_PREFIX}:{make_cache_key('Pytanie', 'm')}"
+        assert mock_redis.storage[stored_key] == pack_embedding(sample_embedding)
+
+        assert await reader.get("Pytanie", "m") == sample_embedding
+        assert await reader.get("Pytanie", "m") == sample_embedding
+        assert reader.get_stats()["redis_hits"] == 1
+        assert reader.get_stats()["memory_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_error_is_miss(self, mock_redis):
+        """Test that Redis errors are treated as cache misses."""
+        cache = EmbeddingCache(max_size=10, redis_url="redis://test")
+        mock_redis.get = AsyncMock(side_effect=redis.exceptions.ConnectionError("down"))
+        cache._redis_client = mock_redis
+
+        assert await cache.get("Pytanie", "m") is None
+        assert cache.get_stats()["misses"] == 1
+
+
+# =========================================================================
+# COMPATIBILITY FUNCTION TESTS
+# =========================================================================
+
+class TestGenerateEmbeddingCached:
+    """Tests for cache in front of generate_embedding()."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_embedded_once(self, sample_embedding):
+        """Test that re-worded duplicates hit the cache."""
+        with patch('backend.services.ollama_service.get_ollama_service') as mock_get_service:
+            mock_service = MagicMock()
+            mock_service.generate_embedding = AsyncMock(return_value=sample_embedding)
+            mock_get_service.return_value = mock_service
+
+            first = await generate_embedding("Jakie mam prawa jako konsument?")
+            second = await generate_embedding("  jakie mam  prawa jako KONSUMENT? ")
+
+            assert first == second == sample_embedding
+            mock_service.generate_embedding.assert_called_once()
@@ -0,0 +1,123 @@
+"""
+PrawnikGPT Backend - Generation Lease Tests
+
+Unit tests for per-response generation leases:
+- In-process leases (exclusive, owner-checked release, expiry)
+- Redis leases (SET NX, compare-and-delete release, fail open on errors)
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import redis
+
+from backend.services.generation_leases import GenerationLeases
+
+
+# =========================================================================
+# FIXTURES
+# =========================================================================
+
+@pytest.fixture
+def redis_client():
+    """Mock async Redis client for lease commands."""
+    client = MagicMock()
+    client.set = AsyncMock(return_value=True)
+    client.get = AsyncMock(return_value=None)
+    client.release_lease = AsyncMock(return_value=1)
+    client.register_script = MagicMock(return_value=client.release_lease)
+    return client
+
+
+# =========================================================================
+# IN-PROCESS LEASE TESTS
+# =========================================================================
+
+class TestInProcessLeases:
+    """Tests for GenerationLeases without Redis."""
+
+    @pytest.mark.asyncio
+    async def test_lease_is_exclusive(self):
+        """Test that a held lease cannot be taken until released."""
+        leases = GenerationLeases()
+
+        assert await leases.acquire("query-1", "fast", "job", ttl=60)
+        assert not await leases.acquire("query-1", "fast", "stream:a", ttl=60)
+        assert await leases.acquire("query-1", "accurate", "stream:a", ttl=60)
+        assert await leases.holder("query-1", "fast") == "job"
+
+        await leases.release("query-1", "fast", "job")
+
+        assert await leases.holder("query-1", "fast") is None
+        assert await leases.acquire("query-1", "fast", "stream:a", ttl=60)
+
+    @pytest.mark.asyncio
+    async def test_release_by_other_owner_is_ignored(self):
+        """Test that only the owner releases a lease."""
+        leases = GenerationLeases()
+        await leases.acquire("query-1", "fast", "stream:a", ttl=60)
+
+        await leases.release("query-1", "fast", "stream:b")
+
+        assert await leases.holder("query-1", "fast") == "stream:a"
+
+    @pytest.mark.asyncio
+    async def test_lease_expires(self):
+        """Test that an expired lease (crashed holder) can be taken over."""
+        leases = GenerationLeases()
+
+        with patch('backend.services.generation_leases.time.time', return_value=1000.0):
+            await leases.acquire("query-1", "fast", "stream:a", ttl=60)
+
+        with patch('backend.services.generation_leases.time.time', return_value=1061.0):
+            assert await leases.holder("query-1", "fast") is None
+            assert await leases.acquire("query-1", "fast", "stream:b", ttl=60)
+
+
+# =========================================================================
+# REDIS LEASE TESTS
+# =========================================================================
+
+class TestRedisLeases:
+    """Tests for GenerationLeases backed by (mocked) Redis."""
+
+    @pytest.mark.asyncio
+    async def test_acquire_uses_set_nx(self, redis_client):
+        """Test that acquire() is a single SET NX EX."""
+        leases = GenerationLeases(redis_client)
+        redis_client.set = AsyncMock(side_effect=[True, None])
+
+        assert await leases.acquire("query-1", "fast", "job", ttl=1800)
+        assert not await leases.acquire("query-1", "fast", "stream:a", ttl=75)
+        redis_client.set.assert_any_await("query_generation:fast:query-1", "job", nx=True, ex=1800)
+
+    @pytest.mark.asyncio
+    async def test_release_compares_owner(self, redis_client):
+        """Test that release() runs the compare-and-delete script."""
+        leases = GenerationLeases(redis_client)
+
+        await leases.release("query-1", "accurate", "job")
+
+        redis_client.release_lease.assert_awaited_once_with(
+            keys=["query_generation:accurate:query-1"], args=["job"]
+        )
+
+    @pytest.mark.asyncio
+    async def test_holder_decodes_owner(self, redis_client):
+        """Test that holder() returns the stored owner."""
+        leases = GenerationLeases(redis_client)
+        redis_client.get = AsyncMock(return_value=b"job")
+
+        assert await leases.holder("query-1", "fast") == "job"
+
+    @pytest.mark.asyncio
+    async def test_redis_error_fails_open(self, redis_client):
+        """Test that a Redis outage never blocks generation."""
+        leases = GenerationLeases(redis_client)
+        redis_client.set = AsyncMock(side_effect=redis.exceptions.ConnectionError("down"))
+        redis_client.get = AsyncMock(side_effect=redis.exceptions.ConnectionError("down"))
+        redis_client.release_lease.side_effect = redis.exceptions.ConnectionError("down")
+
+        assert await leases.acquire("query-1", "fast", "stream:a", ttl=75)
+        assert await leases.holder("query-1", "fast") is None
+        await leases.release("query-1", "fast", "stream:a")
@@ -118,6 +118,12 @@ class TestDatabaseCheck:
 class TestOllamaCheck:
     """Tests for OLLAMA health check"""
 
+    @pytest.fixture(autouse=True)
+    def fresh_ollama_service(self):
+        """Reset the OllamaService singleton (health check results are cached)"""
+        with patch('backend.services.ollama_service._ollama_service', None):
+            yield
+
     @pytest.mark.asyncio
     async def test_ollama_healthy(self, mock_settings):
         """Test OLLAMA check returns 'ok' when service is healthy"""
@@ -0,0 +1,431 @@
+"""
+PrawnikGPT Backend - Job Queue Tests
+
+Unit tests for generation job queueing:
+- In-memory queue (reserve/ack, retries, dead-lettering, visibility timeout,
+  heartbeats, backpressure, depth)
+- Redis Streams queue (stream commands, decoding)
+- Worker pool (handlers, per-type concurrency, permanent errors, reclaimed
+  dead jobs)
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.services.exceptions import JobQueueFullError, NoRelevantActsError
+from backend.services.job_queue import (
+    InMemoryJobQueue,
+    JobQueue,
+    RedisStreamJobQueue,
+    Job,
+    JOB_CONSUMER_GROUP,
+    JOB_DEAD_LETTER_KEY
+)
+from backend.services.job_worker import JobWorkerPool
+from backend.services.generation_leases import JOB_LEASE_OWNER, get_generation_leases
+
+
+# =========================================================================
+# FIXTURES
+# =========================================================================
+
+@pytest.fixture
+def fast_payload():
+    """Fast job payload."""
+    return {"query_id": "query-1", "user_id": "user-1", "query_text": "Czy mogę odstąpić od umowy?"}
+
+
+@pytest.fixture
+def queue():
+    """In-memory queue with small limits."""
+    return InMemoryJobQueue(max_attempts=2, visibility_timeout=60, max_depth=3)
+
+
+# =========================================================================
+# IN-MEMORY QUEUE TESTS
+# =========================================================================
+
+class TestInMemoryJobQueue:
+    """Tests for InMemoryJobQueue."""
+
+    @pytest.mark.asyncio
+    async def test_reserve_and_ack(self, queue, fast_payload):
+        """Test that a reserved job is running until acked."""
+        job_id = await queue.enqueue("fast", fast_payload)
+        job = await queue.reserve("fast", "c1", timeout=0.1)
+
+        assert job.id == job_id
+        assert job.payload == fast_payload
+        assert (await queue.depth())["fast"] == {"waiting": 0, "running": 1}
+
+        await queue.ack(job)
+        assert (await queue.depth())["fast"] == {"waiting": 0, "running": 0}
+        assert queue.completed == 1
+
+    @pytest.mark.asyncio
+    async def test_reserve_timeout(self, queue):
+        """Test that reserve returns None when no job arrives."""
+        assert await queue.reserve("accurate", "c1", timeout=0.01) is None
+
+    @pytest.mark.asyncio
+    async def test_types_are_separate(self, queue, fast_payload):
+        """Test that consumers only get jobs of their type."""
+        await queue.enqueue("fast", fast_payload)
+        assert await queue.reserve("accurate", "c1", timeout=0.01) is None
+        assert await queue.reserve("fast", "c1", timeout=0.01) is not None
+
+    @pytest.mark.asyncio
+    async def test_retry_then_dead_letter(self, queue, fast_payload):
+        """Test that failed jobs are retried up to max_attempts."""
+        await queue.enqueue("fast", fast_payload)
+
+        job = await queue.reserve("fast", "c1", timeout=0.1)
+        assert await queue.fail(job, "timeout") is True
+
+        job = await queue.reserve("fast", "c1", timeout=0.1)
+        assert job.attempts == 1
+        assert await queue.fail(job, "timeout") is False
+
+        assert await queue.reserve("fast", "c1", timeout=0.01) is None
+        assert await queue.dead_letter_count() == 1
+        assert queue.retried == 1 and queue.dead == 1
+
+    @pytest.mark.asyncio
+    async def test_permanent_error_not_retried(self, queue, fast_payload):
+        """Test that non-retryable failures are dead-lettered at once."""
+        await queue.enqueue("fast", fast_payload)
+        job = await queue.reserve("fast", "c1", timeout=0.1)
+
+        assert await queue.fail(job, "no acts", retryable=False) is False
+        assert await queue.dead_letter_count() == 1
+
+    @pytest.mark.asyncio
+    async def test_visibility_timeout_reclaims(self, fast_payload):
+        """Test that jobs not acked in time are requeued."""
+        queue = InMemoryJobQueue(max_attempts=3, visibility_timeout=0, max_depth=10)
+        await queue.enqueue("fast", fast_payload)
+        stuck = await queue.reserve("fast", "c1", timeout=0.1)
+
+        assert await queue.reclaim_expired() == 1
+        retried = await queue.reserve("fast", "c2", timeout=0.1)
+        assert retried.id == stuck.id
+        assert retried.attempts == 1
+
+        # Late ack of the reclaimed delivery is ignored
+        assert await queue.fail(stuck, "late") is False
+
+    @pytest.mark.asyncio
+    async def test_extend_keeps_job_reserved(self, fast_payload):
+        """Test that a heartbeat restarts the visibility timeout of a running job."""
+        queue = InMemoryJobQueue(max_attempts=3, visibility_timeout=0, max_depth=10)
+        await queue.enqueue("fast", fast_payload)
+        job = await queue.reserve("fast", "c1", timeout=0.1)
+
+        queue.visibility_timeout = 60
+        assert await queue.extend(job) is True
+        assert await queue.reclaim_expired() == 0
+
+        await queue.ack(job)
+        assert await queue.extend(job) is False
+
+    @pytest.mark.asyncio
+    async def test_backpressure(self, queue, fast_payload):
+        """Test that enqueue fails at max depth (waiting + running)."""
+        for _ in range(3):
+            await queue.enqueue("fast", fast_payload)
+        await queue.reserve("fast", "c1", timeout=0.1)
+
+        with pytest.raises(JobQueueFullError):
+            await queue.enqueue("fast", fast_payload)
+
+        # Other job types are not affected
+        await queue.enqueue("accurate", {"query_id": "query-1", "query_text": "x"})
+
+    @pytest.mark.asyncio
+    async def test_unknown_type(self, queue):
+        """Test that unknown job types are rejected."""
+        with pytest.raises(ValueError):
+            await queue.enqueue("embedding", {})
+
+    @pytest.mark.asyncio
+    async def test_stats(self, queue, fast_payload):
+        """Test queue statistics."""
+        await queue.enqueue("fast", fast_payload)
+        stats = await queue.get_stats()
+
+        assert stats["backend"] == "memory"
+        assert stats["depth"]["fast"]["waiting"] == 1
+        assert stats["enqueued"] == 1
+        assert stats["dead_letter"] == 0
+
+    def test_incomplete_backend_rejected(self):
+        """Test that a backend missing queue operations cannot be instantiated."""
+        class EnqueueOnlyQueue(JobQueue):
+            async def enqueue(self, job_type, payload):
+                return "job-1"
+
+        with pytest.raises(TypeError, match="abstract"):
+            EnqueueOnlyQueue()
+
+
+# =========================================================================
+# REDIS STREAMS QUEUE TESTS
+# =========================================================================
+
+@pytest.fixture
+def redis_client():
+    """Mock async Redis client for stream commands."""
+    client = MagicMock()
+    client.xgroup_create = AsyncMock()
+    client.xadd = AsyncMock(return_value=b"1-0")
+    client.xlen = AsyncMock(return_value=0)
+    client.xreadgroup = AsyncMock(return_value=[])
+    client.xpending = AsyncMock(return_value={"pending": 0})
+    client.xautoclaim = AsyncMock(return_value=[b"0-0", [], []])
+    client.finish_entry = AsyncMock(return_value=1)
+    client.register_script = MagicMock(return_value=client.finish_entry)
+    return client
+
+
+class TestRedisStreamJobQueue:
+    """Tests for RedisStreamJobQueue (mocked Redis)."""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_adds_stream_entry(self, redis_client, fast_payload):
+        """Test that enqueue creates groups and adds the job to its stream."""
+        queue = RedisStreamJobQueue(redis_client, max_depth=10)
+        job_id = await queue.enqueue("fast", fast_payload)
+
+        redis_client.xgroup_create.assert_any_await("jobs:fast", JOB_CONSUMER_GROUP, id="0", mkstream=True)
+        stream, fields = redis_client.xadd.await_args.args
+        assert stream == "jobs:fast"
+        assert Job.from_json(fields["job"]).id == job_id
+
+    @pytest.mark.asyncio
+    async def test_enqueue_full(self, redis_client, fast_payload):
+        """Test backpressure on stream length."""
+        redis_client.xlen = AsyncMock(return_value=10)
+        queue = RedisStreamJobQueue(redis_client, max_depth=10)
+
+        with pytest.raises(JobQueueFullError):
+            await queue.enqueue("fast", fast_payload)
+
+    @pytest.mark.asyncio
+    async def test_reserve_decodes_entry(self, redis_client, fast_payload):
+        """Test that stream entries are decoded into jobs with receipts."""
+        job = Job("fast", fast_payload, attempts=1)
+        redis_client.xreadgroup = AsyncMock(
+            return_value=[[b"jobs:fast", [(b"5-1", {b"job": job.to_json().encode()})]]]
+        )
+        queue = RedisStreamJobQueue(redis_client)
+
+        reserved = await queue.reserve("fast", "worker-1", timeout=1)
+
+        assert reserved.id == job.id
+        assert reserved.attempts == 1
+        assert reserved.receipt == "5-1"
+
+    @pytest.mark.asyncio
+    async def test_fail_dead_letters_after_max_attempts(self, redis_client, fast_payload):
+        """Test that the last failed attempt goes to the dead-letter stream."""
+        queue = RedisStreamJobQueue(redis_client, max_attempts=2)
+        job = Job("fast", fast_payload, attempts=1, receipt="5-1")
+
+        assert await queue.fail(job, "boom") is False
+
+        kwargs = redis_client.finish_entry.await_args.kwargs
+        assert kwargs["keys"] == ["jobs:fast", JOB_DEAD_LETTER_KEY]
+        assert kwargs["args"][1] == "5-1"
+        assert kwargs["args"][3] == "boom"
+        assert queue.dead == 1
+
+    @pytest.mark.asyncio
+    async def test_extend_claims_entry(self, redis_client, fast_payload):
+        """Test that a heartbeat re-claims the entry, resetting its idle time."""
+        redis_client.xclaim = AsyncMock(side_effect=[[b"5-1"], []])
+        queue = RedisStreamJobQueue(redis_client)
+        job = Job("fast", fast_payload, receipt="5-1")
+        job.consumer = "worker-1"
+
+        assert await queue.extend(job) is True
+        assert await queue.extend(job) is False  # Reclaimed meanwhile
+        redis_client.xclaim.assert_any_await(
+            "jobs:fast", JOB_CONSUMER_GROUP, "worker-1",
+            min_idle_time=0, message_ids=["5-1"], justid=True
+        )
+
+    @pytest.mark.asyncio
+    async def test_depth(self, redis_client):
+        """Test waiting/running split from stream length and pending entries."""
+        redis_client.xlen = AsyncMock(return_value=5)
+        redis_client.xpending = AsyncMock(return_value={"pending": 2})
+        queue = RedisStreamJobQueue(redis_client)
+
+        depth = await queue.depth()
+        assert depth["fast"] == {"waiting": 3, "running": 2}
+
+
+# =========================================================================
+# WORKER POOL TESTS
+# =========================================================================
+
+class TestJobWorkerPool:
+    """Tests for JobWorkerPool."""
+
+    @pytest.mark.asyncio
+    async def test_fast_job_runs_pipeline_for_existing_query(self, queue, fast_payload):
+        """Test that fast jobs run process_query_fast with the queued query ID."""
+        pipeline = AsyncMock()
+
+        with patch('backend.services.job_worker.process_query_fast', pipeline), \
+             patch('backend.services.job_worker.RESERVE_TIMEOUT', 0.01):
+            pool = JobWorkerPool(queue, concurrency={"fast": 1, "accurate": 0}, name="test")
+            await pool.start()
+            await queue.enqueue("fast", fast_payload)
+            for _ in range(100):
+                if pool.processed:
+                    break
+                await asyncio.sleep(0.01)
+            await pool.stop(timeout=1)
+
+        pipeline.assert_awaited_once_with(
+            user_id="user-1", query_text=fast_payload["query_text"], query_id="query-1"
+        )
+        assert queue.completed == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit_per_type(self, fast_payload):
+        """Test that at most `concurrency` jobs of a type run at once."""
+        queue = InMemoryJobQueue(max_depth=10)
+        active = 0
+        peak = 0
+        release = asyncio.Event()
+
+        async def slow_job(**kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await release.wait()
+            active -= 1
+
+        with patch('backend.services.job_worker.process_query_fast', side_effect=slow_job), \
+             patch('backend.services.job_worker.RESERVE_TIMEOUT', 0.01):
+            pool = JobWorkerPool(queue, concurrency={"fast": 2, "accurate": 0}, name="test")
+            await pool.start()
+            for _ in range(5):
+                await queue.enqueue("fast", fast_payload)
+            await asyncio.sleep(0.1)
+
+            assert peak == 2
+            assert (await queue.depth())["fast"] == {"waiting": 3, "running": 2}
+
+            release.set()
+            for _ in range(100):
+                if pool.processed == 5:
+                    break
+                await asyncio.sleep(0.01)
+            await pool.stop(timeout=1)
+
+        assert pool.processed == 5
+
+    @pytest.mark.asyncio
+    async def test_permanent_error_dead_lettered(self, queue, fast_payload):
+        """Test that NoRelevantActsError is not retried and marks the response failed."""
+        pipeline = AsyncMock(side_effect=NoRelevantActsError("no acts"))
+        leases = get_generation_leases()
+        await leases.acquire("query-1", "fast", JOB_LEASE_OWNER, ttl=60)
+
+        with patch('backend.services.job_worker.process_query_fast', pipeline), \
+             patch('backend.services.job_worker.set_query_response_error', new_callable=AsyncMock) as mock_mark, \
+             patch('backend.services.job_worker.RESERVE_TIMEOUT', 0.01):
+            pool = JobWorkerPool(queue, concurrency={"fast": 1, "accurate": 0}, name="test")
+            await pool.start()
+            await queue.enqueue("fast", fast_payload)
+            for _ in range(100):
+                if pool.failed:
+                    break
+                await asyncio.sleep(0.01)
+            await pool.stop(timeout=1)
+
+        assert pipeline.await_count == 1
+        assert await queue.dead_letter_count() == 1
+        mock_mark.assert_awaited_once_with("query-1", "fast", "NoRelevantActsError: no acts")
+        assert await leases.holder("query-1", "fast") is None
+
+    @pytest.mark.asyncio
+    async def test_retried_job_keeps_lease(self, queue, fast_payload):
+        """Test that a failed attempt that is retried neither marks the response nor frees the lease."""
+        pipeline = AsyncMock(side_effect=[RuntimeError("ollama restarting"), None])
+        leases = get_generation_leases()
+        await leases.acquire("query-1", "fast", JOB_LEASE_OWNER, ttl=60)
+        holders = []
+
+        async def run_pipeline(**kwargs):
+            holders.append(await leases.holder("query-1", "fast"))
+            return await pipeline(**kwargs)
+
+        with patch('backend.services.job_worker.process_query_fast', side_effect=run_pipeline), \
+             patch('backend.services.job_worker.set_query_response_error', new_callable=AsyncMock) as mock_mark, \
+             patch('backend.services.job_worker.RESERVE_TIMEOUT', 0.01):
+            pool = JobWorkerPool(queue, concurrency={"fast": 1, "accurate": 0}, name="test")
+            await pool.start()
+            await queue.enqueue("fast", fast_payload)
+            for _ in range(100):
+                if pool.processed:
+                    break
+                await asyncio.sleep(0.01)
+            await pool.stop(timeout=1)
+
+        assert pool.failed == 1
+        assert pool.processed == 1
+        assert holders == [JOB_LEASE_OWNER, JOB_LEASE_OWNER]
+        mock_mark.assert_not_awaited()
+        assert await leases.holder("query-1", "fast") is None
+
+    @pytest.mark.asyncio
+    async def test_reclaimed_dead_job_marks_response_failed(self, fast_payload):
+        """Test that a job reclaimed after its last attempt frees the lease and marks the response."""
+        queue = InMemoryJobQueue(max_attempts=1, visibility_timeout=0, max_depth=10)
+        leases = get_generation_leases()
+        await leases.acquire("query-1", "fast", JOB_LEASE_OWNER, ttl=60)
+        JobWorkerPool(queue, concurrency={"fast": 0, "accurate": 0}, name="test")
+
+        with patch('backend.services.job_worker.set_query_response_error', new_callable=AsyncMock) as mock_mark:
+            await queue.enqueue("fast", fast_payload)
+            await queue.reserve("fast", "c1", timeout=0.1)
+
+            assert await queue.reclaim_expired() == 1
+
+        assert await queue.dead_letter_count() == 1
+        mock_mark.assert_awaited_once_with("query-1", "fast", "visibility timeout expired")
+        assert await leases.holder("query-1", "fast") is None
+
+    @pytest.mark.asyncio
+    async def test_running_job_is_not_reclaimed(self, fast_payload):
+        """Test that heartbeats keep a job running past the visibility timeout reserved."""
+        queue = InMemoryJobQueue(max_attempts=3, visibility_timeout=0.03, max_depth=10)
+        release = asyncio.Event()
+
+        async def slow_job(**kwargs):
+            await release.wait()
+
+        with patch('backend.services.job_worker.process_query_fast', side_effect=slow_job), \
+             patch('backend.services.job_worker.RESERVE_TIMEOUT', 0.01), \
+             patch('backend.services.job_worker.HEARTBEAT_MIN_INTERVAL', 0.01):
+            pool = JobWorkerPool(queue, concurrency={"fast": 1, "accurate": 0}, name="test")
+            await pool.start()
+            await queue.enqueue("fast", fast_payload)
+            await asyncio.sleep(0.15)
+
+            assert await queue.reclaim_expired() == 0
+
+            release.set()
+            for _ in range(100):
+                if pool.processed:
+                    break
+                await asyncio.sleep(0.01)
+            await pool.stop(timeout=1)
+
+        assert pool.processed == 1
+        assert queue.retried == 0
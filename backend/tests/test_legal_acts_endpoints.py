@@ -98,7 +98,7 @@ def sample_relations() -> Dict[str, List[Dict[str, Any]]]:
                 "id": "rel-outgoing-1",
                 "target_act_id": "target-act-1",
                 "relation_type": "zmienia",
-                "article_reference": "Art. 5 zmienia Art. 10",
+                "description": "Art. 5 zmienia Art. 10",
                 "created_at": "2020-01-01T00:00:00Z",
                 "target_act": {
                     "id": "target-act-1",
@@ -113,7 +113,7 @@ def sample_relations() -> Dict[str, List[Dict[str, Any]]]:
                 "id": "rel-incoming-1",
                 "source_act_id": "source-act-1",
                 "relation_type": "powoluje_sie",
-                "article_reference": "Powołuje się na Art. 15",
+                "description": "Powołuje się na Art. 15",
                 "created_at": "2019-06-01T00:00:00Z",
                 "source_act": {
                     "id": "source-act-1",
@@ -398,7 +398,7 @@ class TestGetLegalActRelations:
                 "id": "rel-outgoing-1",
                 "target_act_id": "target-act-1",
                 "relation_type": "zmienia",
-                "article_reference": "Art. 5 zmienia Art. 10",
+                "description": "Art. 5 zmienia Art. 10",
                 "created_at": "2020-01-01T00:00:00Z",
                 "target_act": {
                     "id": "target-act-1",
@@ -459,7 +459,7 @@ class TestLegalActsRepository:
         
         with patch('backend.db.legal_acts.get_supabase') as mock_supabase:
             mock_client = MagicMock()
-            mock_client.table.return_value.select.return_value.order.return_value.range.return_value.execute.return_value = mock_response
+            mock_client.table.return_value.select.return_value.order.return_value.range.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
             
             acts, total = await list_legal_acts(page=1, per_page=20)
@@ -486,9 +486,9 @@ class TestLegalActsRepository:
             mock_client = MagicMock()
             
             # Configure different responses
-            mock_client.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value = mock_act_response
-            mock_client.table.return_value.select.return_value.eq.return_value.execute.return_value = mock_chunks_response
-            mock_client.table.return_value.select.return_value.or_.return_value.execute.return_value = mock_relations_response
+            mock_client.table.return_value.select.return_value.eq.return_value.single.return_value.execute = AsyncMock(return_value=mock_act_response)
+            mock_client.table.return_value.select.return_value.eq.return_value.execute = AsyncMock(return_value=mock_chunks_response)
+            mock_client.table.return_value.select.return_value.or_.return_value.execute = AsyncMock(return_value=mock_relations_response)
             
             mock_supabase.return_value = mock_client
             
@@ -497,23 +497,179 @@ class TestLegalActsRepository:
             assert act is not None
             assert "stats" in act
 
+    @pytest.mark.asyncio
+    async def test_list_legal_acts_after_repository(self, sample_legal_acts_list):
+        """Test keyset pagination filter, next_cursor and count=none."""
+        from backend.db.legal_acts import list_legal_acts_after
+        from backend.db.pagination import encode_cursor
+        
+        mock_response = MagicMock()
+        mock_response.data = sample_legal_acts_list
+        cursor = encode_cursor("published_date", "desc", "2000-01-01", "act-0")
+        
+        with patch('backend.db.legal_acts.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            query = mock_client.table.return_value.select.return_value
+            query.or_.return_value.order.return_value.order.return_value.limit.return_value.execute = AsyncMock(return_value=mock_response)
+            mock_supabase.return_value = mock_client
+            
+            acts, total, next_cursor = await list_legal_acts_after(cursor=cursor, per_page=2)
+        
+        query.or_.assert_called_once_with(
+            'published_date.lt."2000-01-01",'
+            'and(published_date.eq."2000-01-01",id.lt."act-0")'
+        )
+        query.or_.return_value.order.return_value.order.return_value.limit.assert_called_once_with(3)
+        assert len(acts) == 2
+        assert total is None
+        assert next_cursor == encode_cursor(
+            "published_date", "desc", acts[-1]["published_date"], acts[-1]["id"]
+        )
+
+    @pytest.mark.asyncio
+    async def test_list_legal_acts_cursor_mode(self, sample_legal_acts_list):
+        """Test that pagination=cursor uses the keyset repository."""
+        from backend.routers.legal_acts import list_legal_acts
+        
+        with patch('backend.routers.legal_acts.db_list_legal_acts_after', new_callable=AsyncMock) as mock_after:
+            mock_after.return_value = (sample_legal_acts_list, 250, "next-cursor")
+            
+            result = await list_legal_acts(
+                page=1,
+                per_page=20,
+                search=None,
+                status=None,
+                publisher=None,
+                year=None,
+                order_by="published_date",
+                order="desc",
+                pagination="cursor",
+                count="estimated"
+            )
+        
+        assert mock_after.call_args[1]["count"] == "estimated"
+        assert result.pagination.next_cursor == "next-cursor"
+        assert result.pagination.page is None
+        assert result.pagination.total_pages == 13
+
+    @pytest.mark.asyncio
+    async def test_get_legal_act_by_id_materialized_stats(self, sample_act_with_stats, sample_act_id):
+        """Test that embedded legal_act_stats are used without count queries."""
+        from backend.db.legal_acts import get_legal_act_by_id
+        
+        mock_act_response = MagicMock()
+        mock_act_response.data = {**sample_act_with_stats}
+        del mock_act_response.data["stats"]
+        mock_act_response.data["legal_act_stats"] = {"total_chunks": 145, "related_acts_count": 23}
+        
+        with patch('backend.db.legal_acts.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.table.return_value.select.return_value.eq.return_value.single.return_value.execute = AsyncMock(return_value=mock_act_response)
+            mock_supabase.return_value = mock_client
+            
+            act = await get_legal_act_by_id(sample_act_id)
+        
+        mock_client.table.assert_called_once_with("legal_acts")
+        assert act["stats"] == {"total_chunks": 145, "related_acts_count": 23}
+        assert "legal_act_stats" not in act
+
+    @pytest.mark.asyncio
+    async def test_get_legal_act_relations_single_rpc(self, sample_act_id):
+        """Test that relations of both directions come from one RPC call."""
+        from backend.db.legal_acts import get_legal_act_relations
+        
+        def make_row(relation_id, direction, depth, related_id):
+            return {
+                "relation_id": relation_id,
+                "direction": direction,
+                "depth": depth,
+                "source_act_id": sample_act_id if direction == "outgoing" else related_id,
+                "target_act_id": related_id if direction == "outgoing" else sample_act_id,
+                "relation_type": "modifies",
+                "description": f"{relation_id} description",
+                "created_at": "2020-01-01T00:00:00Z",
+                "related_act_id": related_id,
+                "related_act_title": f"Ustawa {related_id}",
+                "related_act_typ_aktu": "Ustawa",
+                "related_act_status": "obowiazujacy"
+            }
+        
+        mock_response = MagicMock()
+        mock_response.data = [
+            make_row("rel-1", "outgoing", 1, "act-b"),
+            make_row("rel-2", "outgoing", 2, "act-c"),
+            make_row("rel-3", "incoming", 1, "act-d")
+        ]
+        
+        with patch('backend.db.legal_acts.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
+            mock_supabase.return_value = mock_client
+            
+            relations = await get_legal_act_relations(sample_act_id, depth=2)
+        
+        mock_client.rpc.assert_called_once_with(
+            "get_act_relations",
+            {"p_act_id": sample_act_id, "p_depth": 2, "p_relation_type": None}
+        )
+        mock_client.table.assert_not_called()
+        
+        assert [(r["id"], r["depth"]) for r in relations["outgoing"]] == [("rel-1", 1), ("rel-2", 2)]
+        assert relations["outgoing"][1]["target_act"]["title"] == "Ustawa act-c"
+        assert relations["incoming"][0]["source_act"]["id"] == "act-d"
+        assert "target_act" not in relations["incoming"][0]
+
     @pytest.mark.asyncio
     async def test_search_legal_acts_repository(self, sample_legal_acts_list):
-        """Test search_legal_acts repository function."""
+        """Test search_legal_acts repository function (ranked RPC, no ILIKE)."""
         from backend.db.legal_acts import search_legal_acts
         
         mock_response = MagicMock()
-        mock_response.data = [sample_legal_acts_list[0]]
+        mock_response.data = [
+            {**sample_legal_acts_list[0], "rank": 0.8, "match_type": "fts", "total_count": 1}
+        ]
         
         with patch('backend.db.legal_acts.get_supabase') as mock_supabase:
             mock_client = MagicMock()
-            mock_client.table.return_value.select.return_value.ilike.return_value.limit.return_value.execute.return_value = mock_response
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
             
             results = await search_legal_acts("Kodeks cywilny")
+        
+        assert mock_client.rpc.call_args[0][0] == "search_legal_acts_ranked"
+        mock_client.table.assert_not_called()
+        assert len(results) == 1
+        assert "Kodeks" in results[0]["title"]
+        assert "total_count" not in results[0]
+
+    @pytest.mark.asyncio
+    async def test_list_legal_acts_search_uses_ranked_rpc(self, sample_legal_acts_list):
+        """Test that list search composes filters and pagination server-side."""
+        from backend.db.legal_acts import list_legal_acts
+        
+        mock_response = MagicMock()
+        mock_response.data = [
+            {**act, "rank": 0.3, "match_type": "trigram", "total_count": 45}
+            for act in sample_legal_acts_list
+        ]
+        
+        with patch('backend.db.legal_acts.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
+            mock_supabase.return_value = mock_client
             
-            assert len(results) == 1
-            assert "Kodeks" in results[0]["title"]
+            acts, total = await list_legal_acts(
+                page=3, per_page=20, search="kodeks cywiny", status="obowiazujacy", year=1964
+            )
+        
+        params = mock_client.rpc.call_args[0][1]
+        assert params["p_query"] == "kodeks cywiny"
+        assert params["p_status"] == "obowiazujacy"
+        assert params["p_year"] == 1964
+        assert (params["p_limit"], params["p_offset"]) == (20, 40)
+        mock_client.table.assert_not_called()
+        assert len(acts) == 3
+        assert total == 45
 
 
 # =========================================================================
@@ -0,0 +1,350 @@
+"""
+PrawnikGPT Backend - LLM Scheduler Tests
+
+Unit tests for LLM request scheduling:
+- Priority classes (interactive before accurate before batch)
+- Per-user fair queuing (round-robin)
+- Deadline-aware shedding
+- Request context and global pool
+- Queue-wait statistics
+- Adaptive concurrency (AIMD)
+"""
+
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+
+from backend.services.exceptions import (
+    LLMRequestShedError,
+    OLLAMATimeoutError,
+    OLLAMAUnavailableError
+)
+from backend.services.llm_scheduler import (
+    AdaptiveConcurrency,
+    LLMScheduler,
+    PriorityLimiter,
+    llm_request_context
+)
+
+
+# =========================================================================
+# HELPERS
+# =========================================================================
+
+async def enqueue(limiter, order, label, priority, user_id=None, deadline=None, service_time=0.0):
+    """Start a task acquiring a slot; it records label on admission and releases."""
+    async def run():
+        await limiter.acquire(priority, user_id, deadline, service_time)
+        order.append(label)
+        limiter.release()
+
+    task = asyncio.create_task(run())
+    await asyncio.sleep(0)  # Let the task reach the queue
+    return task
+
+
+# =========================================================================
+# PRIORITY LIMITER TESTS
+# =========================================================================
+
+class TestPriorityLimiter:
+    """Tests for PriorityLimiter admission order."""
+
+    @pytest.mark.asyncio
+    async def test_free_slot_admits_immediately(self):
+        """Test that requests below capacity do not wait."""
+        limiter = PriorityLimiter("mistral:7b", capacity=2)
+        await limiter.acquire("interactive")
+        await limiter.acquire("batch")
+
+        assert limiter.running == 2
+        assert limiter.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        """Test that interactive requests overtake queued accurate and batch ones."""
+        limiter = PriorityLimiter("shared", capacity=1)
+        await limiter.acquire("interactive")
+        order = []
+
+        tasks = [
+            await enqueue(limiter, order, "batch", "batch"),
+            await enqueue(limiter, order, "accurate", "accurate"),
+            await enqueue(limiter, order, "interactive", "interactive")
+        ]
+        limiter.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["interactive", "accurate", "batch"]
+
+    @pytest.mark.asyncio
+    async def test_fair_queuing_between_users(self):
+        """Test that a user with many queued requests cannot starve another user."""
+        limiter = PriorityLimiter("mistral:7b", capacity=1)
+        await limiter.acquire("interactive")
+        order = []
+
+        tasks = [await enqueue(limiter, order, f"a{i}", "interactive", "user-a") for i in range(3)]
+        tasks.append(await enqueue(limiter, order, "b0", "interactive", "user-b"))
+        limiter.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["a0", "b0", "a1", "a2"]
+
+    @pytest.mark.asyncio
+    async def test_deadline_shedding(self):
+        """Test that a queued request is shed once it cannot meet its deadline."""
+        limiter = PriorityLimiter("mistral:7b", capacity=1)
+        await limiter.acquire("interactive")
+
+        with pytest.raises(LLMRequestShedError):
+            await limiter.acquire("interactive", deadline=time.time() + 0.2, service_time=0.15)
+
+        assert limiter.shed["interactive"] == 1
+        assert limiter.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_shed_error_is_timeout(self):
+        """Test that shed requests are handled like Ollama timeouts."""
+        assert issubclass(LLMRequestShedError, OLLAMATimeoutError)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test that a cancelled waiter does not keep a queue position or slot."""
+        limiter = PriorityLimiter("mistral:7b", capacity=1)
+        await limiter.acquire("interactive")
+
+        task = asyncio.create_task(limiter.acquire("interactive"))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert limiter.waiting == 0
+        limiter.release()
+        assert limiter.running == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_statistics(self):
+        """Test queue-wait metrics per priority class."""
+        limiter = PriorityLimiter("mistral:7b", capacity=1)
+        await limiter.acquire("interactive")
+        order = []
+
+        task = await enqueue(limiter, order, "accurate", "accurate")
+        await asyncio.sleep(0.05)
+        limiter.release()
+        await task
+
+        stats = limiter.get_stats()["priorities"]
+        assert stats["interactive"]["admitted"] == 1
+        assert stats["accurate"]["admitted"] == 1
+        assert stats["accurate"]["wait_ms_avg"] >= 40
+        assert stats["batch"]["wait_ms_p95"] == 0.0
+
+
+# =========================================================================
+# SCHEDULER TESTS
+# =========================================================================
+
+class TestLLMScheduler:
+    """Tests for LLMScheduler."""
+
+    @pytest.mark.asyncio
+    async def test_priority_from_context_and_model(self):
+        """Test priority resolution: explicit, request context, model default."""
+        scheduler = LLMScheduler({"mistral:7b": 1})
+
+        assert scheduler.resolve_priority("mistral:7b") == "interactive"
+        assert scheduler.resolve_priority("mistral:7b", "batch") == "batch"
+        with llm_request_context(priority="accurate"):
+            assert scheduler.resolve_priority("mistral:7b") == "accurate"
+
+        with pytest.raises(ValueError):
+            scheduler.resolve_priority("mistral:7b", "urgent")
+
+    @pytest.mark.asyncio
+    async def test_slot_releases_on_error(self):
+        """Test that slots are released when the request fails."""
+        scheduler = LLMScheduler({"mistral:7b": 1}, global_limit=1)
+
+        with pytest.raises(RuntimeError):
+            async with scheduler.slot("mistral:7b"):
+                raise RuntimeError("boom")
+
+        pools = scheduler.get_stats()["pools"]
+        assert pools["mistral:7b"]["running"] == 0
+        assert pools["global"]["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_global_pool_spans_models(self):
+        """Test that the global pool bounds requests across models."""
+        scheduler = LLMScheduler({"mistral:7b": 2, "gpt-oss:120b": 2}, global_limit=1)
+        held = asyncio.Event()
+        release = asyncio.Event()
+
+        async def accurate():
+            async with scheduler.slot("gpt-oss:120b", "accurate"):
+                held.set()
+                await release.wait()
+
+        task = asyncio.create_task(accurate())
+        await held.wait()
+
+        with pytest.raises(LLMRequestShedError):
+            async with scheduler.slot("mistral:7b", deadline=time.time() + 0.05):
+                pass
+
+        release.set()
+        await task
+
+    @pytest.mark.asyncio
+    async def test_service_time_estimate(self):
+        """Test that successful requests update the service time estimate."""
+        scheduler = LLMScheduler({"mistral:7b": 1})
+
+        async with scheduler.slot("mistral:7b"):
+            await asyncio.sleep(0.02)
+
+        assert scheduler.get_stats()["service_time_ms"]["mistral:7b"] >= 15
+
+    @pytest.mark.asyncio
+    async def test_shedding_disabled(self):
+        """Test that deadlines are ignored when shedding is disabled."""
+        scheduler = LLMScheduler({"mistral:7b": 1}, deadline_shedding=False)
+        release = asyncio.Event()
+
+        async def holder():
+            async with scheduler.slot("mistral:7b"):
+                await release.wait()
+
+        task = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+
+        waiter = asyncio.create_task(_use_slot(scheduler, deadline=time.time() - 1))
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(task, waiter)
+
+        assert scheduler.get_stats()["pools"]["mistral:7b"]["priorities"]["interactive"]["shed"] == 0
+
+
+async def _use_slot(scheduler, deadline=None):
+    """Take and release a mistral:7b slot."""
+    async with scheduler.slot("mistral:7b", deadline=deadline):
+        pass
+
+
+# =========================================================================
+# ADAPTIVE CONCURRENCY TESTS
+# =========================================================================
+
+class TestAdaptiveConcurrency:
+    """Tests for AIMD limit control."""
+
+    def test_initial_limit_clamped(self):
+        """Test that the configured limit is clamped to floor/ceiling."""
+        limiter = PriorityLimiter("mistral:7b", capacity=8)
+        controller = AdaptiveConcurrency(limiter, floor=1, ceiling=4)
+
+        assert limiter.capacity == 4
+        assert controller.get_stats()["limit"] == 4
+
+    def test_increase_when_queueing_with_healthy_latency(self):
+        """Test additive increase while requests queue and latency is stable."""
+        limiter = PriorityLimiter("mistral:7b", capacity=2)
+        controller = AdaptiveConcurrency(limiter, floor=1, ceiling=4)
+
+        with patch('backend.services.llm_scheduler.ADAPTIVE_WINDOW_REQUESTS', 2):
+            for _ in range(3):
+                limiter.queued += 1
+                controller.record_success(1.0)
+                controller.record_success(1.1)
+
+        assert limiter.capacity == 4  # Capped at ceiling
+        assert controller.increases == 2
+
+    def test_no_increase_without_queueing(self):
+        """Test that an idle pool keeps its limit."""
+        limiter = PriorityLimiter("mistral:7b", capacity=2)
+        controller = AdaptiveConcurrency(limiter, floor=1, ceiling=4)
+
+        with patch('backend.services.llm_scheduler.ADAPTIVE_WINDOW_REQUESTS', 2):
+            for _ in range(4):
+                controller.record_success(1.0)
+
+        assert limiter.capacity == 2
+
+    def test_decrease_on_latency_spike(self):
+        """Test multiplicative decrease when latency exceeds tolerance x baseline."""
+        limiter = PriorityLimiter("mistral:7b", capacity=8)
+        controller = AdaptiveConcurrency(limiter, floor=2, ceiling=8)
+
+        with patch('backend.services.llm_scheduler.ADAPTIVE_WINDOW_REQUESTS', 2):
+            controller.record_success(1.0)
+            controller.record_success(1.0)
+            controller.record_success(5.0)
+            controller.record_success(5.0)
+
+        assert limiter.capacity == 6
+        assert controller.decreases == 1
+        assert controller.get_stats()["baseline_latency_ms"] == 1050.0
+
+    def test_decrease_on_timeout_respects_floor(self):
+        """Test immediate back-off on timeouts (once per window) down to floor."""
+        limiter = PriorityLimiter("gpt-oss:120b", capacity=2)
+        controller = AdaptiveConcurrency(limiter, floor=1, ceiling=4)
+
+        controller.record_timeout()
+        assert limiter.capacity == 1
+
+        controller._last_decrease = 0.0
+        controller.record_timeout()
+        assert limiter.capacity == 1
+        assert controller.decreases == 1
+
+    def test_decrease_on_error_rate(self):
+        """Test back-off when backend errors exceed the allowed rate."""
+        limiter = PriorityLimiter("mistral:7b", capacity=4)
+        controller = AdaptiveConcurrency(limiter, floor=1, ceiling=8)
+
+        with patch('backend.services.llm_scheduler.ADAPTIVE_WINDOW_REQUESTS', 4):
+            controller.record_success(1.0)
+            controller.record_success(1.0)
+            controller.record_error()
+            controller.record_error()
+
+        assert limiter.capacity == 3
+
+    @pytest.mark.asyncio
+    async def test_raised_limit_admits_waiters(self):
+        """Test that raising the capacity hands slots to queued requests."""
+        limiter = PriorityLimiter("mistral:7b", capacity=1)
+        await limiter.acquire("interactive")
+
+        task = asyncio.create_task(limiter.acquire("interactive"))
+        await asyncio.sleep(0)
+        limiter.set_capacity(2)
+        await asyncio.wait_for(task, timeout=1)
+
+        assert limiter.running == 2
+
+    @pytest.mark.asyncio
+    async def test_scheduler_reports_outcomes(self):
+        """Test that slot outcomes feed the controller and limits are published."""
+        scheduler = LLMScheduler({"gpt-oss:120b": 2}, adaptive=True, adaptive_ceiling_factor=2.0)
+
+        with pytest.raises(OLLAMATimeoutError):
+            async with scheduler.slot("gpt-oss:120b"):
+                raise OLLAMATimeoutError("timed out")
+
+        assert scheduler.get_limits() == {"gpt-oss:120b": 1}
+        adaptive = scheduler.get_stats()["pools"]["gpt-oss:120b"]["adaptive"]
+        assert adaptive["ceiling"] == 4
+        assert adaptive["decreases"] == 1
+
+        with pytest.raises(OLLAMAUnavailableError):
+            async with scheduler.slot("gpt-oss:120b"):
+                raise OLLAMAUnavailableError("connection refused")
+        assert scheduler.get_stats()["pools"]["gpt-oss:120b"]["running"] == 0
@@ -0,0 +1,259 @@
+"""
+PrawnikGPT Backend - Local Vector Index Tests
+
+Unit tests for the memory-mapped local vector index:
+- Exact top-k search and distance threshold
+- Incremental refresh (watermark, append)
+- Full rebuild (new generation), sync() rebuilding on deletions and act
+  metadata changes
+- Sharing between instances (other workers) via manifest reload
+- semantic_search() routing
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+np = pytest.importorskip("numpy")
+
+from backend.services.local_vector_index import LocalVectorIndex
+from backend.services.vector_search import semantic_search
+from backend.services.exceptions import NoRelevantActsError
+
+
+# =========================================================================
+# FIXTURES
+# =========================================================================
+
+DIM = 768
+
+
+def make_row(i: int, vector) -> dict:
+    """legal_act_chunks row as returned by PostgREST (vector as text)."""
+    return {
+        "id": f"chunk-{i:04d}",
+        "legal_act_id": f"act-{i % 3}",
+        "chunk_index": i,
+        "content": f"Art. {i}. Treść przepisu numer {i}",
+        "metadata": {"number": str(i)},
+        "created_at": f"2025-12-01T10:00:{i:02d}+00:00",
+        "embedding_768": "[" + ",".join(str(float(x)) for x in vector) + "]",
+        "legal_acts": {
+            "title": f"Ustawa {i % 3}",
+            "publisher": "Dz.U.",
+            "year": 2020,
+            "position": i,
+            "status": "obowiązująca"
+        }
+    }
+
+
+@pytest.fixture
+def vectors():
+    """Random unit vectors (deterministic)."""
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(20, DIM)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def database(vectors):
+    """In-memory stand-in for _fetch_batch (ordered by created_at, id) and _fetch_version."""
+    rows = [make_row(i, vectors[i]) for i in range(len(vectors))]
+    state = {"rows": rows[:12], "acts_updated_at": "2025-12-01T09:00:00+00:00"}
+
+    async def fetch_batch(after, limit):
+        result = [
+            row for row in state["rows"]
+            if after is None or (row["created_at"], row["id"]) > after
+        ]
+        return result[:limit]
+
+    async def fetch_version():
+        return len(state["rows"]), state["acts_updated_at"]
+
+    state["all_rows"] = rows
+    state["fetch"] = fetch_batch
+    state["fetch_version"] = fetch_version
+    return state
+
+
+@pytest.fixture
+def index(tmp_path, database):
+    idx = LocalVectorIndex(str(tmp_path), dim=DIM)
+    idx._fetch_batch = database["fetch"]
+    idx._fetch_version = database["fetch_version"]
+    return idx
+
+
+# =========================================================================
+# SEARCH TESTS
+# =========================================================================
+
+class TestSearch:
+    """Tests for exact top-k search."""
+
+    @pytest.mark.asyncio
+    async def test_matches_brute_force(self, index, vectors):
+        """Test that results equal brute-force cosine ranking."""
+        await index.refresh()
+        query = vectors[3] + 0.1 * vectors[7]
+
+        results = index.search(query.tolist(), top_k=5, distance_threshold=2.0)
+
+        sims = vectors[:12] @ (query / np.linalg.norm(query))
+        expected = [f"chunk-{i:04d}" for i in np.argsort(-sims)[:5]]
+        assert [r["id"] for r in results] == expected
+        assert results[0]["id"] == "chunk-0003"
+        assert results[0]["act_title"] == "Ustawa 0"
+        assert results[0]["distance"] == pytest.approx(1 - sims[3], abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_distance_threshold(self, index, vectors):
+        """Test that rows beyond threshold are dropped."""
+        await index.refresh()
+
+        results = index.search(vectors[5].tolist(), top_k=10, distance_threshold=0.5)
+
+        assert [r["id"] for r in results] == ["chunk-0005"]
+
+    def test_not_ready_without_files(self, tmp_path):
+        """Test that an empty directory is not ready."""
+        idx = LocalVectorIndex(str(tmp_path), dim=DIM)
+
+        assert idx.is_ready(DIM) is False
+        assert idx.is_ready(1024) is False
+
+
+# =========================================================================
+# REFRESH TESTS
+# =========================================================================
+
+class TestRefresh:
+    """Tests for incremental and full refresh."""
+
+    @pytest.mark.asyncio
+    async def test_incremental_refresh(self, index, database, vectors):
+        """Test that only new rows are appended after the watermark."""
+        assert await index.refresh() == 12
+
+        database["rows"] = database["all_rows"]
+        assert await index.refresh() == 8
+        assert await index.refresh() == 0
+
+        results = index.search(vectors[15].tolist(), top_k=1, distance_threshold=2.0)
+        assert results[0]["id"] == "chunk-0015"
+        assert index.get_stats()["count"] == 20
+
+    @pytest.mark.asyncio
+    async def test_full_refresh_drops_deleted_rows(self, index, database, vectors, tmp_path):
+        """Test that full rebuild switches to a new generation without deleted rows."""
+        await index.refresh()
+        database["rows"] = [row for row in database["rows"] if row["id"] != "chunk-0002"]
+
+        await index.refresh(full=True)
+
+        results = index.search(vectors[2].tolist(), top_k=1, distance_threshold=2.0)
+        assert results[0]["id"] != "chunk-0002"
+        assert index.get_stats()["generation"] == 1
+        assert not (tmp_path / "embeddings.0.f32").exists()
+
+    @pytest.mark.asyncio
+    async def test_interrupted_append_is_discarded(self, index, database, vectors, tmp_path):
+        """Test that leftovers of an interrupted refresh are truncated."""
+        await index.refresh()
+        with open(tmp_path / "embeddings.0.f32", "ab") as f:
+            f.write(b"\x00" * 100)
+
+        database["rows"] = database["all_rows"]
+        await index.refresh()
+
+        results = index.search(vectors[19].tolist(), top_k=1, distance_threshold=2.0)
+        assert results[0]["id"] == "chunk-0019"
+        assert results[0]["distance"] == pytest.approx(0.0, abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_second_instance_sees_refresh(self, index, database, vectors, tmp_path):
+        """Test that another worker picks up refreshed files via manifest."""
+        reader = LocalVectorIndex(str(tmp_path), dim=DIM)
+        await index.refresh()
+        assert reader.is_ready(DIM)
+
+        database["rows"] = database["all_rows"]
+        await index.refresh()
+
+        results = reader.search(vectors[18].tolist(), top_k=1, distance_threshold=2.0)
+        assert results[0]["id"] == "chunk-0018"
+
+    @pytest.mark.asyncio
+    async def test_sync_rebuilds_after_deletion(self, index, database, vectors):
+        """Test that sync() rebuilds when chunks were deleted from the database."""
+        await index.sync()
+        database["rows"] = database["all_rows"]
+        assert await index.sync() == 8
+        assert index.is_ready(DIM)
+        assert index.get_stats()["generation"] == 0
+
+        database["rows"] = [row for row in database["rows"] if row["id"] != "chunk-0002"]
+        assert await index.sync() == 19
+
+        results = index.search(vectors[2].tolist(), top_k=1, distance_threshold=2.0)
+        assert results[0]["id"] != "chunk-0002"
+        assert index.get_stats()["generation"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sync_rebuilds_after_act_change(self, index, database):
+        """Test that sync() rebuilds when legal act metadata changed."""
+        await index.sync()
+        await index.sync()
+        assert index.is_ready(DIM)
+        assert index.get_stats()["generation"] == 0
+
+        database["acts_updated_at"] = "2025-12-02T09:00:00+00:00"
+        await index.sync()
+        await index.sync()
+
+        assert index.is_ready(DIM)
+        assert index.get_stats()["generation"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batches(self, index, database, vectors):
+        """Test that refresh pages through more rows than one batch."""
+        with patch("backend.services.local_vector_index.REFRESH_BATCH_SIZE", 5):
+            assert await index.refresh() == 12
+
+
+# =========================================================================
+# ROUTING TESTS
+# =========================================================================
+
+class TestSemanticSearchRouting:
+    """Tests for semantic_search() using the local index."""
+
+    @pytest.mark.asyncio
+    async def test_local_index_skips_database(self, index, vectors):
+        """Test that a ready local index answers without an RPC."""
+        await index.refresh()
+
+        with patch('backend.services.vector_search.get_local_vector_index', return_value=index), \
+             patch('backend.services.vector_search.get_supabase') as mock_supabase:
+            results = await semantic_search(vectors[4].tolist(), top_k=3, distance_threshold=2.0)
+
+        mock_supabase.assert_not_called()
+        assert results[0]["id"] == "chunk-0004"
+        assert results[0]["legal_act"]["title"] == "Ustawa 1"
+
+    @pytest.mark.asyncio
+    async def test_dimension_mismatch_uses_database(self, index):
+        """Test that 1024-dim queries fall back to the RPC."""
+        await index.refresh()
+
+        with patch('backend.services.vector_search.get_local_vector_index', return_value=index), \
+             patch('backend.services.vector_search.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+            mock_supabase.return_value = mock_client
+
+            with pytest.raises(NoRelevantActsError):
+                await semantic_search([0.1] * 1024, top_k=3)
+
+        mock_client.rpc.assert_called_once()
@@ -0,0 +1,494 @@
+"""
+PrawnikGPT Backend - Ollama Host Pool Tests
+
+Unit tests for multi-host Ollama routing:
+- Model pinning and installed-model affinity
+- Least-loaded selection with resident-model preference
+- Down marking of unreachable hosts
+- Failover in OllamaService._retry_request
+- Single-host behaviour, per-host model concurrency limits
+- Circuit breaker (closed/open/half-open) and fail-fast requests,
+  also for streaming generation
+- Hedged requests, scheduler slot taken before host selection
+"""
+
+import asyncio
+import time
+from collections import deque
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+from backend.config import settings
+from backend.services.exceptions import (
+    LLMRequestShedError,
+    OLLAMATimeoutError,
+    OLLAMAUnavailableError
+)
+from backend.services.llm_scheduler import LLMScheduler
+from backend.services.ollama_pool import CircuitBreaker, OllamaPool
+from backend.services.ollama_service import OllamaService
+
+SMALL = "http://gpu-small:11434"
+BIG = "http://gpu-big:11434"
+
+
+# =========================================================================
+# HELPERS
+# =========================================================================
+
+def ollama_server(installed, loaded=(), refuse=False, delay=0.0):
+    """Stand-in Ollama server: /api/tags, /api/ps and /api/generate."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delay)
+        if refuse:
+            raise httpx.ConnectError("Connection refused", request=request)
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": name} for name in installed]})
+        if request.url.path == "/api/ps":
+            return httpx.Response(200, json={"models": [{"name": name} for name in loaded]})
+        return httpx.Response(200, json={"response": f"from {request.url.host}"})
+
+    return handler
+
+
+def routed_service(servers, **kwargs) -> OllamaService:
+    """OllamaService over the stand-in servers (first = primary host)."""
+    urls = list(servers)
+    service = OllamaService(base_url=urls[0], extra_hosts=urls[1:], **kwargs)
+    for host in service._pool.hosts:
+        host._client_factory = client_factory(servers)
+    service._pool._last_refresh = float("inf")  # No background refresh
+    return service
+
+
+def client_factory(servers):
+    """Client factory routing each base URL to its stand-in server."""
+    def create(base_url: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=base_url, transport=httpx.MockTransport(servers[base_url]))
+
+    return create
+
+
+# =========================================================================
+# POOL TESTS
+# =========================================================================
+
+class TestOllamaPool:
+    """Tests for OllamaPool host selection."""
+
+    @pytest.mark.asyncio
+    async def test_pinned_model_uses_pinned_host(self):
+        """Test that a pinned model is only routed to its hosts."""
+        pool = OllamaPool([SMALL], model_hosts={"gpt-oss:120b": [BIG]})
+
+        assert [host.base_url for host in pool.hosts] == [SMALL, BIG]
+        for _ in range(3):
+            assert pool.select("gpt-oss:120b").base_url == BIG
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_installed_and_resident_affinity(self):
+        """Test that hosts with the model installed and loaded are preferred."""
+        servers = {
+            SMALL: ollama_server(["mistral:7b"], loaded=["mistral:7b"]),
+            BIG: ollama_server(["mistral:7b", "gpt-oss:120b"])
+        }
+        pool = OllamaPool([SMALL, BIG], client_factory=client_factory(servers))
+
+        assert await pool.refresh() == 2
+        assert pool.select("gpt-oss:120b").base_url == BIG  # Only host with the model
+        assert pool.select("mistral").base_url == SMALL  # Loaded (":latest" not needed)
+        assert pool.all_models() == ["gpt-oss:120b", "mistral:7b"]
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_least_loaded_selection(self):
+        """Test that busy hosts lose to idle ones, cold loads costing extra."""
+        pool = OllamaPool([SMALL, BIG])
+        small, big = pool.hosts
+        small.resident = {"mistral:7b"}
+        big.resident = {"mistral:7b"}
+
+        small.in_flight = 2
+        assert pool.select("mistral:7b") is big
+
+        big.resident = set()  # Cold load on big outweighs two requests in flight
+        assert pool.select("mistral:7b") is small
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_unreachable_host_marked_down(self):
+        """Test that failed refreshes take a host out of rotation."""
+        servers = {
+            SMALL: ollama_server(["mistral:7b"], refuse=True),
+            BIG: ollama_server(["mistral:7b"])
+        }
+        pool = OllamaPool([SMALL, BIG], client_factory=client_factory(servers))
+
+        assert await pool.refresh() == 1
+        assert not pool.hosts[0].healthy
+        assert pool.select("mistral:7b").base_url == BIG
+        assert pool.get_stats()["hosts"][SMALL]["failures"] == 1
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_pinned_host_list(self):
+        """Test that a model pinned to no reachable candidates is rejected."""
+        pool = OllamaPool([SMALL, BIG], model_hosts={"gpt-oss:120b": []})
+
+        # Empty pin list means no pinning
+        assert pool.select("gpt-oss:120b") in pool.hosts
+        with pytest.raises(ValueError):
+            OllamaPool([])
+        await pool.close()
+
+
+# =========================================================================
+# SERVICE ROUTING TESTS
+# =========================================================================
+
+class TestOllamaServiceRouting:
+    """Tests for host routing in OllamaService."""
+
+    @staticmethod
+    async def _generate(service: OllamaService) -> str:
+        """Minimal request made through the host selected by _retry_request()."""
+        client = await service._get_client()
+        response = await client.post("/api/generate", json={})
+        return response.json()["response"]
+
+    @pytest.mark.asyncio
+    async def test_failover_to_healthy_host(self):
+        """Test that a refused connection fails over without backoff."""
+        servers = {
+            SMALL: ollama_server(["mistral:7b"], refuse=True),
+            BIG: ollama_server(["mistral:7b"])
+        }
+        service = routed_service(servers, max_retries=1, retry_delay=10)
+
+        result = await service._retry_request(lambda: self._generate(service), model="mistral:7b")
+
+        assert result == "from gpu-big"
+        stats = service.get_stats()["hosts"]
+        assert stats["failovers"] == 1
+        assert stats["hosts"][SMALL]["healthy"] is False
+        assert stats["hosts"][BIG]["in_flight"] == 0
+        await service._pool.close()
+
+    @pytest.mark.asyncio
+    async def test_failover_exhausted(self):
+        """Test that the error surfaces when every host is down."""
+        servers = {
+            SMALL: ollama_server([], refuse=True),
+            BIG: ollama_server([], refuse=True)
+        }
+        service = routed_service(servers, max_retries=1, retry_delay=0.01)
+
+        with pytest.raises(OLLAMAUnavailableError):
+            await service._retry_request(lambda: self._generate(service), model="mistral:7b")
+        await service._pool.close()
+
+    @pytest.mark.asyncio
+    async def test_single_host_unchanged(self):
+        """Test that one configured host is always used, without refreshes."""
+        service = OllamaService(base_url=SMALL)
+
+        assert not service._pool.is_multi_host
+        assert service._pool.select("gpt-oss:120b") is service._pool.primary
+        assert service._pool._refresh_task is None
+        assert await service._get_client() is service._pool.primary.client
+        await service._pool.close()
+
+    @pytest.mark.asyncio
+    async def test_model_limits_scale_with_hosts(self):
+        """Test that per-host concurrency limits are multiplied by eligible hosts."""
+        service = OllamaService(
+            base_url=SMALL,
+            extra_hosts=[BIG],
+            model_hosts={settings.ollama_accurate_model: [BIG]}
+        )
+
+        limits = service._scheduler.get_limits()
+
+        assert limits[settings.ollama_fast_model] == 2 * settings.ollama_fast_model_concurrency
+        assert limits[settings.ollama_embedding_model] == 2 * settings.ollama_embedding_model_concurrency
+        assert limits[settings.ollama_accurate_model] == settings.ollama_accurate_model_concurrency
+        await service._pool.close()
+
+
+# =========================================================================
+# CIRCUIT BREAKER TESTS
+# =========================================================================
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker state transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the threshold of consecutive failures opens the circuit."""
+        breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()  # Resets the count
+        for _ in range(3):
+            breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+        assert breaker.get_stats()["rejected"] == 1
+
+    def test_half_open_admits_single_probe(self):
+        """Test that one probe passes after the reset period and decides the state."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow()  # Probe still running
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.opened == 2
+
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow() and breaker.allow()
+
+    def test_released_probe_can_be_retried(self):
+        """Test that a probe without a verdict does not block the circuit."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+        breaker.record_failure()
+
+        assert breaker.allow()
+        breaker.release()
+        assert breaker.allow()
+
+    def test_disabled_never_opens(self):
+        """Test that a disabled breaker only counts failures."""
+        breaker = CircuitBreaker(failure_threshold=1, enabled=False)
+        breaker.record_failure()
+        breaker.record_failure()
+
+        assert breaker.allow()
+        assert breaker.consecutive_failures == 2
+
+
+class TestCircuitBreakerRouting:
+    """Tests for circuit breakers in host selection and OllamaService."""
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(self):
+        """Test that requests to a host with an open circuit are not sent."""
+        service = OllamaService(base_url=SMALL, max_retries=1, retry_delay=0.01)
+        breaker = service._pool.primary.breaker("mistral:7b")
+        breaker.failure_threshold = 2
+        calls = 0
+
+        async def timing_out():
+            nonlocal calls
+            calls += 1
+            raise OLLAMATimeoutError("Generation timed out")
+
+        for _ in range(2):
+            with pytest.raises(OLLAMATimeoutError):
+                await service._retry_request(timing_out, model="mistral:7b")
+
+        with pytest.raises(OLLAMAUnavailableError, match="Circuit open"):
+            await service._retry_request(timing_out, model="mistral:7b")
+        assert calls == 2
+
+        # Other models on the same host are unaffected
+        assert service._pool.primary.breaker("nomic-embed-text").allow()
+        await service._pool.close()
+
+    @pytest.mark.asyncio
+    async def test_shed_requests_do_not_trip_circuit(self):
+        """Test that requests shed by the local scheduler are not host failures."""
+        service = OllamaService(base_url=SMALL)
+        breaker = service._pool.primary.breaker("mistral:7b")
+        breaker.failure_threshold = 1
+
+        async def shed():
+            raise LLMRequestShedError("Deadline cannot be met")
+
+        with pytest.raises(LLMRequestShedError):
+            await service._retry_request(shed, model="mistral:7b")
+        assert breaker.state == CircuitBreaker.CLOSED
+        await service._pool.close()
+
+    @staticmethod
+    def _stream_service(handler) -> OllamaService:
+        """Single-host service whose /api/generate is answered by handler."""
+        service = routed_service({SMALL: handler})
+        service.validate_model = AsyncMock(return_value=True)
+        return service
+
+    @staticmethod
+    async def _consume(service: OllamaService, timeout: int = 15) -> str:
+        """Read a whole generate_text_stream() response."""
+        return "".join([
+            token async for token in service.generate_text_stream("Pytanie o umowę", "mistral:7b", timeout=timeout)
+        ])
+
+    @pytest.mark.asyncio
+    async def test_stream_5xx_reopens_half_open_circuit(self):
+        """Test that a streaming probe answered with HTTP 500 re-opens the circuit."""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(500, text="internal error")
+
+        service = self._stream_service(handler)
+        host = service._pool.primary
+        breaker = host.breaker("mistral:7b")
+        breaker.failure_threshold = 1
+        breaker.reset_seconds = 60
+        breaker.record_failure()
+        breaker.opened_at -= 61  # Reset period over - next request is the probe
+
+        with pytest.raises(OLLAMAUnavailableError, match="HTTP 500"):
+            await self._consume(service)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.opened == 2
+        assert not breaker.is_available()
+        assert host.failures == 1
+        assert host.in_flight == 0
+        await service._pool.close()
+
+    @pytest.mark.asyncio
+    async def test_stream_error_line_and_timeout_are_host_failures(self):
+        """Test that an NDJSON error line and a stream timeout count against the host."""
+        async def error_line(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, text='{"error": "model runner crashed"}\n')
+
+        async def too_slow(request: httpx.Request) -> httpx.Response:
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        for handler, error in ((error_line, OLLAMAUnavailableError), (too_slow, OLLAMATimeoutError)):
+            service = self._stream_service(handler)
+            host = service._pool.primary
+
+            with pytest.raises(error):
+                await self._consume(service)
+
+            assert host.failures == 1
+            assert host.breaker("mistral:7b").consecutive_failures == 1
+            await service._pool.close()
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_routes_to_other_host(self):
+        """Test that host selection skips hosts whose circuit is open."""
+        pool = OllamaPool([SMALL, BIG], failure_threshold=1)
+        small, big = pool.hosts
+        big.in_flight = 3
+        small.breaker("mistral:7b").record_failure()
+
+        assert pool.select("mistral:7b") is big
+        assert pool.select("nomic-embed-text") is small
+        await pool.close()
+
+
+# =========================================================================
+# HEDGING TESTS
+# =========================================================================
+
+class TestHedging:
+    """Tests for hedged requests."""
+
+    @staticmethod
+    async def _generate(service: OllamaService) -> str:
+        """Minimal request made through the host selected by _retry_request()."""
+        client = await service._get_client()
+        response = await client.post("/api/generate", json={})
+        return response.json()["response"]
+
+    @pytest.mark.asyncio
+    async def test_slow_request_is_hedged(self):
+        """Test that a request slower than p95 is duplicated and the fast copy wins."""
+        servers = {
+            SMALL: ollama_server(["mistral:7b"], delay=1.0),
+            BIG: ollama_server(["mistral:7b"])
+        }
+        service = routed_service(servers)
+        service._hedging = True
+        service._latencies["mistral:7b"] = deque([0.01] * 20)
+
+        result = await asyncio.wait_for(
+            service._retry_request(lambda: self._generate(service), model="mistral:7b", hedge=True),
+            timeout=0.5
+        )
+
+        assert result == "from gpu-big"
+        assert service.get_stats()["hedging"] == {"enabled": True, "hedged": 1, "won": 1}
+        await asyncio.sleep(0)  # Let the cancelled request finish
+        assert service._pool.hosts[0].in_flight == 0
+        await service._pool.close()
+
+    @pytest.mark.asyncio
+    async def test_no_hedging_without_samples(self):
+        """Test that hedging waits for enough latency samples."""
+        servers = {
+            SMALL: ollama_server(["mistral:7b"], delay=0.1),
+            BIG: ollama_server(["mistral:7b"])
+        }
+        service = routed_service(servers)
+        service._hedging = True
+
+        result = await service._retry_request(
+            lambda: self._generate(service), model="mistral:7b", hedge=True
+        )
+
+        assert result == "from gpu-small"
+        assert service.get_stats()["hedging"]["hedged"] == 0
+        assert len(service._latencies["mistral:7b"]) == 1
+        await service._pool.close()
+
+    @pytest.mark.asyncio
+    async def test_hedge_shares_the_request_slot(self):
+        """Test that a hedge is not queued behind its own request's slot."""
+        servers = {
+            SMALL: ollama_server(["mistral:7b"], delay=1.0),
+            BIG: ollama_server(["mistral:7b"])
+        }
+        service = routed_service(servers)
+        service._scheduler = LLMScheduler({"mistral:7b": 1})
+        service._hedging = True
+        service._latencies["mistral:7b"] = deque([0.01] * 20)
+
+        result = await asyncio.wait_for(
+            service._scheduled_request(
+                lambda: self._generate(service), "mistral:7b", None, None, time.time() + 5, hedge=True
+            ),
+            timeout=0.5
+        )
+
+        assert result == "from gpu-big"
+        await service._pool.close()
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_is_not_host_latency(self):
+        """Test that requests queued for a slot are not in flight or timed on a host."""
+        servers = {
+            SMALL: ollama_server(["mistral:7b"], delay=0.2),
+            BIG: ollama_server(["mistral:7b"], delay=0.2)
+        }
+        service = routed_service(servers)
+        service._scheduler = LLMScheduler({"mistral:7b": 1})
+
+        requests = [
+            asyncio.ensure_future(service._scheduled_request(
+                lambda: self._generate(service), "mistral:7b", None, None, time.time() + 5
+            ))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0.05)
+
+        assert sum(host.in_flight for host in service._pool.hosts) == 1
+
+        await asyncio.gather(*requests)
+
+        assert len(service._latencies["mistral:7b"]) == 2
+        assert max(service._latencies["mistral:7b"]) < 0.35
+        await service._pool.close()
@@ -17,6 +17,7 @@ from typing import List
 
 import httpx
 
+from backend.config import settings
 from backend.services.ollama_service import (
     OllamaService,
     get_ollama_service,
@@ -339,6 +340,10 @@ class TestStructuredOutput:
             assert result == json_response
             assert "answer" in result
             assert "sources" in result
+            
+            # Same context window as other generation requests (no model reload)
+            payload = mock_httpx_client.post.call_args.kwargs["json"]
+            assert payload["options"]["num_ctx"] == settings.ollama_fast_num_ctx
 
     @pytest.mark.asyncio
     async def test_generate_text_structured_invalid_json(self, ollama_service, mock_httpx_client):
@@ -362,6 +367,17 @@ class TestStructuredOutput:
                     model="mistral:7b",
                     json_schema=schema
                 )
+    
+    @pytest.mark.asyncio
+    async def test_warmup_uses_model_num_ctx(self, ollama_service):
+        """Test that warmup loads the model with the context window of real requests."""
+        with patch.object(ollama_service, 'generate_text', new_callable=AsyncMock) as mock_generate:
+            assert await ollama_service.warmup_model(settings.ollama_accurate_model) is True
+            assert await ollama_service.warmup_model(settings.ollama_embedding_model) is True
+        
+        accurate_call, embedding_call = mock_generate.call_args_list
+        assert accurate_call.kwargs["num_ctx"] == settings.ollama_accurate_num_ctx
+        assert embedding_call.kwargs["num_ctx"] is None
 
 
 # =========================================================================
@@ -417,6 +433,234 @@ class TestEmbeddingGeneration:
             mock_service.generate_embedding.assert_called_once_with("Test text", None, None)
 
 
+# =========================================================================
+# BATCHED EMBEDDING TESTS
+# =========================================================================
+
+class TestEmbeddingBatch:
+    """Tests for generate_embeddings_batch() and micro-batching."""
+
+    @staticmethod
+    def _embed_response(request_json):
+        """Build /api/embed response with one distinct vector per input."""
+        embeddings = [[float(len(text))] * 4 for text in request_json["input"]]
+        return MagicMock(status_code=200, json=MagicMock(return_value={"embeddings": embeddings}))
+
+    @pytest.mark.asyncio
+    async def test_batch_splits_and_keeps_order(self, ollama_service, mock_httpx_client):
+        """Test that oversized input is split into several requests in order."""
+        texts = ["a" * n for n in range(1, 8)]
+        mock_httpx_client.post = AsyncMock(
+            side_effect=lambda url, json, timeout: self._embed_response(json)
+        )
+        
+        with patch.object(ollama_service, '_get_client', return_value=mock_httpx_client):
+            result = await ollama_service.generate_embeddings_batch(texts, max_batch=3)
+        
+        assert mock_httpx_client.post.call_count == 3
+        assert all(call.args[0] == "/api/embed" for call in mock_httpx_client.post.call_args_list)
+        assert [len(call.kwargs["json"]["input"]) for call in mock_httpx_client.post.call_args_list] == [3, 3, 1]
+        assert [embedding[0] for embedding in result] == [float(n) for n in range(1, 8)]
+
+    @pytest.mark.asyncio
+    async def test_batch_rejects_empty_text(self, ollama_service):
+        """Test batch embedding with an empty input text."""
+        with pytest.raises(EmbeddingGenerationError, match="index 1"):
+            await ollama_service.generate_embeddings_batch(["ok", "  "])
+
+    @pytest.mark.asyncio
+    async def test_batch_count_mismatch(self, ollama_service, mock_httpx_client):
+        """Test batch embedding when Ollama returns fewer vectors than inputs."""
+        mock_httpx_client.post = AsyncMock(return_value=MagicMock(
+            status_code=200,
+            json=MagicMock(return_value={"embeddings": [[0.1] * 4]})
+        ))
+        
+        with patch.object(ollama_service, '_get_client', return_value=mock_httpx_client):
+            with pytest.raises(EmbeddingGenerationError, match="Expected 2"):
+                await ollama_service.generate_embeddings_batch(["one", "two"])
+
+    @pytest.mark.asyncio
+    async def test_concurrent_single_calls_are_merged(self, ollama_service, mock_httpx_client):
+        """Test that concurrent generate_embedding() calls share one request."""
+        import asyncio
+        
+        mock_httpx_client.post = AsyncMock(
+            side_effect=lambda url, json, timeout: self._embed_response(json)
+        )
+        
+        with patch.object(ollama_service, '_get_client', return_value=mock_httpx_client):
+            results = await asyncio.gather(
+                ollama_service.generate_embedding("x"),
+                ollama_service.generate_embedding("xx"),
+                ollama_service.generate_embedding("xxx")
+            )
+        
+        assert mock_httpx_client.post.call_count == 1
+        assert mock_httpx_client.post.call_args.args[0] == "/api/embed"
+        assert [embedding[0] for embedding in results] == [1.0, 2.0, 3.0]
+
+
+# =========================================================================
+# STREAMING GENERATION TESTS
+# =========================================================================
+
+class TestGenerateTextStream:
+    """Tests for generate_text_stream() method."""
+
+    @staticmethod
+    def _transport_client(status_code: int, lines: List[dict] | None = None, body: bytes = b""):
+        """Build real AsyncClient backed by MockTransport returning NDJSON."""
+        if lines is not None:
+            body = "\n".join(json.dumps(line) for line in lines).encode("utf-8")
+        
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(status_code, content=body)
+        
+        return httpx.AsyncClient(
+            base_url="http://localhost:11434",
+            transport=httpx.MockTransport(handler)
+        )
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_tokens_in_order(self, ollama_service):
+        """Test that NDJSON fragments are yielded as they are parsed."""
+        client = self._transport_client(200, [
+            {"response": "Art. ", "done": False},
+            {"response": "535", "done": False},
+            {"response": "", "done": True, "eval_count": 2}
+        ])
+        
+        with patch.object(ollama_service, 'validate_model', return_value=True), \
+             patch.object(ollama_service, '_get_client', return_value=client):
+            tokens = [
+                token async for token in ollama_service.generate_text_stream(
+                    prompt="Pytanie", model="mistral:7b"
+                )
+            ]
+        
+        assert tokens == ["Art. ", "535"]
+
+    @pytest.mark.asyncio
+    async def test_stream_error_line(self, ollama_service):
+        """Test that an error object in the stream is raised."""
+        client = self._transport_client(200, [{"error": "model crashed"}])
+        
+        with patch.object(ollama_service, 'validate_model', return_value=True), \
+             patch.object(ollama_service, '_get_client', return_value=client):
+            with pytest.raises(OLLAMAUnavailableError, match="model crashed"):
+                async for _ in ollama_service.generate_text_stream(
+                    prompt="Pytanie", model="mistral:7b"
+                ):
+                    pass
+
+    @pytest.mark.asyncio
+    async def test_stream_out_of_memory(self, ollama_service):
+        """Test that HTTP 500 OOM responses map to OutOfMemoryError."""
+        client = self._transport_client(500, body=b"out of memory")
+        
+        with patch.object(ollama_service, 'validate_model', return_value=True), \
+             patch.object(ollama_service, '_get_client', return_value=client):
+            with pytest.raises(OutOfMemoryError):
+                async for _ in ollama_service.generate_text_stream(
+                    prompt="Pytanie", model="mistral:7b"
+                ):
+                    pass
+
+
+# =========================================================================
+# SINGLE-FLIGHT COALESCING TESTS
+# =========================================================================
+
+class TestSingleFlight:
+    """Tests for coalescing of identical in-flight requests."""
+
+    @staticmethod
+    def _slow_generate_response():
+        """Build AsyncMock post() that answers after a short delay."""
+        import asyncio
+        
+        async def _post(url, json, timeout):
+            await asyncio.sleep(0.01)
+            return MagicMock(status_code=200, json=MagicMock(return_value={"response": "Odpowiedź"}))
+        
+        return AsyncMock(side_effect=_post)
+
+    @pytest.mark.asyncio
+    async def test_identical_generations_share_one_call(self, ollama_service, mock_httpx_client):
+        """Test that identical concurrent generate_text() calls cost one request."""
+        import asyncio
+        
+        mock_httpx_client.post = self._slow_generate_response()
+        
+        with patch.object(ollama_service, 'validate_model', return_value=True), \
+             patch.object(ollama_service, '_get_client', return_value=mock_httpx_client):
+            results = await asyncio.gather(*[
+                ollama_service.generate_text(prompt="Pytanie", model="mistral:7b", timeout=15)
+                for _ in range(5)
+            ])
+        
+        assert results == ["Odpowiedź"] * 5
+        assert mock_httpx_client.post.call_count == 1
+        assert ollama_service.get_stats()["single_flight"]["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_different_options_not_coalesced(self, ollama_service, mock_httpx_client):
+        """Test that calls with different options are not merged."""
+        import asyncio
+        
+        mock_httpx_client.post = self._slow_generate_response()
+        
+        with patch.object(ollama_service, 'validate_model', return_value=True), \
+             patch.object(ollama_service, '_get_client', return_value=mock_httpx_client):
+            await asyncio.gather(
+                ollama_service.generate_text(prompt="Pytanie", model="mistral:7b", temperature=0.3),
+                ollama_service.generate_text(prompt="Pytanie", model="mistral:7b", temperature=0.7)
+            )
+        
+        assert mock_httpx_client.post.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_different_timeouts_not_coalesced(self, ollama_service, mock_httpx_client):
+        """Test that a caller never inherits another caller's timeout."""
+        import asyncio
+        
+        mock_httpx_client.post = self._slow_generate_response()
+        
+        with patch.object(ollama_service, 'validate_model', return_value=True), \
+             patch.object(ollama_service, '_get_client', return_value=mock_httpx_client):
+            await asyncio.gather(
+                ollama_service.generate_text(prompt="Pytanie", model="mistral:7b", timeout=5),
+                ollama_service.generate_text(prompt="Pytanie", model="mistral:7b", timeout=60)
+            )
+        
+        timeouts = sorted(call.kwargs["timeout"] for call in mock_httpx_client.post.call_args_list)
+        assert timeouts == [5, 60]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self, ollama_service, mock_httpx_client):
+        """Test that one cancelled caller leaves the shared call running for others."""
+        import asyncio
+        
+        mock_httpx_client.post = self._slow_generate_response()
+        
+        with patch.object(ollama_service, 'validate_model', return_value=True), \
+             patch.object(ollama_service, '_get_client', return_value=mock_httpx_client):
+            first = asyncio.create_task(
+                ollama_service.generate_text(prompt="Pytanie", model="mistral:7b")
+            )
+            second = asyncio.create_task(
+                ollama_service.generate_text(prompt="Pytanie", model="mistral:7b")
+            )
+            await asyncio.sleep(0)
+            first.cancel()
+            
+            assert await second == "Odpowiedź"
+            assert first.cancelled()
+            assert mock_httpx_client.post.call_count == 1
+
+
 # =========================================================================
 # RETRY LOGIC TESTS
 # =========================================================================
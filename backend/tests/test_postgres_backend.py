@@ -0,0 +1,258 @@
+"""
+PrawnikGPT Backend - asyncpg Backend Tests
+
+Unit tests for the optional direct PostgreSQL backend:
+- pgvector binary codec
+- Backend selection (settings flag, missing dependency)
+- PostgREST fallback (connection errors only)
+- Pool creation (single attempt, backoff after failure)
+- SQL identifier validation
+"""
+
+import pytest
+import struct
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.config import settings
+from backend.db.postgres import (
+    PostgresPool,
+    PostgresUnavailableError,
+    encode_vector,
+    decode_vector,
+    execute_rpc
+)
+
+
+# =========================================================================
+# FIXTURES
+# =========================================================================
+
+@pytest.fixture
+def mock_postgrest_client():
+    """Mock async Supabase client returning one RPC row."""
+    client = MagicMock()
+    client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=[{"id": "rest"}]))
+    return client
+
+
+@pytest.fixture
+def asyncpg_enabled():
+    """Enable asyncpg backend with a stand-in asyncpg module."""
+    with patch.object(settings, 'database_backend', 'asyncpg'), \
+         patch.object(settings, 'database_url', 'postgresql://test'), \
+         patch('backend.db.postgres.asyncpg', MagicMock()):
+        yield
+
+
+class FakeInterfaceError(Exception):
+    """Stand-in for asyncpg.InterfaceError."""
+
+
+class FakeDataError(FakeInterfaceError, ValueError):
+    """Stand-in for asyncpg.DataError (an InterfaceError subclass)."""
+
+
+class FakeConnectionDoesNotExistError(FakeInterfaceError):
+    """Stand-in for asyncpg.ConnectionDoesNotExistError."""
+
+
+@pytest.fixture
+def fake_asyncpg():
+    """Stand-in asyncpg module with a real exception hierarchy."""
+    module = SimpleNamespace(
+        InterfaceError=FakeInterfaceError,
+        DataError=FakeDataError,
+        ConnectionDoesNotExistError=FakeConnectionDoesNotExistError,
+        PostgresConnectionError=type("PostgresConnectionError", (Exception,), {}),
+        CannotConnectNowError=type("CannotConnectNowError", (Exception,), {})
+    )
+    with patch('backend.db.postgres.asyncpg', module):
+        yield module
+
+
+def mock_pool(conn):
+    """Mock asyncpg pool handing out conn."""
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+    return pool
+
+
+# =========================================================================
+# CODEC TESTS
+# =========================================================================
+
+class TestVectorCodec:
+    """Tests for pgvector binary format."""
+    
+    def test_encode_layout(self):
+        """Test header (dim, unused) and big-endian float32 payload."""
+        data = encode_vector([1.0, -2.0])
+        
+        assert data[:4] == struct.pack(">HH", 2, 0)
+        assert len(data) == 4 + 2 * 4
+    
+    def test_roundtrip(self):
+        """Test encode/decode roundtrip."""
+        vector = [0.5, -0.25, 0.125] * 8
+        
+        assert decode_vector(encode_vector(vector)) == vector
+
+
+# =========================================================================
+# BACKEND SELECTION TESTS
+# =========================================================================
+
+class TestExecuteRpc:
+    """Tests for execute_rpc() backend selection and fallback."""
+    
+    @pytest.mark.asyncio
+    async def test_postgrest_by_default(self, mock_postgrest_client):
+        """Test that PostgREST is used when DATABASE_BACKEND=postgrest."""
+        with patch.object(settings, 'database_backend', 'postgrest'), \
+             patch.object(PostgresPool, 'call_function', new_callable=AsyncMock) as mock_call:
+            rows = await execute_rpc(mock_postgrest_client, "fetch_related_acts", {"max_depth": 1})
+        
+        assert rows == [{"id": "rest"}]
+        mock_call.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_asyncpg_when_enabled(self, mock_postgrest_client, asyncpg_enabled):
+        """Test that the asyncpg pool is used when enabled."""
+        with patch.object(PostgresPool, 'call_function', new_callable=AsyncMock) as mock_call:
+            mock_call.return_value = [{"id": "pg"}]
+            rows = await execute_rpc(mock_postgrest_client, "fetch_related_acts", {"max_depth": 1})
+        
+        assert rows == [{"id": "pg"}]
+        mock_postgrest_client.rpc.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_fallback_when_pool_unavailable(self, mock_postgrest_client, asyncpg_enabled):
+        """Test PostgREST fallback if the database cannot be reached."""
+        with patch.object(PostgresPool, 'call_function', new_callable=AsyncMock) as mock_call:
+            mock_call.side_effect = PostgresUnavailableError("connection refused")
+            rows = await execute_rpc(mock_postgrest_client, "fetch_related_acts", {"max_depth": 1})
+        
+        assert rows == [{"id": "rest"}]
+    
+    def test_disabled_without_database_url(self):
+        """Test that asyncpg backend is not used without DATABASE_URL."""
+        with patch.object(settings, 'database_backend', 'asyncpg'), \
+             patch.object(settings, 'database_url', None):
+            assert PostgresPool.is_enabled() is False
+
+
+class TestGetPool:
+    """Tests for PostgresPool.get_pool() creation and backoff."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_pool(self):
+        """Start and end each test without a pool or backoff."""
+        with patch.object(PostgresPool, '_pool', None), \
+             patch.object(PostgresPool, '_lock', None), \
+             patch.object(PostgresPool, '_retry_at', 0.0):
+            yield
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_create_one_pool(self):
+        """Test that concurrent first calls share a single pool creation."""
+        import asyncio
+        
+        pool = MagicMock()
+        
+        async def create_pool(**kwargs):
+            await asyncio.sleep(0.01)
+            return pool
+        
+        module = SimpleNamespace(create_pool=AsyncMock(side_effect=create_pool), PostgresError=Exception)
+        with patch('backend.db.postgres.asyncpg', module):
+            pools = await asyncio.gather(*(PostgresPool.get_pool() for _ in range(5)))
+        
+        assert all(p is pool for p in pools)
+        module.create_pool.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_failure_backs_off(self):
+        """Test that a failed creation is not retried until the window passes."""
+        module = SimpleNamespace(
+            create_pool=AsyncMock(side_effect=OSError("connection refused")),
+            PostgresError=type("PostgresError", (Exception,), {})
+        )
+        
+        with patch('backend.db.postgres.asyncpg', module), \
+             patch('backend.db.postgres.time.monotonic', return_value=1000.0):
+            for _ in range(3):
+                with pytest.raises(PostgresUnavailableError):
+                    await PostgresPool.get_pool()
+        
+        module.create_pool.assert_awaited_once()
+        
+        with patch('backend.db.postgres.asyncpg', module), \
+             patch('backend.db.postgres.time.monotonic', return_value=1031.0):
+            with pytest.raises(PostgresUnavailableError):
+                await PostgresPool.get_pool()
+        
+        assert module.create_pool.await_count == 2
+
+
+# =========================================================================
+# SQL CONSTRUCTION TESTS
+# =========================================================================
+
+class TestCallFunction:
+    """Tests for PostgresPool.call_function()."""
+    
+    @pytest.mark.asyncio
+    async def test_named_arguments_and_row_conversion(self):
+        """Test named-argument SQL and UUID conversion of result rows."""
+        from uuid import UUID
+        
+        conn = MagicMock()
+        conn.fetch = AsyncMock(return_value=[{"act_id": UUID(int=1), "depth": 1}])
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+        pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        
+        with patch.object(PostgresPool, 'get_pool', new_callable=AsyncMock, return_value=pool):
+            rows = await PostgresPool.call_function(
+                "fetch_related_acts",
+                {"seed_act_ids": ["a"], "max_depth": 2}
+            )
+        
+        conn.fetch.assert_called_once_with(
+            "SELECT * FROM fetch_related_acts(seed_act_ids => $1, max_depth => $2)",
+            ["a"],
+            2
+        )
+        assert rows == [{"act_id": str(UUID(int=1)), "depth": 1}]
+    
+    @pytest.mark.asyncio
+    async def test_connection_error_is_unavailable(self, fake_asyncpg):
+        """Test that a lost connection is reported as PostgresUnavailableError."""
+        conn = MagicMock()
+        conn.fetch = AsyncMock(side_effect=FakeConnectionDoesNotExistError("connection was closed"))
+        
+        with patch.object(PostgresPool, 'get_pool', new_callable=AsyncMock, return_value=mock_pool(conn)):
+            with pytest.raises(PostgresUnavailableError):
+                await PostgresPool.call_function("fetch_related_acts", {"max_depth": 2})
+    
+    @pytest.mark.asyncio
+    async def test_data_error_propagates(self, fake_asyncpg, mock_postgrest_client):
+        """Test that invalid arguments raise instead of retrying via PostgREST."""
+        conn = MagicMock()
+        conn.fetch = AsyncMock(side_effect=FakeDataError("invalid input for query argument $1"))
+        
+        with patch.object(settings, 'database_backend', 'asyncpg'), \
+             patch.object(settings, 'database_url', 'postgresql://test'), \
+             patch.object(PostgresPool, 'get_pool', new_callable=AsyncMock, return_value=mock_pool(conn)):
+            with pytest.raises(FakeDataError):
+                await execute_rpc(mock_postgrest_client, "fetch_related_acts", {"max_depth": "two"})
+        
+        mock_postgrest_client.rpc.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_rejects_non_identifier(self):
+        """Test that function/parameter names are validated."""
+        with pytest.raises(ValueError):
+            await PostgresPool.call_function("f(); drop table x; --", {})
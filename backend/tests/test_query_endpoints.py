@@ -2,14 +2,17 @@
 PrawnikGPT Backend - Query Management Endpoint Tests
 
 Unit tests for query management endpoints:
+- POST /api/v1/queries (submit query)
 - GET /api/v1/queries (list queries)
 - GET /api/v1/queries/{query_id} (get query details)
 - DELETE /api/v1/queries/{query_id} (delete query)
 - POST /api/v1/queries/{query_id}/accurate-response (request accurate)
+- GET /api/v1/queries/{query_id}/stream (SSE streaming)
 
 All tests use mocks for database and authentication.
 """
 
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from typing import List, Dict, Any
@@ -237,6 +240,46 @@ class TestListQueries:
         assert exc_info.value.status_code == 422
 
 
+    @pytest.mark.asyncio
+    async def test_list_queries_cursor_mode(self, sample_queries_list, sample_user_id):
+        """Test cursor pagination uses keyset repository and returns next_cursor."""
+        from backend.routers.queries import get_queries
+        
+        with patch('backend.routers.queries.list_queries_after', new_callable=AsyncMock) as mock_after, \
+             patch('backend.routers.queries.list_queries', new_callable=AsyncMock) as mock_list:
+            mock_after.return_value = (sample_queries_list[:2], None, "next-cursor")
+            
+            result = await get_queries(
+                per_page=2,
+                pagination="cursor",
+                cursor="prev-cursor",
+                count="none",
+                user_id=sample_user_id
+            )
+        
+        mock_list.assert_not_called()
+        assert mock_after.call_args[1]["cursor"] == "prev-cursor"
+        assert result.pagination.next_cursor == "next-cursor"
+        assert result.pagination.page is None
+        assert result.pagination.total_count is None
+        assert len(result.queries) == 2
+
+    @pytest.mark.asyncio
+    async def test_list_queries_invalid_cursor(self, sample_user_id):
+        """Test that a malformed cursor is rejected with 422."""
+        from backend.routers.queries import get_queries
+        from fastapi import HTTPException
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await get_queries(
+                pagination="cursor",
+                cursor="not-a-cursor",
+                user_id=sample_user_id
+            )
+        
+        assert exc_info.value.status_code == 422
+
+
 # =========================================================================
 # GET QUERY DETAILS TESTS (GET /api/v1/queries/{query_id})
 # =========================================================================
@@ -304,6 +347,29 @@ class TestGetQueryDetails:
             assert result.accurate_response.content == "Szczegółowa analiza prawna..."
             assert result.accurate_response.model_name == "gpt-oss:120b"
 
+    @pytest.mark.asyncio
+    async def test_get_query_failed_response(self, sample_user_id):
+        """Test that a recorded generation failure is reported as failed, not pending."""
+        from backend.routers.queries import get_query
+        
+        failed_query = {
+            "id": "query-123",
+            "query_text": "Pytanie o umowę",
+            "fast_response_error": "NoRelevantActsError: no acts",
+            "created_at": "2025-12-01T10:00:00Z"
+        }
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.get_ratings_by_query', new_callable=AsyncMock) as mock_ratings:
+            mock_get.return_value = failed_query
+            mock_ratings.return_value = []
+            
+            result = await get_query(query_id="query-123", user_id=sample_user_id)
+        
+        assert result.status == "failed"
+        assert result.fast_response.status == "failed"
+        assert result.accurate_response is None
+
     @pytest.mark.asyncio
     async def test_get_query_not_found(self, sample_user_id):
         """Test error when query not found."""
@@ -367,6 +433,83 @@ class TestDeleteQuery:
             assert exc_info.value.status_code == 404
 
 
+# =========================================================================
+# SUBMIT QUERY TESTS
+# =========================================================================
+
+class TestSubmitQuery:
+    """Tests for POST /api/v1/queries endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_submit_queues_fast_job(self, sample_user_id, sample_query_id):
+        """Test that the query is created and a fast job queued for it."""
+        from backend.routers.queries import submit_query
+        from backend.models.query import QuerySubmitRequest
+        
+        request = QuerySubmitRequest(query_text="Jakie są prawa konsumenta przy zakupach online?")
+        
+        with patch('backend.routers.queries.create_query', new_callable=AsyncMock) as mock_create, \
+             patch('backend.routers.queries.enqueue_job', new_callable=AsyncMock) as mock_enqueue:
+            mock_create.return_value = sample_query_id
+            
+            result = await submit_query(request=request, user_id=sample_user_id)
+            
+            assert result.query_id == sample_query_id
+            assert result.status == "processing"
+            mock_enqueue.assert_awaited_once_with("fast", {
+                "query_id": sample_query_id,
+                "user_id": sample_user_id,
+                "query_text": request.query_text
+            })
+
+    @pytest.mark.asyncio
+    async def test_submit_queue_full(self, sample_user_id, sample_query_id):
+        """Test 503 with Retry-After when the job queue is full."""
+        from backend.routers.queries import submit_query
+        from backend.models.query import QuerySubmitRequest
+        from backend.services.exceptions import JobQueueFullError
+        from fastapi import HTTPException
+        
+        request = QuerySubmitRequest(query_text="Jakie są prawa konsumenta przy zakupach online?")
+        
+        with patch('backend.routers.queries.create_query', new_callable=AsyncMock) as mock_create, \
+             patch('backend.routers.queries.delete_query', new_callable=AsyncMock) as mock_delete, \
+             patch('backend.routers.queries.enqueue_job', new_callable=AsyncMock) as mock_enqueue:
+            mock_create.return_value = sample_query_id
+            mock_enqueue.side_effect = JobQueueFullError("full")
+            
+            with pytest.raises(HTTPException) as exc_info:
+                await submit_query(request=request, user_id=sample_user_id)
+            
+            assert exc_info.value.status_code == 503
+            assert exc_info.value.headers["Retry-After"] == "30"
+            mock_delete.assert_awaited_once_with(sample_query_id, sample_user_id)
+
+    @pytest.mark.asyncio
+    async def test_submit_queue_unavailable_discards_query(self, sample_user_id, sample_query_id):
+        """Test that a query whose job cannot be queued is not left pending."""
+        from backend.routers.queries import submit_query
+        from backend.models.query import QuerySubmitRequest
+        from backend.services.generation_leases import get_generation_leases
+        from fastapi import HTTPException
+        import redis
+        
+        request = QuerySubmitRequest(query_text="Jakie są prawa konsumenta przy zakupach online?")
+        
+        with patch('backend.routers.queries.create_query', new_callable=AsyncMock) as mock_create, \
+             patch('backend.routers.queries.delete_query', new_callable=AsyncMock) as mock_delete, \
+             patch('backend.routers.queries.enqueue_job', new_callable=AsyncMock) as mock_enqueue:
+            mock_create.return_value = sample_query_id
+            mock_enqueue.side_effect = redis.exceptions.ConnectionError("redis down")
+            
+            with pytest.raises(HTTPException) as exc_info:
+                await submit_query(request=request, user_id=sample_user_id)
+        
+        assert exc_info.value.status_code == 503
+        mock_delete.assert_awaited_once_with(sample_query_id, sample_user_id)
+        assert await get_generation_leases().holder(sample_query_id, "fast") is None
+
+
 # =========================================================================
 # REQUEST ACCURATE RESPONSE TESTS
 # =========================================================================
@@ -378,16 +521,13 @@ class TestRequestAccurateResponse:
     async def test_request_accurate_success(self, sample_query_from_db, sample_user_id):
         """Test successful accurate response request."""
         from backend.routers.queries import request_accurate_response
-        from fastapi import BackgroundTasks
         
-        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get:
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.enqueue_job', new_callable=AsyncMock) as mock_enqueue:
             mock_get.return_value = sample_query_from_db
             
-            background_tasks = BackgroundTasks()
-            
             result = await request_accurate_response(
                 query_id="query-123",
-                background_tasks=background_tasks,
                 user_id=sample_user_id
             )
             
@@ -395,22 +535,68 @@ class TestRequestAccurateResponse:
             assert result.query_id == "query-123"
             assert result.accurate_response.status == "processing"
             assert result.accurate_response.estimated_time_seconds == 180
+            
+            # Verify job queued
+            mock_enqueue.assert_awaited_once_with("accurate", {
+                "query_id": "query-123",
+                "user_id": sample_user_id,
+                "query_text": sample_query_from_db["query_text"]
+            })
+
+    @pytest.mark.asyncio
+    async def test_request_accurate_already_processing(self, sample_query_from_db, sample_user_id):
+        """Test that a repeated request while the accurate job runs queues no second job."""
+        from backend.routers.queries import request_accurate_response
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.enqueue_job', new_callable=AsyncMock) as mock_enqueue:
+            mock_get.return_value = sample_query_from_db
+            
+            first = await request_accurate_response(query_id="query-123", user_id=sample_user_id)
+            second = await request_accurate_response(query_id="query-123", user_id=sample_user_id)
+        
+        assert first.accurate_response.status == "processing"
+        assert second.accurate_response.status == "processing"
+        mock_enqueue.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_request_accurate_queue_full(self, sample_query_from_db, sample_user_id):
+        """Test 503 with Retry-After when the job queue is full."""
+        from backend.routers.queries import request_accurate_response
+        from backend.services.exceptions import JobQueueFullError
+        from fastapi import HTTPException
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.enqueue_job', new_callable=AsyncMock) as mock_enqueue:
+            mock_get.return_value = sample_query_from_db
+            mock_enqueue.side_effect = JobQueueFullError("full")
+            
+            with pytest.raises(HTTPException) as exc_info:
+                await request_accurate_response(
+                    query_id="query-123",
+                    user_id=sample_user_id
+                )
+            
+            assert exc_info.value.status_code == 503
+            assert "Retry-After" in exc_info.value.headers
+            
+            # Not queued - a retry queues the job instead of reporting it in progress
+            mock_enqueue.side_effect = None
+            await request_accurate_response(query_id="query-123", user_id=sample_user_id)
+            assert mock_enqueue.await_count == 2
 
     @pytest.mark.asyncio
     async def test_request_accurate_query_not_found(self, sample_user_id):
         """Test error when query not found."""
         from backend.routers.queries import request_accurate_response
-        from fastapi import HTTPException, BackgroundTasks
+        from fastapi import HTTPException
         
         with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get:
             mock_get.return_value = None
             
-            background_tasks = BackgroundTasks()
-            
             with pytest.raises(HTTPException) as exc_info:
                 await request_accurate_response(
                     query_id="non-existent",
-                    background_tasks=background_tasks,
                     user_id=sample_user_id
                 )
             
@@ -420,7 +606,7 @@ class TestRequestAccurateResponse:
     async def test_request_accurate_already_exists(self, sample_query_from_db, sample_user_id):
         """Test error when accurate response already exists."""
         from backend.routers.queries import request_accurate_response
-        from fastapi import HTTPException, BackgroundTasks
+        from fastapi import HTTPException
         
         query_with_accurate = {
             **sample_query_from_db,
@@ -430,12 +616,9 @@ class TestRequestAccurateResponse:
         with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get:
             mock_get.return_value = query_with_accurate
             
-            background_tasks = BackgroundTasks()
-            
             with pytest.raises(HTTPException) as exc_info:
                 await request_accurate_response(
                     query_id="query-123",
-                    background_tasks=background_tasks,
                     user_id=sample_user_id
                 )
             
@@ -446,7 +629,7 @@ class TestRequestAccurateResponse:
     async def test_request_accurate_fast_not_completed(self, sample_user_id):
         """Test error when fast response not completed yet."""
         from backend.routers.queries import request_accurate_response
-        from fastapi import HTTPException, BackgroundTasks
+        from fastapi import HTTPException
         
         query_without_fast = {
             "id": "query-123",
@@ -463,12 +646,9 @@ class TestRequestAccurateResponse:
         with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get:
             mock_get.return_value = query_without_fast
             
-            background_tasks = BackgroundTasks()
-            
             with pytest.raises(HTTPException) as exc_info:
                 await request_accurate_response(
                     query_id="query-123",
-                    background_tasks=background_tasks,
                     user_id=sample_user_id
                 )
             
@@ -476,6 +656,221 @@ class TestRequestAccurateResponse:
             assert "fast response" in str(exc_info.value.detail).lower()
 
 
+# =========================================================================
+# STREAMING ENDPOINT TESTS
+# =========================================================================
+
+async def _collect_sse(response) -> List[tuple]:
+    """Collect (event, data) pairs from StreamingResponse body."""
+    import json
+    
+    events = []
+    async for message in response.body_iterator:
+        event_line, data_line = message.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+class TestStreamQueryResponse:
+    """Tests for GET /api/v1/queries/{query_id}/stream endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_stream_fast_tokens(self, sample_user_id):
+        """Test that pipeline tokens are forwarded as SSE events."""
+        from backend.routers.queries import stream_query_response
+        
+        async def fake_pipeline(query_id, query_text, user_id=None):
+            yield {"event": "token", "data": {"text": "Art. "}}
+            yield {"event": "token", "data": {"text": "535"}}
+            yield {"event": "done", "data": {"query_id": query_id, "content": "Art. 535"}}
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.stream_query_fast', side_effect=fake_pipeline):
+            mock_get.return_value = {"id": "query-123", "query_text": "Pytanie o umowę"}
+            
+            response = await stream_query_response(
+                query_id="query-123",
+                response_type="fast",
+                user_id=sample_user_id
+            )
+            events = await _collect_sse(response)
+        
+        assert response.media_type == "text/event-stream"
+        assert [e for e, _ in events] == ["token", "token", "done"]
+        assert events[-1][1]["content"] == "Art. 535"
+
+    @pytest.mark.asyncio
+    async def test_stream_replays_completed_response(self, sample_query_from_db, sample_user_id):
+        """Test that an already stored response is replayed."""
+        from backend.routers.queries import stream_query_response
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.stream_query_fast') as mock_pipeline:
+            mock_get.return_value = sample_query_from_db
+            
+            response = await stream_query_response(
+                query_id="query-123",
+                response_type="fast",
+                user_id=sample_user_id
+            )
+            events = await _collect_sse(response)
+        
+        mock_pipeline.assert_not_called()
+        assert events[0] == ("token", {"text": sample_query_from_db["fast_response_content"]})
+        assert events[1][0] == "done"
+
+    @pytest.mark.asyncio
+    async def test_stream_pipeline_error_event(self, sample_user_id):
+        """Test that pipeline failures end the stream with an error event."""
+        from backend.routers.queries import stream_query_response
+        from backend.services.exceptions import OLLAMATimeoutError
+        
+        async def failing_pipeline(query_id, query_text, user_id=None):
+            yield {"event": "token", "data": {"text": "Art."}}
+            raise OLLAMATimeoutError("timeout")
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.set_query_response_error', new_callable=AsyncMock) as mock_mark, \
+             patch('backend.routers.queries.stream_query_fast', side_effect=failing_pipeline):
+            mock_get.return_value = {"id": "query-123", "query_text": "Pytanie o umowę"}
+            
+            response = await stream_query_response(
+                query_id="query-123",
+                response_type="fast",
+                user_id=sample_user_id
+            )
+            events = await _collect_sse(response)
+        
+        assert events[-1][0] == "error"
+        assert events[-1][1]["error"]["code"] == "GENERATION_TIMEOUT"
+        mock_mark.assert_awaited_once_with("query-123", "fast", "OLLAMATimeoutError: timeout")
+
+    @pytest.mark.asyncio
+    async def test_stream_attaches_to_queued_job(self, sample_query_from_db, sample_user_id):
+        """Test that a stream of a queued query waits for the job instead of generating."""
+        from backend.routers.queries import stream_query_response
+        from backend.services.generation_leases import JOB_LEASE_OWNER, get_generation_leases
+        
+        leases = get_generation_leases()
+        await leases.acquire("query-123", "fast", JOB_LEASE_OWNER, ttl=60)
+        pending = {"id": "query-123", "query_text": sample_query_from_db["query_text"]}
+        
+        async def finish_job():
+            await asyncio.sleep(0.05)
+            mock_get.return_value = sample_query_from_db
+            await leases.release("query-123", "fast", JOB_LEASE_OWNER)
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.stream_query_fast') as mock_pipeline, \
+             patch('backend.routers.queries.ATTACH_POLL_SECONDS', 0.01):
+            mock_get.return_value = pending
+            
+            response = await stream_query_response(
+                query_id="query-123",
+                response_type="fast",
+                user_id=sample_user_id
+            )
+            job = asyncio.create_task(finish_job())
+            events = await _collect_sse(response)
+            await job
+        
+        mock_pipeline.assert_not_called()
+        assert [e for e, _ in events] == ["token", "done"]
+        assert events[1][1]["content"] == sample_query_from_db["fast_response_content"]
+
+    @pytest.mark.asyncio
+    async def test_stream_reports_failed_job(self, sample_user_id):
+        """Test that a stream attached to a job that failed ends with an error event."""
+        from backend.routers.queries import stream_query_response
+        from backend.services.generation_leases import JOB_LEASE_OWNER, get_generation_leases
+        
+        leases = get_generation_leases()
+        await leases.acquire("query-123", "fast", JOB_LEASE_OWNER, ttl=60)
+        
+        async def fail_job():
+            await asyncio.sleep(0.05)
+            mock_get.return_value = {
+                "id": "query-123",
+                "query_text": "Pytanie o umowę",
+                "fast_response_error": "NoRelevantActsError: no acts"
+            }
+            await leases.release("query-123", "fast", JOB_LEASE_OWNER)
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.set_query_response_error', new_callable=AsyncMock) as mock_mark, \
+             patch('backend.routers.queries.stream_query_fast') as mock_pipeline, \
+             patch('backend.routers.queries.ATTACH_POLL_SECONDS', 0.01):
+            mock_get.return_value = {"id": "query-123", "query_text": "Pytanie o umowę"}
+            
+            response = await stream_query_response(
+                query_id="query-123",
+                response_type="fast",
+                user_id=sample_user_id
+            )
+            job = asyncio.create_task(fail_job())
+            events = await _collect_sse(response)
+            await job
+        
+        mock_pipeline.assert_not_called()
+        mock_mark.assert_not_awaited()
+        assert [e for e, _ in events] == ["error"]
+        assert events[0][1]["error"]["code"] == "INTERNAL_SERVER_ERROR"
+
+    @pytest.mark.asyncio
+    async def test_stream_reconnect_does_not_generate_twice(self, sample_query_from_db, sample_user_id):
+        """Test that a second stream of the same response replays the first one's result."""
+        from backend.routers.queries import stream_query_response
+        
+        first_token_sent = asyncio.Event()
+        finish = asyncio.Event()
+        
+        async def fake_pipeline(query_id, query_text, user_id=None):
+            yield {"event": "token", "data": {"text": "Art. "}}
+            first_token_sent.set()
+            await finish.wait()
+            mock_get.return_value = sample_query_from_db  # persisted before done
+            yield {"event": "done", "data": {"query_id": query_id, "content": "Art. 535"}}
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get, \
+             patch('backend.routers.queries.stream_query_fast', side_effect=fake_pipeline) as mock_pipeline, \
+             patch('backend.routers.queries.ATTACH_POLL_SECONDS', 0.01):
+            mock_get.return_value = {"id": "query-123", "query_text": "Pytanie o umowę"}
+            
+            first = await stream_query_response(query_id="query-123", response_type="fast", user_id=sample_user_id)
+            first_events = asyncio.create_task(_collect_sse(first))
+            await first_token_sent.wait()
+            
+            second = await stream_query_response(query_id="query-123", response_type="fast", user_id=sample_user_id)
+            second_events = asyncio.create_task(_collect_sse(second))
+            await asyncio.sleep(0.05)
+            finish.set()
+            
+            await first_events
+            replayed = await second_events
+        
+        assert mock_pipeline.call_count == 1
+        assert [e for e, _ in replayed] == ["token", "done"]
+        assert replayed[0][1]["text"] == sample_query_from_db["fast_response_content"]
+
+    @pytest.mark.asyncio
+    async def test_stream_accurate_requires_fast(self, sample_user_id):
+        """Test 409 when streaming accurate response before fast response."""
+        from backend.routers.queries import stream_query_response
+        from fastapi import HTTPException
+        
+        with patch('backend.routers.queries.get_query_by_id', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = {"id": "query-123", "query_text": "Pytanie o umowę"}
+            
+            with pytest.raises(HTTPException) as exc_info:
+                await stream_query_response(
+                    query_id="query-123",
+                    response_type="accurate",
+                    user_id=sample_user_id
+                )
+            
+            assert exc_info.value.status_code == 409
+
+
 # =========================================================================
 # DATABASE REPOSITORY TESTS
 # =========================================================================
@@ -527,6 +922,47 @@ class TestQueryRepository:
             await list_queries(sample_user_id, page=1, per_page=20, order="invalid")
         assert "order must be" in str(exc_info.value)
 
+    @pytest.mark.asyncio
+    async def test_list_queries_after_repository(self, sample_user_id):
+        """Test keyset pagination: extra row -> next_cursor, cursor -> RPC params."""
+        from backend.db.queries import list_queries_after
+        
+        rows = [
+            {"id": f"q{i}", "created_at": f"2025-12-01T10:0{i}:00+00:00"}
+            for i in range(3)
+        ]
+        
+        with patch('backend.db.queries.get_supabase') as mock_supabase, \
+             patch('backend.db.queries.execute_rpc', new_callable=AsyncMock) as mock_rpc:
+            mock_supabase.return_value = MagicMock()
+            mock_rpc.return_value = rows
+            
+            queries, total, next_cursor = await list_queries_after(sample_user_id, per_page=2)
+            assert [q["id"] for q in queries] == ["q0", "q1"]
+            assert total is None
+            assert mock_rpc.call_args[0][2]["p_per_page"] == 3
+            
+            mock_rpc.return_value = rows[2:]
+            queries, _, last_cursor = await list_queries_after(
+                sample_user_id, cursor=next_cursor, per_page=2
+            )
+        
+        params = mock_rpc.call_args[0][2]
+        assert params["p_after_created_at"] == "2025-12-01T10:01:00+00:00"
+        assert params["p_after_id"] == "q1"
+        assert last_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_list_queries_after_rejects_foreign_cursor(self, sample_user_id):
+        """Test that a cursor issued for another order is rejected."""
+        from backend.db.pagination import encode_cursor
+        from backend.db.queries import list_queries_after
+        
+        cursor = encode_cursor("created_at", "asc", "2025-12-01T10:00:00+00:00", "q1")
+        
+        with pytest.raises(ValueError):
+            await list_queries_after(sample_user_id, cursor=cursor, order="desc")
+
     @pytest.mark.asyncio
     async def test_get_query_by_id_repository(self, sample_query_from_db, sample_user_id):
         """Test get_query_by_id repository function."""
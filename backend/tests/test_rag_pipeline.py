@@ -139,6 +139,18 @@ def sample_sources() -> List[Dict[str, str]]:
     ]
 
 
+def packed_context(text: str, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Result of pack_legal_context with all chunks included."""
+    return {
+        "text": text,
+        "chunks": chunks,
+        "manifest": [{"chunk_id": chunk["id"]} for chunk in chunks],
+        "tokens": 100,
+        "budget": 3000,
+        "dropped": {"duplicate": [], "over_budget": []}
+    }
+
+
 # =========================================================================
 # CACHE TESTS
 # =========================================================================
@@ -210,7 +222,7 @@ class TestProcessQueryFast:
              patch('backend.services.rag_pipeline.semantic_search', new_callable=AsyncMock) as mock_search, \
              patch('backend.services.rag_pipeline.extract_act_ids_from_chunks') as mock_extract, \
              patch('backend.services.rag_pipeline.fetch_related_acts', new_callable=AsyncMock) as mock_related, \
-             patch('backend.services.rag_pipeline.build_legal_context') as mock_context, \
+             patch('backend.services.rag_pipeline.pack_legal_context') as mock_context, \
              patch('backend.services.rag_pipeline.build_prompt') as mock_prompt, \
              patch('backend.services.rag_pipeline.generate_text_fast', new_callable=AsyncMock) as mock_generate, \
              patch('backend.services.rag_pipeline.extract_sources_from_response') as mock_sources, \
@@ -222,7 +234,7 @@ class TestProcessQueryFast:
             mock_search.return_value = sample_chunks
             mock_extract.return_value = ["act-1", "act-2"]
             mock_related.return_value = sample_related_acts
-            mock_context.return_value = "Legal context..."
+            mock_context.return_value = packed_context("Legal context...", sample_chunks)
             mock_prompt.return_value = "Full prompt..."
             mock_generate.return_value = (sample_llm_response, 8500)
             mock_sources.return_value = sample_sources
@@ -278,7 +290,7 @@ class TestProcessQueryFast:
              patch('backend.services.rag_pipeline.semantic_search', new_callable=AsyncMock) as mock_search, \
              patch('backend.services.rag_pipeline.extract_act_ids_from_chunks') as mock_extract, \
              patch('backend.services.rag_pipeline.fetch_related_acts', new_callable=AsyncMock) as mock_related, \
-             patch('backend.services.rag_pipeline.build_legal_context') as mock_context, \
+             patch('backend.services.rag_pipeline.pack_legal_context') as mock_context, \
              patch('backend.services.rag_pipeline.build_prompt') as mock_prompt, \
              patch('backend.services.rag_pipeline.generate_text_fast', new_callable=AsyncMock) as mock_generate:
 
@@ -287,7 +299,7 @@ class TestProcessQueryFast:
             mock_search.return_value = sample_chunks
             mock_extract.return_value = ["act-1"]
             mock_related.return_value = sample_related_acts
-            mock_context.return_value = "Legal context..."
+            mock_context.return_value = packed_context("Legal context...", sample_chunks)
             mock_prompt.return_value = "Full prompt..."
             mock_generate.side_effect = GenerationTimeoutError("Timeout after 15s")
 
@@ -370,7 +382,7 @@ class TestProcessQueryAccurate:
              patch('backend.services.rag_pipeline.semantic_search', new_callable=AsyncMock) as mock_search, \
              patch('backend.services.rag_pipeline.extract_act_ids_from_chunks') as mock_extract, \
              patch('backend.services.rag_pipeline.fetch_related_acts', new_callable=AsyncMock) as mock_related, \
-             patch('backend.services.rag_pipeline.build_legal_context') as mock_context, \
+             patch('backend.services.rag_pipeline.pack_legal_context') as mock_context, \
              patch('backend.services.rag_pipeline.build_prompt') as mock_prompt, \
              patch('backend.services.rag_pipeline.generate_text_accurate', new_callable=AsyncMock) as mock_generate, \
              patch('backend.services.rag_pipeline.update_query_accurate_response', new_callable=AsyncMock) as mock_update:
@@ -379,7 +391,7 @@ class TestProcessQueryAccurate:
             mock_search.return_value = sample_chunks
             mock_extract.return_value = ["act-1"]
             mock_related.return_value = sample_related_acts
-            mock_context.return_value = "Regenerated context..."
+            mock_context.return_value = packed_context("Regenerated context...", sample_chunks)
             mock_prompt.return_value = "Full prompt..."
             mock_generate.return_value = (sample_llm_response, 150000)
             mock_update.return_value = True
@@ -0,0 +1,263 @@
+"""
+PrawnikGPT Backend - Redis Cache Tests
+
+Unit tests for async Redis caching:
+- Cache payload codec (orjson/json, compression tags, legacy JSON)
+- Shared async Redis client registry
+- RAG context cache (chunk references + shared content cache)
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import redis
+
+from backend.config import settings
+from backend.services import cache_codec
+from backend.services.cache_codec import encode_payload, decode_payload, TAG_JSON
+from backend.services.redis_client import get_redis, close_redis
+from backend.services.rag_pipeline import (
+    cache_rag_context,
+    get_cached_context,
+    RAG_CONTEXT_KEY_PREFIX,
+    RAG_CHUNK_KEY_PREFIX,
+    RAG_ACT_KEY_PREFIX
+)
+
+
+# =========================================================================
+# FIXTURES
+# =========================================================================
+
+@pytest.fixture
+def context_payload():
+    """RAG context with long Polish chunk text."""
+    return {
+        "chunks": [
+            {
+                "id": f"chunk-{i}",
+                "legal_act_id": "act-0",
+                "chunk_index": i,
+                "content": "Art. 1. Konsument ma prawo odstąpić od umowy zawartej na odległość " * 20,
+                "distance": 0.1 * i,
+                "legal_act": {"title": "Ustawa o prawach konsumenta", "year": 2014}
+            }
+            for i in range(5)
+        ],
+        "related_acts": [
+            {"id": "act-1", "title": "Kodeks cywilny", "relation_type": "amends", "depth": 1}
+        ]
+    }
+
+
+@pytest.fixture
+def mock_redis():
+    """Mock async Redis client with in-memory storage."""
+    storage = {}
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=lambda key: storage.get(key))
+    client.set = AsyncMock(side_effect=lambda key, value, ex=None: storage.__setitem__(key, value))
+    client.mget = AsyncMock(side_effect=lambda keys: [storage.get(key) for key in keys])
+    client.storage = storage
+    client.ttls = {}
+    
+    def pipeline(transaction=True):
+        queued = []
+        pipe = MagicMock()
+        pipe.set = MagicMock(side_effect=lambda key, value, ex=None: queued.append((key, value, ex)))
+        
+        async def execute():
+            for key, value, ex in queued:
+                storage[key] = value
+                client.ttls[key] = ex
+            return [True] * len(queued)
+        
+        pipe.execute = AsyncMock(side_effect=execute)
+        return pipe
+    
+    client.pipeline = MagicMock(side_effect=pipeline)
+    return client
+
+
+# =========================================================================
+# CODEC TESTS
+# =========================================================================
+
+class TestCacheCodec:
+    """Tests for encode_payload() / decode_payload()."""
+    
+    def test_roundtrip_uncompressed(self, context_payload):
+        """Test roundtrip without compression."""
+        with patch.object(settings, 'redis_cache_compression', "none"):
+            data = encode_payload(context_payload)
+        
+        assert data[:1] == TAG_JSON
+        assert decode_payload(data) == context_payload
+    
+    def test_smaller_than_json_dumps(self, context_payload):
+        """Test that Polish text is stored as UTF-8, not \\u escapes."""
+        with patch.object(settings, 'redis_cache_compression', "none"):
+            data = encode_payload(context_payload)
+        
+        assert len(data) < len(json.dumps(context_payload).encode("utf-8"))
+    
+    def test_small_payload_not_compressed(self):
+        """Test that payloads below threshold skip compression."""
+        with patch.object(settings, 'redis_cache_compression', "zstd"):
+            assert encode_payload({"a": 1})[:1] == TAG_JSON
+    
+    def test_zstd_roundtrip(self, context_payload):
+        """Test zstd compression (if installed)."""
+        pytest.importorskip("zstandard")
+        with patch.object(settings, 'redis_cache_compression', "none"):
+            uncompressed = encode_payload(context_payload)
+        with patch.object(settings, 'redis_cache_compression', "zstd"):
+            data = encode_payload(context_payload)
+        
+        assert data[:1] == cache_codec.TAG_ZSTD
+        assert len(data) < len(uncompressed)
+        assert decode_payload(data) == context_payload
+    
+    def test_missing_library_falls_back(self, context_payload):
+        """Test that a missing compression library stores uncompressed."""
+        with patch.object(settings, 'redis_cache_compression', "lz4"), \
+             patch.object(cache_codec, 'lz4_frame', None):
+            data = encode_payload(context_payload)
+        
+        assert data[:1] == TAG_JSON
+        assert decode_payload(data) == context_payload
+    
+    def test_legacy_json(self, context_payload):
+        """Test that plain JSON written by the old cache is decoded."""
+        assert decode_payload(json.dumps(context_payload).encode()) == context_payload
+    
+    def test_unknown_format(self):
+        """Test that unknown payload formats raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_payload(b"\x7fgarbage")
+
+
+# =========================================================================
+# CLIENT REGISTRY TESTS
+# =========================================================================
+
+class TestSharedRedisClient:
+    """Tests for get_redis() / close_redis()."""
+    
+    @pytest.mark.asyncio
+    async def test_shared_per_url(self):
+        """Test that one pooled client is shared per URL."""
+        try:
+            first = get_redis("redis://localhost:6399/0")
+            assert get_redis("redis://localhost:6399/0") is first
+            assert get_redis("redis://localhost:6399/1") is not first
+            assert first.connection_pool.max_connections == settings.redis_max_connections
+        finally:
+            await close_redis()
+    
+    def test_not_configured(self):
+        """Test that no client is returned without a URL."""
+        with patch.object(settings, 'redis_url', None):
+            assert get_redis() is None
+
+
+# =========================================================================
+# RAG CONTEXT CACHE TESTS
+# =========================================================================
+
+class TestRagContextCache:
+    """Tests for reference-based RAG context caching."""
+    
+    @pytest.mark.asyncio
+    async def test_roundtrip(self, context_payload, mock_redis):
+        """Test that context is stored as references and resolved in order."""
+        with patch('backend.services.rag_pipeline.get_redis', return_value=mock_redis):
+            await cache_rag_context(query_id="q1", **context_payload)
+            cached = await get_cached_context("q1")
+        
+        assert cached == context_payload
+        assert [c["id"] for c in cached["chunks"]] == [f"chunk-{i}" for i in range(5)]
+    
+    @pytest.mark.asyncio
+    async def test_query_entry_holds_references_only(self, context_payload, mock_redis):
+        """Test that chunk text is stored once, outside the per-query entry."""
+        with patch('backend.services.rag_pipeline.get_redis', return_value=mock_redis):
+            await cache_rag_context(query_id="q1", **context_payload)
+        
+        entry_key = f"{RAG_CONTEXT_KEY_PREFIX}:q1"
+        entry = decode_payload(mock_redis.storage[entry_key])
+        assert entry["chunks"][2] == {"id": "chunk-2", "distance": pytest.approx(0.2)}
+        assert entry["related_acts"] == [{"id": "act-1", "relation_type": "amends", "depth": 1}]
+        assert "legal_context" not in entry
+        
+        chunk = decode_payload(mock_redis.storage[f"{RAG_CHUNK_KEY_PREFIX}:chunk-2"])
+        assert "distance" not in chunk
+        assert chunk["content"].startswith("Art. 1.")
+        act = decode_payload(mock_redis.storage[f"{RAG_ACT_KEY_PREFIX}:act-1"])
+        assert act == {"id": "act-1", "title": "Kodeks cywilny"}
+        
+        assert mock_redis.ttls[entry_key] == settings.redis_rag_context_ttl
+        assert mock_redis.ttls[f"{RAG_CHUNK_KEY_PREFIX}:chunk-2"] == settings.redis_rag_content_ttl
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_scores_are_per_query(self, context_payload, mock_redis):
+        """Test that hybrid search scores stay in the query entry, not the shared chunk body."""
+        hybrid = {
+            "chunks": [
+                {**chunk, "rrf_score": 0.03 - 0.001 * i, "semantic_rank": i + 1, "keyword_rank": None}
+                for i, chunk in enumerate(context_payload["chunks"])
+            ],
+            "related_acts": context_payload["related_acts"]
+        }
+        
+        with patch('backend.services.rag_pipeline.get_redis', return_value=mock_redis):
+            await cache_rag_context(query_id="q1", **hybrid)
+            cached = await get_cached_context("q1")
+        
+        chunk = decode_payload(mock_redis.storage[f"{RAG_CHUNK_KEY_PREFIX}:chunk-2"])
+        assert not {"distance", "rrf_score", "semantic_rank", "keyword_rank"} & chunk.keys()
+        entry = decode_payload(mock_redis.storage[f"{RAG_CONTEXT_KEY_PREFIX}:q1"])
+        assert entry["chunks"][2]["semantic_rank"] == 3
+        assert cached == hybrid
+    
+    @pytest.mark.asyncio
+    async def test_chunks_shared_between_queries(self, context_payload, mock_redis):
+        """Test that queries retrieving the same chunks share their bodies."""
+        with patch('backend.services.rag_pipeline.get_redis', return_value=mock_redis):
+            await cache_rag_context(query_id="q1", **context_payload)
+            await cache_rag_context(query_id="q2", **context_payload)
+        
+        chunk_keys = [k for k in mock_redis.storage if k.startswith(f"{RAG_CHUNK_KEY_PREFIX}:")]
+        assert len(chunk_keys) == 5
+    
+    @pytest.mark.asyncio
+    async def test_evicted_content_is_miss(self, context_payload, mock_redis):
+        """Test that a missing chunk body invalidates the cached context."""
+        with patch('backend.services.rag_pipeline.get_redis', return_value=mock_redis):
+            await cache_rag_context(query_id="q1", **context_payload)
+            del mock_redis.storage[f"{RAG_CHUNK_KEY_PREFIX}:chunk-3"]
+            assert await get_cached_context("q1") is None
+    
+    @pytest.mark.asyncio
+    async def test_miss(self, mock_redis):
+        """Test cache miss for unknown query."""
+        with patch('backend.services.rag_pipeline.get_redis', return_value=mock_redis):
+            assert await get_cached_context("missing") is None
+    
+    @pytest.mark.asyncio
+    async def test_redis_error_is_miss(self, mock_redis):
+        """Test that Redis errors do not break the pipeline."""
+        mock_redis.get = AsyncMock(side_effect=redis.exceptions.ConnectionError("down"))
+        mock_redis.pipeline = MagicMock(side_effect=redis.exceptions.ConnectionError("down"))
+        
+        with patch('backend.services.rag_pipeline.get_redis', return_value=mock_redis):
+            await cache_rag_context(query_id="q1", chunks=[], related_acts=[])
+            assert await get_cached_context("q1") is None
+    
+    @pytest.mark.asyncio
+    async def test_without_redis(self):
+        """Test that caching is skipped when Redis is not configured."""
+        with patch('backend.services.rag_pipeline.get_redis', return_value=None):
+            await cache_rag_context(query_id="q1", chunks=[], related_acts=[])
+            assert await get_cached_context("q1") is None
@@ -0,0 +1,192 @@
+"""
+PrawnikGPT Backend - Relation Graph Tests
+
+Unit tests for the in-memory legal act relation graph:
+- CSR traversal (fetch_related_acts RPC semantics)
+- Relation type filters
+- act_relations() format for the relations endpoint
+- Service loading, version check and fallback
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from backend.config import settings
+from backend.services.relation_graph import RelationGraph, RelationGraphService
+from backend.services.vector_search import fetch_related_acts
+
+
+# =========================================================================
+# FIXTURES
+# =========================================================================
+
+def make_act(act_id: str, title: str) -> dict:
+    return {
+        "id": act_id,
+        "title": title,
+        "typ_aktu": "ustawa",
+        "publisher": "Dz.U.",
+        "year": 2020,
+        "position": 1,
+        "status": "obowiązująca",
+        "published_date": "2020-01-01"
+    }
+
+
+def make_relation(relation_id: str, source: str, target: str, relation_type: str) -> dict:
+    return {
+        "id": relation_id,
+        "source_act_id": source,
+        "target_act_id": target,
+        "relation_type": relation_type,
+        "description": f"{source} {relation_type} {target}",
+        "created_at": "2025-01-01T00:00:00+00:00"
+    }
+
+
+@pytest.fixture
+def acts():
+    return [make_act(act_id, f"Ustawa {act_id.upper()}") for act_id in ("a", "b", "c", "d", "e")]
+
+
+@pytest.fixture
+def relations():
+    """
+    a -> b (modifies), c -> a (amends), b -> d (repeals), c -> e (implements), d -> a (based_on)
+    """
+    return [
+        make_relation("r1", "a", "b", "modifies"),
+        make_relation("r2", "c", "a", "amends"),
+        make_relation("r3", "b", "d", "repeals"),
+        make_relation("r4", "c", "e", "implements"),
+        make_relation("r5", "d", "a", "based_on")
+    ]
+
+
+@pytest.fixture
+def graph(acts, relations):
+    return RelationGraph(acts, relations, version=(5,))
+
+
+# =========================================================================
+# TRAVERSAL TESTS
+# =========================================================================
+
+class TestRelatedActs:
+    """Tests for RelationGraph.related_acts()."""
+
+    def test_depth_1_both_directions(self, graph):
+        """Test that depth 1 follows outgoing and incoming edges."""
+        results = graph.related_acts(["a"], depth=1)
+
+        by_id = {r["id"]: r for r in results}
+        assert set(by_id) == {"b", "c", "d"}
+        assert by_id["b"]["relation_type"] == "modifies"
+        assert by_id["c"]["relation_type"] == "amends"
+        assert all(r["depth"] == 1 for r in results)
+
+    def test_depth_2_outgoing_from_first_hop(self, graph):
+        """Test that depth 2 follows outgoing edges of depth-1 acts."""
+        results = graph.related_acts(["a"], depth=2)
+
+        by_id = {r["id"]: r for r in results}
+        assert by_id["e"]["depth"] == 2
+        assert by_id["e"]["source_act_id"] == "c"
+        assert by_id["d"]["depth"] == 1  # Shortest path wins
+        assert "a" not in by_id  # Seed excluded
+        assert [r["depth"] for r in results] == sorted(r["depth"] for r in results)
+
+    def test_relation_type_filter(self, graph):
+        """Test that relation type filter applies to every hop."""
+        results = graph.related_acts(["a"], depth=2, relation_types=["modifies", "repeals"])
+
+        assert [(r["id"], r["depth"]) for r in results] == [("b", 1), ("d", 2)]
+
+    def test_unknown_seed(self, graph):
+        """Test that unknown act IDs yield no results."""
+        assert graph.related_acts(["missing"], depth=2) == []
+
+    def test_multiple_seeds(self, graph):
+        """Test that all seeds are excluded from results."""
+        results = graph.related_acts(["a", "b"], depth=1)
+
+        assert {r["id"] for r in results} == {"c", "d"}
+
+
+class TestActRelations:
+    """Tests for RelationGraph.act_relations()."""
+
+    def test_depth_1(self, graph):
+        """Test outgoing/incoming records with embedded act references."""
+        result = graph.act_relations("a", depth=1)
+
+        assert [r["id"] for r in result["outgoing"]] == ["r1"]
+        assert result["outgoing"][0]["target_act"]["title"] == "Ustawa B"
+        assert {r["id"] for r in result["incoming"]} == {"r2", "r5"}
+        assert all("source_act" in r for r in result["incoming"])
+
+    def test_depth_2(self, graph):
+        """Test that second-level relations are appended."""
+        result = graph.act_relations("a", depth=2, relation_type=None)
+
+        assert [(r["id"], r["depth"]) for r in result["outgoing"]] == [("r1", 1), ("r3", 2)]
+
+    def test_unknown_act(self, graph):
+        assert graph.act_relations("missing") == {"outgoing": [], "incoming": []}
+
+
+# =========================================================================
+# SERVICE TESTS
+# =========================================================================
+
+class TestRelationGraphService:
+    """Tests for loading, version check and fallback."""
+
+    @pytest.fixture(autouse=True)
+    def enable_graph(self):
+        with patch.object(settings, 'relation_graph_enabled', True):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_reload_only_on_version_change(self, acts, relations):
+        """Test that the graph is reloaded only when the version changes."""
+        service = RelationGraphService(refresh_interval=0)
+        versions = [(5, "t1"), (5, "t1"), (6, "t2")]
+
+        async def fetch_all(table, columns):
+            return acts if table == "legal_acts" else relations
+
+        with patch.object(service, '_fetch_version', AsyncMock(side_effect=versions)), \
+             patch.object(service, '_fetch_all', AsyncMock(side_effect=fetch_all)):
+            first = await service.get_graph()
+            second = await service.get_graph()
+            third = await service.get_graph()
+
+        assert first is second
+        assert third is not first
+        assert service.get_stats()["loads"] == 2
+
+    @pytest.mark.asyncio
+    async def test_load_failure_returns_none(self):
+        """Test that a failed load returns None (callers use database)."""
+        service = RelationGraphService(refresh_interval=60)
+
+        with patch.object(service, '_fetch_version', AsyncMock(side_effect=RuntimeError("down"))) as mock_version:
+            assert await service.get_graph() is None
+            assert await service.get_graph() is None  # Retry deferred
+
+        assert mock_version.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_fetch_related_acts_uses_graph(self, graph):
+        """Test that fetch_related_acts() is served without RPC when loaded."""
+        service = RelationGraphService()
+        service._graph = graph
+        service._checked_at = float("inf")
+
+        with patch('backend.services.vector_search.get_relation_graph_service', return_value=service), \
+             patch('backend.services.vector_search.execute_rpc', new_callable=AsyncMock) as mock_rpc:
+            results = await fetch_related_acts(["a"], depth=1)
+
+        mock_rpc.assert_not_called()
+        assert {r["id"] for r in results} == {"b", "c", "d"}
@@ -16,6 +16,8 @@ from typing import List, Dict, Any
 from backend.services.vector_search import (
     semantic_search,
     semantic_search_with_query,
+    hybrid_search,
+    get_search_tier,
     fetch_related_acts,
     extract_act_ids_from_chunks,
     group_chunks_by_act,
@@ -136,7 +138,7 @@ class TestSemanticSearch:
 
         with patch('backend.services.vector_search.get_supabase') as mock_supabase:
             mock_client = MagicMock()
-            mock_client.rpc.return_value.execute.return_value = mock_response
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
 
             results = await semantic_search(
@@ -152,13 +154,13 @@ class TestSemanticSearch:
 
     @pytest.mark.asyncio
     async def test_semantic_search_with_768_dim_embedding(self, sample_embedding_768, sample_chunks_response):
-        """Test semantic search with 768-dim embedding (should pad to 1024)."""
+        """Test semantic search with 768-dim embedding (native 768-dim RPC, no padding)."""
         mock_response = MagicMock()
         mock_response.data = sample_chunks_response
 
         with patch('backend.services.vector_search.get_supabase') as mock_supabase:
             mock_client = MagicMock()
-            mock_client.rpc.return_value.execute.return_value = mock_response
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
 
             results = await semantic_search(
@@ -167,10 +169,10 @@ class TestSemanticSearch:
                 distance_threshold=0.5
             )
 
-            # Verify RPC was called with padded embedding
+            # Verify 768-dim RPC was called with unpadded embedding
             call_args = mock_client.rpc.call_args
-            assert call_args[0][0] == "semantic_search_chunks"
-            assert len(call_args[0][1]["query_embedding"]) == 1024
+            assert call_args[0][0] == "semantic_search_chunks_768"
+            assert len(call_args[0][1]["query_embedding"]) == 768
 
     @pytest.mark.asyncio
     async def test_semantic_search_no_results(self, sample_embedding_1024):
@@ -180,7 +182,7 @@ class TestSemanticSearch:
 
         with patch('backend.services.vector_search.get_supabase') as mock_supabase:
             mock_client = MagicMock()
-            mock_client.rpc.return_value.execute.return_value = mock_response
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
 
             with pytest.raises(NoRelevantActsError):
@@ -212,7 +214,7 @@ class TestSemanticSearch:
 
         with patch('backend.services.vector_search.get_supabase') as mock_supabase:
             mock_client = MagicMock()
-            mock_client.rpc.return_value.execute.return_value = mock_response
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
 
             with pytest.raises(NoRelevantActsError) as exc_info:
@@ -273,6 +275,147 @@ class TestSemanticSearch:
         assert "distance_threshold must be 0-2" in str(exc_info.value)
 
 
+class TestSearchQualityTiers:
+    """Tests for per-request index parameters (HNSW ef_search / IVFFlat probes)."""
+
+    @pytest.mark.asyncio
+    async def test_quality_tier_uses_tuned_rpc(self, sample_embedding_1024, sample_chunks_response):
+        """Test that a quality tier switches to semantic_search_chunks_tuned."""
+        with patch('backend.services.vector_search.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=sample_chunks_response))
+            mock_supabase.return_value = mock_client
+
+            await semantic_search(sample_embedding_1024, top_k=10, quality="fast")
+
+            name, params = mock_client.rpc.call_args[0]
+            assert name == "semantic_search_chunks_tuned"
+            assert params["ef_search"] == get_search_tier("fast")["ef_search"]
+            assert params["probes"] == get_search_tier("fast")["probes"]
+
+    @pytest.mark.asyncio
+    async def test_explicit_ef_search_overrides_tier(self, sample_embedding_1024, sample_chunks_response):
+        """Test that explicit ef_search overrides the tier value."""
+        with patch('backend.services.vector_search.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=sample_chunks_response))
+            mock_supabase.return_value = mock_client
+
+            await semantic_search(sample_embedding_1024, quality="accurate", ef_search=300)
+
+            params = mock_client.rpc.call_args[0][1]
+            assert params["ef_search"] == 300
+            assert params["probes"] == get_search_tier("accurate")["probes"]
+
+    @pytest.mark.asyncio
+    async def test_768_dim_tier_uses_native_rpc(self, sample_embedding_768, sample_chunks_response):
+        """Test that 768-dim embeddings with a tier use the native 768-dim RPC."""
+        with patch('backend.services.vector_search.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=sample_chunks_response))
+            mock_supabase.return_value = mock_client
+
+            await semantic_search(sample_embedding_768, quality="fast")
+
+            name, params = mock_client.rpc.call_args[0]
+            assert name == "semantic_search_chunks_768"
+            assert len(params["query_embedding"]) == 768
+            assert "ef_search" in params
+
+    def test_fast_tier_cheaper_than_accurate(self):
+        """Test default tiers: fast search scans less of the index."""
+        fast = get_search_tier("fast")
+        accurate = get_search_tier("accurate")
+
+        assert fast["ef_search"] < accurate["ef_search"]
+        assert fast["probes"] < accurate["probes"]
+
+    def test_unknown_tier(self):
+        """Test that unknown quality tier is rejected."""
+        with pytest.raises(ValueError):
+            get_search_tier("ultra")
+
+
+# =========================================================================
+# HYBRID SEARCH TESTS
+# =========================================================================
+
+class TestHybridSearch:
+    """Tests for hybrid_search function (vector + keyword, RRF)."""
+
+    @pytest.fixture
+    def hybrid_rows(self, sample_chunks_response) -> List[Dict[str, Any]]:
+        """RPC rows in fused order (keyword-only hit ranked first)."""
+        rows = [dict(row) for row in reversed(sample_chunks_response)]
+        for i, row in enumerate(rows, start=1):
+            row["rrf_score"] = 1.0 / (60 + i)
+            row["semantic_rank"] = None if i == 1 else i
+            row["keyword_rank"] = i
+            row["keyword_score"] = 0.1
+        return rows
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_params(self, sample_embedding_768, hybrid_rows):
+        """Test that weights and query text are passed to the RPC."""
+        with patch('backend.services.vector_search.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=hybrid_rows))
+            mock_supabase.return_value = mock_client
+
+            await hybrid_search(
+                query_embedding=sample_embedding_768,
+                query_text="art. 535 kodeksu cywilnego",
+                top_k=5,
+                semantic_weight=0.7,
+                keyword_weight=1.3,
+                rrf_k=30
+            )
+
+            name, params = mock_client.rpc.call_args[0]
+            assert name == "hybrid_search_chunks_768"
+            assert params["query_text"] == "art. 535 kodeksu cywilnego"
+            assert params["match_count"] == 5
+            assert params["semantic_weight"] == 0.7
+            assert params["keyword_weight"] == 1.3
+            assert params["rrf_k"] == 30
+            assert len(params["query_embedding"]) == 768
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_preserves_fused_order(self, sample_embedding_1024, hybrid_rows):
+        """Test that fused ranking from the RPC is kept and rank fields exposed."""
+        with patch('backend.services.vector_search.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=hybrid_rows))
+            mock_supabase.return_value = mock_client
+
+            results = await hybrid_search(sample_embedding_1024, "umowa sprzedaży")
+
+            assert [r["id"] for r in results] == ["chunk-3", "chunk-2", "chunk-1"]
+            assert results[0]["semantic_rank"] is None
+            assert results[0]["keyword_rank"] == 1
+            assert results[0]["rrf_score"] > results[1]["rrf_score"]
+            assert results[0]["legal_act"]["title"] == "Ustawa o prawach konsumenta"
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_insufficient_results(self, sample_embedding_1024, hybrid_rows):
+        """Test hybrid search with fewer results than MIN_RESULTS_REQUIRED."""
+        with patch('backend.services.vector_search.get_supabase') as mock_supabase:
+            mock_client = MagicMock()
+            mock_client.rpc.return_value.execute = AsyncMock(
+                return_value=MagicMock(data=hybrid_rows[:MIN_RESULTS_REQUIRED - 1])
+            )
+            mock_supabase.return_value = mock_client
+
+            with pytest.raises(NoRelevantActsError):
+                await hybrid_search(sample_embedding_1024, "umowa sprzedaży")
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_invalid_weights(self, sample_embedding_1024):
+        """Test validation of negative weights."""
+        with pytest.raises(ValueError):
+            await hybrid_search(sample_embedding_1024, "umowa", keyword_weight=-1.0)
+
+
 # =========================================================================
 # FETCH RELATED ACTS TESTS
 # =========================================================================
@@ -288,7 +431,7 @@ class TestFetchRelatedActs:
 
         with patch('backend.services.vector_search.get_supabase') as mock_supabase:
             mock_client = MagicMock()
-            mock_client.rpc.return_value.execute.return_value = mock_response
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
 
             results = await fetch_related_acts(
@@ -309,7 +452,7 @@ class TestFetchRelatedActs:
 
         with patch('backend.services.vector_search.get_supabase') as mock_supabase:
             mock_client = MagicMock()
-            mock_client.rpc.return_value.execute.return_value = mock_response
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
 
             results = await fetch_related_acts(
@@ -331,7 +474,7 @@ class TestFetchRelatedActs:
 
         with patch('backend.services.vector_search.get_supabase') as mock_supabase:
             mock_client = MagicMock()
-            mock_client.rpc.return_value.execute.return_value = mock_response
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
 
             results = await fetch_related_acts(
@@ -395,7 +538,7 @@ class TestSemanticSearchWithQuery:
             
             mock_embed.return_value = mock_embedding
             mock_client = MagicMock()
-            mock_client.rpc.return_value.execute.return_value = mock_response
+            mock_client.rpc.return_value.execute = AsyncMock(return_value=mock_response)
             mock_supabase.return_value = mock_client
 
             results = await semantic_search_with_query(
@@ -489,9 +632,9 @@ class TestVectorSearchIntegration:
             def rpc_side_effect(func_name, params):
                 mock_result = MagicMock()
                 if func_name == "semantic_search_chunks":
-                    mock_result.execute.return_value = mock_chunks
+                    mock_result.execute = AsyncMock(return_value=mock_chunks)
                 elif func_name == "fetch_related_acts":
-                    mock_result.execute.return_value = mock_related
+                    mock_result.execute = AsyncMock(return_value=mock_related)
                 return mock_result
             
             mock_client.rpc.side_effect = rpc_side_effect
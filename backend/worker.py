@@ -0,0 +1,104 @@
+"""
+PrawnikGPT Backend - Generation Job Worker Entry Point
+
+Standalone process consuming fast / accurate generation jobs from the
+Redis Streams job queue (JOB_QUEUE_BACKEND=redis), so API pods and
+GPU-bound generation scale independently.
+
+Usage:
+    python -m backend.worker
+
+Environment: Same .env as the API (see .env.example). Concurrency per
+process: JOB_FAST_CONCURRENCY / JOB_ACCURATE_CONCURRENCY.
+
+Stops on SIGTERM/SIGINT: no new jobs are taken and running jobs get
+JOB_SHUTDOWN_TIMEOUT seconds to finish (unfinished jobs are retried by
+another worker after JOB_VISIBILITY_TIMEOUT).
+"""
+
+import asyncio
+import logging
+import signal
+import sys
+
+from backend.config import settings
+from backend.db.supabase_client import SupabaseClient
+from backend.db.postgres import PostgresPool
+from backend.services.answer_cache import periodic_answer_cache_invalidation
+from backend.services.job_queue import get_job_queue
+from backend.services.job_worker import JobWorkerPool
+from backend.services.rag_pipeline import periodic_metrics_logging
+from backend.services.redis_client import close_redis
+
+# =========================================================================
+# LOGGING CONFIGURATION
+# =========================================================================
+
+logging.basicConfig(
+    level=settings.log_level,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    handlers=[
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================================
+# MAIN
+# =========================================================================
+
+async def run_worker() -> int:
+    """
+    Run job worker pool until SIGTERM/SIGINT.
+
+    Returns:
+        int: Process exit code
+    """
+    queue = get_job_queue()
+    if queue.backend != "redis":
+        logger.error(
+            "Standalone worker requires JOB_QUEUE_BACKEND=redis and REDIS_URL "
+            "(the in-memory queue is consumed inside the API process)"
+        )
+        return 1
+
+    logger.info("=" * 80)
+    logger.info("PrawnikGPT Job Worker Starting...")
+    logger.info("=" * 80)
+    logger.info(f"Version: {settings.app_version}")
+    logger.info(f"Environment: {settings.environment}")
+    logger.info(f"OLLAMA Host: {settings.ollama_host}")
+    logger.info(f"Redis URL: {settings.redis_url}")
+    logger.info("=" * 80)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    pool = JobWorkerPool(queue)
+    await pool.start()
+    metrics_task = asyncio.create_task(periodic_metrics_logging(interval_seconds=300))
+    # Fast jobs use this process's answer cache
+    invalidation_task = asyncio.create_task(
+        periodic_answer_cache_invalidation(settings.answer_cache_invalidation_interval)
+    )
+
+    try:
+        await stop.wait()
+        logger.info("Job worker shutting down...")
+        await pool.stop(timeout=settings.job_shutdown_timeout)
+    finally:
+        metrics_task.cancel()
+        invalidation_task.cancel()
+        await SupabaseClient.close()
+        await PostgresPool.close()
+        await close_redis()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_worker()))
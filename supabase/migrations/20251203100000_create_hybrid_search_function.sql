@@ -0,0 +1,179 @@
+-- =====================================================
+-- migration: create hybrid_search_chunks rpc function
+-- description: hybrid retrieval (pgvector + full-text) with reciprocal rank fusion
+-- tables affected: legal_act_chunks, legal_acts
+-- dependencies: vector extension, legal_act_chunks.content_tsvector, idx_legal_act_chunks_content_fts
+-- author: prawnikgpt
+-- date: 2025-12-03
+-- notes: vector top-k and keyword top-k are computed and fused in a single round trip
+-- performance: two index scans (ivfflat + gin) limited to candidate_count rows each
+-- =====================================================
+
+-- hybrid_search_chunks: fuses semantic and keyword rankings of chunks
+-- input: query_embedding (vector), query_text (text), match_count (int), weights and rrf constant
+-- output: same columns as semantic_search_chunks plus per-list ranks and fused score
+-- algorithm: weighted reciprocal rank fusion
+--   rrf_score = semantic_weight / (rrf_k + semantic_rank) + keyword_weight / (rrf_k + keyword_rank)
+--   (a list the chunk does not appear in contributes 0)
+-- keyword matching: 'simple' configuration (same as content_tsvector trigger), terms are OR-ed
+--   so questions citing article numbers or statute names match chunks containing those tokens
+-- usage: called from backend vector_search.hybrid_search() via supabase rpc
+
+create or replace function hybrid_search_chunks(
+    query_embedding vector(1024),        -- query vector (1024-dim, 768-dim padded)
+    query_text text,                     -- raw user question for keyword matching
+    match_count int default 10,          -- number of fused results to return
+    semantic_weight float default 1.0,   -- weight of vector ranking in fusion
+    keyword_weight float default 1.0,    -- weight of keyword ranking in fusion
+    rrf_k int default 60,                -- rrf damping constant (higher = flatter)
+    candidate_count int default 50,      -- top-k taken from each list before fusion
+    similarity_threshold float default 2.0  -- max cosine distance for vector candidates
+)
+returns table (
+    id uuid,
+    legal_act_id uuid,
+    chunk_index integer,
+    content text,
+    metadata jsonb,
+    distance float,
+    keyword_score float,
+    semantic_rank bigint,
+    keyword_rank bigint,
+    rrf_score float,
+    -- legal act info (joined)
+    act_title text,
+    act_publisher varchar(50),
+    act_year integer,
+    act_position integer,
+    act_status text
+)
+language plpgsql
+security definer  -- run with function owner's privileges (bypass rls for performance)
+set search_path = public
+as $$
+declare
+    keyword_query tsquery;
+begin
+    -- validate input parameters
+    if query_embedding is null then
+        raise exception 'query_embedding cannot be null';
+    end if;
+
+    if match_count < 1 or match_count > 100 then
+        raise exception 'match_count must be between 1 and 100';
+    end if;
+
+    if candidate_count < match_count or candidate_count > 500 then
+        raise exception 'candidate_count must be between match_count and 500';
+    end if;
+
+    if semantic_weight < 0 or keyword_weight < 0 then
+        raise exception 'weights must be non-negative';
+    end if;
+
+    -- build or-query from the question terms ('a & b' -> 'a | b')
+    -- null/empty query text disables the keyword list
+    keyword_query := nullif(
+        replace(plainto_tsquery('simple', coalesce(query_text, ''))::text, '&', '|'),
+        ''
+    )::tsquery;
+
+    return query
+    with semantic as (
+        -- vector top-k (ivfflat index: order by distance + limit)
+        select
+            s.chunk_id,
+            row_number() over (order by s.dist) as rank
+        from (
+            select lac.id as chunk_id, (lac.embedding <=> query_embedding)::float as dist
+            from legal_act_chunks lac
+            order by lac.embedding <=> query_embedding
+            limit candidate_count
+        ) s
+        where s.dist < similarity_threshold
+    ),
+    keyword as (
+        -- full-text top-k (gin index on content_tsvector)
+        select
+            k.chunk_id,
+            k.score,
+            row_number() over (order by k.score desc) as rank
+        from (
+            select lac.id as chunk_id, ts_rank_cd(lac.content_tsvector, keyword_query)::float as score
+            from legal_act_chunks lac
+            where keyword_query is not null
+              and lac.content_tsvector @@ keyword_query
+            order by score desc
+            limit candidate_count
+        ) k
+    ),
+    fused as (
+        select
+            coalesce(s.chunk_id, k.chunk_id) as chunk_id,
+            k.score,
+            s.rank as s_rank,
+            k.rank as k_rank,
+            coalesce(semantic_weight / (rrf_k + s.rank), 0)
+              + coalesce(keyword_weight / (rrf_k + k.rank), 0) as score_rrf
+        from semantic s
+        full outer join keyword k on k.chunk_id = s.chunk_id
+        order by score_rrf desc
+        limit match_count
+    )
+    select
+        lac.id,
+        lac.legal_act_id,
+        lac.chunk_index,
+        lac.content,
+        lac.metadata,
+        (lac.embedding <=> query_embedding)::float as distance,
+        f.score as keyword_score,
+        f.s_rank as semantic_rank,
+        f.k_rank as keyword_rank,
+        f.score_rrf::float as rrf_score,
+        -- legal act metadata
+        la.title as act_title,
+        la.publisher as act_publisher,
+        la.year as act_year,
+        la.position as act_position,
+        la.status::text as act_status
+    from fused f
+    inner join legal_act_chunks lac on lac.id = f.chunk_id
+    inner join legal_acts la on la.id = lac.legal_act_id
+    order by f.score_rrf desc;
+end;
+$$;
+
+-- grant execute permissions (same roles as semantic_search_chunks)
+grant execute on function hybrid_search_chunks(vector(1024), text, int, float, float, int, int, float) to anon;
+grant execute on function hybrid_search_chunks(vector(1024), text, int, float, float, int, int, float) to authenticated;
+grant execute on function hybrid_search_chunks(vector(1024), text, int, float, float, int, int, float) to service_role;
+
+-- function documentation
+comment on function hybrid_search_chunks(vector(1024), text, int, float, float, int, int, float) is
+'Hybrid (semantic + keyword) search for legal act chunks with reciprocal rank fusion.
+
+Parameters:
+- query_embedding: 1024-dimensional query vector
+- query_text: question text used for full-text matching (terms OR-ed)
+- match_count: number of fused results (1-100, default 10)
+- semantic_weight / keyword_weight: weights of each ranking (default 1.0)
+- rrf_k: fusion constant (default 60)
+- candidate_count: candidates taken from each ranking (default 50)
+- similarity_threshold: max cosine distance for vector candidates (default 2.0 = no filter)
+
+Returns:
+- same columns as semantic_search_chunks (distance always computed)
+- keyword_score (ts_rank_cd), semantic_rank, keyword_rank (null if absent from a list)
+- rrf_score (fused score, higher = better)';
+
+-- =====================================================
+-- example queries for testing
+-- =====================================================
+
+-- select id, semantic_rank, keyword_rank, rrf_score
+-- from hybrid_search_chunks(
+--     (select embedding from legal_act_chunks limit 1),
+--     'art. 535 kodeks cywilny umowa sprzedaży',
+--     10
+-- );
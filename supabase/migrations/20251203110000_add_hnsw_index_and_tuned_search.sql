@@ -0,0 +1,151 @@
+-- =====================================================
+-- migration: hnsw vector index + semantic_search_chunks_tuned rpc function
+-- description: replace ivfflat with hnsw and allow per-request recall/latency tuning
+-- tables affected: legal_act_chunks, legal_acts
+-- dependencies: vector extension >= 0.5.0 (hnsw), legal_act_chunks table
+-- author: prawnikgpt
+-- date: 2025-12-03
+-- notes: ef_search (hnsw) and probes (ivfflat) are set per transaction with set_config(..., true)
+--        so each request can choose its own quality tier without affecting other sessions
+-- performance: hnsw gives better recall/latency than ivfflat lists=100 and needs no retraining
+--              after bulk imports (ivfflat clusters are fixed at index build time)
+-- =====================================================
+
+-- =====================================================
+-- step 1: hnsw index
+-- =====================================================
+
+-- idx_legal_act_chunks_embedding_hnsw: graph-based ann index (cosine distance)
+-- m=16: max connections per node (default, good for 1024-dim vectors)
+-- ef_construction=64: build-time candidate list (higher = better graph, slower build)
+-- note: index creation on 500k vectors may take 10-30 minutes and needs
+--       maintenance_work_mem large enough to hold the graph (e.g. set maintenance_work_mem = '2GB')
+create index if not exists idx_legal_act_chunks_embedding_hnsw
+  on legal_act_chunks
+  using hnsw (embedding vector_cosine_ops)
+  with (m = 16, ef_construction = 64);
+
+-- drop ivfflat so the planner does not choose between two ann indexes
+-- rollback: recreate idx_legal_act_chunks_embedding_ivfflat (see 20251118221104) and drop the hnsw index
+drop index if exists idx_legal_act_chunks_embedding_ivfflat;
+
+-- =====================================================
+-- step 2: tuned semantic search function
+-- =====================================================
+
+-- semantic_search_chunks_tuned: semantic_search_chunks with index search parameters
+-- input: same as semantic_search_chunks plus ef_search (hnsw) and probes (ivfflat)
+-- output: same columns as semantic_search_chunks
+-- ef_search: size of hnsw candidate list (higher = better recall, slower); must be >= match_count,
+--            otherwise hnsw returns at most ef_search rows
+-- probes: number of ivfflat lists scanned (only used if an ivfflat index is present)
+-- usage: called from backend vector_search.semantic_search(quality=...) via supabase rpc
+
+create or replace function semantic_search_chunks_tuned(
+    query_embedding vector(1024),           -- query vector (1024-dim for nomic/mxbai models)
+    match_count int default 10,             -- number of results to return
+    similarity_threshold float default 0.5, -- max cosine distance (lower = more similar)
+    ef_search int default 40,               -- hnsw.ef_search for this transaction
+    probes int default 10                   -- ivfflat.probes for this transaction
+)
+returns table (
+    id uuid,
+    legal_act_id uuid,
+    chunk_index integer,
+    content text,
+    metadata jsonb,
+    distance float,
+    -- legal act info (joined)
+    act_title text,
+    act_publisher varchar(50),
+    act_year integer,
+    act_position integer,
+    act_status text
+)
+language plpgsql
+security definer  -- run with function owner's privileges (bypass rls for performance)
+set search_path = public
+as $$
+begin
+    -- validate input parameters
+    if query_embedding is null then
+        raise exception 'query_embedding cannot be null';
+    end if;
+
+    if match_count < 1 or match_count > 100 then
+        raise exception 'match_count must be between 1 and 100';
+    end if;
+
+    if similarity_threshold < 0 or similarity_threshold > 2 then
+        raise exception 'similarity_threshold must be between 0 and 2 (cosine distance range)';
+    end if;
+
+    if ef_search < 1 or ef_search > 1000 then
+        raise exception 'ef_search must be between 1 and 1000';
+    end if;
+
+    if probes < 1 or probes > 1000 then
+        raise exception 'probes must be between 1 and 1000';
+    end if;
+
+    -- index parameters for this transaction only (is_local = true)
+    -- ef_search is raised to match_count so hnsw can return all requested rows
+    perform set_config('hnsw.ef_search', greatest(ef_search, match_count)::text, true);
+    perform set_config('ivfflat.probes', probes::text, true);
+
+    return query
+    select
+        lac.id,
+        lac.legal_act_id,
+        lac.chunk_index,
+        lac.content,
+        lac.metadata,
+        (lac.embedding <=> query_embedding)::float as distance,
+        -- legal act metadata
+        la.title as act_title,
+        la.publisher as act_publisher,
+        la.year as act_year,
+        la.position as act_position,
+        la.status::text as act_status
+    from legal_act_chunks lac
+    inner join legal_acts la on la.id = lac.legal_act_id
+    where
+        (lac.embedding <=> query_embedding) < similarity_threshold
+    order by
+        lac.embedding <=> query_embedding asc
+    limit match_count;
+end;
+$$;
+
+-- grant execute permissions
+grant execute on function semantic_search_chunks_tuned(vector(1024), int, float, int, int) to anon;
+grant execute on function semantic_search_chunks_tuned(vector(1024), int, float, int, int) to authenticated;
+grant execute on function semantic_search_chunks_tuned(vector(1024), int, float, int, int) to service_role;
+
+-- function documentation
+comment on function semantic_search_chunks_tuned(vector(1024), int, float, int, int) is
+'Semantic similarity search with per-request ANN index parameters.
+Same result as semantic_search_chunks; recall/latency controlled by ef_search (HNSW) and probes (IVFFlat).
+
+Parameters:
+- query_embedding: 1024-dimensional query vector
+- match_count: number of results (1-100, default 10)
+- similarity_threshold: max cosine distance (0-2, default 0.5)
+- ef_search: HNSW candidate list size (1-1000, default 40, raised to match_count)
+- probes: IVFFlat lists scanned (1-1000, default 10)
+
+Example usage from backend:
+  response = supabase.rpc(
+      "semantic_search_chunks_tuned",
+      {"query_embedding": [0.1, 0.2, ...], "match_count": 10, "ef_search": 100}
+  ).execute()
+';
+
+-- =====================================================
+-- example queries for testing and debugging
+-- =====================================================
+
+-- recall check (compare with exact search):
+-- select id from semantic_search_chunks_tuned((select embedding from legal_act_chunks limit 1), 10, 2.0, 40);
+-- set enable_indexscan = off;  -- forces exact scan in this session
+-- select id from semantic_search_chunks((select embedding from legal_act_chunks limit 1), 10, 2.0);
@@ -0,0 +1,289 @@
+-- =====================================================
+-- migration: native 768-dim embedding storage
+-- description: store nomic-embed-text vectors as vector(768) instead of zero-padded vector(1024)
+-- tables affected: legal_act_chunks
+-- dependencies: 20251203110000_add_hnsw_index_and_tuned_search (hnsw), 20251203100000 (hybrid search)
+-- author: prawnikgpt
+-- date: 2025-12-03
+-- notes: padding 768-dim vectors with 256 zeros wastes 25% of every vector in the heap,
+--        the ann index and every rpc payload, and adds 256 multiply-adds per distance
+-- layout after this migration:
+--   embedding (vector(1024))    - 1024-dim models (mxbai-embed-large), null for 768-dim models
+--   embedding_768 (vector(768)) - 768-dim models (nomic-embed-text), null for 1024-dim models
+--   each column has its own hnsw index (null vectors are not indexed)
+-- =====================================================
+
+-- =====================================================
+-- step 1: dimension-specific column
+-- =====================================================
+
+alter table legal_act_chunks
+  add column if not exists embedding_768 vector(768);
+
+-- embedding is no longer required - exactly one embedding column per row must be set
+alter table legal_act_chunks
+  alter column embedding drop not null;
+
+-- =====================================================
+-- step 2: move padded nomic-embed-text vectors to embedding_768
+-- =====================================================
+
+-- first 768 components of padded vectors (trailing 256 zeros dropped)
+-- cast via real[] works on all pgvector versions (subvector() needs >= 0.7.0)
+update legal_act_chunks
+set embedding_768 = ((embedding::real[])[1:768])::vector(768),
+    embedding = null
+where embedding_model_name = 'nomic-embed-text'
+  and embedding is not null;
+
+alter table legal_act_chunks
+  add constraint legal_act_chunks_one_embedding
+  check (num_nonnulls(embedding, embedding_768) = 1);
+
+-- =====================================================
+-- step 3: hnsw index on embedding_768
+-- =====================================================
+
+-- same parameters as idx_legal_act_chunks_embedding_hnsw
+-- (768-dim graph: ~25% smaller than the padded 1024-dim one)
+create index if not exists idx_legal_act_chunks_embedding_768_hnsw
+  on legal_act_chunks
+  using hnsw (embedding_768 vector_cosine_ops)
+  with (m = 16, ef_construction = 64);
+
+-- reclaim space of the removed padded vectors (run manually, takes a lock):
+-- vacuum full analyze legal_act_chunks;
+-- or without exclusive lock:
+-- vacuum analyze legal_act_chunks;
+
+-- =====================================================
+-- step 4: search functions for 768-dim embeddings
+-- =====================================================
+
+-- semantic_search_chunks_768: semantic search over embedding_768
+-- input: same as semantic_search_chunks_tuned (ef_search / probes set per transaction)
+-- output: same columns as semantic_search_chunks
+-- usage: called from backend vector_search.semantic_search() for 768-dim query embeddings
+
+create or replace function semantic_search_chunks_768(
+    query_embedding vector(768),            -- query vector (768-dim, nomic-embed-text)
+    match_count int default 10,             -- number of results to return
+    similarity_threshold float default 0.5, -- max cosine distance (lower = more similar)
+    ef_search int default 40,               -- hnsw.ef_search for this transaction
+    probes int default 10                   -- ivfflat.probes for this transaction
+)
+returns table (
+    id uuid,
+    legal_act_id uuid,
+    chunk_index integer,
+    content text,
+    metadata jsonb,
+    distance float,
+    -- legal act info (joined)
+    act_title text,
+    act_publisher varchar(50),
+    act_year integer,
+    act_position integer,
+    act_status text
+)
+language plpgsql
+security definer  -- run with function owner's privileges (bypass rls for performance)
+set search_path = public
+as $$
+begin
+    -- validate input parameters
+    if query_embedding is null then
+        raise exception 'query_embedding cannot be null';
+    end if;
+
+    if match_count < 1 or match_count > 100 then
+        raise exception 'match_count must be between 1 and 100';
+    end if;
+
+    if similarity_threshold < 0 or similarity_threshold > 2 then
+        raise exception 'similarity_threshold must be between 0 and 2 (cosine distance range)';
+    end if;
+
+    if ef_search < 1 or ef_search > 1000 then
+        raise exception 'ef_search must be between 1 and 1000';
+    end if;
+
+    if probes < 1 or probes > 1000 then
+        raise exception 'probes must be between 1 and 1000';
+    end if;
+
+    -- index parameters for this transaction only (is_local = true)
+    perform set_config('hnsw.ef_search', greatest(ef_search, match_count)::text, true);
+    perform set_config('ivfflat.probes', probes::text, true);
+
+    return query
+    select
+        lac.id,
+        lac.legal_act_id,
+        lac.chunk_index,
+        lac.content,
+        lac.metadata,
+        (lac.embedding_768 <=> query_embedding)::float as distance,
+        -- legal act metadata
+        la.title as act_title,
+        la.publisher as act_publisher,
+        la.year as act_year,
+        la.position as act_position,
+        la.status::text as act_status
+    from legal_act_chunks lac
+    inner join legal_acts la on la.id = lac.legal_act_id
+    where
+        (lac.embedding_768 <=> query_embedding) < similarity_threshold
+    order by
+        lac.embedding_768 <=> query_embedding asc
+    limit match_count;
+end;
+$$;
+
+-- grant execute permissions
+grant execute on function semantic_search_chunks_768(vector(768), int, float, int, int) to anon;
+grant execute on function semantic_search_chunks_768(vector(768), int, float, int, int) to authenticated;
+grant execute on function semantic_search_chunks_768(vector(768), int, float, int, int) to service_role;
+
+comment on function semantic_search_chunks_768(vector(768), int, float, int, int) is
+'Semantic similarity search over native 768-dim embeddings (embedding_768).
+Same parameters and result columns as semantic_search_chunks_tuned.';
+
+-- hybrid_search_chunks_768: hybrid_search_chunks over embedding_768
+-- keyword candidates are limited to rows with a 768-dim embedding (same embedding space)
+
+create or replace function hybrid_search_chunks_768(
+    query_embedding vector(768),        -- query vector (768-dim, nomic-embed-text)
+    query_text text,                     -- raw user question for keyword matching
+    match_count int default 10,          -- number of fused results to return
+    semantic_weight float default 1.0,   -- weight of vector ranking in fusion
+    keyword_weight float default 1.0,    -- weight of keyword ranking in fusion
+    rrf_k int default 60,                -- rrf damping constant (higher = flatter)
+    candidate_count int default 50,      -- top-k taken from each list before fusion
+    similarity_threshold float default 2.0  -- max cosine distance for vector candidates
+)
+returns table (
+    id uuid,
+    legal_act_id uuid,
+    chunk_index integer,
+    content text,
+    metadata jsonb,
+    distance float,
+    keyword_score float,
+    semantic_rank bigint,
+    keyword_rank bigint,
+    rrf_score float,
+    -- legal act info (joined)
+    act_title text,
+    act_publisher varchar(50),
+    act_year integer,
+    act_position integer,
+    act_status text
+)
+language plpgsql
+security definer  -- run with function owner's privileges (bypass rls for performance)
+set search_path = public
+as $$
+declare
+    keyword_query tsquery;
+begin
+    -- validate input parameters
+    if query_embedding is null then
+        raise exception 'query_embedding cannot be null';
+    end if;
+
+    if match_count < 1 or match_count > 100 then
+        raise exception 'match_count must be between 1 and 100';
+    end if;
+
+    if candidate_count < match_count or candidate_count > 500 then
+        raise exception 'candidate_count must be between match_count and 500';
+    end if;
+
+    if semantic_weight < 0 or keyword_weight < 0 then
+        raise exception 'weights must be non-negative';
+    end if;
+
+    -- build or-query from the question terms ('a & b' -> 'a | b')
+    -- null/empty query text disables the keyword list
+    keyword_query := nullif(
+        replace(plainto_tsquery('simple', coalesce(query_text, ''))::text, '&', '|'),
+        ''
+    )::tsquery;
+
+    return query
+    with semantic as (
+        -- vector top-k (hnsw index on embedding_768: order by distance + limit)
+        select
+            s.chunk_id,
+            row_number() over (order by s.dist) as rank
+        from (
+            select lac.id as chunk_id, (lac.embedding_768 <=> query_embedding)::float as dist
+            from legal_act_chunks lac
+            order by lac.embedding_768 <=> query_embedding
+            limit candidate_count
+        ) s
+        where s.dist < similarity_threshold
+    ),
+    keyword as (
+        -- full-text top-k (gin index on content_tsvector)
+        select
+            k.chunk_id,
+            k.score,
+            row_number() over (order by k.score desc) as rank
+        from (
+            select lac.id as chunk_id, ts_rank_cd(lac.content_tsvector, keyword_query)::float as score
+            from legal_act_chunks lac
+            where keyword_query is not null
+              and lac.embedding_768 is not null  -- same embedding space as the vector list
+              and lac.content_tsvector @@ keyword_query
+            order by score desc
+            limit candidate_count
+        ) k
+    ),
+    fused as (
+        select
+            coalesce(s.chunk_id, k.chunk_id) as chunk_id,
+            k.score,
+            s.rank as s_rank,
+            k.rank as k_rank,
+            coalesce(semantic_weight / (rrf_k + s.rank), 0)
+              + coalesce(keyword_weight / (rrf_k + k.rank), 0) as score_rrf
+        from semantic s
+        full outer join keyword k on k.chunk_id = s.chunk_id
+        order by score_rrf desc
+        limit match_count
+    )
+    select
+        lac.id,
+        lac.legal_act_id,
+        lac.chunk_index,
+        lac.content,
+        lac.metadata,
+        (lac.embedding_768 <=> query_embedding)::float as distance,
+        f.score as keyword_score,
+        f.s_rank as semantic_rank,
+        f.k_rank as keyword_rank,
+        f.score_rrf::float as rrf_score,
+        -- legal act metadata
+        la.title as act_title,
+        la.publisher as act_publisher,
+        la.year as act_year,
+        la.position as act_position,
+        la.status::text as act_status
+    from fused f
+    inner join legal_act_chunks lac on lac.id = f.chunk_id
+    inner join legal_acts la on la.id = lac.legal_act_id
+    order by f.score_rrf desc;
+end;
+$$;
+
+-- grant execute permissions
+grant execute on function hybrid_search_chunks_768(vector(768), text, int, float, float, int, int, float) to anon;
+grant execute on function hybrid_search_chunks_768(vector(768), text, int, float, float, int, int, float) to authenticated;
+grant execute on function hybrid_search_chunks_768(vector(768), text, int, float, float, int, int, float) to service_role;
+
+-- function documentation
+comment on function hybrid_search_chunks_768(vector(768), text, int, float, float, int, int, float) is
+'Hybrid search over native 768-dim embeddings (embedding_768).
+Same parameters and result columns as hybrid_search_chunks.';
@@ -0,0 +1,131 @@
+-- =====================================================
+-- migration: create get_act_relations rpc function
+-- description: outgoing + incoming relations of one act (depth 1-2) in a single round trip
+-- tables affected: legal_act_relations, legal_acts
+-- dependencies: legal_act_relations table, idx_legal_act_relations_source / _target indexes
+-- author: prawnikgpt
+-- date: 2025-12-03
+-- notes: replaces up to four serialized postgrest queries in db/legal_acts.get_legal_act_relations
+--        (outgoing, incoming, second-level outgoing, second-level incoming)
+-- =====================================================
+
+-- get_act_relations: relations graph of a legal act for GET /api/v1/legal-acts/{act_id}/relations
+-- input: p_act_id (uuid), p_depth (1-2), p_relation_type (text, optional)
+-- output: one row per relation with direction ('outgoing' | 'incoming'), depth and
+--         metadata of the related act (target for outgoing, source for incoming)
+-- traversal:
+--   depth 1: outgoing (act -> x) and incoming (x -> act) relations
+--   depth 2: outgoing relations of depth-1 targets, incoming relations of depth-1 sources
+-- usage: called from backend db/legal_acts.get_legal_act_relations() via supabase rpc
+
+create or replace function get_act_relations(
+    p_act_id uuid,                    -- legal act id
+    p_depth int default 1,            -- traversal depth (1 or 2)
+    p_relation_type text default null -- optional filter: 'modifies', 'repeals', 'implements', 'based_on', 'amends'
+)
+returns table (
+    relation_id uuid,
+    direction text,
+    depth integer,
+    source_act_id uuid,
+    target_act_id uuid,
+    relation_type text,
+    description text,
+    created_at timestamptz,
+    -- related act info (joined)
+    related_act_id uuid,
+    related_act_title text,
+    related_act_typ_aktu varchar(255),
+    related_act_status text
+)
+language plpgsql
+stable
+security definer  -- run with function owner's privileges (bypass rls for performance)
+set search_path = public
+as $$
+begin
+    -- validate input parameters
+    if p_act_id is null then
+        raise exception 'p_act_id cannot be null';
+    end if;
+
+    if p_depth < 1 or p_depth > 2 then
+        raise exception 'p_depth must be 1 or 2';
+    end if;
+
+    return query
+    with filtered as (
+        select lar.id as rel_id, lar.source_act_id as src, lar.target_act_id as tgt,
+               lar.relation_type::text as rel_type, lar.description as rel_description,
+               lar.created_at as rel_created_at
+        from legal_act_relations lar
+        where p_relation_type is null or lar.relation_type::text = p_relation_type
+    ),
+    first_outgoing as (
+        select f.* from filtered f where f.src = p_act_id
+    ),
+    first_incoming as (
+        select f.* from filtered f where f.tgt = p_act_id
+    ),
+    edges as (
+        select 'outgoing'::text as dir, 1 as lvl, fo.*, fo.tgt as related
+        from first_outgoing fo
+
+        union all
+
+        select 'incoming'::text, 1, fi.*, fi.src
+        from first_incoming fi
+
+        union all
+
+        -- second level: outgoing relations of acts this act affects
+        select 'outgoing'::text, 2, f.*, f.tgt
+        from filtered f
+        where p_depth = 2
+          and f.src in (select fo.tgt from first_outgoing fo)
+
+        union all
+
+        -- second level: incoming relations of acts affecting this act
+        select 'incoming'::text, 2, f.*, f.src
+        from filtered f
+        where p_depth = 2
+          and f.tgt in (select fi.src from first_incoming fi)
+    )
+    select
+        e.rel_id,
+        e.dir,
+        e.lvl,
+        e.src,
+        e.tgt,
+        e.rel_type,
+        e.rel_description,
+        e.rel_created_at,
+        -- related act metadata
+        la.id,
+        la.title,
+        la.typ_aktu,
+        la.status::text
+    from edges e
+    inner join legal_acts la on la.id = e.related
+    order by e.dir desc, e.lvl asc, e.rel_created_at asc;  -- outgoing first
+end;
+$$;
+
+-- grant execute permissions (public legal data)
+grant execute on function get_act_relations(uuid, int, text) to anon;
+grant execute on function get_act_relations(uuid, int, text) to authenticated;
+grant execute on function get_act_relations(uuid, int, text) to service_role;
+
+-- function documentation
+comment on function get_act_relations(uuid, int, text) is
+'Outgoing and incoming relations of a legal act (depth 1-2) with related act metadata.
+One row per relation: direction (outgoing/incoming), depth (1/2), relation data and
+related act (id, title, typ_aktu, status).';
+
+-- =====================================================
+-- example queries for testing
+-- =====================================================
+
+-- select direction, depth, relation_type, related_act_title
+-- from get_act_relations((select id from legal_acts limit 1), 2);
@@ -0,0 +1,269 @@
+-- =====================================================
+-- migration: create legal_act_stats table
+-- description: per-act chunk and relation counters maintained by triggers
+-- tables affected: legal_act_stats (new), legal_acts, legal_act_chunks, legal_act_relations (triggers)
+-- dependencies: legal_acts, legal_act_chunks, legal_act_relations
+-- author: prawnikgpt
+-- date: 2025-12-03
+-- notes: replaces two count(*) queries per GET /api/v1/legal-acts/{act_id} request;
+--        refresh_legal_act_stats() recomputes all counters (backfill + periodic drift repair)
+-- =====================================================
+
+-- legal_act_stats: one row per legal act with materialized counters
+-- design: 1:1 with legal_acts (primary key = foreign key), embedded by postgrest as
+--         legal_acts.select('..., legal_act_stats(total_chunks, related_acts_count)')
+-- maintenance: statement-level triggers with transition tables (one update per act per
+--              statement, bulk ingestion of thousands of chunks costs one row update)
+create table legal_act_stats (
+  -- legal act (deleted together with the act)
+  legal_act_id uuid primary key references legal_acts(id) on delete cascade,
+
+  -- number of rows in legal_act_chunks for this act
+  total_chunks integer not null default 0 check (total_chunks >= 0),
+
+  -- number of rows in legal_act_relations where this act is source or target
+  related_acts_count integer not null default 0 check (related_acts_count >= 0),
+
+  -- last counter change (trigger or refresh)
+  updated_at timestamptz not null default now()
+);
+
+-- enable row level security (rls)
+alter table legal_act_stats enable row level security;
+
+-- rls policy: statistics are public (derived from public legal acts)
+create policy legal_act_stats_select_all_anon
+  on legal_act_stats
+  for select
+  to anon
+  using (true);
+
+create policy legal_act_stats_select_all_authenticated
+  on legal_act_stats
+  for select
+  to authenticated
+  using (true);
+
+comment on table legal_act_stats is 'materialized per-act counters (chunks, relations) maintained by triggers';
+comment on column legal_act_stats.total_chunks is 'number of legal_act_chunks rows of the act';
+comment on column legal_act_stats.related_acts_count is 'number of legal_act_relations rows with the act as source or target';
+
+-- =====================================================
+-- counter maintenance
+-- =====================================================
+
+-- apply_legal_act_stats_delta: add deltas to counters (arrays of equal length, one entry per
+-- affected row; entries for the same act are summed first so each act row is updated once)
+-- acts without stats row are skipped (created by legal_acts insert trigger / refresh)
+create or replace function apply_legal_act_stats_delta(
+    p_act_ids uuid[],
+    p_chunk_deltas integer[],
+    p_relation_deltas integer[]
+)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update legal_act_stats s
+    set total_chunks = greatest(s.total_chunks + d.chunk_delta, 0),
+        related_acts_count = greatest(s.related_acts_count + d.relation_delta, 0),
+        updated_at = now()
+    from (
+        select u.act_id,
+               sum(u.chunk_delta)::integer as chunk_delta,
+               sum(u.relation_delta)::integer as relation_delta
+        from unnest(p_act_ids, p_chunk_deltas, p_relation_deltas) as u(act_id, chunk_delta, relation_delta)
+        group by u.act_id
+        having sum(u.chunk_delta) <> 0 or sum(u.relation_delta) <> 0
+    ) d
+    where s.legal_act_id = d.act_id;
+end;
+$$;
+
+-- legal_acts: create zero counters for new acts
+create or replace function legal_act_stats_on_act_insert()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into legal_act_stats (legal_act_id)
+    select n.id from new_rows n
+    on conflict (legal_act_id) do nothing;
+    return null;
+end;
+$$;
+
+create trigger legal_act_stats_act_insert
+  after insert on legal_acts
+  referencing new table as new_rows
+  for each statement
+  execute function legal_act_stats_on_act_insert();
+
+-- legal_act_chunks: +1 per inserted chunk, -1 per deleted chunk, move on legal_act_id change
+create or replace function legal_act_stats_on_chunk_change()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op = 'INSERT' then
+        perform apply_legal_act_stats_delta(
+            array(select n.legal_act_id from new_rows n),
+            array(select 1 from new_rows),
+            array(select 0 from new_rows)
+        );
+    elsif tg_op = 'DELETE' then
+        perform apply_legal_act_stats_delta(
+            array(select o.legal_act_id from old_rows o),
+            array(select -1 from old_rows),
+            array(select 0 from old_rows)
+        );
+    else
+        -- update: counters change only for rows whose legal_act_id changed (deltas net to zero otherwise)
+        perform apply_legal_act_stats_delta(
+            array(select o.legal_act_id from old_rows o) || array(select n.legal_act_id from new_rows n),
+            array(select -1 from old_rows) || array(select 1 from new_rows),
+            array(select 0 from old_rows) || array(select 0 from new_rows)
+        );
+    end if;
+    return null;
+end;
+$$;
+
+-- transition tables require one trigger per event
+create trigger legal_act_stats_chunk_insert
+  after insert on legal_act_chunks
+  referencing new table as new_rows
+  for each statement
+  execute function legal_act_stats_on_chunk_change();
+
+create trigger legal_act_stats_chunk_delete
+  after delete on legal_act_chunks
+  referencing old table as old_rows
+  for each statement
+  execute function legal_act_stats_on_chunk_change();
+
+create trigger legal_act_stats_chunk_update
+  after update on legal_act_chunks
+  referencing old table as old_rows new table as new_rows
+  for each statement
+  execute function legal_act_stats_on_chunk_change();
+
+-- legal_act_relations: each relation counts for both its source and target act
+create or replace function legal_act_stats_on_relation_change()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op = 'INSERT' then
+        perform apply_legal_act_stats_delta(
+            array(select n.source_act_id from new_rows n) || array(select n.target_act_id from new_rows n),
+            array(select 0 from new_rows) || array(select 0 from new_rows),
+            array(select 1 from new_rows) || array(select 1 from new_rows)
+        );
+    elsif tg_op = 'DELETE' then
+        perform apply_legal_act_stats_delta(
+            array(select o.source_act_id from old_rows o) || array(select o.target_act_id from old_rows o),
+            array(select 0 from old_rows) || array(select 0 from old_rows),
+            array(select -1 from old_rows) || array(select -1 from old_rows)
+        );
+    else
+        perform apply_legal_act_stats_delta(
+            array(select o.source_act_id from old_rows o) || array(select o.target_act_id from old_rows o)
+                || array(select n.source_act_id from new_rows n) || array(select n.target_act_id from new_rows n),
+            array(select 0 from old_rows) || array(select 0 from old_rows)
+                || array(select 0 from new_rows) || array(select 0 from new_rows),
+            array(select -1 from old_rows) || array(select -1 from old_rows)
+                || array(select 1 from new_rows) || array(select 1 from new_rows)
+        );
+    end if;
+    return null;
+end;
+$$;
+
+create trigger legal_act_stats_relation_insert
+  after insert on legal_act_relations
+  referencing new table as new_rows
+  for each statement
+  execute function legal_act_stats_on_relation_change();
+
+create trigger legal_act_stats_relation_delete
+  after delete on legal_act_relations
+  referencing old table as old_rows
+  for each statement
+  execute function legal_act_stats_on_relation_change();
+
+create trigger legal_act_stats_relation_update
+  after update on legal_act_relations
+  referencing old table as old_rows new table as new_rows
+  for each statement
+  execute function legal_act_stats_on_relation_change();
+
+-- =====================================================
+-- refresh (backfill + drift repair)
+-- =====================================================
+
+-- refresh_legal_act_stats: recompute all counters from base tables
+-- output: number of acts whose counters were created or corrected
+-- usage: once below (backfill), then periodically from backend (LEGAL_ACT_STATS_REFRESH_INTERVAL)
+create or replace function refresh_legal_act_stats()
+returns table (updated_acts integer)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_updated integer;
+begin
+    insert into legal_act_stats (legal_act_id, total_chunks, related_acts_count, updated_at)
+    select
+        la.id,
+        coalesce(c.chunk_count, 0),
+        coalesce(r.relation_count, 0),
+        now()
+    from legal_acts la
+    left join (
+        select legal_act_id, count(*)::integer as chunk_count
+        from legal_act_chunks
+        group by legal_act_id
+    ) c on c.legal_act_id = la.id
+    left join (
+        select e.act_id, count(*)::integer as relation_count
+        from (
+            select source_act_id as act_id from legal_act_relations
+            union all
+            select target_act_id from legal_act_relations
+        ) e
+        group by e.act_id
+    ) r on r.act_id = la.id
+    on conflict (legal_act_id) do update
+    set total_chunks = excluded.total_chunks,
+        related_acts_count = excluded.related_acts_count,
+        updated_at = excluded.updated_at
+    where legal_act_stats.total_chunks <> excluded.total_chunks
+       or legal_act_stats.related_acts_count <> excluded.related_acts_count;
+
+    get diagnostics v_updated = row_count;
+    return query select v_updated;
+end;
+$$;
+
+-- refresh is a maintenance operation (full scan of chunks): backend service role only
+revoke execute on function refresh_legal_act_stats() from public;
+grant execute on function refresh_legal_act_stats() to service_role;
+
+revoke execute on function apply_legal_act_stats_delta(uuid[], integer[], integer[]) from public;
+
+comment on function refresh_legal_act_stats() is
+'Recomputes legal_act_stats from legal_act_chunks and legal_act_relations.
+Returns number of acts whose counters were created or corrected.';
+
+-- backfill counters for existing acts
+select refresh_legal_act_stats();
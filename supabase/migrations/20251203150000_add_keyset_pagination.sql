@@ -0,0 +1,126 @@
+-- =========================================================================
+-- Migration: Keyset (cursor) pagination for list endpoints
+-- Purpose: Constant-time page fetches for GET /api/v1/legal-acts and
+--          GET /api/v1/queries (no OFFSET scan, no window count per page)
+-- Used by: db/legal_acts.list_legal_acts_after(), db/queries.list_queries_after()
+-- =========================================================================
+
+-- STEP 1: Indexes matching the keyset sort keys
+-- (published_date, id) serves both directions (backward index scan for desc)
+-- and supersedes the single-column published_date index
+CREATE INDEX IF NOT EXISTS idx_legal_acts_published_date_id
+ON public.legal_acts (published_date, id);
+
+DROP INDEX IF EXISTS idx_legal_acts_published_date;
+
+-- (user_id, created_at, id): history of one user in creation order
+CREATE INDEX IF NOT EXISTS idx_query_history_user_created_id
+ON public.query_history (user_id, created_at, id);
+
+
+-- STEP 2: Keyset variant of list_user_queries
+-- Returns one page after (p_after_created_at, p_after_id); no total_count column
+-- (count is requested separately and only when the client asks for it).
+-- p_after_created_at is text (ISO 8601) so PostgREST and asyncpg callers pass the same value.
+CREATE OR REPLACE FUNCTION list_user_queries_keyset(
+    p_user_id uuid,
+    p_per_page int,
+    p_order text DEFAULT 'desc',
+    p_after_created_at text DEFAULT NULL,
+    p_after_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+    -- query_history fields
+    id uuid,
+    user_id uuid,
+    query_text text,
+    created_at timestamptz,
+    fast_response_content text,
+    fast_model_name text,
+    fast_generation_time_ms int,
+    accurate_response_content text,
+    accurate_model_name text,
+    accurate_generation_time_ms int,
+    sources jsonb,
+    -- ratings
+    fast_rating text,
+    accurate_rating text
+)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_after timestamptz := p_after_created_at::timestamptz;
+BEGIN
+    IF p_order NOT IN ('desc', 'asc') THEN
+        RAISE EXCEPTION 'p_order must be desc or asc';
+    END IF;
+
+    IF (v_after IS NULL) <> (p_after_id IS NULL) THEN
+        RAISE EXCEPTION 'p_after_created_at and p_after_id must be given together';
+    END IF;
+
+    -- Separate branches keep ORDER BY index-compatible (no CASE expressions)
+    IF p_order = 'desc' THEN
+        RETURN QUERY
+        SELECT
+            qh.id, qh.user_id, qh.query_text, qh.created_at,
+            qh.fast_response_content, qh.fast_model_name, qh.fast_generation_time_ms,
+            qh.accurate_response_content, qh.accurate_model_name, qh.accurate_generation_time_ms,
+            qh.sources,
+            r.fast_rating, r.accurate_rating
+        FROM (
+            SELECT *
+            FROM query_history q
+            WHERE q.user_id = p_user_id
+              AND (v_after IS NULL OR (q.created_at, q.id) < (v_after, p_after_id))
+            ORDER BY q.created_at DESC, q.id DESC
+            LIMIT p_per_page
+        ) qh
+        LEFT JOIN LATERAL (
+            -- Ratings of page rows only
+            SELECT
+                MAX(CASE WHEN rt.response_type = 'fast' THEN rt.rating_value::text END) AS fast_rating,
+                MAX(CASE WHEN rt.response_type = 'accurate' THEN rt.rating_value::text END) AS accurate_rating
+            FROM ratings rt
+            WHERE rt.query_history_id = qh.id
+        ) r ON true
+        ORDER BY qh.created_at DESC, qh.id DESC;
+    ELSE
+        RETURN QUERY
+        SELECT
+            qh.id, qh.user_id, qh.query_text, qh.created_at,
+            qh.fast_response_content, qh.fast_model_name, qh.fast_generation_time_ms,
+            qh.accurate_response_content, qh.accurate_model_name, qh.accurate_generation_time_ms,
+            qh.sources,
+            r.fast_rating, r.accurate_rating
+        FROM (
+            SELECT *
+            FROM query_history q
+            WHERE q.user_id = p_user_id
+              AND (v_after IS NULL OR (q.created_at, q.id) > (v_after, p_after_id))
+            ORDER BY q.created_at ASC, q.id ASC
+            LIMIT p_per_page
+        ) qh
+        LEFT JOIN LATERAL (
+            SELECT
+                MAX(CASE WHEN rt.response_type = 'fast' THEN rt.rating_value::text END) AS fast_rating,
+                MAX(CASE WHEN rt.response_type = 'accurate' THEN rt.rating_value::text END) AS accurate_rating
+            FROM ratings rt
+            WHERE rt.query_history_id = qh.id
+        ) r ON true
+        ORDER BY qh.created_at ASC, qh.id ASC;
+    END IF;
+END;
+$$;
+
+-- Grant execute permission
+GRANT EXECUTE ON FUNCTION list_user_queries_keyset(uuid, int, text, text, uuid) TO authenticated;
+GRANT EXECUTE ON FUNCTION list_user_queries_keyset(uuid, int, text, text, uuid) TO service_role;
+
+-- Add comment for documentation
+COMMENT ON FUNCTION list_user_queries_keyset(uuid, int, text, text, uuid) IS
+'Lists one page of user queries after a (created_at, id) keyset position, with joined ratings.
+Args: p_user_id, p_per_page, p_order (desc/asc), p_after_created_at, p_after_id';
@@ -0,0 +1,147 @@
+-- =========================================================================
+-- Migration: Ranked legal act title search (Polish FTS + pg_trgm fallback)
+-- Purpose: One indexed search engine for legal act titles with server-side
+--          ranking, filters and pagination
+-- Used by: GET /api/v1/legal-acts?search=..., db/legal_acts.search_legal_acts()
+-- =========================================================================
+
+-- STEP 1: Polish full-text index
+-- 20251202110000 used CREATE INDEX IF NOT EXISTS with the name of the existing
+-- 'simple' index from the table migration, so the 'polish' expression index was
+-- never built. Replace the unused 'simple' index with the 'polish' one.
+DROP INDEX IF EXISTS idx_legal_acts_title_fts;
+
+CREATE INDEX idx_legal_acts_title_fts
+ON public.legal_acts
+USING GIN (to_tsvector('polish', title));
+
+COMMENT ON INDEX idx_legal_acts_title_fts IS
+'Full-text search index for legal act titles (polish configuration).';
+
+
+-- STEP 2: Trigram index for typo- and prefix-tolerant matching
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_legal_acts_title_trgm
+ON public.legal_acts
+USING GIN (title gin_trgm_ops);
+
+
+-- STEP 3: Ranked search RPC
+-- Matching:
+--   1. Polish FTS (plainto_tsquery), ranked by ts_rank_cd (normalized to 0..1)
+--   2. Only if FTS finds nothing: trigram word similarity (p_query <% title),
+--      ranked by word_similarity (typos, word prefixes, unstemmed forms)
+-- Filters (status, publisher, year) are applied inside each index scan.
+-- total_count is the number of matches (same on every page).
+CREATE OR REPLACE FUNCTION search_legal_acts_ranked(
+    p_query text,
+    p_status text DEFAULT NULL,
+    p_publisher text DEFAULT NULL,
+    p_year int DEFAULT NULL,
+    p_limit int DEFAULT 20,
+    p_offset int DEFAULT 0,
+    p_similarity_threshold real DEFAULT 0.4
+)
+RETURNS TABLE (
+    id uuid,
+    title text,
+    typ_aktu text,
+    publisher text,
+    year int,
+    position int,
+    status text,
+    organ_wydajacy text,
+    published_date date,
+    effective_date date,
+    created_at timestamptz,
+    -- ranking
+    rank real,
+    match_type text,
+    -- pagination
+    total_count bigint
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_tsquery tsquery;
+    v_has_fts boolean;
+BEGIN
+    -- Validate input parameters
+    IF p_query IS NULL OR length(trim(p_query)) = 0 THEN
+        RAISE EXCEPTION 'p_query cannot be empty';
+    END IF;
+
+    IF p_limit < 1 OR p_limit > 100 THEN
+        RAISE EXCEPTION 'p_limit must be between 1 and 100';
+    END IF;
+
+    IF p_offset < 0 THEN
+        RAISE EXCEPTION 'p_offset must be >= 0';
+    END IF;
+
+    v_tsquery := plainto_tsquery('polish', p_query);
+
+    -- Does full-text search match anything? (index probe, stops at first row)
+    v_has_fts := numnode(v_tsquery) > 0 AND EXISTS (
+        SELECT 1
+        FROM legal_acts la
+        WHERE to_tsvector('polish', la.title) @@ v_tsquery
+          AND (p_status IS NULL OR la.status::text = p_status)
+          AND (p_publisher IS NULL OR la.publisher = p_publisher)
+          AND (p_year IS NULL OR la.year = p_year)
+    );
+
+    -- 1. Full-text matches (idx_legal_acts_title_fts)
+    IF v_has_fts THEN
+        RETURN QUERY
+        SELECT
+            la.id, la.title, la.typ_aktu::text, la.publisher::text, la.year, la.position,
+            la.status::text, la.organ_wydajacy, la.published_date, la.effective_date, la.created_at,
+            ts_rank_cd(to_tsvector('polish', la.title), v_tsquery, 32)::real AS match_rank,
+            'fts'::text,
+            count(*) OVER ()
+        FROM legal_acts la
+        WHERE to_tsvector('polish', la.title) @@ v_tsquery
+          AND (p_status IS NULL OR la.status::text = p_status)
+          AND (p_publisher IS NULL OR la.publisher = p_publisher)
+          AND (p_year IS NULL OR la.year = p_year)
+        ORDER BY match_rank DESC, la.published_date DESC, la.id
+        LIMIT p_limit
+        OFFSET p_offset;
+        RETURN;
+    END IF;
+
+    -- 2. Trigram fallback (idx_legal_acts_title_trgm)
+    PERFORM set_config('pg_trgm.word_similarity_threshold', p_similarity_threshold::text, true);
+
+    RETURN QUERY
+    SELECT
+        la.id, la.title, la.typ_aktu::text, la.publisher::text, la.year, la.position,
+        la.status::text, la.organ_wydajacy, la.published_date, la.effective_date, la.created_at,
+        word_similarity(p_query, la.title)::real AS match_rank,
+        'trigram'::text,
+        count(*) OVER ()
+    FROM legal_acts la
+    WHERE p_query <% la.title
+      AND (p_status IS NULL OR la.status::text = p_status)
+      AND (p_publisher IS NULL OR la.publisher = p_publisher)
+      AND (p_year IS NULL OR la.year = p_year)
+    ORDER BY match_rank DESC, la.published_date DESC, la.id
+    LIMIT p_limit
+    OFFSET p_offset;
+END;
+$$;
+
+-- Grant execute permission
+GRANT EXECUTE ON FUNCTION search_legal_acts_ranked(text, text, text, int, int, int, real) TO authenticated;
+GRANT EXECUTE ON FUNCTION search_legal_acts_ranked(text, text, text, int, int, int, real) TO anon;
+GRANT EXECUTE ON FUNCTION search_legal_acts_ranked(text, text, text, int, int, int, real) TO service_role;
+
+-- Add comment for documentation
+COMMENT ON FUNCTION search_legal_acts_ranked(text, text, text, int, int, int, real) IS
+'Ranked search on legal act titles: Polish full-text search, trigram word similarity
+fallback when full-text search finds nothing. Filters and pagination are server-side.
+Args: p_query, p_status, p_publisher, p_year, p_limit, p_offset, p_similarity_threshold';
@@ -0,0 +1,18 @@
+-- =========================================================================
+-- Migration: Failed generation state for query responses
+-- Purpose: Record why a fast/accurate response could not be generated, so
+--          failed queries are reported as failed instead of pending forever
+-- Used by: db/queries.set_query_response_error(), GET /api/v1/queries/{id},
+--          GET /api/v1/queries/{id}/stream, services/job_worker.py
+-- =========================================================================
+
+-- STEP 1: Error columns (NULL = no failure; cleared when a retry succeeds)
+ALTER TABLE public.query_history
+ADD COLUMN IF NOT EXISTS fast_response_error text,
+ADD COLUMN IF NOT EXISTS accurate_response_error text;
+
+COMMENT ON COLUMN public.query_history.fast_response_error IS
+'Error of the last failed fast response generation (NULL if none).';
+
+COMMENT ON COLUMN public.query_history.accurate_response_error IS
+'Error of the last failed accurate response generation (NULL if none).';
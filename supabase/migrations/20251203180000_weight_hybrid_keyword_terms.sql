@@ -0,0 +1,361 @@
+-- =====================================================
+-- migration: weight hybrid keyword matching towards rare terms
+-- description: keyword list of hybrid search built from informative question terms only
+-- tables affected: none (functions only)
+-- dependencies: 20251203100000_create_hybrid_search_function, 20251203120000_add_native_768_embeddings
+-- author: prawnikgpt
+-- date: 2025-12-03
+-- notes: the keyword query OR-ed every term of plainto_tsquery('simple', question), so stop
+--        words ('jakie', 'się', 'przy', 'art') matched nearly every chunk and the keyword
+--        top-k was decided by chance instead of by article numbers and statute names.
+--        ts_rank_cd has no idf, so the fix is in the query itself:
+--        1. stop words and tokens shorter than 3 characters (except numbers) are dropped
+--        2. the remaining terms are and-ed if at least one chunk contains all of them,
+--           otherwise or-ed
+-- performance: one extra gin index probe (exists) per multi-term question
+-- =====================================================
+
+-- =====================================================
+-- step 1: keyword query builder
+-- =====================================================
+
+-- hybrid_keyword_query: tsquery for the keyword list of hybrid search
+-- input: raw user question
+-- output: 'a' & 'b' & ... if some chunk matches every term, else 'a' | 'b' | ...;
+--         null if the question has no informative term
+-- terms: lexemes of the 'simple' configuration (same as content_tsvector trigger)
+
+create or replace function hybrid_keyword_query(query_text text)
+returns tsquery
+language plpgsql
+stable
+set search_path = public
+as $$
+declare
+    terms text[];
+    and_query tsquery;
+begin
+    -- quoted lexemes (used verbatim, no second normalization pass)
+    select array_agg(
+               '''' || replace(replace(t.lexeme, '\', '\\'), '''', '''''') || ''''
+               order by t.lexeme
+           )
+    into terms
+    from unnest(to_tsvector('simple', coalesce(query_text, ''))) t
+    where (char_length(t.lexeme) >= 3 or t.lexeme ~ '^[0-9]+$')  -- keep 'art. 5' -> '5'
+      and t.lexeme <> all (array[
+          -- polish function words and question words
+          'aby', 'ale', 'albo', 'bez', 'być', 'był', 'była', 'było', 'będzie', 'czy', 'czyli',
+          'czym', 'dla', 'gdy', 'ich', 'jak', 'jaka', 'jaki', 'jakie', 'jakim', 'jego', 'jej',
+          'jest', 'jeśli', 'jeżeli', 'już', 'kiedy', 'która', 'które', 'którego', 'który',
+          'których', 'lecz', 'lub', 'mnie', 'mogę', 'może', 'można', 'nad', 'nie', 'oraz',
+          'pod', 'przed', 'przez', 'przy', 'się', 'są', 'tak', 'także', 'tego', 'tej', 'ten',
+          'też', 'tym', 'więc', 'żeby',
+          -- structural tokens present in almost every chunk
+          'art', 'ust', 'pkt', 'lit', 'poz'
+      ]);
+
+    if terms is null then
+        return null;
+    end if;
+
+    if array_length(terms, 1) = 1 then
+        return terms[1]::tsquery;
+    end if;
+
+    -- chunks containing every term first (rare tokens then decide the ranking)
+    and_query := array_to_string(terms, ' & ')::tsquery;
+    if exists (
+        select 1 from legal_act_chunks lac where lac.content_tsvector @@ and_query
+    ) then
+        return and_query;
+    end if;
+
+    return array_to_string(terms, ' | ')::tsquery;
+end;
+$$;
+
+comment on function hybrid_keyword_query(text) is
+'Keyword query of hybrid search: informative terms of the question (no stop words or
+tokens shorter than 3 characters except numbers), and-ed if some chunk contains all of
+them, otherwise or-ed. Null if no term is left.';
+
+-- =====================================================
+-- step 2: hybrid search functions use the builder
+-- =====================================================
+
+-- hybrid_search_chunks: unchanged except for the keyword query (see 20251203100000)
+
+create or replace function hybrid_search_chunks(
+    query_embedding vector(1024),        -- query vector (1024-dim, 768-dim padded)
+    query_text text,                     -- raw user question for keyword matching
+    match_count int default 10,          -- number of fused results to return
+    semantic_weight float default 1.0,   -- weight of vector ranking in fusion
+    keyword_weight float default 1.0,    -- weight of keyword ranking in fusion
+    rrf_k int default 60,                -- rrf damping constant (higher = flatter)
+    candidate_count int default 50,      -- top-k taken from each list before fusion
+    similarity_threshold float default 2.0  -- max cosine distance for vector candidates
+)
+returns table (
+    id uuid,
+    legal_act_id uuid,
+    chunk_index integer,
+    content text,
+    metadata jsonb,
+    distance float,
+    keyword_score float,
+    semantic_rank bigint,
+    keyword_rank bigint,
+    rrf_score float,
+    -- legal act info (joined)
+    act_title text,
+    act_publisher varchar(50),
+    act_year integer,
+    act_position integer,
+    act_status text
+)
+language plpgsql
+security definer  -- run with function owner's privileges (bypass rls for performance)
+set search_path = public
+as $$
+declare
+    keyword_query tsquery;
+begin
+    -- validate input parameters
+    if query_embedding is null then
+        raise exception 'query_embedding cannot be null';
+    end if;
+
+    if match_count < 1 or match_count > 100 then
+        raise exception 'match_count must be between 1 and 100';
+    end if;
+
+    if candidate_count < match_count or candidate_count > 500 then
+        raise exception 'candidate_count must be between match_count and 500';
+    end if;
+
+    if semantic_weight < 0 or keyword_weight < 0 then
+        raise exception 'weights must be non-negative';
+    end if;
+
+    -- informative question terms, and-ed if some chunk contains all of them
+    -- (see hybrid_keyword_query); null if no term is left
+    keyword_query := hybrid_keyword_query(query_text);
+
+    return query
+    with semantic as (
+        -- vector top-k (ivfflat index: order by distance + limit)
+        select
+            s.chunk_id,
+            row_number() over (order by s.dist) as rank
+        from (
+            select lac.id as chunk_id, (lac.embedding <=> query_embedding)::float as dist
+            from legal_act_chunks lac
+            order by lac.embedding <=> query_embedding
+            limit candidate_count
+        ) s
+        where s.dist < similarity_threshold
+    ),
+    keyword as (
+        -- full-text top-k (gin index on content_tsvector)
+        select
+            k.chunk_id,
+            k.score,
+            row_number() over (order by k.score desc) as rank
+        from (
+            select lac.id as chunk_id, ts_rank_cd(lac.content_tsvector, keyword_query)::float as score
+            from legal_act_chunks lac
+            where keyword_query is not null
+              and lac.content_tsvector @@ keyword_query
+            order by score desc
+            limit candidate_count
+        ) k
+    ),
+    fused as (
+        select
+            coalesce(s.chunk_id, k.chunk_id) as chunk_id,
+            k.score,
+            s.rank as s_rank,
+            k.rank as k_rank,
+            coalesce(semantic_weight / (rrf_k + s.rank), 0)
+              + coalesce(keyword_weight / (rrf_k + k.rank), 0) as score_rrf
+        from semantic s
+        full outer join keyword k on k.chunk_id = s.chunk_id
+        order by score_rrf desc
+        limit match_count
+    )
+    select
+        lac.id,
+        lac.legal_act_id,
+        lac.chunk_index,
+        lac.content,
+        lac.metadata,
+        (lac.embedding <=> query_embedding)::float as distance,
+        f.score as keyword_score,
+        f.s_rank as semantic_rank,
+        f.k_rank as keyword_rank,
+        f.score_rrf::float as rrf_score,
+        -- legal act metadata
+        la.title as act_title,
+        la.publisher as act_publisher,
+        la.year as act_year,
+        la.position as act_position,
+        la.status::text as act_status
+    from fused f
+    inner join legal_act_chunks lac on lac.id = f.chunk_id
+    inner join legal_acts la on la.id = lac.legal_act_id
+    order by f.score_rrf desc;
+end;
+$$;
+
+comment on function hybrid_search_chunks(vector(1024), text, int, float, float, int, int, float) is
+'Hybrid (semantic + keyword) search for legal act chunks with reciprocal rank fusion.
+
+Parameters:
+- query_embedding: 1024-dimensional query vector
+- query_text: question text used for full-text matching (see hybrid_keyword_query)
+- match_count: number of fused results (1-100, default 10)
+- semantic_weight / keyword_weight: weights of each ranking (default 1.0)
+- rrf_k: fusion constant (default 60)
+- candidate_count: candidates taken from each ranking (default 50)
+- similarity_threshold: max cosine distance for vector candidates (default 2.0 = no filter)
+
+Returns:
+- same columns as semantic_search_chunks (distance always computed)
+- keyword_score (ts_rank_cd), semantic_rank, keyword_rank (null if absent from a list)
+- rrf_score (fused score, higher = better)';
+
+-- hybrid_search_chunks_768: unchanged except for the keyword query (see 20251203120000)
+
+create or replace function hybrid_search_chunks_768(
+    query_embedding vector(768),        -- query vector (768-dim, nomic-embed-text)
+    query_text text,                     -- raw user question for keyword matching
+    match_count int default 10,          -- number of fused results to return
+    semantic_weight float default 1.0,   -- weight of vector ranking in fusion
+    keyword_weight float default 1.0,    -- weight of keyword ranking in fusion
+    rrf_k int default 60,                -- rrf damping constant (higher = flatter)
+    candidate_count int default 50,      -- top-k taken from each list before fusion
+    similarity_threshold float default 2.0  -- max cosine distance for vector candidates
+)
+returns table (
+    id uuid,
+    legal_act_id uuid,
+    chunk_index integer,
+    content text,
+    metadata jsonb,
+    distance float,
+    keyword_score float,
+    semantic_rank bigint,
+    keyword_rank bigint,
+    rrf_score float,
+    -- legal act info (joined)
+    act_title text,
+    act_publisher varchar(50),
+    act_year integer,
+    act_position integer,
+    act_status text
+)
+language plpgsql
+security definer  -- run with function owner's privileges (bypass rls for performance)
+set search_path = public
+as $$
+declare
+    keyword_query tsquery;
+begin
+    -- validate input parameters
+    if query_embedding is null then
+        raise exception 'query_embedding cannot be null';
+    end if;
+
+    if match_count < 1 or match_count > 100 then
+        raise exception 'match_count must be between 1 and 100';
+    end if;
+
+    if candidate_count < match_count or candidate_count > 500 then
+        raise exception 'candidate_count must be between match_count and 500';
+    end if;
+
+    if semantic_weight < 0 or keyword_weight < 0 then
+        raise exception 'weights must be non-negative';
+    end if;
+
+    -- informative question terms, and-ed if some chunk contains all of them
+    -- (see hybrid_keyword_query); null if no term is left
+    keyword_query := hybrid_keyword_query(query_text);
+
+    return query
+    with semantic as (
+        -- vector top-k (hnsw index on embedding_768: order by distance + limit)
+        select
+            s.chunk_id,
+            row_number() over (order by s.dist) as rank
+        from (
+            select lac.id as chunk_id, (lac.embedding_768 <=> query_embedding)::float as dist
+            from legal_act_chunks lac
+            order by lac.embedding_768 <=> query_embedding
+            limit candidate_count
+        ) s
+        where s.dist < similarity_threshold
+    ),
+    keyword as (
+        -- full-text top-k (gin index on content_tsvector)
+        select
+            k.chunk_id,
+            k.score,
+            row_number() over (order by k.score desc) as rank
+        from (
+            select lac.id as chunk_id, ts_rank_cd(lac.content_tsvector, keyword_query)::float as score
+            from legal_act_chunks lac
+            where keyword_query is not null
+              and lac.embedding_768 is not null  -- same embedding space as the vector list
+              and lac.content_tsvector @@ keyword_query
+            order by score desc
+            limit candidate_count
+        ) k
+    ),
+    fused as (
+        select
+            coalesce(s.chunk_id, k.chunk_id) as chunk_id,
+            k.score,
+            s.rank as s_rank,
+            k.rank as k_rank,
+            coalesce(semantic_weight / (rrf_k + s.rank), 0)
+              + coalesce(keyword_weight / (rrf_k + k.rank), 0) as score_rrf
+        from semantic s
+        full outer join keyword k on k.chunk_id = s.chunk_id
+        order by score_rrf desc
+        limit match_count
+    )
+    select
+        lac.id,
+        lac.legal_act_id,
+        lac.chunk_index,
+        lac.content,
+        lac.metadata,
+        (lac.embedding_768 <=> query_embedding)::float as distance,
+        f.score as keyword_score,
+        f.s_rank as semantic_rank,
+        f.k_rank as keyword_rank,
+        f.score_rrf::float as rrf_score,
+        -- legal act metadata
+        la.title as act_title,
+        la.publisher as act_publisher,
+        la.year as act_year,
+        la.position as act_position,
+        la.status::text as act_status
+    from fused f
+    inner join legal_act_chunks lac on lac.id = f.chunk_id
+    inner join legal_acts la on la.id = lac.legal_act_id
+    order by f.score_rrf desc;
+end;
+$$;
+
+-- =====================================================
+-- example queries for testing
+-- =====================================================
+
+-- select hybrid_keyword_query('Jakie są prawa konsumenta przy zakupie wadliwego produktu?');
+-- -> 'konsumenta' & 'prawa' & 'produktu' & 'wadliwego' & 'zakupie' (or | if no chunk has all)
+
+-- select hybrid_keyword_query('art. 535 kodeks cywilny');
+-- -> '535' & 'cywilny' & 'kodeks'